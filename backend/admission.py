@@ -0,0 +1,130 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def take_up_to(self, n: int, now: Optional[float] = None) -> int:
+        self._refill(time.monotonic() if now is None else now)
+        k = min(int(self.tokens), n)
+        self.tokens -= k
+        return k
+
+
+class AdmissionGate:
+    """Token-bucket gate in front of exam session creation, with a FIFO waiting room.
+
+    A candidate either gets a token straight away (only while nobody is
+    waiting, so arrivals cannot overtake the queue) or a ticket: a wall-clock
+    time slot 1/rate after the previous one. A ticket is admitted on the
+    first request at or after its slot by whichever process handles it, so it
+    must travel with the client in a form the client cannot forge (the signed
+    Flask session); `admit()` takes it back. Waiting clients derive their
+    position from their slot, the server time and the rate, so one broadcast
+    per tick serves the whole room regardless of its size.
+
+    Tickets not used within `ticket_ttl_sec` of their slot are refused;
+    their candidates simply queue again.
+    """
+
+    def __init__(self, rate: float, burst: float, *, ticket_ttl_sec: float = 1800.0) -> None:
+        self.enabled = rate > 0
+        self.bucket = TokenBucket(rate, max(1.0, burst))
+        self.ticket_ttl_sec = ticket_ttl_sec
+
+        self._lock = threading.Lock()
+        self._next_slot = 0.0  # wall-clock slot of the last ticket issued
+        self._started = False
+
+        self.stats = {'admitted_direct': 0, 'admitted_from_queue': 0, 'queued': 0, 'expired_tickets': 0}
+
+    def admit(self, ticket: Optional[float] = None, now: Optional[float] = None) -> Tuple[bool, Optional[float]]:
+        """Return (admitted, ticket); `ticket` is the one the candidate holds, if any.
+
+        The returned ticket is set while the candidate has to wait; the caller
+        stores it and passes it back on the next attempt.
+        """
+        if not self.enabled:
+            return True, None
+        now = time.time() if now is None else now
+        with self._lock:
+            if ticket is not None:
+                if ticket > now:
+                    return False, ticket
+                if now - ticket <= self.ticket_ttl_sec:
+                    self.stats['admitted_from_queue'] += 1
+                    return True, None
+                self.stats['expired_tickets'] += 1
+            if self._next_slot <= now and self.bucket.try_acquire():
+                self.stats['admitted_direct'] += 1
+                return True, None
+            slot = max(now, self._next_slot) + 1.0 / self.bucket.rate
+            self._next_slot = slot
+            # The queue is served at `rate` by its slots; the bucket only
+            # refills once the last of them is due.
+            self.bucket.tokens = 0.0
+            self.bucket.last = time.monotonic() + (slot - now)
+            self.stats['queued'] += 1
+            return False, slot
+
+    def position(self, ticket: float, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return max(1, math.ceil((ticket - now) * self.bucket.rate))
+
+    def progress(self, now: Optional[float] = None) -> Dict[str, float]:
+        now = time.time() if now is None else now
+        return {
+            'server_time': now,
+            'waiting': max(0, math.ceil((self._next_slot - now) * self.bucket.rate)),
+            'rate': self.bucket.rate,
+        }
+
+    def start(
+        self,
+        spawn: Callable,
+        sleep: Callable[[float], None],
+        on_progress: Callable[[Dict[str, float]], None],
+        interval_sec: float = 0.5,
+    ) -> None:
+        """Broadcast progress on the server's task primitives; `on_progress` is called while anyone waits."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        def _loop():
+            was_waiting = False
+            while True:
+                try:
+                    progress = self.progress()
+                    if progress['waiting'] or was_waiting:
+                        on_progress(progress)
+                    was_waiting = bool(progress['waiting'])
+                except Exception as e:
+                    print(f"Admission Gate Error: {e}")
+                sleep(interval_sec)
+
+        spawn(_loop)
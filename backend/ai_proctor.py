@@ -2,17 +2,28 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import base64
+import threading
+from audio_vad import VoiceActivityDetector, parse_features
+from proctor import FaceCheck
+from proctor_policy import DEFAULT_POLICY
 
 class AIProctor:
     def __init__(self):
         # Initialize MediaPipe Face Mesh
-        # refine_landmarks=True gives us Iris landmarks for gaze tracking
+        # refine_landmarks=True gives us Iris landmarks for gaze tracking.
+        # One graph serves every session with sparse frames, so each frame is
+        # detected on its own (no tracking across frames); up to two faces so
+        # a second person is seen at all.
         self.mp_face_mesh = mp.solutions.face_mesh
         self.face_mesh = self.mp_face_mesh.FaceMesh(
+            static_image_mode=True,
+            max_num_faces=2,
             min_detection_confidence=0.5, 
             min_tracking_confidence=0.5,
             refine_landmarks=True
         )
+        self._lock = threading.Lock()
+        self._vad = VoiceActivityDetector()
 
     def get_head_pose(self, shape, face_landmarks):
         """
@@ -68,9 +79,43 @@ class AIProctor:
 
         return pitch, yaw
 
-    def process_frame(self, base64_image):
+    def mouth_ratio(self, face_landmarks):
+        """Lip gap relative to face height (forehead to chin)."""
+        top_lip = face_landmarks.landmark[13]
+        bottom_lip = face_landmarks.landmark[14]
+        face_height = face_landmarks.landmark[152].y - face_landmarks.landmark[10].y
+        if face_height <= 0:
+            return 0.0
+        return (bottom_lip.y - top_lip.y) / face_height
+
+    def check_face(self, frame, policy=DEFAULT_POLICY):
+        """
+        Second tier of the ProctorEngine cascade: face count, head pose and
+        mouth check for an already decoded BGR frame. Returns a FaceCheck,
+        or None if the frame could not be analysed.
+        """
+        try:
+            with self._lock:
+                results = self.face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            faces = results.multi_face_landmarks or []
+            if len(faces) != 1:
+                return FaceCheck(len(faces))
+
+            pitch, yaw = self.get_head_pose(frame.shape, faces[0])
+            looking_away = (
+                abs(yaw) > policy.max_yaw_deg
+                or pitch > policy.max_pitch_down_deg
+                or pitch < -policy.max_pitch_up_deg
+            )
+            return FaceCheck(1, looking_away, self.mouth_ratio(faces[0]) > policy.mouth_open_ratio)
+        except Exception as e:
+            print(f"AI Error: {e}")
+            return None
+
+    def process_frame(self, base64_image, policy=DEFAULT_POLICY):
         """
-        Analyzes a single frame for cheating behaviors.
+        Analyzes a single frame for cheating behaviors, with the thresholds
+        of the exam's ProctorPolicy.
         """
         try:
             # Decode image
@@ -88,7 +133,8 @@ class AIProctor:
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             h, w, _ = frame.shape
 
-            results = self.face_mesh.process(frame_rgb)
+            with self._lock:
+                results = self.face_mesh.process(frame_rgb)
 
             # 1. No Face Detected
             if not results.multi_face_landmarks:
@@ -102,29 +148,19 @@ class AIProctor:
             face_landmarks = results.multi_face_landmarks[0]
             pitch, yaw = self.get_head_pose(frame.shape, face_landmarks)
 
-            # Thresholds (Tuned for typical webcams)
-            if abs(yaw) > 25:
+            # Thresholds (defaults tuned for typical webcams)
+            if abs(yaw) > policy.max_yaw_deg:
                 direction = "Right" if yaw > 0 else "Left"
                 return True, f"Looking away ({direction})"
             
-            if pitch > 20: 
+            if pitch > policy.max_pitch_down_deg:
                 return True, "Looking Down (Suspicious - Phone?)"
             
-            if pitch < -25:
+            if pitch < -policy.max_pitch_up_deg:
                 return True, "Looking Up"
 
             # 4. Mouth Open Check (Speaking)
-            top_lip = face_landmarks.landmark[13]
-            bottom_lip = face_landmarks.landmark[14]
-            
-            # Calculate distance relative to face height
-            face_top = face_landmarks.landmark[10].y
-            face_bottom = face_landmarks.landmark[152].y
-            face_height = face_bottom - face_top
-            
-            lip_dist = bottom_lip.y - top_lip.y
-            
-            if (lip_dist / face_height) > 0.08: # Threshold for open mouth
+            if self.mouth_ratio(face_landmarks) > policy.mouth_open_ratio: # Threshold for open mouth
                 return True, "Mouth Open / Talking detected"
 
             return False, None
@@ -133,12 +169,20 @@ class AIProctor:
             print(f"AI Error: {e}")
             return False, None
 
-    def analyze_audio(self, audio_level):
+    def analyze_audio(self, audio_level, audio_features=None, session_state=None, policy=DEFAULT_POLICY):
         """
-        Checks if audio volume exceeds ambient threshold.
+        Checks for speech. Uses the spectral VAD when the client sent band
+        features (needs a per-session state dict for the noise floor);
+        otherwise falls back to the volume threshold.
         """
-        # Threshold adjusted. 0.25 is usually quite loud for normalized audio.
-        THRESHOLD = 0.35 
-        if audio_level > THRESHOLD:
+        feats = parse_features(audio_features) if session_state is not None else None
+        if feats is not None:
+            is_voice, _ = self._vad.classify(session_state, feats)
+            if is_voice:
+                return True, "Speech Detected"
+            return False, None
+
+        # 0.25 is usually quite loud for normalized audio (default 0.35).
+        if audio_level > policy.audio_threshold:
             return True, "High Volume / Speech Detected"
         return False, None
\ No newline at end of file
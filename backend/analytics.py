@@ -0,0 +1,354 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import case, exists, select
+from sqlalchemy.orm import aliased
+
+from models import db, ExamQuestion, ExamResponse, ExamSession
+
+OPTION_LABELS = ('A', 'B', 'C', 'D')
+NO_ANSWER = 4            # column for unanswered questions in the option counts
+GROUP_FRACTION = 0.27    # Kelley's upper/lower groups for the discrimination index
+SCORE_BINS = np.linspace(0.0, 100.0, 11)
+
+
+_ANSWERED = aliased(ExamResponse)
+
+
+def _empty(dtype) -> np.ndarray:
+    return np.zeros(0, dtype=dtype)
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def _num(x) -> Optional[float]:
+    x = float(x)
+    return None if np.isnan(x) else round(x, 4)
+
+
+class _ExamColumns:
+    """Completed attempts of one exam as columnar arrays, grown incrementally.
+
+    Sessions:  ids, percentage (only attempts with at least one response; a
+               session closed at its deadline without answers says nothing
+               about the items)
+    Responses: session row, question row, selected option (NO_ANSWER if none
+               or not a valid option), correct
+    """
+
+    def __init__(self, exam_id: int) -> None:
+        self.exam_id = exam_id
+        questions = (
+            db.session.query(ExamQuestion.id, ExamQuestion.question_text, ExamQuestion.correct_option, ExamQuestion.order_index)
+            .filter(ExamQuestion.exam_id == exam_id)
+            .order_by(ExamQuestion.order_index.asc(), ExamQuestion.id.asc())
+            .all()
+        )
+        self.questions = questions
+        self.qids = np.asarray([q.id for q in questions], dtype=np.int64)
+        self.qsort = np.argsort(self.qids)
+        self.correct_option = np.asarray([q.correct_option for q in questions], dtype=np.int8)
+
+        self.session_ids = _empty(np.int64)
+        self.pct = _empty(np.float64)
+        self._session_row: Dict[int, int] = {}
+
+        self.r_session = _empty(np.int32)
+        self.r_question = _empty(np.int32)
+        self.r_selected = _empty(np.int8)
+        self.r_correct = _empty(np.bool_)
+        # Additive, so kept across refreshes instead of recomputed.
+        self.option_counts = np.zeros((len(questions), NO_ANSWER + 1), dtype=np.int64)
+
+        self.watermark: Optional[datetime] = None
+        self.checked_at = 0.0
+        self.stale = True
+        self.result: Optional[Dict[str, Any]] = None
+        self.pass_percentage: Optional[float] = None
+
+    def _question_rows(self, qids: np.ndarray) -> np.ndarray:
+        """Map question ids to rows; -1 for ids no longer in the exam."""
+        if not len(self.qids):
+            return np.full(len(qids), -1, dtype=np.int32)
+        pos = np.searchsorted(self.qids, qids, sorter=self.qsort)
+        pos = np.minimum(pos, len(self.qids) - 1)
+        rows = self.qsort[pos]
+        return np.where(self.qids[rows] == qids, rows, -1).astype(np.int32)
+
+    def refresh(self, overlap_sec: float, chunk: int) -> int:
+        """Pull attempts submitted since the watermark; returns how many sessions were added.
+
+        The window re-reads `overlap_sec` before the watermark so a submission
+        that committed late with an earlier timestamp is not missed; sessions
+        already loaded are skipped.
+        """
+        since = self.watermark - timedelta(seconds=overlap_sec) if self.watermark else None
+
+        cond = [
+            ExamSession.exam_id == self.exam_id,
+            ExamSession.status == 'Completed',
+            # Aliased: the response query below joins ExamResponse itself.
+            exists().where(_ANSWERED.session_id == ExamSession.id),
+        ]
+        if since is not None:
+            cond.append(ExamSession.submitted_at >= since)
+
+        rows = db.session.execute(
+            select(ExamSession.id, ExamSession.percentage, ExamSession.submitted_at).where(*cond)
+        ).all()
+        new = [r for r in rows if r[0] not in self._session_row]
+        if not new:
+            return 0
+
+        base = len(self.session_ids)
+        new_ids = np.fromiter((r[0] for r in new), np.int64, len(new))
+        for i, sid in enumerate(new_ids.tolist()):
+            self._session_row[sid] = base + i
+        self.session_ids = np.concatenate([self.session_ids, new_ids])
+        self.pct = np.concatenate([self.pct, np.fromiter((r[1] or 0.0 for r in new), np.float64, len(new))])
+        stamps = [r[2] for r in rows if r[2] is not None]
+        if stamps:
+            self.watermark = max(stamps + ([self.watermark] if self.watermark else []))
+
+        # One integer per response: question_id * 16 + selected * 2 + correct,
+        # so the rows stream as two int columns and decode in NumPy. Selected
+        # must fit its 3 bits: anything but a real option counts as unanswered.
+        selected = case(
+            (ExamResponse.selected_option.between(0, len(OPTION_LABELS) - 1), ExamResponse.selected_option),
+            else_=NO_ANSWER,
+        )
+        code = (
+            ExamResponse.question_id * 16
+            + selected * 2
+            + case((ExamResponse.is_correct, 1), else_=0)
+        )
+        stmt = select(ExamResponse.session_id, code)
+        # A few new sessions: look their responses up by session id. Otherwise
+        # one streamed join over the same window as the session query.
+        if len(new) <= chunk // 10:
+            stmt = stmt.where(ExamResponse.session_id.in_(new_ids.tolist()))
+        else:
+            stmt = stmt.join(ExamSession, ExamSession.id == ExamResponse.session_id).where(*cond)
+
+        order = np.argsort(new_ids)
+        sorted_ids = new_ids[order]
+        r_sess, r_code = [], []
+        # Fetched in chunks straight from the DBAPI cursor: no Row objects,
+        # tuples go to NumPy. (No stream_results: its buffer would prefetch rows.)
+        result = db.session.connection().execute(stmt)
+        while True:
+            part = result.cursor.fetchmany(chunk) if result.cursor is not None else []
+            if not part:
+                break
+            arr = np.asarray(part, dtype=np.int64).reshape(-1, 2)
+            sids = arr[:, 0]
+            # Rows of sessions loaded earlier (overlap) or committed after the session query are skipped.
+            pos = np.minimum(np.searchsorted(sorted_ids, sids), len(sorted_ids) - 1)
+            mine = sorted_ids[pos] == sids
+            if mine.any():
+                r_sess.append((base + order[pos[mine]]).astype(np.int32))
+                r_code.append(arr[mine, 1])
+        result.close()
+
+        if r_sess:
+            sess = np.concatenate(r_sess)
+            codes = np.concatenate(r_code)
+            qrow = self._question_rows(codes >> 4)
+            sel = ((codes >> 1) & 7).astype(np.int8)
+            ok = (codes & 1).astype(np.bool_)
+            keep = (qrow >= 0) & (sel >= 0) & (sel <= NO_ANSWER)
+            sess, qrow, sel, ok = sess[keep], qrow[keep], sel[keep], ok[keep]
+
+            n_q = len(self.qids)
+            self.option_counts += np.bincount(
+                qrow.astype(np.int64) * (NO_ANSWER + 1) + sel, minlength=n_q * (NO_ANSWER + 1)
+            ).reshape(n_q, NO_ANSWER + 1)
+            self.r_session = np.concatenate([self.r_session, sess])
+            self.r_question = np.concatenate([self.r_question, qrow])
+            self.r_selected = np.concatenate([self.r_selected, sel])
+            self.r_correct = np.concatenate([self.r_correct, ok])
+        return len(new)
+
+    def compute(self, pass_percentage: float) -> Dict[str, Any]:
+        n_q = len(self.qids)
+        n_s = len(self.session_ids)
+        q, ok = self.r_question, self.r_correct
+
+        attempts = np.bincount(q, minlength=n_q)
+        correct = np.bincount(q, weights=ok, minlength=n_q)
+        difficulty = _ratio(correct, attempts)
+
+        # Upper/lower groups by the candidates' overall percentage.
+        group = np.zeros(n_s, dtype=np.int8)
+        if n_s >= 2:
+            size = max(1, int(round(n_s * GROUP_FRACTION)))
+            order = np.argsort(self.pct, kind='stable')
+            group[order[:size]] = 1
+            group[order[-size:]] = 2
+        r_group = group[self.r_session]
+        upper, lower = r_group == 2, r_group == 1
+        p_upper = _ratio(np.bincount(q[upper], weights=ok[upper], minlength=n_q), np.bincount(q[upper], minlength=n_q))
+        p_lower = _ratio(np.bincount(q[lower], weights=ok[lower], minlength=n_q), np.bincount(q[lower], minlength=n_q))
+        discrimination = p_upper - p_lower
+
+        # Point-biserial correlation of each item with the candidates' percentage.
+        score = self.pct[self.r_session]
+        sum_all = np.bincount(q, weights=score, minlength=n_q)
+        sum_ok = np.bincount(q, weights=score * ok, minlength=n_q)
+        sq_all = np.bincount(q, weights=score * score, minlength=n_q)
+        mean_ok = _ratio(sum_ok, correct)
+        mean_wrong = _ratio(sum_all - sum_ok, attempts - correct)
+        mean_all = _ratio(sum_all, attempts)
+        std_all = np.sqrt(np.maximum(_ratio(sq_all, attempts) - mean_all ** 2, 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            point_biserial = (mean_ok - mean_wrong) / std_all * np.sqrt(difficulty * (1.0 - difficulty))
+
+        upper_counts = np.bincount(
+            q[upper].astype(np.int64) * (NO_ANSWER + 1) + self.r_selected[upper], minlength=n_q * (NO_ANSWER + 1)
+        ).reshape(n_q, NO_ANSWER + 1)
+        lower_counts = np.bincount(
+            q[lower].astype(np.int64) * (NO_ANSWER + 1) + self.r_selected[lower], minlength=n_q * (NO_ANSWER + 1)
+        ).reshape(n_q, NO_ANSWER + 1)
+
+        items: List[Dict[str, Any]] = []
+        counts = self.option_counts.tolist()
+        up_c, lo_c = upper_counts.tolist(), lower_counts.tolist()
+        for i, question in enumerate(self.questions):
+            n = int(attempts[i])
+            options = []
+            for j, label in enumerate(OPTION_LABELS):
+                options.append({
+                    'option': label,
+                    'is_correct': j == int(self.correct_option[i]),
+                    'count': counts[i][j],
+                    'share': round(counts[i][j] / n, 4) if n else None,
+                    'upper': up_c[i][j],
+                    'lower': lo_c[i][j],
+                })
+            items.append({
+                'question_id': question.id,
+                'order_index': question.order_index,
+                'question_text': question.question_text,
+                'attempts': n,
+                'unanswered': counts[i][NO_ANSWER],
+                'difficulty': _num(difficulty[i]),
+                'discrimination': _num(discrimination[i]),
+                'point_biserial': _num(point_biserial[i]),
+                'options': options,
+            })
+
+        pct = self.pct
+        if n_s:
+            hist, _ = np.histogram(np.clip(pct, 0.0, 100.0), bins=SCORE_BINS)
+            q25, median, q75 = np.percentile(pct, [25, 50, 75])
+            scores = {
+                'count': n_s,
+                'mean': _num(pct.mean()),
+                'std': _num(pct.std()),
+                'min': _num(pct.min()),
+                'q25': _num(q25),
+                'median': _num(median),
+                'q75': _num(q75),
+                'max': _num(pct.max()),
+                'pass_rate': _num((pct >= pass_percentage).mean()),
+                'histogram': [
+                    {'from': int(SCORE_BINS[k]), 'to': int(SCORE_BINS[k + 1]), 'count': int(hist[k])}
+                    for k in range(len(hist))
+                ],
+            }
+        else:
+            scores = {'count': 0, 'histogram': []}
+
+        return {
+            'exam_id': self.exam_id,
+            'sessions': n_s,
+            'responses': int(len(q)),
+            'scores': scores,
+            'items': items,
+        }
+
+
+class ExamAnalytics:
+    """Item analysis per exam: difficulty, discrimination, distractors, score distribution.
+
+    Each exam's completed attempts are loaded once into columnar arrays and
+    then extended incrementally with sessions submitted since the last
+    refresh. Statistics are recomputed with NumPy only when new attempts
+    arrived; otherwise the cached result is returned as is.
+
+    `mark_stale(exam_id)` makes the next read refresh straight away (e.g.
+    after a submission in this process); other processes' submissions are
+    picked up within `refresh_sec`. `invalidate` drops an exam's arrays
+    entirely, for when attempts were deleted.
+    """
+
+    def __init__(self, refresh_sec: float = 10.0, overlap_sec: float = 5.0, chunk: int = 5000) -> None:
+        self.refresh_sec = refresh_sec
+        self.overlap_sec = overlap_sec
+        self.chunk = chunk
+        self._exams: Dict[int, _ExamColumns] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'refreshes': 0, 'rebuilds': 0, 'sessions_loaded': 0}
+
+    def _columns(self, exam_obj, force: bool = False):
+        """Columns of `exam_obj`, refreshed if due; returns (columns, sessions added). Caller holds the lock."""
+        cols = self._exams.get(exam_obj.id)
+        if cols is None or force:
+            cols = _ExamColumns(exam_obj.id)
+            self._exams[exam_obj.id] = cols
+            self.stats['rebuilds'] += 1
+
+        now = time.monotonic()
+        if not cols.stale and now - cols.checked_at < self.refresh_sec:
+            return cols, 0
+        added = cols.refresh(self.overlap_sec, self.chunk)
+        cols.checked_at = now
+        cols.stale = False
+        self.stats['refreshes'] += 1
+        self.stats['sessions_loaded'] += added
+        return cols, added
+
+    def get(self, exam_obj, force: bool = False) -> Dict[str, Any]:
+        # One exam is refreshed by one request at a time; reads of a fresh
+        # result never wait on the database.
+        with self._lock:
+            cols, added = self._columns(exam_obj, force)
+            pass_percentage = float(exam_obj.pass_percentage or 0.0)
+            if added or cols.result is None or cols.pass_percentage != pass_percentage:
+                cols.result = cols.compute(pass_percentage)
+                cols.pass_percentage = pass_percentage
+            else:
+                self.stats['hits'] += 1
+            return cols.result
+
+    def snapshot(self, exam_obj) -> Dict[str, np.ndarray]:
+        """Current response columns of an exam, for other analyses (e.g. collusion checks)."""
+        with self._lock:
+            cols, _ = self._columns(exam_obj)
+            return {
+                'session_ids': cols.session_ids,
+                'question_ids': cols.qids,
+                'correct_option': cols.correct_option,
+                'r_session': cols.r_session,
+                'r_question': cols.r_question,
+                'r_selected': cols.r_selected,
+            }
+
+    def mark_stale(self, exam_id: int) -> None:
+        cols = self._exams.get(exam_id)
+        if cols is not None:
+            cols.stale = True
+
+    def invalidate(self, exam_id: Optional[int] = None) -> None:
+        with self._lock:
+            if exam_id is None:
+                self._exams.clear()
+            else:
+                self._exams.pop(exam_id, None)
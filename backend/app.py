@@ -1,38 +1,117 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session, send_from_directory, abort, make_response
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
-from models import db, User, Exam, ExamQuestion, ExamSession, ExamResponse, Warning, LoginActivity, PasswordOTP
+from models import db, User, Exam, ExamQuestion, ExamSession, ExamResponse, Warning, PasswordOTP, CollusionPair, Notification, LoginRollup, PurgeJob, EXAM_TOTALS_BACKFILL_SQL
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from sqlalchemy import text
+from sqlalchemy import text, func
+import atexit
 import os
-import eventlet
+import threading
+import time
 from proctor import ProctorEngine
+from proctor_policy import DEFAULT_POLICY, ProctorPolicy, compile_policy
+from evidence_store import EvidenceStore
+from session_recorder import SessionRecorder
+from upload_pipeline import UploadNormalizer
+from deadlines import DeadlineScheduler
+from admission import AdmissionGate
+from eligibility import EligibilityService
+from login_audit import BACKFILL_BUCKETS, BACKFILL_ROLLUPS_SQL, GRANULARITIES, login_audit, login_series
+from publication import drain_notifications, publish_exam_results
+from purge import cascade_plan, claim_purge_job, count_rows, run_plan, run_plan_batched
+from retention import RecordingRule, RetentionSweeper, RowRule, UploadRule, retention_report
+from student_stats import invalidate_student_stats, record_submission, student_stats
+from file_serving import FileSender, StaticManifest, ensure_thumbnail, ONE_YEAR
+from http_encoding import FastJSONProvider, ResponseCompressor, response_metrics, stream_json_array
+from mailer import MailQueue, SMTPConfig
+from passwords import hash_password, verify_password, hash_otp, verify_otp
 import secrets
 import base64
+import json
 from datetime import timedelta
 from io import BytesIO
-import csv
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
+# Heavy modules (reportlab, OpenCV, MediaPipe) are imported on first use or by
+# prewarm_heavy_modules(); keep module import cheap. Run check_startup.py after
+# touching imports here.
 
 # Initialize App
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.config['SECRET_KEY'] = 'proctor_secret_key_123'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Request bodies above this are rejected with 413 before they are read;
+# uploaded files are spooled to disk by Werkzeug rather than held in memory.
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('UPLOAD_MAX_MB', '10')) * 1024 * 1024)
+# Non-file form fields (the webcam capture arrives as a data URL field).
+app.config['MAX_FORM_MEMORY_SIZE'] = 2 * 1024 * 1024
 
 # Enable CORS with credentials support
 CORS(app, supports_credentials=True)
 db.init_app(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
+# JSON bodies go through orjson when it is installed (JSON_BACKEND=auto|orjson|stdlib);
+# dynamic responses are gzip/br-compressed per Accept-Encoding above a size threshold.
+app.json = FastJSONProvider(app, os.environ.get('JSON_BACKEND', 'auto'))
+response_compressor = ResponseCompressor.from_env(os.environ)
+app.after_request(response_compressor)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_DIR = os.path.join(BASE_DIR, 'uploads')
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+THUMB_DIR = os.path.join(UPLOAD_DIR, 'thumbs')
+THUMB_SIZE = 96
+
+# Uploads and static assets: conditional/Range responses, optionally offloaded
+# to the front web server (FILE_OFFLOAD=x-sendfile|x-accel).
+file_sender = FileSender.from_env(os.environ, {
+    UPLOAD_DIR: 'X_ACCEL_UPLOADS_LOCATION',
+    THUMB_DIR: 'X_ACCEL_THUMBS_LOCATION',
+    app.static_folder: 'X_ACCEL_STATIC_LOCATION',
+})
+static_manifest = StaticManifest(app.static_folder)
+
+
+@app.url_defaults
+def _hashed_static_url(endpoint, values):
+    # url_for('static', filename='exam.css') -> /static/exam.<hash>.css
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = static_manifest.hashed(values['filename'])
+
+
+def _serve_static(filename):
+    rel, current = static_manifest.resolve(filename)
+    if current:
+        return file_sender.send(app.static_folder, rel, max_age=ONE_YEAR, immutable=True)
+    return file_sender.send(app.static_folder, rel)
+
+
+app.view_functions['static'] = _serve_static
+
+# Violation snapshots: content-addressed, processed off the frame path.
+# Retention sweeps run in one process only (start_evidence_sweeper).
+evidence_store = EvidenceStore(
+    os.path.join(UPLOAD_DIR, 'evidence'),
+    retention_days=float(os.environ.get('EVIDENCE_RETENTION_DAYS', '30')),
+    max_total_bytes=int(float(os.environ.get('EVIDENCE_MAX_MB', '2048')) * 1024 * 1024),
+    sweep_interval_sec=0,
+)
+EVIDENCE_SWEEP_SEC = float(os.environ.get('EVIDENCE_SWEEP_SEC', '600'))
+
+
+def start_evidence_sweeper() -> None:
+    if EVIDENCE_SWEEP_SEC > 0:
+        evidence_store.start_sweeping(EVIDENCE_SWEEP_SEC)
+
+# Optional per-exam timelapse recordings (Exam.recording_enabled).
+session_recorder = SessionRecorder(
+    os.path.join(UPLOAD_DIR, 'recordings'),
+    segment_bytes=int(float(os.environ.get('RECORDING_SEGMENT_MB', '8')) * 1024 * 1024),
+    usage_ttl_sec=float(os.environ.get('RECORDING_USAGE_TTL_SEC', '30')),
+)
+RECORDING_DEFAULT_BUDGET_MB = int(os.environ.get('RECORDING_DEFAULT_BUDGET_MB', '1024'))
 
 
 def _get_existing_columns(table_name: str):
@@ -43,6 +122,22 @@ def _get_existing_columns(table_name: str):
         return set()
 
 
+def _refresh_exam_totals(exam: Exam) -> None:
+    """Recompute `question_count` and `total_marks` for one exam inside the current transaction.
+
+    Call after adding or deleting ExamQuestion rows and before committing, so the
+    counters are written atomically with the question changes.
+    """
+    db.session.flush()
+    count, marks = (
+        db.session.query(func.count(ExamQuestion.id), func.coalesce(func.sum(ExamQuestion.marks), 0))
+        .filter(ExamQuestion.exam_id == exam.id)
+        .one()
+    )
+    exam.question_count = int(count or 0)
+    exam.total_marks = int(marks or 0)
+
+
 def ensure_sqlite_schema():
     """Minimal schema upgrader (SQLite) for added columns without migrations."""
     try:
@@ -67,6 +162,12 @@ def ensure_sqlite_schema():
                 alters.append("ALTER TABLE user ADD COLUMN id_proof_path VARCHAR(300)")
             if 'face_image_path' not in existing:
                 alters.append("ALTER TABLE user ADD COLUMN face_image_path VARCHAR(300)")
+            if 'uploads_status' not in existing:
+                alters.append("ALTER TABLE user ADD COLUMN uploads_status VARCHAR(20)")
+            if 'uploads_attempts' not in existing:
+                alters.append("ALTER TABLE user ADD COLUMN uploads_attempts INTEGER DEFAULT 0")
+            if 'face_embedding' not in existing:
+                alters.append("ALTER TABLE user ADD COLUMN face_embedding BLOB")
             if 'proctoring_consent' not in existing:
                 alters.append("ALTER TABLE user ADD COLUMN proctoring_consent BOOLEAN DEFAULT 0")
             if 'terms_accepted' not in existing:
@@ -87,6 +188,29 @@ def ensure_sqlite_schema():
                 alters.append("ALTER TABLE exam ADD COLUMN reattempt_after_days INTEGER")
             if 'available_from' not in existing_exam_cols:
                 alters.append("ALTER TABLE exam ADD COLUMN available_from DATE")
+            if 'question_count' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN question_count INTEGER DEFAULT 0")
+                alters.append(EXAM_TOTALS_BACKFILL_SQL)
+            if 'proctor_policy' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN proctor_policy TEXT")
+            if 'recording_enabled' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN recording_enabled BOOLEAN DEFAULT 0")
+            if 'recording_interval_sec' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN recording_interval_sec INTEGER DEFAULT 10")
+            if 'recording_budget_mb' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN recording_budget_mb INTEGER")
+            if 'shuffle_questions' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN shuffle_questions BOOLEAN DEFAULT 0")
+            if 'shuffle_options' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN shuffle_options BOOLEAN DEFAULT 0")
+            if 'pool_draw' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN pool_draw TEXT")
+            if 'collusion_scanned_at' not in existing_exam_cols:
+                # Existing exams count as scanned now, so the upgrade does not rescan them all.
+                alters.append("ALTER TABLE exam ADD COLUMN collusion_scanned_at DATETIME")
+                alters.append("UPDATE exam SET collusion_scanned_at = CURRENT_TIMESTAMP")
+            if 'collusion_scan_requested' not in existing_exam_cols:
+                alters.append("ALTER TABLE exam ADD COLUMN collusion_scan_requested VARCHAR(10)")
 
             for stmt in alters:
                 db.session.execute(text(stmt))
@@ -113,10 +237,87 @@ def ensure_sqlite_schema():
             for stmt in alters:
                 db.session.execute(text(stmt))
             db.session.commit()
+
+        existing_question_cols = _get_existing_columns('exam_question')
+        if existing_question_cols and 'pool' not in existing_question_cols:
+            db.session.execute(text("ALTER TABLE exam_question ADD COLUMN pool VARCHAR(50)"))
+            db.session.commit()
+
+        existing_summary_cols = _get_existing_columns('dashboard_summary')
+        if existing_summary_cols and 'score_sum' not in existing_summary_cols:
+            # Records without the running sum cannot be updated in place; let them rebuild.
+            db.session.execute(text("ALTER TABLE dashboard_summary ADD COLUMN score_sum FLOAT DEFAULT 0"))
+            db.session.execute(text("DELETE FROM dashboard_summary"))
+            db.session.commit()
+
+        existing_login_cols = _get_existing_columns('login_activity')
+        if existing_login_cols and 'role' not in existing_login_cols:
+            db.session.execute(text("ALTER TABLE login_activity ADD COLUMN role VARCHAR(20)"))
+            db.session.commit()
+        if LoginRollup.query.first() is None:
+            for g in GRANULARITIES:
+                db.session.execute(text(BACKFILL_ROLLUPS_SQL.format(granularity=g, bucket=BACKFILL_BUCKETS[g])))
+            db.session.commit()
+
+        # create_all() only indexes tables it creates; add them to older databases.
+        for stmt in (
+            "CREATE INDEX IF NOT EXISTS ix_exam_response_session_id ON exam_response (session_id)",
+            "CREATE INDEX IF NOT EXISTS ix_exam_session_exam_status ON exam_session (exam_id, status, submitted_at)",
+            "CREATE INDEX IF NOT EXISTS ix_exam_session_user_status ON exam_session (user_id, status, submitted_at)",
+            "CREATE INDEX IF NOT EXISTS ix_login_activity_login_time ON login_activity (login_time)",
+            "CREATE INDEX IF NOT EXISTS ix_exam_response_question_id ON exam_response (question_id)",
+            "CREATE INDEX IF NOT EXISTS ix_warning_session_id ON warning (session_id)",
+        ):
+            db.session.execute(text(stmt))
+        db.session.commit()
     except Exception:
         db.session.rollback()
 
 
+# Bump whenever ensure_sqlite_schema() or the seed data changes. Stored in
+# SQLite's PRAGMA user_version so boot can skip schema work with one cheap read.
+SCHEMA_VERSION = 15
+
+
+def get_schema_version() -> int:
+    try:
+        return int(db.session.execute(text("PRAGMA user_version")).scalar() or 0)
+    except Exception:
+        return 0
+
+
+def bootstrap_schema(force: bool = False) -> bool:
+    """Create/upgrade tables and seed defaults once per SCHEMA_VERSION.
+
+    Must run inside an app context. Returns True if any work was done.
+    """
+    if not force and get_schema_version() >= SCHEMA_VERSION:
+        return False
+
+    db.create_all()
+
+    ensure_sqlite_schema()
+
+    _seed_default_exam_if_missing()
+
+    # Create default admin if not exists
+    admin = User.query.filter_by(role='admin').first()
+    if not admin:
+        default_admin = User(
+            name="Super Admin",
+            email="admin@system.com",
+            password=hash_password("admin123"),
+            role="admin"
+        )
+        db.session.add(default_admin)
+        db.session.commit()
+        print("✅ Default Admin Created: admin@system.com / admin123")
+
+    db.session.execute(text(f"PRAGMA user_version = {int(SCHEMA_VERSION)}"))
+    db.session.commit()
+    return True
+
+
 def _seed_default_exam_if_missing():
     existing = Exam.query.count()
     if existing:
@@ -190,6 +391,7 @@ def _seed_default_exam_if_missing():
             )
         )
 
+    _refresh_exam_totals(exam)
     db.session.commit()
 
 
@@ -231,44 +433,866 @@ def _save_face_data_url(data_url: str) -> str:
     return out_path
 
 
+def _on_uploads_normalized(user_id: int, result: dict) -> None:
+    # Runs on the normalizer thread.
+    with app.app_context():
+        user = User.query.get(user_id)
+        if not user:
+            return
+        user.uploads_status = result['status']
+        if 'id_proof_path' in result:
+            user.id_proof_path = result['id_proof_path']
+        if 'face_image_path' in result:
+            user.face_image_path = result['face_image_path']
+        if 'face_embedding' in result:
+            user.face_embedding = result['face_embedding']
+        db.session.commit()
+
+
+# A registration whose uploads could not be processed in this many runs
+# (errors, or restarts mid-run) is marked 'failed' instead of retried.
+UPLOAD_MAX_ATTEMPTS = int(os.environ.get('UPLOAD_MAX_ATTEMPTS', '3'))
+
+
+def _on_uploads_failed(user_id: int, error: Exception) -> None:
+    # Runs on the normalizer thread.
+    with app.app_context():
+        user = User.query.get(user_id)
+        if not user or user.uploads_status != 'pending':
+            return
+        if (user.uploads_attempts or 0) >= UPLOAD_MAX_ATTEMPTS:
+            user.uploads_status = 'failed'
+            db.session.commit()
+            return
+        user.uploads_attempts = (user.uploads_attempts or 0) + 1
+        job = (user.id, user.id_proof_path, user.face_image_path)
+        db.session.commit()
+    upload_normalizer.submit(*job)
+
+
+upload_normalizer = UploadNormalizer(
+    _on_uploads_normalized, on_failed=_on_uploads_failed, thumb_dir=THUMB_DIR, thumb_size=THUMB_SIZE,
+)
+
+
+def _requeue_pending_uploads() -> int:
+    """Resubmit registrations whose normalization was interrupted by a restart; returns how many.
+
+    Run it in one process, at startup, before any worker can have runs in flight.
+    """
+    User.query.filter(
+        User.uploads_status == 'pending',
+        func.coalesce(User.uploads_attempts, 0) >= UPLOAD_MAX_ATTEMPTS,
+    ).update({'uploads_status': 'failed'}, synchronize_session=False)
+    pending = User.query.filter_by(uploads_status='pending').all()
+    jobs = []
+    for u in pending:
+        u.uploads_attempts = (u.uploads_attempts or 0) + 1
+        jobs.append((u.id, u.id_proof_path, u.face_image_path))
+    db.session.commit()
+    for job in jobs:
+        upload_normalizer.submit(*job)
+    return len(jobs)
+
+
+# Outbound mail is queued and delivered by a background sender over a pooled
+# SMTP connection, so reset-password storms never block request handlers.
+mail_queue = None
+
+
+def get_mail_queue():
+    global mail_queue
+    if mail_queue is None:
+        config = SMTPConfig.from_env(os.environ)
+        if config is not None:
+            mail_queue = MailQueue(config)
+    return mail_queue
+
+
 def _send_otp_email(to_email: str, otp_code: str) -> bool:
-    """Send OTP via SMTP. If SMTP env vars missing, log to console and return True."""
-    host = os.environ.get('SMTP_HOST')
-    port = os.environ.get('SMTP_PORT')
-    user = os.environ.get('SMTP_USER')
-    password = os.environ.get('SMTP_PASS')
-    from_email = os.environ.get('SMTP_FROM') or user
-
-    if not host or not port or not user or not password or not from_email:
+    """Queue the OTP email. If SMTP env vars missing, log to console and return True."""
+    queue = get_mail_queue()
+    if queue is None:
         print(f"DEV OTP for {to_email}: {otp_code}")
         return True
 
-    import smtplib
-    from email.mime.text import MIMEText
-
-    msg = MIMEText(
+    return queue.enqueue(
+        to_email,
+        'ProctorExam.AI - Password Reset OTP',
         f"Your ProctorExam.AI OTP is: {otp_code}\n\nThis code expires in 10 minutes.",
-        'plain',
-        'utf-8',
     )
-    msg['Subject'] = 'ProctorExam.AI - Password Reset OTP'
-    msg['From'] = from_email
-    msg['To'] = to_email
-
-    with smtplib.SMTP(host, int(port)) as server:
-        server.starttls()
-        server.login(user, password)
-        server.sendmail(from_email, [to_email], msg.as_string())
-    return True
+
+
+def _results_notification_body(exam_obj, percentage: float, result_status: str) -> str:
+    return (
+        f"Your result for {exam_obj.name} is now available.\n\n"
+        f"Score: {percentage:.1f}% ({result_status})\n\n"
+        "Sign in to ProctorExam.AI to see the details."
+    )
+
+
+def _deliver_notification(to_email: str, subject: str, body: str) -> bool:
+    queue = get_mail_queue()
+    if queue is None:
+        print(f"DEV notification for {to_email}: {subject}")
+        return True
+    return queue.enqueue(to_email, f"ProctorExam.AI - {subject}", body)
+
+
+# Queued notifications (e.g. from results publication) are moved from the
+# notification table into the mail queue in batches.
+NOTIFY_INTERVAL_SEC = float(os.environ.get('NOTIFY_INTERVAL_SEC', '2'))
+NOTIFY_BATCH = 200
+_notification_dispatcher_started = False
+
+
+def start_notification_dispatcher() -> None:
+    global _notification_dispatcher_started
+    if _notification_dispatcher_started:
+        return
+    _notification_dispatcher_started = True
+
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    delivered = drain_notifications(_deliver_notification, NOTIFY_BATCH)
+            except Exception as e:
+                delivered = 0
+                print(f"Notification Dispatcher Error: {e}")
+            # Keep going while there is a backlog; nap when drained or the mail queue is full.
+            socketio.sleep(0 if delivered >= NOTIFY_BATCH else NOTIFY_INTERVAL_SEC)
+
+    socketio.start_background_task(_loop)
+
+
+# User/exam deletion. Small ones run inline as one transaction of set-based
+# statements; anything touching more than PURGE_INLINE_MAX_ROWS rows becomes
+# a purge_job that a background worker deletes in PURGE_BATCH-row batches,
+# pausing PURGE_PAUSE_SEC between them so running exams keep getting writes in.
+PURGE_INLINE_MAX_ROWS = int(os.environ.get('PURGE_INLINE_MAX_ROWS', '5000'))
+PURGE_BATCH = int(os.environ.get('PURGE_BATCH', '2000'))
+PURGE_PAUSE_SEC = float(os.environ.get('PURGE_PAUSE_SEC', '0.05'))
+PURGE_POLL_SEC = 5.0
+_purge_worker_started = False
+
+
+def _purge_affected_users(target_table: str, target_id: int):
+    if target_table == 'exam':
+        # Their recent results name this exam.
+        return [u for (u,) in db.session.query(ExamSession.user_id).filter_by(exam_id=target_id).distinct()]
+    return []
+
+
+def _after_purge(target_table: str, target_id: int) -> None:
+    if target_table == 'exam':
+        if question_randomizer is not None:
+            question_randomizer.invalidate(target_id)
+        if exam_analytics is not None:
+            exam_analytics.invalidate(target_id)
+    else:
+        login_audit.forget(target_id)
+        eligibility.invalidate(target_id)
+        if exam_analytics is not None:
+            exam_analytics.invalidate()
+
+
+def _delete_or_queue(target_table: str, target_id: int):
+    """Delete a user/exam with its dependent rows now, or queue a PurgeJob and return it."""
+    plan = cascade_plan(target_table)
+    if count_rows(plan, target_id) <= PURGE_INLINE_MAX_ROWS:
+        invalidate_student_stats(_purge_affected_users(target_table, target_id))
+        run_plan(plan, target_id)
+        db.session.commit()
+        _after_purge(target_table, target_id)
+        return None
+
+    if target_table == 'exam':
+        # No new attempts while the purge runs.
+        Exam.query.filter_by(id=target_id).update({'is_active': False})
+    job = PurgeJob(target_table=target_table, target_id=target_id)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def run_purge_job(job) -> int:
+    """Carry out a claimed purge job in batches and record the outcome. Returns rows deleted."""
+    try:
+        users = _purge_affected_users(job['target_table'], job['target_id'])
+        deleted = run_plan_batched(
+            cascade_plan(job['target_table']), job['target_id'], PURGE_BATCH,
+            pause=lambda: socketio.sleep(PURGE_PAUSE_SEC),
+        )
+        invalidate_student_stats(users)
+        PurgeJob.query.filter_by(id=job['id']).update({
+            'status': 'done', 'rows_deleted': deleted, 'finished_at': datetime.utcnow(),
+        })
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        PurgeJob.query.filter_by(id=job['id']).update({
+            'status': 'failed', 'error': str(e)[:500], 'finished_at': datetime.utcnow(),
+        })
+        db.session.commit()
+        raise
+    _after_purge(job['target_table'], job['target_id'])
+    return deleted
+
+
+def start_purge_worker() -> None:
+    global _purge_worker_started
+    if _purge_worker_started:
+        return
+    _purge_worker_started = True
+
+    def _loop():
+        while True:
+            job = None
+            try:
+                with app.app_context():
+                    job = claim_purge_job()
+                    if job is not None:
+                        deleted = run_purge_job(job)
+                        print(f"✅ Purged {job['target_table']} #{job['target_id']}: {deleted} rows")
+            except Exception as e:
+                print(f"Purge Worker Error: {e}")
+            socketio.sleep(0 if job is not None else PURGE_POLL_SEC)
+
+    socketio.start_background_task(_loop)
+
+
+# Login audit entries are buffered by login_audit and written in batches;
+# the retention sweeper below expires them.
+LOGIN_AUDIT_FLUSH_SEC = float(os.environ.get('LOGIN_AUDIT_FLUSH_SEC', '1'))
+_login_audit_writer_started = False
+
+
+def _flush_login_audit() -> None:
+    with app.app_context():
+        login_audit.flush()
+
+
+def start_login_audit_writer() -> None:
+    global _login_audit_writer_started
+    if _login_audit_writer_started:
+        return
+    _login_audit_writer_started = True
+    atexit.register(_flush_login_audit)
+
+    def _loop():
+        while True:
+            socketio.sleep(LOGIN_AUDIT_FLUSH_SEC)
+            try:
+                with app.app_context():
+                    login_audit.flush()
+            except Exception as e:
+                print(f"Login Audit Writer Error: {e}")
+
+    socketio.start_background_task(_loop)
+
+
+# Data retention. Each policy is a number of days (0 keeps forever):
+# proctoring warnings, per-question responses of old attempts (scores stay on
+# the session), raw login entries and hourly login rollups (daily ones are
+# kept), session recordings, and registration media no account refers to any
+# more (after UPLOAD_ORPHAN_GRACE_DAYS). The sweeper works in small steps
+# capped by RETENTION_ROWS_PER_SEC / RETENTION_FILES_PER_SEC and stands by
+# while more than RETENTION_MAX_LIVE_SESSIONS exam sessions are in progress.
+RETAIN_WARNINGS_DAYS = float(os.environ.get('RETAIN_WARNINGS_DAYS', '365'))
+RETAIN_RESPONSES_DAYS = float(os.environ.get('RETAIN_RESPONSES_DAYS', '730'))
+LOGIN_RETENTION_DAYS = int(os.environ.get('LOGIN_RETENTION_DAYS', '90'))
+LOGIN_HOURLY_RETENTION_DAYS = int(os.environ.get('LOGIN_HOURLY_RETENTION_DAYS', '180'))
+RETAIN_RECORDINGS_DAYS = float(os.environ.get('RETAIN_RECORDINGS_DAYS', '90'))
+UPLOAD_ORPHAN_GRACE_DAYS = float(os.environ.get('UPLOAD_ORPHAN_GRACE_DAYS', '1'))
+RETENTION_ROWS_PER_SEC = float(os.environ.get('RETENTION_ROWS_PER_SEC', '2000'))
+RETENTION_FILES_PER_SEC = float(os.environ.get('RETENTION_FILES_PER_SEC', '50'))
+RETENTION_MAX_LIVE_SESSIONS = int(os.environ.get('RETENTION_MAX_LIVE_SESSIONS', '0'))
+RETENTION_TICK_SEC = 1.0
+RETENTION_BUSY_CHECK_SEC = 30.0
+retention_sweeper = None
+_retention_sweeper_started = False
+_retention_busy = {'checked': 0.0, 'busy': False}
+
+
+def _exams_in_progress() -> bool:
+    # Re-checked every RETENTION_BUSY_CHECK_SEC; sessions abandoned long ago
+    # (older than the longest sitting) do not count.
+    mono = time.monotonic()
+    if mono - _retention_busy['checked'] >= RETENTION_BUSY_CHECK_SEC:
+        live = ExamSession.query.filter(
+            ExamSession.status == 'Active',
+            ExamSession.start_time >= datetime.utcnow() - timedelta(hours=6),
+        ).count()
+        _retention_busy.update(checked=mono, busy=live > RETENTION_MAX_LIVE_SESSIONS)
+    return _retention_busy['busy']
+
+
+def _referenced_uploads():
+    refs = set()
+    for face, id_proof in db.session.query(User.face_image_path, User.id_proof_path):
+        refs.update(_safe_basename(p) for p in (face, id_proof) if p)
+    return refs
+
+
+def _expired_recording_sessions(session_ids, cutoff):
+    alive = set()
+    expired = set()
+    for sid, status, ended in db.session.query(
+        ExamSession.id, ExamSession.status,
+        func.coalesce(ExamSession.submitted_at, ExamSession.end_time, ExamSession.start_time),
+    ).filter(ExamSession.id.in_(session_ids)):
+        alive.add(sid)
+        if status != 'Active' and ended is not None and ended < cutoff:
+            expired.add(sid)
+    return expired | (set(session_ids) - alive)
+
+
+def get_retention_sweeper() -> RetentionSweeper:
+    global retention_sweeper
+    if retention_sweeper is None:
+        rules = [
+            RowRule('warnings', 'warning', 'timestamp < :cutoff', 'DELETE FROM warning WHERE id IN ({ids})',
+                    RETAIN_WARNINGS_DAYS),
+            RowRule('exam_responses', 'exam_session',
+                    'COALESCE(submitted_at, end_time, start_time) < :cutoff',
+                    'DELETE FROM exam_response WHERE session_id IN ({ids})',
+                    RETAIN_RESPONSES_DAYS, cost_per_key=50),
+            RowRule('login_activity', 'login_activity', 'login_time < :cutoff',
+                    'DELETE FROM login_activity WHERE id IN ({ids})', LOGIN_RETENTION_DAYS),
+            RowRule('login_rollups_hourly', 'login_rollup', 'bucket < :cutoff',
+                    'DELETE FROM login_rollup WHERE rowid IN ({ids})', LOGIN_HOURLY_RETENTION_DAYS,
+                    scope="granularity = 'hour'"),
+            RecordingRule('recordings', session_recorder.root, RETAIN_RECORDINGS_DAYS,
+                          _expired_recording_sessions, on_removed=session_recorder.forget_usage),
+            UploadRule('upload_orphans', UPLOAD_DIR, ('face_', 'idproof_'), _referenced_uploads,
+                       UPLOAD_ORPHAN_GRACE_DAYS, thumb_dir=THUMB_DIR, thumb_size=THUMB_SIZE),
+        ]
+        retention_sweeper = RetentionSweeper(
+            rules,
+            rows_per_sec=RETENTION_ROWS_PER_SEC,
+            files_per_sec=RETENTION_FILES_PER_SEC,
+            busy=_exams_in_progress,
+        )
+    return retention_sweeper
+
+
+def start_retention_sweeper() -> None:
+    global _retention_sweeper_started
+    if _retention_sweeper_started:
+        return
+    _retention_sweeper_started = True
+    sweeper = get_retention_sweeper()
+
+    def _loop():
+        while True:
+            socketio.sleep(RETENTION_TICK_SEC)
+            try:
+                with app.app_context():
+                    for rule, result in sweeper.tick():
+                        # Cached item statistics would still count the removed responses.
+                        if rule.name == 'exam_responses' and result.rows and exam_analytics is not None:
+                            exam_analytics.invalidate()
+            except Exception as e:
+                print(f"Retention Sweeper Error: {e}")
+
+    socketio.start_background_task(_loop)
+
+
+def prewarm_heavy_modules() -> None:
+    """Import report/CV modules on a background thread so first use is fast.
+
+    Called once before serving; never at import time.
+    """
+    def _warm():
+        try:
+            from reportlab.pdfgen import canvas  # noqa: F401
+        except Exception as e:
+            print(f"⚠️  Report module prewarm failed: {e}")
+
+    threading.Thread(target=_warm, name='report-prewarm', daemon=True).start()
+    proctor_engine.prewarm()
+
+
+# Per-candidate question/option order (imports NumPy, so loaded on first use).
+question_randomizer = None
+
+
+def get_question_randomizer():
+    global question_randomizer
+    if question_randomizer is None:
+        from randomization import QuestionRandomizer
+        question_randomizer = QuestionRandomizer(app.config['SECRET_KEY'])
+    return question_randomizer
+
+
+# Item analysis per exam (imports NumPy, so loaded on first use).
+exam_analytics = None
+
+
+def get_exam_analytics():
+    global exam_analytics
+    if exam_analytics is None:
+        from analytics import ExamAnalytics
+        exam_analytics = ExamAnalytics(refresh_sec=float(os.environ.get('ANALYTICS_REFRESH_SEC', '10')))
+    return exam_analytics
+
+
+# Answer-similarity collusion checks (NumPy; loaded on first use), run by one
+# monitor process. Exams with submissions since their last scan are rescanned
+# every COLLUSION_SCAN_SEC (0 disables that); scans an admin queued
+# (Exam.collusion_scan_requested) are picked up within COLLUSION_POLL_SEC.
+COLLUSION_SCAN_SEC = float(os.environ.get('COLLUSION_SCAN_SEC', '300'))
+COLLUSION_POLL_SEC = float(os.environ.get('COLLUSION_POLL_SEC', '5'))
+COLLUSION_MIN_Z = float(os.environ.get('COLLUSION_MIN_Z', '4'))
+_collusion_monitor_started = False
+
+_COLLUSION_REQUESTS_SQL = "SELECT id, collusion_scan_requested FROM exam WHERE collusion_scan_requested IS NOT NULL"
+# Clears a request only if it was not replaced in the meantime.
+_CLAIM_COLLUSION_REQUEST_SQL = (
+    "UPDATE exam SET collusion_scan_requested = NULL WHERE id = :id AND collusion_scan_requested = :method"
+)
+_COLLUSION_DUE_SQL = (
+    "SELECT e.id FROM exam e WHERE EXISTS (SELECT 1 FROM exam_session s WHERE s.exam_id = e.id "
+    "AND s.status = 'Completed' AND s.submitted_at > COALESCE(e.collusion_scanned_at, '1970-01-01'))"
+)
+
+
+def run_collusion_scan(exam_obj, method=None, offload=False):
+    """Rescan one exam's completed attempts and replace its stored suspicious pairs; returns scan stats."""
+    from collusion import AnswerMatrix, CollusionDetector
+
+    started = time.perf_counter()
+    scanned_at = datetime.utcnow()
+    analytics = get_exam_analytics()
+    analytics.mark_stale(exam_obj.id)  # submissions may have gone through other workers
+    matrix = AnswerMatrix.from_columns(analytics.snapshot(exam_obj))
+    detector = CollusionDetector(min_z=COLLUSION_MIN_Z)
+    pairs = None
+    if offload:
+        # Keep the eventlet hub responsive while NumPy works.
+        try:
+            from eventlet import tpool  # type: ignore
+            pairs = tpool.execute(detector.scan, matrix, method)
+        except ImportError:
+            pass
+    if pairs is None:
+        pairs = detector.scan(matrix, method)
+
+    CollusionPair.query.filter_by(exam_id=exam_obj.id).delete()
+    if pairs:
+        now = datetime.utcnow()
+        db.session.execute(CollusionPair.__table__.insert(), [
+            {
+                'exam_id': exam_obj.id, 'session_a': p.session_a, 'session_b': p.session_b,
+                'shared_wrong': p.shared_wrong, 'both_wrong': p.both_wrong,
+                'expected': p.expected, 'z_score': p.z_score, 'detected_at': now,
+            }
+            for p in pairs
+        ])
+    exam_obj.collusion_scanned_at = scanned_at
+    db.session.commit()
+    return dict(detector.last_stats, seconds=round(time.perf_counter() - started, 3))
+
+
+def _collusion_scans_due(auto: bool) -> dict:
+    """exam_id -> method ('auto' = by cohort size): queued requests, claimed, plus exams with new submissions."""
+    with app.app_context():
+        due = dict(db.session.execute(text(_COLLUSION_REQUESTS_SQL)).fetchall())
+        if due:
+            db.session.execute(
+                text(_CLAIM_COLLUSION_REQUEST_SQL), [{'id': i, 'method': m} for i, m in due.items()]
+            )
+            db.session.commit()
+        if auto:
+            for (exam_id,) in db.session.execute(text(_COLLUSION_DUE_SQL)):
+                due.setdefault(exam_id, 'auto')
+    return due
+
+
+def start_collusion_monitor() -> None:
+    """Run queued and periodic collusion scans; start it in one process only."""
+    global _collusion_monitor_started
+    if COLLUSION_POLL_SEC <= 0 or _collusion_monitor_started:
+        return
+    _collusion_monitor_started = True
+
+    def _loop():
+        last_auto = time.monotonic()
+        while True:
+            socketio.sleep(COLLUSION_POLL_SEC)
+            auto = COLLUSION_SCAN_SEC > 0 and time.monotonic() - last_auto >= COLLUSION_SCAN_SEC
+            if auto:
+                last_auto = time.monotonic()
+            try:
+                due = _collusion_scans_due(auto)
+            except Exception as ex:
+                print(f"Collusion Scan Error: {ex}")
+                continue
+            for exam_id, method in due.items():
+                try:
+                    with app.app_context():
+                        e = Exam.query.get(exam_id)
+                        if e is not None:
+                            run_collusion_scan(e, method=None if method == 'auto' else method, offload=True)
+                except Exception as ex:
+                    print(f"Collusion Scan Error: {ex}")
+
+    socketio.start_background_task(_loop)
+
+
+def _exam_payload(exam_obj):
+    return get_question_randomizer().payload(
+        exam_obj,
+        lambda: (
+            ExamQuestion.query.filter_by(exam_id=exam_obj.id)
+            .order_by(ExamQuestion.order_index.asc(), ExamQuestion.id.asc())
+            .all()
+        ),
+    )
 
 
 # --- Lazy Loading AI to prevent setup crashes ---
 proctor = None
 
-# Lightweight proctoring engine + in-memory per-session state
-proctor_engine = ProctorEngine()
+# Lightweight proctoring engine + in-memory per-session state. The MediaPipe
+# face mesh (get_proctor) is its second tier, consulted only when the Haar
+# tier is unsure or on the policy's sampling schedule; PROCTOR_FACE_MESH=0
+# keeps it Haar-only.
+PROCTOR_FACE_MESH = os.environ.get('PROCTOR_FACE_MESH', '1').strip().lower() not in ('0', 'false', 'no')
+proctor_engine = ProctorEngine(verifier_loader=(lambda: get_proctor()) if PROCTOR_FACE_MESH else None)
 proctor_session_state = {}
 
+# Compiled per-exam proctoring policies: exam id -> (stored JSON, ProctorPolicy).
+# The frame path only reads the policy held in the session state; edits are
+# swapped in by reload_proctor_policies() (right away on the worker that saved
+# them, within PROCTOR_POLICY_RELOAD_SEC on the others).
+_proctor_policy_cache = {}
+PROCTOR_POLICY_RELOAD_SEC = float(os.environ.get('PROCTOR_POLICY_RELOAD_SEC', '10'))
+_policy_reloader_started = False
+
+
+def _proctor_policy_for_exam(exam_obj) -> ProctorPolicy:
+    if exam_obj is None:
+        return DEFAULT_POLICY
+    cached = _proctor_policy_cache.get(exam_obj.id)
+    if cached is None:
+        raw = getattr(exam_obj, 'proctor_policy', None)
+        cached = _proctor_policy_cache[exam_obj.id] = (raw, compile_policy(raw))
+    return cached[1]
+
+
+def reload_proctor_policies(exam_ids=None) -> int:
+    """Recompile cached policies whose stored JSON changed and apply them to live sessions.
+
+    `exam_ids=None` checks every cached exam. Sessions in progress switch to
+    the new policy on their next frame and their pages get the new client
+    settings. Returns the number of policies that changed.
+    """
+    ids = list(_proctor_policy_cache) if exam_ids is None else [int(i) for i in exam_ids]
+    if not ids:
+        return 0
+    rows = dict(db.session.query(Exam.id, Exam.proctor_policy).filter(Exam.id.in_(ids)).all())
+    changed = {}
+    for exam_id in ids:
+        if exam_id not in rows:
+            _proctor_policy_cache.pop(exam_id, None)
+            continue
+        cached = _proctor_policy_cache.get(exam_id)
+        if cached is not None and cached[0] == rows[exam_id]:
+            continue
+        policy = compile_policy(rows[exam_id])
+        _proctor_policy_cache[exam_id] = (rows[exam_id], policy)
+        changed[exam_id] = policy
+    if changed:
+        for sid, state in list(proctor_session_state.items()):
+            policy = changed.get(state.get('exam_id'))
+            if policy is not None:
+                state['policy'] = policy
+                socketio.emit('proctor_policy', policy.client_settings(), to=_session_room(sid))
+    return len(changed)
+
+
+def start_policy_reloader() -> None:
+    """Poll for policy edits made on other workers (no-op with PROCTOR_POLICY_RELOAD_SEC=0)."""
+    global _policy_reloader_started
+    if PROCTOR_POLICY_RELOAD_SEC <= 0 or _policy_reloader_started:
+        return
+    _policy_reloader_started = True
+
+    def _loop():
+        while True:
+            socketio.sleep(PROCTOR_POLICY_RELOAD_SEC)
+            if not _proctor_policy_cache:
+                continue
+            try:
+                with app.app_context():
+                    reload_proctor_policies()
+            except Exception as ex:
+                print(f"Policy Reload Error: {ex}")
+
+    socketio.start_background_task(_loop)
+
+
+def _proctor_state(exam_session_id: int):
+    """Per-session proctoring state, created with the exam's proctoring policy on first use."""
+    state = proctor_session_state.get(exam_session_id)
+    if state is None:
+        s = ExamSession.query.get(exam_session_id)
+        exam_obj = Exam.query.get(s.exam_id) if s and s.exam_id else None
+        state = {'policy': _proctor_policy_for_exam(exam_obj), 'exam_id': exam_obj.id if exam_obj else None}
+        if exam_obj is not None and exam_obj.recording_enabled:
+            budget_mb = exam_obj.recording_budget_mb or RECORDING_DEFAULT_BUDGET_MB
+            state['recording'] = (exam_obj.id, max(1, int(exam_obj.recording_interval_sec or 10)), budget_mb * 1024 * 1024)
+            state['recorded_at'] = 0.0
+        proctor_session_state[exam_session_id] = state
+    return state
+
+
+def _recording_settings(data) -> dict:
+    """Validated Exam recording columns present in a request body; raises ValueError."""
+    out = {}
+    if 'recording_enabled' in data:
+        out['recording_enabled'] = bool(data.get('recording_enabled'))
+    for key in ('recording_interval_sec', 'recording_budget_mb'):
+        if key in data:
+            raw = data.get(key)
+            if raw in (None, '') and key == 'recording_budget_mb':
+                out[key] = None
+                continue
+            try:
+                value = int(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid value for {key}')
+            if value < 1:
+                raise ValueError(f'{key} must be >= 1')
+            out[key] = value
+    return out
+
+
+def _end_proctor_session(exam_session_id: int) -> None:
+    """Drop in-memory proctoring state and close the session's recording, if any."""
+    state = proctor_session_state.pop(exam_session_id, None)
+    if state and state.get('recording'):
+        session_recorder.close_session(state['recording'][0], exam_session_id)
+    deadline_scheduler.remove(exam_session_id)
+
+
+# --- Exam deadlines (server is the timing authority) ---
+
+DEFAULT_EXAM_MINUTES = 30  # same fallback as exam.js
+EXAM_GRACE_SEC = float(os.environ.get('EXAM_GRACE_SEC', '30'))
+
+
+def _utc_ts(dt: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime (as stored by the models)."""
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+def _session_deadline(s: ExamSession, exam_obj) -> float:
+    minutes = (exam_obj.duration_minutes if exam_obj else None) or DEFAULT_EXAM_MINUTES
+    return _utc_ts(s.start_time or datetime.utcnow()) + minutes * 60.0
+
+
+def _session_room(exam_session_id: int) -> str:
+    return f"exam_session_{exam_session_id}"
+
+
+def _time_sync_payload(deadline: float) -> dict:
+    now = time.time()
+    return {'remaining_sec': max(0.0, round(deadline - now, 1)), 'server_time': now}
+
+
+def _on_deadline_warn(batch) -> None:
+    for sid, deadline in batch:
+        socketio.emit('time_sync', _time_sync_payload(deadline), to=_session_room(sid))
+
+
+def _on_deadline_reached(batch) -> None:
+    for sid, deadline in batch:
+        socketio.emit('force_submit', {'grace_sec': EXAM_GRACE_SEC}, to=_session_room(sid))
+
+
+# Sessions still Active after deadline + grace were never submitted: close
+# them with zero marks in one statement per batch. RETURNING gives the rows
+# this statement actually closed; a session submitted (or closed by another
+# worker) in the meantime is not in it.
+_EXPIRE_SESSIONS_SQL = (
+    "UPDATE exam_session SET status = 'Completed', end_time = :now, submitted_at = :now, "
+    "obtained_marks = 0, percentage = 0, results_published = 0, "
+    "total_marks = (SELECT e.total_marks FROM exam e WHERE e.id = exam_session.exam_id), "
+    "result_status = CASE WHEN COALESCE((SELECT e.pass_percentage FROM exam e WHERE e.id = exam_session.exam_id), 0) <= 0 "
+    "THEN 'Passed' ELSE 'Failed' END "
+    "WHERE status = 'Active' AND {where} "
+    "RETURNING id, user_id, exam_id"
+)
+_SET_SESSION_TOTAL_SQL = "UPDATE exam_session SET total_marks = :total WHERE id = :id"
+
+# Backstop for sessions no live scheduler tracks (started on another worker,
+# or whose worker restarted): Active sessions whose deadline passed more than
+# :overdue_sec ago, computed from the exam's duration in the database.
+_OVERDUE_SESSIONS_WHERE = (
+    "start_time IS NOT NULL AND (julianday(:now) - julianday(start_time)) * 86400.0 >= "
+    "COALESCE(NULLIF((SELECT e.duration_minutes FROM exam e WHERE e.id = exam_session.exam_id), 0), :default_minutes) * 60.0 "
+    "+ :overdue_sec"
+)
+EXPIRY_SWEEP_SEC = float(os.environ.get('EXPIRY_SWEEP_SEC', '60'))
+
+
+def _set_drawn_totals(rows) -> None:
+    """Pooled exams give each attempt a subset of the bank: replace the bank
+    total the expiry SQL wrote with what this attempt would have been graded on."""
+    by_exam = {}
+    for sid, _, exam_id in rows:
+        by_exam.setdefault(exam_id, []).append(sid)
+    if not by_exam:
+        return
+    randomizer = get_question_randomizer()
+    for exam_obj in Exam.query.filter(Exam.id.in_(list(by_exam)), Exam.pool_draw.isnot(None)):
+        payload = _exam_payload(exam_obj)
+        if not payload.policy.pool_draw:
+            continue
+        db.session.execute(text(_SET_SESSION_TOTAL_SQL), [
+            {'id': sid, 'total': randomizer.totals(payload, randomizer.plan(payload, sid))[1]}
+            for sid in by_exam[exam_obj.id]
+        ])
+
+
+def _close_expired_sessions(where: str, params: dict) -> list:
+    """Close the Active sessions matching `where`; notify only the ones this call closed."""
+    with app.app_context():
+        rows = db.session.execute(
+            text(_EXPIRE_SESSIONS_SQL.format(where=where)),
+            {'now': datetime.utcnow(), **params},
+        ).fetchall()
+        _set_drawn_totals(rows)
+        user_ids = [u for _, u, _ in rows]
+        invalidate_student_stats(user_ids)
+        db.session.commit()
+    eligibility.invalidate(*user_ids)
+    closed = [sid for sid, _, _ in rows]
+    for sid in closed:
+        _end_proctor_session(sid)
+        socketio.emit('exam_expired', {
+            'reason': 'Time is up. Your exam was closed.',
+            'redirect': '/student_dashboard',
+        }, to=_session_room(sid))
+    return closed
+
+
+def _finalize_expired_sessions(batch) -> None:
+    ids = [int(sid) for sid, _ in batch]
+    closed = set(_close_expired_sessions(f"id IN ({','.join(str(i) for i in ids)})", {}))
+    for sid in ids:
+        if sid not in closed:
+            _end_proctor_session(sid)  # submitted or closed elsewhere; drop local state only
+
+
+deadline_scheduler = DeadlineScheduler(
+    on_warn=_on_deadline_warn,
+    on_deadline=_on_deadline_reached,
+    on_expire=_finalize_expired_sessions,
+    grace_sec=EXAM_GRACE_SEC,
+)
+
+
+# Per-user exam eligibility (availability / reattempt rules), memoized;
+# invalidate on every path that completes or removes a user's sessions.
+eligibility = EligibilityService(ttl_sec=float(os.environ.get('ELIGIBILITY_TTL_SEC', '300')))
+
+
+# Admission control for exam starts: at most ADMISSION_RATE new sessions per
+# second (bursts of ADMISSION_BURST); the rest wait in the waiting room.
+# ADMISSION_RATE=0 disables the gate.
+#
+# Sessions pre-created by reserve-sessions ('Reserved', start_time = when
+# reserved) that nobody claims within RESERVATION_TTL_HOURS are deleted by the
+# expiry sweeper.
+admission_gate = AdmissionGate(
+    rate=float(os.environ.get('ADMISSION_RATE', '50')),
+    burst=float(os.environ.get('ADMISSION_BURST', '100')),
+)
+RESERVATION_TTL_HOURS = float(os.environ.get('RESERVATION_TTL_HOURS', '24'))
+_EXPIRE_RESERVATIONS_SQL = "DELETE FROM exam_session WHERE status = 'Reserved' AND start_time < :cutoff"
+WAITING_ROOM = 'waiting_room'
+
+
+def start_admission_gate() -> None:
+    admission_gate.start(
+        socketio.start_background_task,
+        socketio.sleep,
+        lambda progress: socketio.emit('queue_progress', progress, to=WAITING_ROOM),
+    )
+
+
+def start_deadline_scheduler(load_active: bool = True) -> int:
+    """Start the scheduler loop (once, before serving); with `load_active`, track every Active session first.
+
+    Pre-fork workers pass load_active=False: each tracks the sessions it
+    starts or whose socket connects to it, and one worker runs
+    `start_expiry_sweeper` for the rest.
+    """
+    loaded = 0
+    if load_active:
+        with app.app_context():
+            rows = (
+                db.session.query(ExamSession, Exam)
+                .outerjoin(Exam, ExamSession.exam_id == Exam.id)
+                .filter(ExamSession.status == 'Active')
+                .all()
+            )
+            loaded = deadline_scheduler.add_many((s.id, _session_deadline(s, e)) for s, e in rows)
+    deadline_scheduler.start(socketio.start_background_task, socketio.sleep)
+    return loaded
+
+
+def _track_session_deadline(exam_session_id: int):
+    """Deadline of an Active session, registering it with this process's scheduler if it is new here."""
+    deadline = deadline_scheduler.deadline(exam_session_id)
+    if deadline is None:
+        s = ExamSession.query.get(exam_session_id)
+        if s is not None and s.status == 'Active':
+            deadline = _session_deadline(s, Exam.query.get(s.exam_id) if s.exam_id else None)
+            deadline_scheduler.add(exam_session_id, deadline)
+    return deadline
+
+
+_expiry_sweeper_started = False
+
+
+def start_expiry_sweeper() -> None:
+    """Every EXPIRY_SWEEP_SEC, close Active sessions overdue by grace + one sweep interval.
+
+    Also deletes reservations older than RESERVATION_TTL_HOURS. Run it in one
+    process only. The extra interval leaves the finalization
+    (and the exam_expired event) to the worker whose scheduler tracks the
+    session whenever there is one.
+    """
+    global _expiry_sweeper_started
+    if EXPIRY_SWEEP_SEC <= 0 or _expiry_sweeper_started:
+        return
+    _expiry_sweeper_started = True
+
+    def _loop():
+        while True:
+            socketio.sleep(EXPIRY_SWEEP_SEC)
+            try:
+                closed = _close_expired_sessions(_OVERDUE_SESSIONS_WHERE, {
+                    'default_minutes': DEFAULT_EXAM_MINUTES, 'overdue_sec': EXAM_GRACE_SEC + EXPIRY_SWEEP_SEC,
+                })
+                if closed:
+                    print(f"ℹ️  Closed {len(closed)} overdue exam sessions")
+                with app.app_context():
+                    cutoff = datetime.utcnow() - timedelta(hours=RESERVATION_TTL_HOURS)
+                    dropped = db.session.execute(text(_EXPIRE_RESERVATIONS_SQL), {'cutoff': cutoff}).rowcount
+                    db.session.commit()
+                if dropped:
+                    print(f"ℹ️  Dropped {dropped} unused session reservations")
+            except Exception as e:
+                print(f"Expiry Sweeper Error: {e}")
+
+    socketio.start_background_task(_loop)
+
 def get_proctor():
     global proctor
     if proctor is None:
@@ -282,8 +1306,41 @@ def get_proctor():
     return proctor
 
 
+def _process_memory_kb():
+    """RSS and PSS of this process in KiB (Linux /proc); PSS splits shared pages across sharers."""
+    out = {'rss_kb': None, 'pss_kb': None}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    out['rss_kb'] = int(line.split()[1])
+                    break
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    out['pss_kb'] = int(line.split()[1])
+                    break
+    except Exception:
+        pass
+    return out
+
+
 # --- Routes ---
 
+@app.route('/healthz/ready')
+def readiness():
+    """Readiness probe: 200 once the proctoring models are loaded in this worker."""
+    ready = proctor_engine.models_loaded
+    return jsonify({
+        'ready': ready,
+        'pid': os.getpid(),
+        'models': {
+            'haar_cascade': proctor_engine.cv_available,
+            'mediapipe_face_mesh': proctor is not None,
+        },
+        'memory': _process_memory_kb(),
+    }), (200 if ready else 503)
+
 @app.route('/')
 def root():
     return render_template('home.html')
@@ -327,8 +1384,12 @@ def login():
         # Database Lookup
         user = User.query.filter_by(email=email).first()
 
-        # 4. Verify Password
-        if user and check_password_hash(user.password, password): 
+        # 4. Verify Password (transparently upgrading hashes from older policies)
+        ok, upgraded_hash = verify_password(user.password, password) if user else (False, None)
+        if ok:
+            if upgraded_hash:
+                user.password = upgraded_hash
+
             session['user_id'] = user.id
             session['role'] = user.role
 
@@ -337,11 +1398,12 @@ def login():
                 user.student_uid = f"STD-{year}-{str(user.id).zfill(6)}"
                 db.session.add(user)
             
-            # Record activity
-            login_entry = LoginActivity(user_id=user.id, email=email)
-            db.session.add(login_entry)
-            db.session.commit()
-            
+            # Audit entries are written in batches; only a rehash or a new
+            # student id needs a commit on the request path.
+            login_audit.record(user.id, email, user.role)
+            if db.session.dirty:
+                db.session.commit()
+
             target_url = url_for('admin_dashboard') if user.role == 'admin' else url_for('student_dashboard')
 
             if request.is_json:
@@ -465,7 +1527,7 @@ def register():
                 return render_template('register.html', error=msg)
 
         # 4. Create User (Hash Password)
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_password = hash_password(password)
 
 
         new_user = User(
@@ -480,13 +1542,18 @@ def register():
             face_image_path=face_image_path,
             proctoring_consent=bool(proctoring_consent),
             terms_accepted=bool(terms_accepted),
-            registration_complete=True
+            registration_complete=True,
+            uploads_status='pending' if (id_proof_path or face_image_path) else None,
+            uploads_attempts=1 if (id_proof_path or face_image_path) else 0,
         )
 
         try:
             db.session.add(new_user)
             db.session.commit()
 
+            if new_user.uploads_status == 'pending':
+                upload_normalizer.submit(new_user.id, id_proof_path, face_image_path)
+
             if request.is_json:
                 return jsonify({'success': True, 'redirect': url_for('login')})
             return redirect(url_for('login'))
@@ -511,7 +1578,7 @@ def forgot_password_request():
         return jsonify({'success': True, 'message': 'If the email exists, an OTP has been sent.'})
 
     otp_code = ''.join(str(secrets.randbelow(10)) for _ in range(6))
-    otp_hash = generate_password_hash(otp_code, method='pbkdf2:sha256')
+    otp_hash = hash_otp(app.config['SECRET_KEY'], user.id, otp_code)
     expires_at = datetime.utcnow() + timedelta(minutes=10)
 
     rec = PasswordOTP(user_id=user.id, otp_hash=otp_hash, expires_at=expires_at, used=False)
@@ -534,7 +1601,7 @@ def forgot_password_verify():
         return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
 
     rec = PasswordOTP.query.filter_by(user_id=user.id, used=False).order_by(PasswordOTP.created_at.desc()).first()
-    if not rec or rec.expires_at < datetime.utcnow() or not check_password_hash(rec.otp_hash, otp):
+    if not rec or rec.expires_at < datetime.utcnow() or not verify_otp(app.config['SECRET_KEY'], user.id, otp, rec.otp_hash):
         return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
 
     return jsonify({'success': True, 'message': 'OTP verified'})
@@ -556,11 +1623,11 @@ def forgot_password_reset():
         return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
 
     rec = PasswordOTP.query.filter_by(user_id=user.id, used=False).order_by(PasswordOTP.created_at.desc()).first()
-    if not rec or rec.expires_at < datetime.utcnow() or not check_password_hash(rec.otp_hash, otp):
+    if not rec or rec.expires_at < datetime.utcnow() or not verify_otp(app.config['SECRET_KEY'], user.id, otp, rec.otp_hash):
         return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
 
     rec.used = True
-    user.password = generate_password_hash(new_password, method='pbkdf2:sha256')
+    user.password = hash_password(new_password)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Password updated successfully'})
@@ -582,15 +1649,17 @@ def admin_login():
         # Only check admin users
         user = User.query.filter_by(email=email, role='admin').first()
 
-        if user and check_password_hash(user.password, password):
+        ok, upgraded_hash = verify_password(user.password, password) if user else (False, None)
+        if ok:
+            if upgraded_hash:
+                user.password = upgraded_hash
 
             session['user_id'] = user.id
             session['role'] = 'admin'
 
-            # Log activity (optional)
-            login_entry = LoginActivity(user_id=user.id, email=email)
-            db.session.add(login_entry)
-            db.session.commit()
+            login_audit.record(user.id, email, 'admin')
+            if upgraded_hash:
+                db.session.commit()
 
             return redirect(url_for('admin_dashboard'))
 
@@ -602,8 +1671,17 @@ def admin_login():
     return render_template('admin_login.html')
 
 
-@app.route('/uploads/<path:filename>')
-def uploaded_file(filename: str):
+@app.errorhandler(413)
+def request_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    msg = f'Upload too large (max {limit_mb} MB)'
+    if request.path.startswith('/register') and not request.is_json:
+        return render_template('register.html', error=msg), 413
+    return jsonify({'success': False, 'message': msg}), 413
+
+
+def _authorize_upload(filename: str) -> str:
+    """Basename of an upload the current user may view; aborts otherwise."""
     if 'user_id' not in session:
         abort(401)
 
@@ -622,8 +1700,23 @@ def uploaded_file(filename: str):
         }
         if filename not in allowed:
             abort(403)
+    return filename
 
-    return send_from_directory(UPLOAD_DIR, filename, as_attachment=False)
+
+@app.route('/uploads/<path:filename>')
+def uploaded_file(filename: str):
+    filename = _authorize_upload(filename)
+    # Upload names carry a random token and are never rewritten.
+    return file_sender.send(UPLOAD_DIR, filename, max_age=ONE_YEAR, immutable=True, private=True)
+
+
+@app.route('/uploads/thumbs/<filename>')
+def uploaded_thumbnail(filename: str):
+    filename = _authorize_upload(filename)
+    thumb = ensure_thumbnail(os.path.join(UPLOAD_DIR, filename), THUMB_DIR, THUMB_SIZE)
+    if thumb is None:
+        abort(404)
+    return file_sender.send(THUMB_DIR, thumb, mimetype='image/jpeg', max_age=ONE_YEAR, immutable=True, private=True)
 
 
 @app.route('/student_dashboard')
@@ -638,86 +1731,23 @@ def student_dashboard():
     exams = Exam.query.filter_by(is_active=True).order_by(Exam.created_at.desc()).all()
     upcoming_exam = exams[0] if exams else None
 
-    def _exam_access_for_user(exam_obj: Exam, user_obj: User):
-        now = datetime.utcnow()
-        today = now.date()
-
-        available_from = getattr(exam_obj, 'available_from', None)
-        if available_from and today < available_from:
-            return {
-                'allowed': False,
-                'badge_text': f"Available after {available_from.strftime('%b %d, %Y')}",
-            }
-
-        last = (
-            ExamSession.query
-            .filter_by(user_id=user_obj.id, exam_id=exam_obj.id)
-            .filter(ExamSession.status == 'Completed')
-            .filter(ExamSession.submitted_at.isnot(None))
-            .order_by(ExamSession.submitted_at.desc())
-            .first()
-        )
-
-        if not last:
-            return {'allowed': True, 'badge_text': 'Available now'}
-
-        allow_reattempt = bool(getattr(exam_obj, 'allow_reattempt', False))
-        if not allow_reattempt:
-            return {'allowed': False, 'badge_text': 'Single attempt completed'}
-
-        days = getattr(exam_obj, 'reattempt_after_days', None)
-        try:
-            days = int(days) if days is not None else None
-        except Exception:
-            days = None
-        if not days or days <= 0:
-            return {'allowed': True, 'badge_text': 'Available now'}
-
-        last_date = (last.submitted_at or last.end_time or last.start_time)
-        last_day = last_date.date() if last_date else today
-        unlock_day = last_day + timedelta(days=days)
-        if today < unlock_day:
-            return {'allowed': False, 'badge_text': f"Reattempt locked ({days} days)"}
-
-        return {'allowed': True, 'badge_text': 'Available now'}
-
+    access = eligibility.access(user.id, exams)
     for e in exams:
-        access = _exam_access_for_user(e, user)
-        setattr(e, '_access_allowed', bool(access.get('allowed')))
-        setattr(e, '_access_badge_text', access.get('badge_text') or 'Available')
-
-    completed_sessions = (
-        ExamSession.query
-        .filter_by(user_id=user.id, status='Completed')
-        .filter(ExamSession.submitted_at.isnot(None))
-        .order_by(ExamSession.submitted_at.desc())
-        .all()
-    )
-
-    upcoming_exam = exams[0] if exams else None
-
-    exams_completed = len(completed_sessions)
-    avg_score = 0.0
-    if exams_completed:
-        vals = [float(s.percentage or 0.0) for s in completed_sessions]
-        avg_score = sum(vals) / len(vals)
-
-    attempted_exam_ids = {s.exam_id for s in completed_sessions if s.exam_id is not None}
-    pending_exams = 0
-    for e in exams:
-        if e.id not in attempted_exam_ids:
-            pending_exams += 1
-
-    recent_results = []
-    for s in completed_sessions[:5]:
-        e = Exam.query.get(s.exam_id) if s.exam_id else None
-        recent_results.append({
-            'session_id': s.id,
-            'exam_name': (e.name if e else 'Exam'),
-            'date': (s.submitted_at or s.end_time or s.start_time),
-            'percentage': float(s.percentage or 0.0),
-            'result_status': (s.result_status or 'Completed'),
-        })
+        setattr(e, '_access_allowed', access[e.id].allowed)
+        setattr(e, '_access_badge_text', access[e.id].badge_text)
+
+    # Counts and recent results come from the student's stats record
+    # (one row, kept current by each submission).
+    stats = student_stats(user.id)
+
+    # Exams with a completed attempt, read fresh: the eligibility memo can lag
+    # a submission taken by another worker by up to its TTL.
+    attempted_exam_ids = {
+        exam_id for (exam_id,) in db.session.query(ExamSession.exam_id)
+        .filter(ExamSession.user_id == user.id, ExamSession.status == 'Completed')
+        .distinct()
+    }
+    pending_exams = sum(1 for e in exams if e.id not in attempted_exam_ids)
 
     initials = ''.join([p[0] for p in (user.name or '').split()[:2]]).upper() or 'U'
 
@@ -727,10 +1757,10 @@ def student_dashboard():
         initials=initials,
         exams=exams,
         upcoming_exam=upcoming_exam,
-        exams_completed=exams_completed,
-        avg_score=avg_score,
+        exams_completed=stats.exams_completed,
+        avg_score=stats.avg_score,
         pending_exams=pending_exams,
-        recent_results=recent_results,
+        recent_results=stats.recent_results[:5],
     )
 
 @app.route('/profile')
@@ -742,24 +1772,8 @@ def profile():
     if not user or user.role != 'student':
         return redirect(url_for('login'))
 
-    completed_sessions = (
-        ExamSession.query
-        .filter_by(user_id=user.id, status='Completed')
-        .filter(ExamSession.submitted_at.isnot(None))
-        .order_by(ExamSession.submitted_at.desc())
-        .limit(10)
-        .all()
-    )
-    history = []
-    for s in completed_sessions:
-        e = Exam.query.get(s.exam_id) if s.exam_id else None
-        history.append({
-            'session_id': s.id,
-            'exam_name': (e.name if e else 'Exam'),
-            'date': (s.submitted_at or s.end_time or s.start_time),
-            'percentage': float(s.percentage or 0.0),
-            'result_status': (s.result_status or 'Completed'),
-        })
+    # Last 10 completed attempts, straight from the stats record.
+    history = student_stats(user.id).recent_results
 
     initials = ''.join([p[0] for p in (user.name or '').split()[:2]]).upper() or 'U'
     face_filename = _safe_basename(user.face_image_path)
@@ -798,40 +1812,31 @@ def exam():
     if not target_exam or not target_exam.is_active:
         return redirect(url_for('student_dashboard'))
 
-    today = datetime.utcnow().date()
-    available_from = getattr(target_exam, 'available_from', None)
-    if available_from and today < available_from:
+    # Fresh read: another worker may have taken this user's last submission.
+    if not eligibility.access_for(user.id, target_exam).allowed:
         return redirect(url_for('student_dashboard'))
 
-    last = (
-        ExamSession.query
-        .filter_by(user_id=user.id, exam_id=target_exam.id)
-        .filter(ExamSession.status == 'Completed')
-        .filter(ExamSession.submitted_at.isnot(None))
-        .order_by(ExamSession.submitted_at.desc())
-        .first()
-    )
-    if last:
-        allow_reattempt = bool(getattr(target_exam, 'allow_reattempt', False))
-        if not allow_reattempt:
-            return redirect(url_for('student_dashboard'))
-
-        days = getattr(target_exam, 'reattempt_after_days', None)
-        try:
-            days = int(days) if days is not None else None
-        except Exception:
-            days = None
-        if days and days > 0:
-            last_date = (last.submitted_at or last.end_time or last.start_time)
-            last_day = last_date.date() if last_date else today
-            unlock_day = last_day + timedelta(days=days)
-            if today < unlock_day:
-                return redirect(url_for('student_dashboard'))
-
-    new_session = ExamSession(user_id=session['user_id'], exam_id=exam_id)
-    db.session.add(new_session)
+    # The ticket rides in the signed session cookie, so any worker honours it.
+    admitted, ticket = admission_gate.admit(session.get('admission_ticket'))
+    if not admitted:
+        session['admission_ticket'] = ticket
+        return render_template(
+            'waiting_room.html', exam_id=exam_id, ticket=ticket,
+            position=admission_gate.position(ticket), **admission_gate.progress(),
+        )
+    session.pop('admission_ticket', None)
+
+    # Candidates enrolled ahead of time claim their pre-created row instead of inserting one.
+    new_session = ExamSession.query.filter_by(user_id=user.id, exam_id=exam_id, status='Reserved').first()
+    if new_session is not None:
+        new_session.status = 'Active'
+        new_session.start_time = datetime.utcnow()
+    else:
+        new_session = ExamSession(user_id=session['user_id'], exam_id=exam_id)
+        db.session.add(new_session)
     db.session.commit()
     session['exam_session_id'] = new_session.id
+    deadline_scheduler.add(new_session.id, _session_deadline(new_session, target_exam))
     
     return render_template('exam.html', user_name=user.name or 'Student', exam_id=exam_id)
 
@@ -898,6 +1903,10 @@ def exam_report_pdf(session_id: int):
         .all()
     )
 
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
     width, height = A4
@@ -1015,6 +2024,8 @@ def admin_parse_exam_csv():
     except Exception:
         return jsonify({'success': False, 'message': 'Failed to read CSV'}), 400
 
+    import csv
+
     expected = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option', 'marks']
     reader = csv.reader(text_data.splitlines())
     rows = list(reader)
@@ -1078,10 +2089,10 @@ def admin_create_exam_api():
     name = (data.get('name') or '').strip()
     description = (data.get('description') or '').strip()
     duration_minutes = data.get('duration_minutes')
-    total_marks = data.get('total_marks')
     allow_reattempt = bool(data.get('allow_reattempt'))
     reattempt_after_days = data.get('reattempt_after_days')
     available_from_raw = data.get('available_from')
+    proctor_policy_raw = data.get('proctor_policy')
     questions = data.get('questions') or []
 
     if not name:
@@ -1094,10 +2105,27 @@ def admin_create_exam_api():
     except Exception:
         duration_val = None
 
+    proctor_policy_val = None
+    if proctor_policy_raw:
+        try:
+            ProctorPolicy.from_dict(proctor_policy_raw)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Invalid proctor policy: {e}'}), 400
+        proctor_policy_val = json.dumps(proctor_policy_raw)
+
     try:
-        total_val = int(total_marks) if total_marks is not None else None
-    except Exception:
-        total_val = None
+        recording_val = _recording_settings(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    pool_draw_raw = data.get('pool_draw')
+    pool_draw_val = None
+    if pool_draw_raw:
+        from randomization import RandomizationPolicy
+        try:
+            pool_draw_val = json.dumps(dict(RandomizationPolicy.parse_pool_draw(pool_draw_raw)))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Invalid pool_draw: {e}'}), 400
 
     try:
         available_from_val = None
@@ -1118,11 +2146,17 @@ def admin_create_exam_api():
             name=name,
             description=description or None,
             duration_minutes=duration_val,
-            total_marks=int(total_val or 0),
+            total_marks=0,
+            question_count=0,
             is_active=True,
             allow_reattempt=allow_reattempt,
             reattempt_after_days=reattempt_days_val,
             available_from=available_from_val,
+            proctor_policy=proctor_policy_val,
+            shuffle_questions=bool(data.get('shuffle_questions')),
+            shuffle_options=bool(data.get('shuffle_options')),
+            pool_draw=pool_draw_val,
+            **recording_val,
         )
         db.session.add(exam)
         db.session.flush()
@@ -1138,6 +2172,7 @@ def admin_create_exam_api():
             d = (q.get('option_d') or '').strip()
             correct_opt = q.get('correct_option')
             marks = q.get('marks')
+            pool = (str(q.get('pool') or '').strip() or None)
 
             if not q_text or not a or not b or not c_opt or not d:
                 continue
@@ -1165,6 +2200,7 @@ def admin_create_exam_api():
                     correct_option=correct_opt,
                     marks=marks,
                     order_index=i,
+                    pool=pool[:50] if pool else None,
                 )
             )
             inserted += 1
@@ -1173,13 +2209,8 @@ def admin_create_exam_api():
             db.session.rollback()
             return jsonify({'success': False, 'message': 'No valid questions to insert'}), 400
 
-        if not total_val:
-            try:
-                total_val = sum(int(q.get('marks') or 0) for q in questions)
-            except Exception:
-                total_val = inserted
-            exam.total_marks = int(total_val or 0)
-
+        # total_marks is always derived from the stored questions so it cannot drift.
+        _refresh_exam_totals(exam)
         db.session.commit()
         return jsonify({'success': True, 'exam_id': exam.id})
     except Exception:
@@ -1206,7 +2237,15 @@ def admin_list_exams_api():
             'allow_reattempt': bool(getattr(e, 'allow_reattempt', False)),
             'reattempt_after_days': getattr(e, 'reattempt_after_days', None),
             'available_from': (getattr(e, 'available_from', None).strftime('%Y-%m-%d') if getattr(e, 'available_from', None) else None),
-            'question_count': ExamQuestion.query.filter_by(exam_id=e.id).count(),
+            'question_count': int(e.question_count or 0),
+            'proctor_policy': json.loads(e.proctor_policy) if e.proctor_policy else None,
+            'shuffle_questions': bool(e.shuffle_questions),
+            'shuffle_options': bool(e.shuffle_options),
+            'pool_draw': json.loads(e.pool_draw) if e.pool_draw else None,
+            'recording_enabled': bool(e.recording_enabled),
+            'recording_interval_sec': e.recording_interval_sec,
+            'recording_budget_mb': e.recording_budget_mb,
+            'recording_usage_mb': round(session_recorder.usage_bytes(e.id) / (1024 * 1024), 1) if e.recording_enabled else None,
         })
     return jsonify({'success': True, 'exams': out})
 
@@ -1221,11 +2260,178 @@ def admin_update_exam_api(exam_id: int):
 
     if 'is_active' in data:
         e.is_active = bool(data.get('is_active'))
+    try:
+        for key, value in _recording_settings(data).items():
+            setattr(e, key, value)
+    except ValueError as ex:
+        return jsonify({'success': False, 'message': str(ex)}), 400
+    if 'proctor_policy' in data:
+        raw = data.get('proctor_policy')
+        try:
+            ProctorPolicy.from_dict(raw)
+        except ValueError as ex:
+            return jsonify({'success': False, 'message': f'Invalid proctor policy: {ex}'}), 400
+        e.proctor_policy = json.dumps(raw) if raw else None
 
     db.session.commit()
+    if 'proctor_policy' in data:
+        reload_proctor_policies([e.id])
     return jsonify({'success': True})
 
 
+@app.route('/admin/api/exams/<int:exam_id>/reserve-sessions', methods=['POST'])
+def admin_reserve_exam_sessions(exam_id: int):
+    """Bulk pre-create 'Reserved' sessions so exam start only flips a row to Active.
+
+    Body: {"user_ids": [...]} (default: every registered student). Unclaimed
+    reservations are dropped after RESERVATION_TTL_HOURS.
+    """
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    e = Exam.query.get_or_404(exam_id)
+    data = request.get_json(silent=True) or {}
+    user_ids = data.get('user_ids')
+    q = db.session.query(User.id).filter(User.role == 'student')
+    if user_ids is not None:
+        if not isinstance(user_ids, list):
+            return jsonify({'success': False, 'message': 'user_ids must be a list'}), 400
+        try:
+            user_ids = [int(u) for u in user_ids]
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'user_ids must be integers'}), 400
+        q = q.filter(User.id.in_(user_ids))
+    else:
+        q = q.filter(User.registration_complete.is_(True))
+    candidates = {uid for (uid,) in q.all()}
+
+    already = {
+        uid for (uid,) in db.session.query(ExamSession.user_id)
+        .filter(ExamSession.exam_id == e.id, ExamSession.status.in_(('Reserved', 'Active')))
+        .all()
+    }
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': uid, 'exam_id': e.id, 'start_time': now, 'status': 'Reserved', 'warnings_count': 0, 'cheating_status': False}
+        for uid in sorted(candidates - already)
+    ]
+    if rows:
+        db.session.execute(ExamSession.__table__.insert(), rows)
+        db.session.commit()
+    return jsonify({'success': True, 'reserved': len(rows), 'skipped': len(candidates) - len(rows)})
+
+
+@app.route('/admin/api/exams/<int:exam_id>/analytics')
+def admin_exam_analytics(exam_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    e = Exam.query.get_or_404(exam_id)
+    force = request.args.get('refresh') == 'full'
+    return jsonify({'success': True, 'analytics': get_exam_analytics().get(e, force=force)})
+
+
+@app.route('/admin/api/exams/<int:exam_id>/collusion')
+def admin_exam_collusion(exam_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    e = Exam.query.get_or_404(exam_id)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    pairs = (
+        CollusionPair.query.filter_by(exam_id=exam_id)
+        .order_by(CollusionPair.z_score.desc())
+        .limit(limit)
+        .all()
+    )
+    session_ids = {p.session_a for p in pairs} | {p.session_b for p in pairs}
+    candidates = {}
+    if session_ids:
+        rows = (
+            db.session.query(ExamSession.id, ExamSession.percentage, User.id, User.name, User.email)
+            .join(User, User.id == ExamSession.user_id)
+            .filter(ExamSession.id.in_(session_ids))
+            .all()
+        )
+        candidates = {
+            sid: {'session_id': sid, 'user_id': uid, 'name': name, 'email': email, 'percentage': pct}
+            for sid, pct, uid, name, email in rows
+        }
+
+    from collusion import group_pairs
+
+    return jsonify({
+        'success': True,
+        'scanned_at': e.collusion_scanned_at.isoformat() if e.collusion_scanned_at else None,
+        'scan_pending': e.collusion_scan_requested is not None,
+        'pairs': [
+            {
+                'a': candidates.get(p.session_a, {'session_id': p.session_a}),
+                'b': candidates.get(p.session_b, {'session_id': p.session_b}),
+                'shared_wrong': p.shared_wrong,
+                'both_wrong': p.both_wrong,
+                'expected': p.expected,
+                'z_score': p.z_score,
+            }
+            for p in pairs
+        ],
+        'groups': [list(g) for g in group_pairs(pairs)],
+    })
+
+
+@app.route('/admin/api/exams/<int:exam_id>/collusion/scan', methods=['POST'])
+def admin_exam_collusion_scan(exam_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    e = Exam.query.get_or_404(exam_id)
+    method = (request.get_json(silent=True) or {}).get('method')
+    if method not in (None, 'exact', 'lsh'):
+        return jsonify({'success': False, 'message': 'method must be exact or lsh'}), 400
+    # Queued for the collusion monitor; GET .../collusion shows when it ran.
+    e.collusion_scan_requested = method or 'auto'
+    db.session.commit()
+    return jsonify({'success': True, 'queued': True}), 202
+
+
+@app.route('/admin/api/exams/<int:exam_id>/publish-results', methods=['POST'])
+def admin_publish_results(exam_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    e = Exam.query.get_or_404(exam_id)
+    try:
+        result = publish_exam_results(e, _results_notification_body)
+    except Exception:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Failed to publish results'}), 500
+    return jsonify({
+        'success': True,
+        'published': result.published,
+        'students': result.students,
+        'notifications': result.notifications,
+    })
+
+
+@app.route('/admin/api/purge-jobs/<int:job_id>')
+def admin_purge_job(job_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    job = PurgeJob.query.get_or_404(job_id)
+    return jsonify({
+        'success': True,
+        'id': job.id,
+        'target': job.target_table,
+        'target_id': job.target_id,
+        'status': job.status,
+        'rows_deleted': int(job.rows_deleted or 0),
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
 @app.route('/admin/api/exams/<int:exam_id>', methods=['DELETE'])
 def admin_delete_exam_api(exam_id: int):
     if 'role' not in session or session.get('role') != 'admin':
@@ -1233,11 +2439,11 @@ def admin_delete_exam_api(exam_id: int):
 
     e = Exam.query.get_or_404(exam_id)
     try:
-        # detach sessions (keep history)
-        ExamSession.query.filter_by(exam_id=e.id).update({'exam_id': None})
-        ExamQuestion.query.filter_by(exam_id=e.id).delete()
-        db.session.delete(e)
-        db.session.commit()
+        # Questions, their responses and collusion pairs go; sessions stay as
+        # history with exam_id cleared (see the ondelete rules on the models).
+        job = _delete_or_queue('exam', e.id)
+        if job is not None:
+            return jsonify({'success': True, 'queued': True, 'job_id': job.id, 'message': 'Deletion queued'}), 202
         return jsonify({'success': True})
     except Exception:
         db.session.rollback()
@@ -1251,15 +2457,16 @@ def list_exams():
     exams = Exam.query.filter_by(is_active=True).order_by(Exam.created_at.desc()).all()
     data = []
     for e in exams:
-        q_count = ExamQuestion.query.filter_by(exam_id=e.id).count()
+        # Pooled exams: what one attempt is given, not the whole bank.
+        count, marks = _exam_payload(e).drawn_totals() if e.pool_draw else (int(e.question_count or 0), e.total_marks)
         data.append({
             'id': e.id,
             'name': e.name,
             'description': e.description,
             'duration_minutes': e.duration_minutes,
-            'total_marks': e.total_marks,
+            'total_marks': marks,
             'pass_percentage': e.pass_percentage,
-            'question_count': q_count,
+            'question_count': count,
         })
     return jsonify({'success': True, 'exams': data})
 
@@ -1267,20 +2474,21 @@ def list_exams():
 @app.route('/api/exams/<int:exam_id>')
 def get_exam(exam_id: int):
     e = Exam.query.get_or_404(exam_id)
-    questions = (
-        ExamQuestion.query.filter_by(exam_id=e.id)
-        .order_by(ExamQuestion.order_index.asc(), ExamQuestion.id.asc())
-        .all()
-    )
-    q_data = []
-    for q in questions:
-        q_data.append({
-            'id': q.id,
-            'question_text': q.question_text,
-            'options': [q.option_a, q.option_b, q.option_c, q.option_d],
-            'marks': q.marks,
-            'order_index': q.order_index,
-        })
+
+    # Candidates get their own order, derived from (exam, session); anyone
+    # else (e.g. a preview) sees the canonical order.
+    session_id = session.get('exam_session_id')
+    if session_id is not None:
+        s = ExamSession.query.get(session_id)
+        if not s or s.exam_id != e.id or s.user_id != session.get('user_id'):
+            session_id = None
+
+    randomizer = get_question_randomizer()
+    payload = _exam_payload(e)
+    plan = randomizer.plan(payload, session_id)
+    q_data = randomizer.render(payload, plan)
+    # This attempt's total (a pooled exam draws a subset); previews get the expected one.
+    total_marks = randomizer.totals(payload, plan)[1] if session_id is not None else payload.drawn_totals()[1]
     return jsonify({
         'success': True,
         'exam': {
@@ -1288,7 +2496,7 @@ def get_exam(exam_id: int):
             'name': e.name,
             'description': e.description,
             'duration_minutes': e.duration_minutes,
-            'total_marks': e.total_marks,
+            'total_marks': total_marks,
             'pass_percentage': e.pass_percentage,
         },
         'questions': q_data,
@@ -1326,34 +2534,26 @@ def submit_exam_attempt():
     if not exam:
         return jsonify({'success': False, 'message': 'Exam not found'}), 400
 
-    questions = (
-        ExamQuestion.query.filter_by(exam_id=exam.id)
-        .order_by(ExamQuestion.order_index.asc(), ExamQuestion.id.asc())
-        .all()
-    )
+    if time.time() > _session_deadline(s, exam) + EXAM_GRACE_SEC:
+        return jsonify({'success': False, 'message': 'Exam time is over'}), 400
 
     ExamResponse.query.filter_by(session_id=s.id).delete()
 
+    # Answers are indices into the options as displayed; map them back
+    # through this session's plan before scoring.
+    randomizer = get_question_randomizer()
+    payload = _exam_payload(exam)
+    plan = randomizer.plan(payload, s.id)
+
     obtained = 0
     total = 0
-    for q in questions:
-        total += int(q.marks or 0)
-        raw_selected = answers.get(str(q.id))
-        selected = None
-        if raw_selected is not None:
-            try:
-                selected = int(raw_selected)
-            except Exception:
-                selected = None
-
-        is_correct = selected is not None and selected == q.correct_option
-        marks_awarded = int(q.marks or 0) if is_correct else 0
+    for question_id, selected, is_correct, marks_awarded, max_marks in randomizer.grade(payload, plan, answers):
+        total += max_marks
         obtained += marks_awarded
-
         db.session.add(
             ExamResponse(
                 session_id=s.id,
-                question_id=q.id,
+                question_id=question_id,
                 selected_option=selected,
                 is_correct=is_correct,
                 marks_awarded=marks_awarded,
@@ -1372,9 +2572,13 @@ def submit_exam_attempt():
     s.result_status = result_status
     if hasattr(s, 'results_published'):
         s.results_published = False
+    record_submission(s.user_id, s.id, exam.name, s.submitted_at, percentage, result_status)
     db.session.commit()
 
-    proctor_session_state.pop(s.id, None)
+    eligibility.invalidate(s.user_id)
+    if exam_analytics is not None:
+        exam_analytics.mark_stale(exam.id)
+    _end_proctor_session(s.id)
 
     return jsonify({
         'success': True,
@@ -1413,6 +2617,87 @@ def admin_stats():
         'total_students': total_students,
         'created_exams': created_exams,
         'pending_results': pending_results,
+        'queued_notifications': Notification.query.filter(Notification.sent_at.is_(None)).count(),
+    })
+
+
+@app.route('/admin/api/retention')
+def admin_retention_report():
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    sweeper = get_retention_sweeper()
+    return jsonify({
+        'policies': {
+            'warnings_days': RETAIN_WARNINGS_DAYS,
+            'responses_days': RETAIN_RESPONSES_DAYS,
+            'login_activity_days': LOGIN_RETENTION_DAYS,
+            'login_hourly_rollup_days': LOGIN_HOURLY_RETENTION_DAYS,
+            'recordings_days': RETAIN_RECORDINGS_DAYS,
+            'upload_orphan_grace_days': UPLOAD_ORPHAN_GRACE_DAYS,
+        },
+        'rules': [r.name for r in sweeper.rules],
+        'reclaimed': retention_report(),
+        'sweeper': dict(sweeper.stats),
+    })
+
+
+@app.route('/admin/api/mail/metrics')
+def admin_mail_metrics():
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    queue = get_mail_queue()
+    return jsonify({
+        'configured': queue is not None,
+        'metrics': queue.metrics() if queue is not None else None,
+    })
+
+
+@app.route('/admin/api/responses/metrics')
+def admin_response_metrics():
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'json_backend': app.json.backend,
+        'codings': list(response_compressor.codings()) if response_compressor.enabled else [],
+        'min_bytes': response_compressor.min_bytes,
+        'endpoints': response_metrics.snapshot(),
+    })
+
+
+@app.route('/admin/api/proctor/metrics')
+def admin_proctor_metrics():
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'face_mesh': proctor is not None,
+        'live_sessions': len(proctor_session_state),
+        'cascade': proctor_engine.metrics.snapshot(),
+    })
+
+
+@app.route('/admin/api/logins/activity')
+def admin_login_activity():
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    try:
+        days = int(request.args.get('days', 2 if granularity == 'hour' else 30))
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
+    days = max(1, min(days, LOGIN_HOURLY_RETENTION_DAYS if granularity == 'hour' else 366))
+
+    return jsonify({
+        'granularity': granularity,
+        'series': login_series(granularity, datetime.utcnow() - timedelta(days=days)),
+        'pending': login_audit.pending(),
+        'stats': dict(login_audit.stats),
     })
 
 
@@ -1421,7 +2706,13 @@ def admin_sessions():
     if 'role' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
 
-    sessions_data = ExamSession.query.order_by(ExamSession.start_time.desc()).limit(50).all()
+    sessions_data = (
+        ExamSession.query
+        .filter(ExamSession.status != 'Reserved')
+        .order_by(ExamSession.start_time.desc())
+        .limit(50)
+        .all()
+    )
     data = []
     for s in sessions_data:
         student = User.query.get(s.user_id)
@@ -1457,6 +2748,98 @@ def admin_sessions():
     return jsonify(data)
 
 
+@app.route('/admin/api/sessions/<int:session_id>/evidence')
+def admin_session_evidence(session_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    items = []
+    for entry in evidence_store.manifest(session_id):
+        items.append({
+            'warning_id': entry.get('warning_id'),
+            'violation': entry.get('violation'),
+            'timestamp': datetime.utcfromtimestamp(entry.get('timestamp') or 0).strftime('%Y-%m-%d %H:%M:%S'),
+            'bytes': entry.get('bytes'),
+            'url': url_for('admin_evidence_blob', blob_id=entry.get('blob')),
+        })
+    return jsonify({'success': True, 'session_id': session_id, 'evidence': items})
+
+
+@app.route('/admin/evidence/<blob_id>.jpg')
+def admin_evidence_blob(blob_id: str):
+    if 'role' not in session or session.get('role') != 'admin':
+        abort(403)
+
+    path = evidence_store.blob_path(blob_id)
+    if not path:
+        abort(404)
+    # Content-addressed: the bytes behind a URL never change.
+    resp = send_from_directory(os.path.dirname(path), os.path.basename(path), mimetype='image/jpeg', conditional=True)
+    resp.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return resp
+
+
+@app.route('/admin/api/sessions/<int:session_id>/recording')
+def admin_session_recording(session_id: int):
+    if 'role' not in session or session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    s = ExamSession.query.get_or_404(session_id)
+    reader = session_recorder.open(s.exam_id, s.id)
+    if reader is None or not len(reader):
+        return jsonify({'success': True, 'session_id': s.id, 'frames': 0, 'markers': []})
+    try:
+        start, end, frames = reader.start, reader.end, len(reader)
+    finally:
+        reader.close()
+
+    # Violation markers as offsets into the timelapse, for seeking.
+    markers = []
+    for w in Warning.query.filter_by(session_id=s.id).order_by(Warning.timestamp.asc()).all():
+        if w.timestamp is None:
+            continue
+        ts = _utc_ts(w.timestamp)
+        markers.append({'violation': w.violation_type, 'offset_sec': round(max(0.0, ts - start), 1)})
+
+    return jsonify({
+        'success': True,
+        'session_id': s.id,
+        'frames': frames,
+        'started_at': datetime.utcfromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_sec': round(end - start, 1),
+        'frame_url': url_for('admin_session_recording_frame', session_id=s.id),
+        'markers': markers,
+    })
+
+
+@app.route('/admin/recording/<int:session_id>/frame.jpg')
+def admin_session_recording_frame(session_id: int):
+    """Frame at `?t=<seconds from start>` (latest frame at or before it)."""
+    if 'role' not in session or session.get('role') != 'admin':
+        abort(403)
+
+    s = ExamSession.query.get_or_404(session_id)
+    try:
+        offset = float(request.args.get('t', 0))
+    except ValueError:
+        abort(400)
+    reader = session_recorder.open(s.exam_id, s.id)
+    if reader is None:
+        abort(404)
+    try:
+        found = reader.frame_at(reader.start + offset) if len(reader) else None
+        if found is None:
+            abort(404)
+        ts, frame = found
+        resp = make_response(frame)
+        resp.headers['X-Frame-Offset'] = f"{ts - reader.start:.1f}"
+    finally:
+        reader.close()
+    resp.mimetype = 'image/jpeg'
+    resp.headers['Cache-Control'] = 'private, max-age=300'
+    return resp
+
+
 @app.route('/admin/report/<int:session_id>.csv')
 def admin_session_report_csv(session_id: int):
     if 'role' not in session or session.get('role') != 'admin':
@@ -1502,25 +2885,41 @@ def admin_session_report_csv(session_id: int):
     return resp
 
 
+def _keyset_pages(query, page_size: int = 500):
+    """Rows of `query` by descending id, fetched one page at a time (`id < last_id LIMIT n`).
+
+    Each page is a separate, fully read query, so no SQLite read cursor stays
+    open while a streamed response waits on the client (an open cursor holds
+    the read lock and blocks writers' commits).
+    """
+    last_id = None
+    while True:
+        page = query if last_id is None else query.filter(User.id < last_id)
+        rows = page.order_by(User.id.desc()).limit(page_size).all()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1].id
+
+
 @app.route('/admin/users')
 def admin_users_api():
     if 'role' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
 
-    students = User.query.filter_by(role='student').order_by(User.id.desc()).all()
-    users_list = []
-    for s in students:
-        users_list.append({
-            'id': s.id,
-            'student_uid': s.student_uid,
-            'name': s.name,
-            'email': s.email,
-            'mobile_number': s.mobile_number,
-            'institution': s.institution,
-            'role': s.role,
-            'registration_complete': s.registration_complete,
-        })
-    return jsonify(users_list)
+    # Streamed: the whole student list is never held in memory at once.
+    students = _keyset_pages(User.query.filter_by(role='student'))
+    return stream_json_array({
+        'id': s.id,
+        'student_uid': s.student_uid,
+        'name': s.name,
+        'email': s.email,
+        'mobile_number': s.mobile_number,
+        'institution': s.institution,
+        'role': s.role,
+        'registration_complete': s.registration_complete,
+        'face_thumb_url': url_for('uploaded_thumbnail', filename=_safe_basename(s.face_image_path)) if s.face_image_path else None,
+    } for s in students)
 
 
 @app.route('/admin/api/users/<int:user_id>')
@@ -1536,10 +2935,12 @@ def admin_get_user(user_id: int):
     face_filename = _safe_basename(u.face_image_path)
     id_proof_url = url_for('uploaded_file', filename=id_proof_filename) if id_proof_filename else None
     face_url = url_for('uploaded_file', filename=face_filename) if face_filename else None
+    face_thumb_url = url_for('uploaded_thumbnail', filename=face_filename) if face_filename else None
 
     sessions = (
         ExamSession.query
         .filter_by(user_id=u.id)
+        .filter(ExamSession.status != 'Reserved')
         .order_by(ExamSession.start_time.desc())
         .limit(20)
         .all()
@@ -1567,6 +2968,8 @@ def admin_get_user(user_id: int):
             'date_of_birth': u.date_of_birth,
             'id_proof_url': id_proof_url,
             'face_url': face_url,
+            'face_thumb_url': face_thumb_url,
+            'uploads_status': u.uploads_status,
         },
         'history': history,
     })
@@ -1582,16 +2985,9 @@ def admin_delete_user(user_id: int):
         return jsonify({'success': False, 'message': 'Not a student'}), 400
 
     try:
-        sessions = ExamSession.query.filter_by(user_id=u.id).all()
-        for s in sessions:
-            ExamResponse.query.filter_by(session_id=s.id).delete()
-            Warning.query.filter_by(session_id=s.id).delete()
-        ExamSession.query.filter_by(user_id=u.id).delete()
-        PasswordOTP.query.filter_by(user_id=u.id).delete()
-        LoginActivity.query.filter_by(user_id=u.id).delete()
-
-        db.session.delete(u)
-        db.session.commit()
+        job = _delete_or_queue('user', u.id)
+        if job is not None:
+            return jsonify({'success': True, 'queued': True, 'job_id': job.id, 'message': 'Deletion queued'}), 202
         return jsonify({'success': True, 'message': 'Student deleted'})
     except Exception:
         db.session.rollback()
@@ -1600,7 +2996,7 @@ def admin_delete_user(user_id: int):
 
 # --- Socket.IO proctoring/exam events ---
 
-def handle_violation(exam_session_id: int, message: str):
+def handle_violation(exam_session_id: int, message: str, risk: float = 0.0):
     current_session = ExamSession.query.get(exam_session_id)
     if not current_session or current_session.status != 'Active':
         return
@@ -1609,14 +3005,16 @@ def handle_violation(exam_session_id: int, message: str):
     new_warning = Warning(session_id=exam_session_id, violation_type=message)
     db.session.add(new_warning)
 
-    max_warnings = 6
+    state = _proctor_state(exam_session_id)
+    max_warnings = state['policy'].max_warnings
     if current_session.warnings_count >= max_warnings:
         current_session.cheating_status = True
         current_session.status = 'Terminated (Cheating)'
         current_session.end_time = datetime.utcnow()
         db.session.commit()
 
-        proctor_session_state.pop(exam_session_id, None)
+        evidence_store.capture(exam_session_id, new_warning.id, message, state.get('last_frame'))
+        _end_proctor_session(exam_session_id)
 
         emit('exam_terminated', {
             'reason': 'Max warnings exceeded. Exam Terminated.',
@@ -1625,12 +3023,33 @@ def handle_violation(exam_session_id: int, message: str):
         return
 
     db.session.commit()
+    evidence_store.capture(exam_session_id, new_warning.id, message, state.get('last_frame'))
     emit('warning_alert', {
         'message': message,
-        'count': current_session.warnings_count
+        'count': current_session.warnings_count,
+        'max': max_warnings,
+        'risk': round(float(risk), 3),
     })
 
 
+@socketio.on('connect')
+def handle_connect():
+    exam_session_id = session.get('exam_session_id')
+    if not exam_session_id:
+        return
+    join_room(_session_room(exam_session_id))
+    deadline = _track_session_deadline(exam_session_id)
+    if deadline is not None:
+        emit('time_sync', _time_sync_payload(deadline))
+        emit('proctor_policy', _proctor_state(exam_session_id)['policy'].client_settings())
+
+
+@socketio.on('waiting_room_join')
+def handle_waiting_room_join(data=None):
+    join_room(WAITING_ROOM)
+    emit('queue_progress', admission_gate.progress())
+
+
 @socketio.on('process_frame')
 def handle_frame(data):
     exam_session_id = session.get('exam_session_id')
@@ -1639,25 +3058,38 @@ def handle_frame(data):
 
     image_data = data.get('image')
     audio_level = data.get('audio_level', 0)
+    audio_features = data.get('audio_features')
     client_violation_type = data.get('violation_type')
 
-    state = proctor_session_state.setdefault(exam_session_id, {})
+    state = _proctor_state(exam_session_id)
+    if image_data:
+        # Kept by reference only; used as evidence if this or a later event is a violation.
+        state['last_frame'] = image_data
+        rec = state.get('recording')
+        if rec:
+            now = time.time()
+            if now - state['recorded_at'] >= rec[1]:
+                state['recorded_at'] = now
+                session_recorder.append(rec[0], exam_session_id, image_data, rec[2])
     res = proctor_engine.analyze(
         session_state=state,
         image_data_url=image_data,
         audio_level=audio_level,
         client_violation_type=client_violation_type,
+        audio_features=audio_features,
     )
 
     if res.violation and res.message:
-        handle_violation(exam_session_id, res.message)
+        handle_violation(exam_session_id, res.message, res.risk)
 
 
 @socketio.on('tab_change')
 def handle_tab_change(data):
     exam_session_id = session.get('exam_session_id')
     if exam_session_id:
-        handle_violation(exam_session_id, 'Tab Switch / Window Minimized detected')
+        res = proctor_engine.analyze_tab_event(_proctor_state(exam_session_id), 'Tab Switch / Window Minimized detected')
+        if res.violation and res.message:
+            handle_violation(exam_session_id, res.message, res.risk)
 
 
 @socketio.on('submit_exam')
@@ -1670,28 +3102,27 @@ def handle_submit():
             s.end_time = datetime.utcnow()
             db.session.commit()
 
-        proctor_session_state.pop(exam_session_id, None)
+        _end_proctor_session(exam_session_id)
 
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-
-        ensure_sqlite_schema()
-
-        _seed_default_exam_if_missing()
-
-        # Create default admin if not exists
-        admin = User.query.filter_by(role='admin').first()
-        if not admin:
-            default_admin = User(
-                name="Super Admin",
-                email="admin@system.com",
-                password=generate_password_hash("admin123"),
-                role="admin"
-            )
-            db.session.add(default_admin)
-            db.session.commit()
-            print("✅ Default Admin Created: admin@system.com / admin123")
-
-    socketio.run(app, debug=True, port=5000)
\ No newline at end of file
+        # Schema work is normally done by `python bootstrap_db.py`; this only
+        # runs it when the database is missing or older than SCHEMA_VERSION.
+        if bootstrap_schema():
+            print(f"✅ Database schema bootstrapped (version {SCHEMA_VERSION})")
+        if _requeue_pending_uploads():
+            print("ℹ️  Resumed pending upload normalization")
+    print(f"ℹ️  Tracking {start_deadline_scheduler()} active exam deadlines")
+    start_expiry_sweeper()
+    start_evidence_sweeper()
+    start_admission_gate()
+    start_collusion_monitor()
+    start_notification_dispatcher()
+    start_policy_reloader()
+    start_login_audit_writer()
+    start_purge_worker()
+    start_retention_sweeper()
+
+    prewarm_heavy_modules()
+    socketio.run(app, debug=True, port=5000)
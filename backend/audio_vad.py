@@ -0,0 +1,104 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Band edges (Hz) used by the client to pool AnalyserNode FFT bins.
+# Keep in sync with AUDIO_BAND_EDGES_HZ in static/js/proctor.js.
+BAND_EDGES_HZ = (100, 200, 300, 400, 510, 630, 770, 920, 1080, 1270, 1480, 1720, 2000, 2700, 3700, 5300, 8000)
+NUM_BANDS = len(BAND_EDGES_HZ) - 1
+
+# Client payload: NUM_BANDS mean band levels + 1 voice-band flux value, each a
+# uint8. AnalyserNode bytes map minDecibels..maxDecibels (-100..-30 dB) to 0..255.
+FEATURE_LEN = NUM_BANDS + 1
+DB_PER_UNIT = 70.0 / 255.0
+
+_lo = np.asarray(BAND_EDGES_HZ[:-1])
+_hi = np.asarray(BAND_EDGES_HZ[1:])
+# Bands that carry most speech energy (formants F1-F3).
+VOICE_MASK = (_lo >= 300) & (_hi <= 3700)
+NOISE_MASK = ~VOICE_MASK
+
+# Precomputed averaging weights so classification is a few dot products.
+_VOICE_W = (VOICE_MASK / VOICE_MASK.sum()).astype(np.float32)
+_TILT_W = (_VOICE_W - NOISE_MASK / NOISE_MASK.sum()).astype(np.float32)
+_VOICE_F = VOICE_MASK.astype(np.float32) / VOICE_MASK.sum()
+
+
+def parse_features(raw: Any) -> Optional[np.ndarray]:
+    """Validate a client feature vector; returns float32 array or None."""
+    if not isinstance(raw, (list, tuple)) or len(raw) != FEATURE_LEN:
+        return None
+    try:
+        arr = np.asarray(raw, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if not np.all(np.isfinite(arr)) or arr.min() < 0 or arr.max() > 255:
+        return None
+    return arr
+
+
+class VoiceActivityDetector:
+    """Classifies one window of band energies as speech vs. background.
+
+    Speech is distinguished from steady noise (fans, hum) by three cues:
+    - voice bands rise well above the per-session noise floor,
+    - they rise more than the out-of-voice bands (spectral tilt),
+    - the voice-band level is modulated over the window (flux).
+
+    The noise floor is adaptive per session: it falls quickly to quieter
+    levels and creeps up slowly while no speech is detected, so a constant
+    fan is absorbed into the floor within a few windows.
+
+    State lives in the caller's `session_state` dict under `vad_*` keys.
+    """
+
+    def __init__(
+        self,
+        *,
+        snr_db: float = 8.0,
+        min_voice_fraction: float = 0.5,
+        min_tilt_db: float = 3.0,
+        min_flux_db: float = 1.5,
+        floor_fall: float = 0.5,
+        floor_rise: float = 0.05,
+    ) -> None:
+        self.snr_units = snr_db / DB_PER_UNIT
+        self.min_voice_fraction = min_voice_fraction
+        self.min_tilt_units = min_tilt_db / DB_PER_UNIT
+        self.min_flux_units = min_flux_db / DB_PER_UNIT
+        self.floor_fall = floor_fall
+        self.floor_rise = floor_rise
+
+    def classify(self, session_state: Dict[str, Any], features: Sequence[float]) -> Tuple[bool, float]:
+        """Return (is_voice, score) where score is the mean voice-band SNR in dB."""
+        feats = features if isinstance(features, np.ndarray) else parse_features(features)
+        if feats is None:
+            return False, 0.0
+
+        bands = feats[:NUM_BANDS]
+        flux = float(feats[NUM_BANDS])
+
+        floor = session_state.get('vad_floor')
+        if floor is None:
+            # First window only seeds the floor.
+            session_state['vad_floor'] = bands.copy()
+            return False, 0.0
+
+        excess = bands - floor
+        voice_mean = float(excess @ _VOICE_W)
+        voice_fraction = float((excess > self.snr_units) @ _VOICE_F)
+        tilt = float(excess @ _TILT_W)
+
+        is_voice = (
+            voice_fraction >= self.min_voice_fraction
+            and tilt >= self.min_tilt_units
+            and flux >= self.min_flux_units
+        )
+
+        # Fall fast towards quieter levels; creep up only while nobody is talking.
+        if is_voice:
+            np.minimum(floor, floor + self.floor_fall * excess, out=floor)
+        else:
+            floor += np.where(excess < 0, self.floor_fall, self.floor_rise) * excess
+
+        return is_voice, voice_mean * DB_PER_UNIT
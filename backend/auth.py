@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, LoginActivity
+from passwords import hash_password, verify_password
+from models import db, User
+from login_audit import login_audit
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,7 +14,7 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({'message': 'Email already registered'}), 400
 
-    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    hashed_password = hash_password(data['password'])
 
     new_user = User(
         name=f"{data['firstName']} {data['lastName']}",
@@ -35,12 +36,15 @@ def login():
     email = data['email'].strip().lower()
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password, data['password']):
+    ok, upgraded_hash = verify_password(user.password, data['password']) if user else (False, None)
+    if not ok:
         return jsonify({'message': 'Invalid email or password'}), 401
+    if upgraded_hash:
+        user.password = upgraded_hash
 
-    login_entry = LoginActivity(user_id=user.id, email=email)
-    db.session.add(login_entry)
-    db.session.commit()
+    login_audit.record(user.id, email, user.role)
+    if upgraded_hash:
+        db.session.commit()
 
     return jsonify({
         'message': 'Login successful',
@@ -0,0 +1,154 @@
+"""Benchmark for the item analytics endpoint on a large exam.
+
+Builds a scratch SQLite database (never the real one) with one exam and
+`--sessions` x `--questions` responses, then measures through the admin API:
+  - cold build (one streamed query + NumPy)
+  - cached reads
+  - incremental refresh after a handful of new submissions
+and compares difficulty with a naive per-row ORM loop.
+
+Usage:
+    python bench_analytics.py                          # 2000 x 50 = 100k responses
+    python bench_analytics.py --sessions 10000 --questions 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark exam item analytics')
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--new', type=int, default=25, help='submissions added before the incremental refresh')
+    parser.add_argument('--reads', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_analytics_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['ANALYTICS_REFRESH_SEC'] = '3600'
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamQuestion, ExamSession, ExamResponse
+
+    rng = random.Random(7)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    def add_sessions(exam_id, qids, correct, user_ids, submitted_at):
+        """Candidates of ability a answer each question correctly with probability ~a."""
+        db.session.execute(ExamSession.__table__.insert(), [
+            {'user_id': uid, 'exam_id': exam_id, 'status': 'Completed',
+             'submitted_at': submitted_at + timedelta(milliseconds=50 * i), 'percentage': 0.0}
+            for i, uid in enumerate(user_ids)
+        ])
+        sessions = (
+            db.session.query(ExamSession.id)
+            .filter(ExamSession.exam_id == exam_id, ExamSession.user_id.in_(user_ids))
+            .all()
+        )
+        rows, pct = [], {}
+        for (sid,) in sessions:
+            ability = rng.random()
+            got = 0
+            for qid, ans in zip(qids, correct):
+                if rng.random() < 0.05:
+                    sel = None
+                elif rng.random() < ability:
+                    sel = ans
+                else:
+                    sel = rng.choice([o for o in range(4) if o != ans])
+                ok = sel == ans
+                got += ok
+                rows.append({'session_id': sid, 'question_id': qid, 'selected_option': sel,
+                             'is_correct': ok, 'marks_awarded': int(ok)})
+            pct[sid] = got * 100.0 / len(qids)
+        db.session.execute(ExamResponse.__table__.insert(), rows)
+        db.session.execute(
+            ExamSession.__table__.update().where(ExamSession.id == db.bindparam('sid')).values(percentage=db.bindparam('p')),
+            [{'sid': k, 'p': v} for k, v in pct.items()],
+        )
+        db.session.commit()
+        return len(rows)
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        exam = Exam(name='Analytics', is_active=True, question_count=args.questions, total_marks=args.questions, pass_percentage=40.0)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.execute(ExamQuestion.__table__.insert(), [
+            {'exam_id': exam.id, 'question_text': f'Q{i}', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c',
+             'option_d': 'd', 'correct_option': i % 4, 'marks': 1, 'order_index': i}
+            for i in range(args.questions)
+        ])
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'C{i}', 'email': f'c{i}@bench.local', 'password': '-', 'role': 'student'}
+            for i in range(args.sessions + args.new)
+        ])
+        db.session.commit()
+        exam_id = exam.id
+        qids = [q for (q,) in db.session.query(ExamQuestion.id).filter_by(exam_id=exam_id).order_by(ExamQuestion.order_index)]
+        correct = [i % 4 for i in range(args.questions)]
+        users = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+        t0 = time.perf_counter()
+        n = add_sessions(exam_id, qids, correct, users[:args.sessions], datetime.utcnow() - timedelta(hours=1))
+        print(f"ℹ️  Seeded {n} responses in {time.perf_counter() - t0:.1f}s")
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s['role'] = 'admin'
+    url = f'/admin/api/exams/{exam_id}/analytics'
+
+    print("\n--- Admin analytics endpoint ---")
+    t0 = time.perf_counter()
+    cold = admin.get(url).get_json()['analytics']
+    print(f"cold build        {_ms(time.perf_counter() - t0)}  ({cold['sessions']} sessions, {cold['responses']} responses)")
+
+    t0 = time.perf_counter()
+    for _ in range(args.reads):
+        admin.get(url)
+    print(f"cached read       {_ms((time.perf_counter() - t0) / args.reads)}  (avg of {args.reads})")
+
+    with app.app_context():
+        add_sessions(exam_id, qids, correct, users[args.sessions:], datetime.utcnow())
+    app_module.get_exam_analytics().mark_stale(exam_id)
+    t0 = time.perf_counter()
+    warm = admin.get(url).get_json()['analytics']
+    print(f"incremental (+{args.new}) {_ms(time.perf_counter() - t0)}  ({warm['sessions']} sessions)")
+
+    t0 = time.perf_counter()
+    full = admin.get(url + '?refresh=full').get_json()['analytics']
+    print(f"full rebuild      {_ms(time.perf_counter() - t0)}")
+
+    # Naive baseline: walk every response through the ORM.
+    with app.app_context():
+        t0 = time.perf_counter()
+        attempts, right = {}, {}
+        sessions = ExamSession.query.filter_by(exam_id=exam_id, status='Completed').all()
+        for s in sessions:
+            for r in ExamResponse.query.filter_by(session_id=s.id).all():
+                attempts[r.question_id] = attempts.get(r.question_id, 0) + 1
+                right[r.question_id] = right.get(r.question_id, 0) + int(bool(r.is_correct))
+        naive = time.perf_counter() - t0
+    print(f"naive ORM loop    {_ms(naive)}  (difficulty only)")
+
+    ok = all(
+        abs(item['difficulty'] - right[item['question_id']] / attempts[item['question_id']]) < 1e-3
+        for item in warm['items']
+    )
+    same = [i['discrimination'] for i in warm['items']] == [i['discrimination'] for i in full['items']]
+    print(f"\n{'✅' if ok else '❌'} Difficulty matches the naive computation")
+    print(f"{'✅' if same else '❌'} Incremental refresh matches a full rebuild")
+    print(f"ℹ️  Analytics stats: {app_module.get_exam_analytics().stats}")
+    return 0 if ok and same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Benchmark for the proctoring detector cascade.
+
+Feeds a sequence of webcam-sized JPEG frames (a directory of images given with
+`--frames`, read in name order, e.g. exported timelapse frames; otherwise a
+synthetic sequence with still stretches and movement) through:
+  - the face mesh on every frame (what wiring MediaPipe in directly would cost)
+  - Haar only (PROCTOR_FACE_MESH=0)
+  - the cascade: frame difference + Haar on every frame, face mesh when Haar
+    is unsure or every `--mesh-every` frames
+and prints per-frame CPU time, per-tier cost and the escalation rate. The
+face-mesh runs need MediaPipe; without it only the Haar tiers are measured.
+
+Usage:
+    python bench_cascade.py
+    python bench_cascade.py --frames /path/to/frames --mesh-every 5
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def _synthetic_frames(count: int):
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+
+    rng = np.random.default_rng(7)
+    base = np.tile(np.linspace(40, 200, 320, dtype=np.uint8), (240, 1))
+    frames = []
+    x = 120
+    for i in range(count):
+        if (i // 10) % 3 == 2:  # every third stretch of 10 frames has movement
+            x = 60 + (x + 23) % 180
+        img = cv2.cvtColor(base, cv2.COLOR_GRAY2BGR)
+        cv2.ellipse(img, (x + 40, 120), (38, 50), 0, 0, 360, (170, 180, 200), -1)
+        noise = rng.integers(0, 3, img.shape, dtype=np.uint8)
+        frames.append(cv2.add(img, noise))
+    return frames
+
+
+def _load_frames(directory: str):
+    import cv2  # type: ignore
+
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        img = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+        if img is not None:
+            frames.append(cv2.resize(img, (320, 240)))
+    return frames
+
+
+def _data_url(img) -> str:
+    import cv2  # type: ignore
+
+    ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), 40])
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode('ascii')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the detector cascade')
+    parser.add_argument('--frames', help='directory of frames (default: synthetic)')
+    parser.add_argument('--count', type=int, default=300, help='synthetic frames')
+    parser.add_argument('--mesh-every', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from proctor import ProctorEngine
+    from proctor_policy import ProctorPolicy
+
+    frames = _load_frames(args.frames) if args.frames else _synthetic_frames(args.count)
+    if not frames:
+        print("❌ No frames to process")
+        return 1
+    urls = [_data_url(f) for f in frames]
+    policy = ProctorPolicy(mesh_every_n=args.mesh_every)
+    print(f"ℹ️  {len(urls)} frames ({'from ' + args.frames if args.frames else 'synthetic'}), mesh every {args.mesh_every}")
+
+    try:
+        from ai_proctor import AIProctor
+        mesh = AIProctor()
+    except Exception as e:
+        mesh = None
+        print(f"ℹ️  Face mesh unavailable ({e}); measuring the Haar tiers only")
+
+    def run(label, engine):
+        state = {'policy': policy}
+        engine.prewarm(background=False)
+        engine.analyze_frame(dict(state), urls[0])
+        engine.metrics.reset()
+        t0 = time.process_time()
+        for url in urls:
+            engine.analyze_frame(state, url)
+        dt = time.process_time() - t0
+        snap = engine.metrics.snapshot()
+        print(f"{label:<22} {_ms(dt / len(urls))} CPU/frame  escalations {snap['escalations']} "
+              f"({(snap['escalation_rate'] or 0) * 100:.1f}%), reused {snap['reused']}")
+        for name, tier in snap['tiers'].items():
+            if tier['runs']:
+                print(f"   {name:<8} {tier['runs']:>5} runs  avg {tier['ms_avg']:.3f} ms  total {tier['ms_total']:.1f} ms")
+        return dt
+
+    print("\n--- CPU per frame ---")
+    if mesh is not None:
+        import cv2  # type: ignore
+        import numpy as np  # type: ignore
+
+        mesh.check_face(frames[0], policy)
+        t0 = time.process_time()
+        for url in urls:
+            raw = np.frombuffer(base64.b64decode(url.split(',', 1)[1]), dtype=np.uint8)
+            mesh.check_face(cv2.imdecode(raw, cv2.IMREAD_COLOR), policy)
+        full = time.process_time() - t0
+        print(f"{'face mesh every frame':<22} {_ms(full / len(urls))} CPU/frame")
+
+    run('haar only', ProctorEngine())
+    if mesh is not None:
+        engine = ProctorEngine(verifier_loader=lambda: mesh)
+        deadline = time.time() + 30
+        while engine.verifier() is None and time.time() < deadline:
+            time.sleep(0.01)
+        cascade = run('cascade', engine)
+        print(f"\n✅ Cascade uses {cascade / full * 100:.0f}% of the CPU of running the face mesh on every frame")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Load test: thousands of candidates opening the same exam at once.
+
+Runs against a scratch SQLite database (never the real one). Every candidate
+requests /exam at the same moment; admitted candidates get a session, the rest
+land in the waiting room and retry once their ticket (a time slot) is due,
+like the waiting-room page does.
+
+Reports first-response latency, how many were admitted directly vs. queued,
+failed requests (e.g. "database is locked"), time until everyone has a session
+and the resulting session-creation rate.
+
+Usage:
+    python bench_exam_start.py                      # 5000 starts, gate defaults
+    python bench_exam_start.py --rate 0             # no admission control
+    python bench_exam_start.py --rate 200 --burst 400 --reserved
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Simulate simultaneous exam starts')
+    parser.add_argument('--candidates', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=200, help='requests in flight')
+    parser.add_argument('--rate', type=float, default=None, help='ADMISSION_RATE (0 disables the gate)')
+    parser.add_argument('--burst', type=float, default=None, help='ADMISSION_BURST')
+    parser.add_argument('--reserved', action='store_true', help='pre-create sessions before the start')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_exam_start_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    if args.rate is not None:
+        os.environ['ADMISSION_RATE'] = str(args.rate)
+    if args.burst is not None:
+        os.environ['ADMISSION_BURST'] = str(args.burst)
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamSession
+
+    app.logger.setLevel(logging.CRITICAL)  # failures are counted, not printed
+    gate = app_module.admission_gate
+    print(f"ℹ️  Scratch database: {workdir}")
+    print(f"ℹ️  Admission: {'rate %.0f/s, burst %.0f' % (gate.bucket.rate, gate.bucket.burst) if gate.enabled else 'disabled'}")
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        exam = Exam(name='Load test', duration_minutes=60, is_active=True, question_count=1, total_marks=1)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'Candidate {i}', 'email': f'c{i}@bench.local', 'password': '-', 'role': 'student', 'registration_complete': True}
+            for i in range(args.candidates)
+        ])
+        db.session.commit()
+        exam_id = exam.id
+        user_ids = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').all()]
+
+    if args.reserved:
+        admin = app.test_client()
+        with admin.session_transaction() as s:
+            s['role'] = 'admin'
+        start = time.perf_counter()
+        r = admin.post(f'/admin/api/exams/{exam_id}/reserve-sessions', json={})
+        print(f"✅ Reserved {r.get_json()['reserved']} sessions in {time.perf_counter() - start:.2f}s")
+
+    clients = {}
+    for uid in user_ids:
+        c = app.test_client()
+        with c.session_transaction() as s:
+            s['user_id'] = uid
+            s['role'] = 'student'
+        clients[uid] = c
+
+    tickets = {}
+    ticket_re = re.compile(r'data-ticket="([0-9.]+)"')
+
+    def start_exam(uid):
+        t0 = time.perf_counter()
+        try:
+            r = clients[uid].get(f'/exam?exam_id={exam_id}')
+            m = ticket_re.search(r.get_data(as_text=True))
+            if m:
+                tickets[uid] = float(m.group(1))
+            outcome = 'error' if r.status_code >= 400 else ('queued' if m else 'admitted')
+        except Exception:
+            outcome = 'error'
+        return uid, outcome, time.perf_counter() - t0
+
+    print(f"\n--- {len(user_ids)} candidates start at once ({args.concurrency} in flight) ---")
+    t_start = time.perf_counter()
+    latencies = []
+    admitted, waiting, errors = set(), set(), 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for uid, outcome, dt in pool.map(start_exam, user_ids):
+            latencies.append(dt)
+            if outcome == 'admitted':
+                admitted.add(uid)
+            elif outcome == 'queued':
+                waiting.add(uid)
+            else:
+                errors += 1
+                waiting.add(uid)
+        first_wave = time.perf_counter() - t_start
+        print(f"first wave        {first_wave:8.2f}s  admitted {len(admitted)}  queued {len(waiting) - errors}  errors {errors}")
+        print(f"latency p50/p95/p99 {_pct(latencies, 50) * 1000:7.1f} / {_pct(latencies, 95) * 1000:7.1f} / {_pct(latencies, 99) * 1000:7.1f} ms")
+
+        # Drain: candidates retry once their ticket is due.
+        retries = 0
+        while waiting and time.perf_counter() - t_start < 600:
+            now = time.time()
+            ready = [u for u in waiting if tickets.get(u, 0) <= now]
+            for uid, outcome, _ in pool.map(start_exam, ready):
+                retries += 1
+                if outcome == 'admitted':
+                    admitted.add(uid)
+                    waiting.discard(uid)
+                elif outcome == 'error':
+                    errors += 1
+            time.sleep(0.1)
+    total = time.perf_counter() - t_start
+
+    with app.app_context():
+        active = ExamSession.query.filter_by(exam_id=exam_id, status='Active').count()
+    print(f"all admitted in   {total:8.2f}s  ({len(admitted)}/{len(user_ids)}, {retries} retries, {errors} errors total)")
+    print(f"session creation  {active / total:8.1f}/s  ({active} Active sessions)")
+    print(f"gate stats        {gate.stats}")
+    return 0 if len(admitted) == len(user_ids) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Login throughput benchmark for the password hashing policy.
+
+Measures, per hashing method:
+  - verify cost (logins/sec on one core)
+  - first login after a policy change (verify + rehash) vs. steady state
+  - OTP issue/verify with the keyed HMAC vs. the old werkzeug hash
+  - eventlet hub responsiveness while many logins hash concurrently,
+    with and without tpool offload
+
+Usage:
+    python bench_login.py
+    python bench_login.py --methods pbkdf2:sha256:600000 pbkdf2:sha256:210000 --logins 200
+"""
+import argparse
+import time
+
+from werkzeug.security import generate_password_hash
+
+import passwords
+
+DEFAULT_METHODS = ['pbkdf2:sha256:1000000', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:210000', 'scrypt:32768:8:1']
+
+
+def _rate(n: int, elapsed: float) -> str:
+    return f"{n / elapsed:10.1f}/s  ({elapsed / n * 1000.0:8.2f} ms/op)"
+
+
+def bench_verify(methods, iterations: int) -> None:
+    print("\n--- Verify cost per policy ---")
+    for method in methods:
+        stored = generate_password_hash('password123', method=method)
+        passwords.PASSWORD_HASH_METHOD = method
+        start = time.perf_counter()
+        for _ in range(iterations):
+            ok, _ = passwords.verify_password(stored, 'password123')
+            assert ok
+        print(f"{method:28s} {_rate(iterations, time.perf_counter() - start)}")
+
+
+def bench_rehash(legacy_method: str, policy: str, iterations: int) -> None:
+    print(f"\n--- Rehash on login: {legacy_method} -> {policy} ---")
+    passwords.PASSWORD_HASH_METHOD = policy
+    legacy = [generate_password_hash('password123', method=legacy_method) for _ in range(iterations)]
+
+    start = time.perf_counter()
+    upgraded = []
+    for stored in legacy:
+        ok, new_hash = passwords.verify_password(stored, 'password123')
+        assert ok and new_hash
+        upgraded.append(new_hash)
+    print(f"{'first login (verify+rehash)':28s} {_rate(iterations, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for stored in upgraded:
+        ok, new_hash = passwords.verify_password(stored, 'password123')
+        assert ok and new_hash is None
+    print(f"{'next login (verify only)':28s} {_rate(iterations, time.perf_counter() - start)}")
+
+
+def bench_otp(iterations: int) -> None:
+    print("\n--- OTP issue + verify ---")
+    secret = 'bench-secret'
+    start = time.perf_counter()
+    for i in range(iterations):
+        digest = passwords.hash_otp(secret, i, '123456')
+        assert passwords.verify_otp(secret, i, '123456', digest)
+    print(f"{'hmac-sha256':28s} {_rate(iterations, time.perf_counter() - start)}")
+
+    n = max(1, iterations // 1000)
+    start = time.perf_counter()
+    for i in range(n):
+        digest = generate_password_hash('123456', method='pbkdf2:sha256')
+        assert passwords.verify_otp(secret, i, '123456', digest)
+    print(f"{'pbkdf2:sha256 (legacy)':28s} {_rate(n, time.perf_counter() - start)}")
+
+
+def bench_hub(policy: str, concurrency: int) -> None:
+    try:
+        import eventlet
+    except ImportError:
+        print("\n(eventlet not installed; skipping hub responsiveness benchmark)")
+        return
+
+    print(f"\n--- {concurrency} concurrent logins under the eventlet hub ({policy}) ---")
+    passwords.PASSWORD_HASH_METHOD = policy
+    stored = generate_password_hash('password123', method=policy)
+
+    for offload in (False, True):
+        passwords.OFFLOAD_HASHING = offload
+        worst_gap = [0.0]
+        running = [True]
+
+        def ticker():
+            last = time.perf_counter()
+            while running[0]:
+                eventlet.sleep(0.005)
+                now = time.perf_counter()
+                worst_gap[0] = max(worst_gap[0], now - last)
+                last = now
+
+        tick = eventlet.spawn(ticker)
+        pool = eventlet.GreenPool(concurrency)
+        start = time.perf_counter()
+        for _ in range(concurrency):
+            pool.spawn(passwords.verify_password, stored, 'password123')
+        pool.waitall()
+        elapsed = time.perf_counter() - start
+        running[0] = False
+        tick.wait()
+
+        label = 'tpool offload' if offload else 'inline'
+        print(f"{label:28s} {_rate(concurrency, elapsed)}  worst hub stall {worst_gap[0] * 1000.0:8.1f} ms")
+    passwords.OFFLOAD_HASHING = True
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Login throughput benchmark')
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--legacy', default='pbkdf2:sha256:260000', help='method of hashes stored before the policy change (werkzeug 2.x default)')
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--otps', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    policy = passwords.PASSWORD_HASH_METHOD
+    bench_verify(args.methods, args.logins)
+    if args.legacy != policy:
+        bench_rehash(args.legacy, policy, args.logins)
+    bench_otp(args.otps)
+    bench_hub(policy, args.logins)
+
+
+if __name__ == '__main__':
+    main()
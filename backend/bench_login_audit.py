@@ -0,0 +1,145 @@
+"""Benchmark for the batched login audit log.
+
+Runs against a scratch SQLite database (never the real one). Measures:
+  - /login requests through the app, whose audit entry is now only buffered
+  - recording one entry: buffered append vs. the previous INSERT + commit
+  - flushing a large backlog (`--entries` logins spread over `--days` days)
+    into login_activity plus hourly/daily rollups
+  - admin chart queries served from rollups vs. GROUP BY over raw rows
+  - the retention sweep
+and checks that rollups agree with the raw rows.
+
+Usage:
+    python bench_login_audit.py
+    python bench_login_audit.py --entries 500000 --days 180
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the login audit log')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--logins', type=int, default=300, help='/login requests through the app')
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--retention-days', type=int, default=90)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_login_audit_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    # Cheap hashes: this measures what happens around password verification.
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+    import app as app_module
+    from app import app, db, User
+    from models import LoginActivity
+    from login_audit import LoginAuditLog, login_audit, login_series
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import text
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        pw = generate_password_hash('password123', method='pbkdf2:sha256:1000')
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'S{i}', 'email': f's{i}@bench.local', 'password': pw, 'role': 'student',
+             'registration_complete': True, 'student_uid': f'STD-{i}'}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+        users = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+
+    print("\n--- Login path ---")
+    client = app.test_client()
+    t0 = time.perf_counter()
+    for i in range(args.logins):
+        r = client.post('/login', json={'email': f's{i % args.users}@bench.local', 'password': 'password123'})
+        assert r.status_code == 200, r.status_code
+    dt = time.perf_counter() - t0
+    print(f"{'/login (buffered)':<24} {_ms(dt / args.logins)}  per request, {login_audit.pending()} entries pending")
+
+    with app.app_context():
+        login_audit.flush()
+        n = args.logins
+        t0 = time.perf_counter()
+        for i in range(n):
+            db.session.add(LoginActivity(user_id=users[i % len(users)], email='x@bench.local', role='student'))
+            db.session.commit()
+        sync = (time.perf_counter() - t0) / n
+        scratch = LoginAuditLog()
+        t0 = time.perf_counter()
+        for i in range(n):
+            scratch.record(users[i % len(users)], 'x@bench.local', 'student')
+        buffered = (time.perf_counter() - t0) / n
+        print(f"{'INSERT + commit':<24} {_ms(sync)}  per login (previous)")
+        print(f"{'record()':<24} {_ms(buffered)}  per login ({sync / buffered:,.0f}x less)")
+        db.session.execute(text("DELETE FROM login_activity"))
+        db.session.execute(text("DELETE FROM login_rollup"))
+        db.session.commit()
+
+    print("\n--- Backlog ---")
+    now = datetime.utcnow()
+    span = args.days * 86400
+    with app.app_context():
+        written, dt = 0, 0.0
+        for i in range(args.entries):
+            # Oldest first, like real traffic: the sweeper expires in rowid order.
+            at = now - timedelta(seconds=span * (args.entries - i) / args.entries)
+            login_audit.record(users[i % len(users)], f's{i % len(users)}@bench.local', 'admin' if i % 50 == 0 else 'student', at=at)
+            if login_audit.pending() >= 10000 or i == args.entries - 1:
+                t0 = time.perf_counter()
+                written += login_audit.flush()
+                dt += time.perf_counter() - t0
+        print(f"{'flush':<24} {_ms(dt)}  {written:,} entries ({written / dt:,.0f}/s)")
+
+        print("\n--- Admin charts ---")
+        raw_sql = {
+            'hour': "SELECT strftime('%Y-%m-%d %H', login_time), role, COUNT(*) FROM login_activity "
+                    "WHERE login_time >= :since GROUP BY 1, 2",
+            'day': "SELECT date(login_time), role, COUNT(*) FROM login_activity WHERE login_time >= :since GROUP BY 1, 2",
+        }
+        for granularity, days in (('hour', 2), ('hour', 30), ('day', 30), ('day', args.days)):
+            since = now - timedelta(days=days)
+            t0 = time.perf_counter()
+            series = login_series(granularity, since)
+            fast = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            db.session.execute(text(raw_sql[granularity]), {'since': since.strftime('%Y-%m-%d %H:%M:%S.%f')}).all()
+            slow = time.perf_counter() - t0
+            print(f"{granularity + f' x {days}d':<24} {_ms(fast)}  rollups, {len(series)} buckets  vs {_ms(slow)}  raw GROUP BY")
+
+        raw_total = LoginActivity.query.count()
+        rollup_totals = dict(db.session.execute(text(
+            "SELECT granularity, SUM(logins) FROM login_rollup GROUP BY granularity"
+        )).all())
+
+        print("\n--- Retention ---")
+        t0 = time.perf_counter()
+        app_module.LOGIN_RETENTION_DAYS = app_module.LOGIN_HOURLY_RETENTION_DAYS = args.retention_days
+        app_module.retention_sweeper = None
+        sweeper = app_module.get_retention_sweeper()
+        removed = {r.name: sweeper.run_pass(r).rows for r in sweeper.rules if r.name.startswith('login_')}
+        dt = time.perf_counter() - t0
+        print(f"{'sweep':<24} {_ms(dt)}  {removed['login_activity']:,} entries, "
+              f"{removed['login_rollups_hourly']:,} hourly rollups")
+        daily_after = db.session.execute(text("SELECT SUM(logins) FROM login_rollup WHERE granularity = 'day'")).scalar()
+
+    ok = rollup_totals.get('hour') == raw_total == rollup_totals.get('day') == daily_after == args.entries
+    print(f"\n{'✅' if ok else '❌'} Rollups match the raw rows ({raw_total:,}) and daily totals survive retention")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Benchmark for bulk results publication.
+
+Runs against a scratch SQLite database (never the real one): `--students`
+candidates with `--history` earlier completed attempts each, plus one pending
+attempt of the exam being published. Measures through the app:
+  - publishing the exam (one UPDATE ... RETURNING, stats records, notification rows)
+  - student dashboard views served from the stats record vs. rebuilt after
+    it was dropped (latency and SQL statements per view)
+  - draining the notification outbox into a delivery callback
+
+Usage:
+    python bench_publication.py
+    python bench_publication.py --students 20000 --history 10
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark results publication')
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--history', type=int, default=5, help='earlier completed attempts per student')
+    parser.add_argument('--views', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_publication_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamSession, Notification
+    from publication import drain_notifications
+    from student_stats import invalidate_student_stats
+    from sqlalchemy import event
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        old = Exam(name='Earlier exam', is_active=True)
+        exam = Exam(name='Final exam', is_active=True, pass_percentage=40.0)
+        db.session.add_all([old, exam])
+        db.session.flush()
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'S{i}', 'email': f's{i}@bench.local', 'password': '-', 'role': 'student', 'registration_complete': True}
+            for i in range(args.students)
+        ])
+        users = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+        base = datetime.utcnow() - timedelta(days=30)
+        db.session.execute(ExamSession.__table__.insert(), [
+            {'user_id': uid, 'exam_id': old.id, 'status': 'Completed', 'submitted_at': base + timedelta(hours=h),
+             'percentage': float((uid * 7 + h * 13) % 100), 'result_status': 'Passed', 'results_published': True}
+            for uid in users for h in range(args.history)
+        ])
+        db.session.execute(ExamSession.__table__.insert(), [
+            {'user_id': uid, 'exam_id': exam.id, 'status': 'Completed', 'submitted_at': datetime.utcnow(),
+             'percentage': float(uid % 100), 'result_status': 'Passed' if uid % 100 >= 40 else 'Failed',
+             'results_published': False}
+            for uid in users
+        ])
+        db.session.commit()
+        exam_id = exam.id
+
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s['role'] = 'admin'
+    print(f"ℹ️  Pending results: {admin.get('/admin/api/stats').get_json()['pending_results']}")
+
+    print("\n--- Publication ---")
+    statements[0] = 0
+    t0 = time.perf_counter()
+    r = admin.post(f'/admin/api/exams/{exam_id}/publish-results').get_json()
+    print(f"publish           {_ms(time.perf_counter() - t0)}  {r['published']} results, "
+          f"{r['notifications']} notifications, {statements[0]} statements")
+
+    print("\n--- Student dashboard ---")
+    clients = []
+    for uid in users[:args.views]:
+        c = app.test_client()
+        with c.session_transaction() as s:
+            s['user_id'] = uid
+            s['role'] = 'student'
+        clients.append(c)
+
+    def views(label):
+        statements[0] = 0
+        t0 = time.perf_counter()
+        for c in clients:
+            c.get('/student_dashboard')
+        dt = time.perf_counter() - t0
+        print(f"{label:<17} {_ms(dt / len(clients))}  {statements[0] / len(clients):5.1f} statements/view")
+
+    views('first view')
+    views('repeat view')
+    with app.app_context():
+        invalidate_student_stats(users[:args.views])
+        db.session.commit()
+    views('after invalidation')
+
+    print("\n--- Notification outbox ---")
+    sent = []
+    t0 = time.perf_counter()
+    with app.app_context():
+        while drain_notifications(lambda to, subject, body: sent.append(to) or True, app_module.NOTIFY_BATCH):
+            pass
+        left = Notification.query.filter(Notification.sent_at.is_(None)).count()
+    dt = time.perf_counter() - t0
+    print(f"drain             {_ms(dt)}  {len(sent)} delivered ({len(sent) / dt:,.0f}/s), {left} left")
+
+    ok = r['published'] == args.students and len(sent) == args.students and left == 0
+    print(f"\n{'✅' if ok else '❌'} Every result published and notified exactly once")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
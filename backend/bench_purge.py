@@ -0,0 +1,185 @@
+"""Benchmark for cascading user/exam deletion.
+
+Runs against a scratch SQLite database (never the real one): one exam with
+`--sessions` completed attempts of `--questions` responses each, plus one
+student with `--history` attempts. Measures:
+  - deleting the heavy student: previous per-session loop vs. the set-based plan
+  - deleting the exam as one transaction vs. in bounded batches, while a
+    concurrent writer (standing in for running exams) records how long its
+    small commits wait for the SQLite write lock
+and checks that nothing is left orphaned.
+
+Usage:
+    python bench_purge.py
+    python bench_purge.py --sessions 5000 --questions 80
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark cascading deletes')
+    parser.add_argument('--sessions', type=int, default=3000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--history', type=int, default=300, help='attempts of the heavy student')
+    parser.add_argument('--batch', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_purge_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamQuestion, ExamSession, ExamResponse, Warning, CollusionPair
+    from purge import cascade_plan, count_rows, run_plan, run_plan_batched
+    from sqlalchemy import text
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    def build_exam(name, user_ids, per_user):
+        exam = Exam(name=name, is_active=True)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.execute(ExamQuestion.__table__.insert(), [
+            {'exam_id': exam.id, 'question_text': f'Q{i}', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c',
+             'option_d': 'd', 'correct_option': i % 4, 'marks': 1, 'order_index': i}
+            for i in range(args.questions)
+        ])
+        qids = [q for (q,) in db.session.query(ExamQuestion.id).filter_by(exam_id=exam.id).order_by(ExamQuestion.id)]
+        now = datetime.utcnow()
+        first = (db.session.query(db.func.max(ExamSession.id)).scalar() or 0) + 1
+        db.session.execute(ExamSession.__table__.insert(), [
+            {'user_id': uid, 'exam_id': exam.id, 'status': 'Completed', 'submitted_at': now, 'percentage': 50.0}
+            for uid in user_ids for _ in range(per_user)
+        ])
+        sids = list(range(first, first + len(user_ids) * per_user))
+        for i in range(0, len(sids), 500):
+            chunk = sids[i:i + 500]
+            db.session.execute(ExamResponse.__table__.insert(), [
+                {'session_id': sid, 'question_id': q, 'selected_option': (sid + q) % 4, 'is_correct': (sid + q) % 4 == 0}
+                for sid in chunk for q in qids
+            ])
+            db.session.execute(Warning.__table__.insert(), [{'session_id': sid, 'violation_type': 'tab'} for sid in chunk[::10]])
+        db.session.execute(CollusionPair.__table__.insert(), [
+            {'exam_id': exam.id, 'session_a': sids[i], 'session_b': sids[i + 1], 'shared_wrong': 5, 'both_wrong': 6,
+             'expected': 1.0, 'z_score': 5.0, 'detected_at': now}
+            for i in range(0, min(len(sids) - 1, 200), 2)
+        ])
+        db.session.commit()
+        return exam.id
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'S{i}', 'email': f's{i}@bench.local', 'password': '-', 'role': 'student', 'registration_complete': True}
+            for i in range(args.sessions + 2)
+        ])
+        db.session.commit()
+        users = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+        heavy_a, heavy_b, cohort = users[0], users[1], users[2:]
+        build_exam('History A', [heavy_a], args.history)
+        build_exam('History B', [heavy_b], args.history)
+        exam_id = build_exam('Big exam', cohort, 1)
+        print(f"ℹ️  {ExamResponse.query.count():,} responses, {ExamSession.query.count():,} sessions")
+
+        print("\n--- Student with many attempts ---")
+        t0 = time.perf_counter()
+        statements = 0
+        sessions = ExamSession.query.filter_by(user_id=heavy_a).all()
+        CollusionPair.query.filter(
+            CollusionPair.session_a.in_([s.id for s in sessions]) | CollusionPair.session_b.in_([s.id for s in sessions])
+        ).delete(synchronize_session=False)
+        for s in sessions:
+            ExamResponse.query.filter_by(session_id=s.id).delete()
+            Warning.query.filter_by(session_id=s.id).delete()
+            statements += 2
+        ExamSession.query.filter_by(user_id=heavy_a).delete()
+        User.query.filter_by(id=heavy_a).delete()
+        db.session.commit()
+        print(f"{'per-session loop':<22} {_ms(time.perf_counter() - t0)}  {statements + 4} statements (previous)")
+
+        plan = cascade_plan('user')
+        t0 = time.perf_counter()
+        rows = run_plan(plan, heavy_b)
+        db.session.commit()
+        print(f"{'set-based plan':<22} {_ms(time.perf_counter() - t0)}  {len(plan)} statements, {rows:,} rows")
+
+        print("\n--- Exam with a large cohort, concurrent writer ---")
+        probe = ExamSession(user_id=cohort[0], status='Active')
+        db.session.add(probe)
+        db.session.commit()
+        writer_session = probe.id
+        plan = cascade_plan('exam')
+        rows_total = count_rows(plan, exam_id)
+
+    def run_with_writer(label, purge):
+        waits = []
+        stop = threading.Event()
+
+        def writer():
+            with app.app_context():
+                while not stop.is_set():
+                    t = time.perf_counter()
+                    db.session.execute(text("INSERT INTO warning (session_id, violation_type) VALUES (:s, 'probe')"),
+                                       {'s': writer_session})
+                    db.session.commit()
+                    waits.append(time.perf_counter() - t)
+                    time.sleep(0.005)
+                db.session.remove()
+
+        th = threading.Thread(target=writer)
+        th.start()
+        time.sleep(0.1)
+        with app.app_context():
+            t0 = time.perf_counter()
+            rows = purge()
+            dt = time.perf_counter() - t0
+        stop.set()
+        th.join()
+        waits.sort()
+        p99 = waits[int(len(waits) * 0.99) - 1] if waits else 0.0
+        print(f"{label:<22} {_ms(dt)}  {rows:,} rows; writer max wait {_ms(waits[-1])}, p99 {_ms(p99)}")
+
+    def single():
+        n = run_plan(plan, exam_id)
+        db.session.commit()
+        return n
+
+    def rebuild():
+        with app.app_context():
+            return build_exam('Big exam', cohort, 1)
+
+    run_with_writer('one transaction', single)
+    exam_id = rebuild()
+    run_with_writer(f'batches of {args.batch}', lambda: run_plan_batched(plan, exam_id, args.batch, pause=lambda: time.sleep(app_module.PURGE_PAUSE_SEC)))
+
+    with app.app_context():
+        orphans = {
+            'responses': db.session.execute(text(
+                "SELECT COUNT(*) FROM exam_response r LEFT JOIN exam_session s ON s.id = r.session_id "
+                "LEFT JOIN exam_question q ON q.id = r.question_id WHERE s.id IS NULL OR q.id IS NULL")).scalar(),
+            'warnings': db.session.execute(text(
+                "SELECT COUNT(*) FROM warning w LEFT JOIN exam_session s ON s.id = w.session_id WHERE s.id IS NULL")).scalar(),
+            'sessions': db.session.execute(text(
+                "SELECT COUNT(*) FROM exam_session s LEFT JOIN user u ON u.id = s.user_id WHERE u.id IS NULL")).scalar(),
+            'pairs': CollusionPair.query.count(),
+        }
+        kept = ExamSession.query.filter(ExamSession.exam_id.is_(None), ExamSession.status == 'Completed').count()
+    ok = not any(orphans.values()) and kept == 2 * len(cohort)
+    print(f"\nℹ️  {rows_total:,} rows per exam purge; {kept:,} sessions kept as history")
+    print(f"{'✅' if ok else '❌'} No orphans left ({orphans})")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
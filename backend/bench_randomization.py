@@ -0,0 +1,112 @@
+"""Benchmark for per-session question/option randomization.
+
+Nothing is stored per candidate, so serving an exam costs one plan derivation
+(keyed hash + NumPy permutations) plus rendering from the shared payload. This
+checks that the cost stays flat as the number of sessions grows and reports
+how it scales with the number of questions, for serving and for grading.
+
+Usage:
+    python bench_randomization.py
+    python bench_randomization.py --questions 20 100 500 --sessions 1000 10000 100000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from randomization import QuestionRandomizer
+
+
+def _rate(n: int, elapsed: float) -> str:
+    return f"{n / elapsed:10.1f}/s  ({elapsed / n * 1e6:8.1f} us/op)"
+
+
+def _exam(n_questions: int, pooled: bool):
+    rows = [
+        SimpleNamespace(
+            id=i + 1,
+            question_text=f'Question {i + 1}',
+            option_a='A', option_b='B', option_c='C', option_d='D',
+            correct_option=i % 4,
+            marks=1 + i % 3,
+            pool=('bank' if pooled and i >= n_questions // 2 else None),
+        )
+        for i in range(n_questions)
+    ]
+    exam = SimpleNamespace(
+        id=1,
+        created_at=None,
+        question_count=n_questions,
+        shuffle_questions=True,
+        shuffle_options=True,
+        pool_draw=({'bank': max(1, n_questions // 4)} if pooled else None),
+    )
+    return exam, rows
+
+
+def bench(n_questions: int, session_counts, pooled: bool, sample: int) -> None:
+    randomizer = QuestionRandomizer('bench-secret')
+    exam, rows = _exam(n_questions, pooled)
+    t0 = time.perf_counter()
+    payload = randomizer.payload(exam, lambda: rows)
+    build = time.perf_counter() - t0
+    label = f"{n_questions} questions{' (half pooled, draw 1/4)' if pooled else ''}"
+    print(f"\n--- {label}: payload built once in {build * 1000:.2f} ms ---")
+
+    for sessions in session_counts:
+        # Sample session ids across the whole id range; cost must not depend on it.
+        ids = random.sample(range(1, sessions + 1), min(sample, sessions))
+
+        t0 = time.perf_counter()
+        for sid in ids:
+            randomizer.render(payload, randomizer.plan(payload, sid))
+        serve = time.perf_counter() - t0
+
+        plans = [randomizer.plan(payload, sid) for sid in ids]
+        answers = [
+            {str(payload.ids[pos]): random.randrange(4) for pos in plan.order.tolist()}
+            for plan in plans
+        ]
+        t0 = time.perf_counter()
+        for plan, ans in zip(plans, answers):
+            for _ in randomizer.grade(payload, plan, ans):
+                pass
+        grade = time.perf_counter() - t0
+
+        print(f"{sessions:>7} sessions  serve {_rate(len(ids), serve)}   grade {_rate(len(ids), grade)}")
+
+
+def check_determinism(n_questions: int) -> None:
+    randomizer = QuestionRandomizer('bench-secret')
+    exam, rows = _exam(n_questions, pooled=True)
+    payload = randomizer.payload(exam, lambda: rows)
+    a, b = randomizer.plan(payload, 42), randomizer.plan(payload, 42)
+    same = (a.order == b.order).all() and (a.option_perm == b.option_perm).all()
+    distinct = len({tuple(randomizer.plan(payload, sid).order.tolist()) for sid in range(1, 201)})
+
+    # Answering every displayed question correctly must score full marks.
+    inverse = {int(payload.ids[pos]): list(perm).index(int(payload.correct[pos]))
+               for pos, perm in zip(a.order.tolist(), a.option_perm.tolist())}
+    graded = list(randomizer.grade(payload, a, {str(k): v for k, v in inverse.items()}))
+    full = all(g[2] for g in graded) and sum(g[3] for g in graded) == sum(g[4] for g in graded)
+
+    print(f"{'✅' if same else '❌'} Same session -> same plan")
+    print(f"{'✅' if distinct > 150 else '❌'} {distinct}/200 sessions got distinct question orders")
+    print(f"{'✅' if full else '❌'} Correct displayed answers map back to full marks")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark question randomization')
+    parser.add_argument('--questions', type=int, nargs='+', default=[20, 100, 500])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--sample', type=int, default=2000, help='plans timed per session count')
+    args = parser.parse_args()
+
+    check_determinism(40)
+    for n in args.questions:
+        bench(n, args.sessions, pooled=False, sample=args.sample)
+        bench(n, args.sessions, pooled=True, sample=args.sample)
+
+
+if __name__ == '__main__':
+    main()
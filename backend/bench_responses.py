@@ -0,0 +1,144 @@
+"""Benchmark for JSON serialization and response compression.
+
+Runs against a scratch SQLite database (never the real one) with `--users`
+students and one exam of `--questions` questions. Measures:
+  - serializing the user list and the exam payload: stdlib json vs. orjson
+  - bytes on the wire for the hot endpoints, identity vs. gzip (and br when
+    the brotli package is installed), and the time spent compressing
+  - peak Python memory for the user list: building the whole list for
+    jsonify (previous) vs. the streamed array
+and checks that every encoding decodes to the same JSON.
+
+Usage:
+    python bench_responses.py
+    python bench_responses.py --users 50000 --questions 300
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization and compression')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_responses_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamQuestion
+    from flask import jsonify
+    from http_encoding import FastJSONProvider, brotli, orjson, response_metrics
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        for i in range(0, args.users, 5000):
+            db.session.execute(User.__table__.insert(), [
+                {'name': f'Student {k}', 'email': f'student{k}@bench.local', 'password': '-', 'role': 'student',
+                 'student_uid': f'STU{k:07d}', 'institution': 'Bench University', 'mobile_number': f'+1555{k:07d}',
+                 'face_image_path': f'/srv/uploads/face_{k:08d}.jpg', 'registration_complete': True}
+                for k in range(i, min(args.users, i + 5000))
+            ])
+        exam = Exam(name='Bench exam', description='Serialization benchmark', is_active=True)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.execute(ExamQuestion.__table__.insert(), [
+            {'exam_id': exam.id, 'question_text': f'Question {i}: which of the following best describes item {i}?',
+             'option_a': f'First option for {i}', 'option_b': f'Second option for {i}', 'option_c': f'Third option for {i}',
+             'option_d': f'Fourth option for {i}', 'correct_option': i % 4, 'marks': 1, 'order_index': i}
+            for i in range(args.questions)
+        ])
+        app_module._refresh_exam_totals(exam)
+        db.session.commit()
+        exam_id = exam.id
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['role'] = 'admin'
+        s['user_id'] = 1
+
+    print("\n--- Serialization ---")
+    with app.test_request_context():
+        users = client.get('/admin/users').get_json()
+        exam_payload = client.get(f'/api/exams/{exam_id}').get_json()
+        backends = ['stdlib'] + (['orjson'] if orjson is not None else [])
+        for label, obj in (('user list', users), ('exam payload', exam_payload)):
+            for backend in backends:
+                provider = FastJSONProvider(app, backend)
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    body = provider.encode(obj)
+                dt = (time.perf_counter() - t0) / args.repeat
+                print(f"{label + ' / ' + backend:<26} {_ms(dt)}  {len(body):,} bytes")
+    if orjson is None:
+        print("ℹ️  orjson is not installed; responses use the stdlib encoder")
+
+    print("\n--- Bytes on the wire ---")
+    ok = True
+    codings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    for path in ('/admin/users', f'/api/exams/{exam_id}', '/api/exams', '/admin/api/sessions'):
+        reference = None
+        for coding in codings:
+            response_metrics.reset()
+            r = client.get(path, headers={'Accept-Encoding': coding})
+            body = r.get_data()
+            sent = r.headers.get('Content-Encoding') or 'identity'
+            if sent == 'gzip':
+                body = gzip.decompress(body)
+            elif sent == 'br':
+                body = brotli.decompress(body)
+            decoded = json.loads(body)
+            reference = decoded if reference is None else reference
+            ok = ok and decoded == reference
+            stats = next(iter(response_metrics.snapshot().values()), {})
+            print(f"{path:<22} {coding:<9} {len(r.get_data()):>10,} bytes  ({sent}; "
+                  f"serialize {stats.get('serialize_ms_max', 0):.2f} ms, compress {stats.get('compress_ms_total', 0):.2f} ms)")
+
+    print("\n--- Peak memory, user list ---")
+    from app import _safe_basename
+    from flask import url_for
+
+    with app.test_request_context():
+        tracemalloc.start()
+        students = User.query.filter_by(role='student').order_by(User.id.desc()).all()
+        body = jsonify([{
+            'id': s.id, 'student_uid': s.student_uid, 'name': s.name, 'email': s.email,
+            'mobile_number': s.mobile_number, 'institution': s.institution, 'role': s.role,
+            'registration_complete': s.registration_complete,
+            'face_thumb_url': url_for('uploaded_thumbnail', filename=_safe_basename(s.face_image_path)) if s.face_image_path else None,
+        } for s in students]).get_data()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.session.remove()
+    print(f"{'list + jsonify':<22} {peak / (1024 * 1024):9.1f} MB  {len(body):,} bytes (previous)")
+    del students, body
+
+    tracemalloc.start()
+    r = client.get('/admin/users')
+    size = sum(len(chunk) for chunk in r.response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'streamed array':<22} {peak / (1024 * 1024):9.1f} MB  {size:,} bytes")
+
+    print(f"\n{'✅' if ok else '❌'} Every encoding decoded to the same JSON")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Benchmark for the data retention sweeper.
+
+Runs against a scratch SQLite database and a scratch upload directory (never
+the real ones): `--warnings` warnings and `--sessions` attempts with
+`--responses` responses each, spread over three years, plus registration
+media of which half is orphaned. Measures:
+  - a single DELETE of the expired warnings (how long it holds the write lock)
+  - the backlog sweep in checkpointed steps (throughput, longest step)
+  - the next pass once caught up (the frontier keeps it to new expiries)
+  - the rate limiter (rows/s achieved vs. configured)
+and checks that exactly the expired rows and orphaned files are gone.
+
+Usage:
+    python bench_retention.py
+    python bench_retention.py --warnings 500000 --sessions 50000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the retention sweeper')
+    parser.add_argument('--warnings', type=int, default=200000)
+    parser.add_argument('--sessions', type=int, default=20000)
+    parser.add_argument('--responses', type=int, default=20)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=20000.0, help='rows/s for the rate-limited run')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_retention_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    upload_dir = os.path.join(workdir, 'uploads')
+    os.makedirs(upload_dir)
+
+    import app as app_module
+    from app import app, db, User, ExamSession, ExamResponse, Warning
+    from retention import RetentionSweeper, RowRule, UploadRule
+    from sqlalchemy import text
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database and uploads: {workdir}")
+
+    now = datetime.utcnow()
+    span = timedelta(days=3 * 365)
+    warn_days, resp_days = 365, 730
+
+    def rules():
+        return [
+            RowRule('warnings', 'warning', 'timestamp < :cutoff', 'DELETE FROM warning WHERE id IN ({ids})', warn_days),
+            RowRule('exam_responses', 'exam_session', 'COALESCE(submitted_at, end_time, start_time) < :cutoff',
+                    'DELETE FROM exam_response WHERE session_id IN ({ids})', resp_days, cost_per_key=args.responses),
+            UploadRule('upload_orphans', upload_dir, ('face_', 'idproof_'), referenced, grace_days=1),
+        ]
+
+    def referenced():
+        return {os.path.basename(p) for (p,) in db.session.query(User.face_image_path) if p}
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        user = User(name='S', email='s@bench.local', password='-', role='student')
+        db.session.add(user)
+        db.session.flush()
+        for i in range(0, args.sessions, 2000):
+            n = min(2000, args.sessions - i)
+            db.session.execute(ExamSession.__table__.insert(), [
+                {'user_id': user.id, 'status': 'Completed', 'start_time': now - span + span * (i + k) / args.sessions,
+                 'submitted_at': now - span + span * (i + k) / args.sessions}
+                for k in range(n)
+            ])
+        sids = [s for (s,) in db.session.query(ExamSession.id).order_by(ExamSession.id)]
+        for i in range(0, len(sids), 1000):
+            db.session.execute(ExamResponse.__table__.insert(), [
+                {'session_id': sid, 'question_id': q + 1, 'selected_option': q % 4} for sid in sids[i:i + 1000]
+                for q in range(args.responses)
+            ])
+        for i in range(0, args.warnings, 20000):
+            db.session.execute(Warning.__table__.insert(), [
+                {'session_id': sids[(i + k) * len(sids) // args.warnings], 'violation_type': 'tab',
+                 'timestamp': now - span + span * (i + k) / args.warnings}
+                for k in range(min(20000, args.warnings - i))
+            ])
+        db.session.commit()
+
+        old = time.time() - 3 * 86400
+        kept_files = []
+        for i in range(args.files):
+            name = f"face_{i:08d}.jpg"
+            with open(os.path.join(upload_dir, name), 'wb') as f:
+                f.write(b'\xff' * 4096)
+            os.utime(os.path.join(upload_dir, name), (old, old))
+            if i % 2 == 0:
+                kept_files.append(name)
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'U{i}', 'email': f'u{i}@bench.local', 'password': '-', 'role': 'student',
+             'face_image_path': os.path.join(upload_dir, n)}
+            for i, n in enumerate(kept_files)
+        ])
+        db.session.commit()
+
+        warn_cut = (now - timedelta(days=warn_days)).strftime('%Y-%m-%d %H:%M:%S.%f')
+        expected_warnings = db.session.execute(text("SELECT COUNT(*) FROM warning WHERE timestamp >= :c"), {'c': warn_cut}).scalar()
+        resp_cut = (now - timedelta(days=resp_days)).strftime('%Y-%m-%d %H:%M:%S.%f')
+        expected_responses = db.session.execute(text(
+            "SELECT COUNT(*) FROM exam_response r JOIN exam_session s ON s.id = r.session_id WHERE s.submitted_at >= :c"
+        ), {'c': resp_cut}).scalar()
+        print(f"ℹ️  {args.warnings:,} warnings, {args.sessions * args.responses:,} responses, {args.files:,} files")
+
+        print("\n--- Single DELETE (for comparison) ---")
+        db.session.execute(text("SAVEPOINT oneshot"))
+        t0 = time.perf_counter()
+        n = db.session.execute(text("DELETE FROM warning WHERE timestamp < :c"), {'c': warn_cut}).rowcount
+        print(f"{'warnings':<22} {_ms(time.perf_counter() - t0)}  {n:,} rows in one write transaction")
+        db.session.execute(text("ROLLBACK TO oneshot"))
+        db.session.rollback()
+
+        print("\n--- Checkpointed sweep ---")
+        sweeper = RetentionSweeper(rules(), rows_per_sec=1e9, files_per_sec=1e9, batch=2000)
+        for rule in sweeper.rules:
+            steps, longest, t0 = 0, 0.0, time.perf_counter()
+            total = rows = files = 0
+            done = False
+            while not done:
+                s0 = time.perf_counter()
+                r = sweeper.step(rule, sweeper.batch)
+                longest = max(longest, time.perf_counter() - s0)
+                steps += 1
+                rows += r.rows
+                files += r.files
+                done = r.done
+            dt = time.perf_counter() - t0
+            total = rows or files
+            print(f"{rule.name:<22} {_ms(dt)}  {total:,} {'rows' if rows else 'files'} in {steps} steps "
+                  f"({total / dt:,.0f}/s), longest step {_ms(longest)}")
+
+        print("\n--- Next pass, caught up ---")
+        for rule in sweeper.rules:
+            t0 = time.perf_counter()
+            r = sweeper.run_pass(rule)
+            print(f"{rule.name:<22} {_ms(time.perf_counter() - t0)}  {r.rows + r.files} removed")
+
+        remaining_warnings = Warning.query.count()
+        remaining_responses = ExamResponse.query.count()
+        remaining_files = sorted(os.listdir(upload_dir))
+
+        print("\n--- Rate limit ---")
+        # Expiry follows insertion order, as in the real tables.
+        db.session.execute(text("DELETE FROM retention_checkpoint"))
+        db.session.execute(text("DELETE FROM warning"))
+        db.session.commit()
+        for i in range(0, args.warnings, 20000):
+            db.session.execute(Warning.__table__.insert(), [
+                {'session_id': sids[0], 'violation_type': 'tab', 'timestamp': now - timedelta(days=1000)}
+                for _ in range(min(20000, args.warnings - i))
+            ])
+        db.session.commit()
+        limited = RetentionSweeper(rules()[:1], rows_per_sec=args.rate, files_per_sec=1, batch=500)
+        limited.buckets['rows'].tokens = 0.0
+        swept, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < 2.0:
+            swept += sum(r.rows for _, r in limited.tick())
+            time.sleep(0.01)
+        dt = time.perf_counter() - t0
+        print(f"{'warnings':<22} {swept / dt:,.0f} rows/s achieved, {args.rate:,.0f} configured")
+
+    ok = (remaining_warnings == expected_warnings and remaining_responses == expected_responses
+          and remaining_files == sorted(kept_files) and swept / dt <= args.rate * 1.1)
+    print(f"\n{'✅' if ok else '❌'} Exactly the expired rows and orphaned files were removed "
+          f"({remaining_warnings:,}/{expected_warnings:,} warnings, {remaining_responses:,}/{expected_responses:,} responses, "
+          f"{len(remaining_files)}/{len(kept_files)} files kept)")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
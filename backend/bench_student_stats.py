@@ -0,0 +1,168 @@
+"""Benchmark for per-student stats records.
+
+Runs against a scratch SQLite database (never the real one): `--students`
+candidates with `--attempts` completed attempts each, spread over `--exams`
+exams. Measures:
+  - the previous per-view recompute (every completed session loaded, plus one
+    exam lookup per listed result) vs. reading the stats record
+  - dashboard and profile views through the app (latency, statements per view)
+  - folding a new submission into the record, and a full rebuild
+and checks that records updated in place match a rebuild from exam_session.
+
+Usage:
+    python bench_student_stats.py
+    python bench_student_stats.py --students 500 --attempts 800
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000.0:9.2f} ms"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark per-student stats records')
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--attempts', type=int, default=300, help='completed attempts per student')
+    parser.add_argument('--exams', type=int, default=20)
+    parser.add_argument('--views', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_student_stats_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    import app as app_module
+    from app import app, db, User, Exam, ExamSession
+    from models import DashboardSummary
+    from student_stats import CHUNK, rebuild_student_stats, record_submission, student_stats
+    from sqlalchemy import event
+
+    app.logger.setLevel(logging.CRITICAL)
+    print(f"ℹ️  Scratch database: {workdir}")
+
+    with app.app_context():
+        app_module.bootstrap_schema(force=True)
+        exams = [Exam(name=f'Exam {i}', is_active=True) for i in range(args.exams)]
+        db.session.add_all(exams)
+        db.session.flush()
+        exam_ids = [e.id for e in exams]
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'S{i}', 'email': f's{i}@bench.local', 'password': '-', 'role': 'student', 'registration_complete': True}
+            for i in range(args.students)
+        ])
+        users = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+        base = datetime.utcnow() - timedelta(days=365)
+        for uid in users:
+            db.session.execute(ExamSession.__table__.insert(), [
+                {'user_id': uid, 'exam_id': exam_ids[(uid + h) % len(exam_ids)], 'status': 'Completed',
+                 'submitted_at': base + timedelta(hours=h, seconds=uid), 'percentage': float((uid * 7 + h * 13) % 100),
+                 'result_status': 'Passed' if (uid * 7 + h * 13) % 100 >= 40 else 'Failed', 'results_published': True}
+                for h in range(args.attempts)
+            ])
+        db.session.commit()
+    print(f"ℹ️  {len(users)} students x {args.attempts} attempts")
+    sample = users[:args.views]
+
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    def legacy(uid):
+        completed = (
+            ExamSession.query
+            .filter_by(user_id=uid, status='Completed')
+            .filter(ExamSession.submitted_at.isnot(None))
+            .order_by(ExamSession.submitted_at.desc())
+            .all()
+        )
+        avg = sum(float(s.percentage or 0.0) for s in completed) / len(completed) if completed else 0.0
+        recent = []
+        for s in completed[:10]:
+            e = Exam.query.get(s.exam_id) if s.exam_id else None
+            recent.append((e.name if e else 'Exam', float(s.percentage or 0.0)))
+        return len(completed), avg, recent
+
+    def timed(label, fn):
+        statements[0] = 0
+        t0 = time.perf_counter()
+        for uid in sample:
+            fn(uid)
+        dt = time.perf_counter() - t0
+        print(f"{label:<20} {_ms(dt / len(sample))}  {statements[0] / len(sample):5.1f} statements/student")
+
+    print("\n--- Per student (in process) ---")
+    with app.app_context():
+        timed('legacy recompute', lambda uid: (legacy(uid), db.session.expunge_all()))
+        timed('record (cold)', student_stats)
+        timed('record (warm)', student_stats)
+        mismatches = 0
+        for uid in sample:
+            n, avg, recent = legacy(uid)
+            st = student_stats(uid)
+            got = [(r['exam_name'], r['percentage']) for r in st.recent_results]
+            if st.exams_completed != n or abs(st.avg_score - avg) > 1e-6 or got != recent:
+                mismatches += 1
+        db.session.expunge_all()
+
+    print("\n--- Through the app ---")
+    clients = []
+    for uid in sample:
+        c = app.test_client()
+        with c.session_transaction() as s:
+            s['user_id'] = uid
+            s['role'] = 'student'
+        clients.append(c)
+    for path in ('/student_dashboard', '/profile'):
+        statements[0] = 0
+        t0 = time.perf_counter()
+        for c in clients:
+            c.get(path)
+        dt = time.perf_counter() - t0
+        print(f"{path:<20} {_ms(dt / len(clients))}  {statements[0] / len(clients):5.1f} statements/view")
+
+    print("\n--- Maintenance ---")
+    with app.app_context():
+        now = datetime.utcnow()
+        statements[0] = 0
+        t0 = time.perf_counter()
+        for i, uid in enumerate(sample):
+            pct = float((uid * 3 + i) % 100)
+            sid = db.session.execute(ExamSession.__table__.insert().values(
+                user_id=uid, exam_id=exam_ids[0], status='Completed', submitted_at=now + timedelta(seconds=i),
+                percentage=pct, result_status='Passed' if pct >= 40 else 'Failed', results_published=False,
+            )).inserted_primary_key[0]
+            record_submission(uid, sid, 'Exam 0', now + timedelta(seconds=i), pct, 'Passed' if pct >= 40 else 'Failed')
+            db.session.commit()
+        dt = time.perf_counter() - t0
+        print(f"{'submit (in place)':<20} {_ms(dt / len(sample))}  {statements[0] / len(sample):5.1f} statements/submit")
+        in_place = {
+            uid: (st.exams_completed, round(st.avg_score, 6), [(r['session_id'], r['percentage']) for r in st.recent_results])
+            for uid in sample for st in [student_stats(uid)]
+        }
+
+        t0 = time.perf_counter()
+        for i in range(0, len(users), CHUNK):
+            rebuild_student_stats(users[i:i + CHUNK])
+            db.session.commit()
+        dt = time.perf_counter() - t0
+        print(f"{'full rebuild':<20} {_ms(dt)}  {len(users)} records ({len(users) * args.attempts / dt:,.0f} attempts/s)")
+        rebuilt = {
+            uid: (st.exams_completed, round(st.avg_score, 6), [(r['session_id'], r['percentage']) for r in st.recent_results])
+            for uid in sample for st in [student_stats(uid)]
+        }
+        records = DashboardSummary.query.count()
+
+    ok = mismatches == 0 and in_place == rebuilt and records == len(users)
+    print(f"\n{'✅' if ok else '❌'} Records match the recompute ({mismatches} mismatches) and a rebuild "
+          f"({'equal' if in_place == rebuilt else 'differ'})")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
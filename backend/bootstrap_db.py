@@ -0,0 +1,20 @@
+from app import app, db, bootstrap_schema, get_schema_version, SCHEMA_VERSION
+import argparse
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Create/upgrade the database schema and seed defaults.')
+    parser.add_argument('--force', action='store_true', help='re-run even if the version stamp is current')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        before = get_schema_version()
+        print(f"ℹ️  Schema version: {before} (code expects {SCHEMA_VERSION})")
+        if bootstrap_schema(force=args.force):
+            print(f"✅ Schema bootstrapped and stamped as version {get_schema_version()}")
+        else:
+            print("✅ Schema already up to date; nothing to do.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Offline consistency check for the denormalized exam counters.
+
+`Exam.question_count` and `Exam.total_marks` are maintained by the app whenever
+questions are created or deleted. This script compares them against the actual
+`exam_question` rows of an existing SQLite database, without starting Flask.
+
+Usage:
+    python check_exam_consistency.py                 # report only
+    python check_exam_consistency.py --fix           # rewrite drifted rows
+    python check_exam_consistency.py path/to/database.db --fix
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from models import EXAM_TOTALS_BACKFILL_SQL
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'instance', 'database.db')
+
+DRIFT_QUERY = """
+    SELECT e.id, e.name, e.question_count, e.total_marks,
+           COUNT(q.id) AS actual_count,
+           COALESCE(SUM(q.marks), 0) AS actual_marks
+    FROM exam e
+    LEFT JOIN exam_question q ON q.exam_id = e.id
+    GROUP BY e.id
+    HAVING COALESCE(e.question_count, -1) != COUNT(q.id)
+        OR COALESCE(e.total_marks, -1) != COALESCE(SUM(q.marks), 0)
+    ORDER BY e.id
+"""
+
+
+def check_database(db_path: str, fix: bool = False) -> int:
+    """Return the number of drifted exams found (before any fix)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(exam)").fetchall()}
+        if not cols:
+            print(f"❌ No 'exam' table in {db_path}")
+            return 0
+
+        if 'question_count' not in cols:
+            print("⚠️  Column exam.question_count is missing (database predates the counter).")
+            if not fix:
+                total = conn.execute("SELECT COUNT(*) FROM exam").fetchone()[0]
+                print(f"   Re-run with --fix to add it and backfill {total} exams.")
+                return total
+            conn.execute("ALTER TABLE exam ADD COLUMN question_count INTEGER DEFAULT 0")
+
+        drifted = conn.execute(DRIFT_QUERY).fetchall()
+        if not drifted:
+            print("✅ All exam counters are consistent.")
+            return 0
+
+        print(f"⚠️  {len(drifted)} exam(s) with drifted counters:")
+        for exam_id, name, stored_count, stored_marks, actual_count, actual_marks in drifted:
+            print(
+                f"   - ID: {exam_id} | {name} | questions {stored_count} -> {actual_count}"
+                f" | total_marks {stored_marks} -> {actual_marks}"
+            )
+
+        if fix:
+            conn.execute(EXAM_TOTALS_BACKFILL_SQL)
+            conn.commit()
+            print("💾 Counters recomputed from exam_question.")
+        return len(drifted)
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path', nargs='?', default=DEFAULT_DB_PATH)
+    parser.add_argument('--fix', action='store_true', help='rewrite drifted counters in place')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ Database not found: {args.db_path}")
+        return 2
+
+    drifted = check_database(args.db_path, fix=args.fix)
+    return 1 if drifted and not args.fix else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
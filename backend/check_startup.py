@@ -0,0 +1,115 @@
+"""Cold-start budget check for `import app`.
+
+Imports the app in a fresh interpreter with `-X importtime`, then fails
+(non-zero exit) if:
+  - any heavy module that must stay lazy was imported at module load, or
+  - the cumulative import time exceeds the budget.
+
+Usage:
+    python check_startup.py
+    python check_startup.py --budget-ms 1500 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported on first use / by prewarm_heavy_modules(), never by `import app`.
+LAZY_MODULES = ['cv2', 'mediapipe', 'reportlab', 'ai_proctor']
+
+DEFAULT_BUDGET_MS = 2500.0
+
+PROBE = (
+    "import sys, json\n"
+    "import app\n"
+    "print('LOADED=' + json.dumps(sorted(m for m in {mods} if m in sys.modules)))\n"
+)
+
+
+def profile_import():
+    env = dict(os.environ)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(mods=repr(LAZY_MODULES))],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import app failed')
+
+    timings = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        name = parts[2].rstrip()
+        timings.append((cumulative_us, name.strip(), len(name) - len(name.lstrip())))
+
+    loaded = []
+    for line in proc.stdout.splitlines():
+        if line.startswith('LOADED='):
+            loaded = json.loads(line[len('LOADED='):])
+    return timings, loaded
+
+
+def app_entry(timings):
+    """Index of the `import app` line in the profile, or None."""
+    return next((i for i in range(len(timings) - 1, -1, -1) if timings[i][1] == 'app'), None)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Cold-start budget check for import app')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    timings, loaded = profile_import()
+
+    app_idx = app_entry(timings)
+    if app_idx is None:
+        print("❌ Could not find 'app' in the import profile")
+        return 1
+    total_us, _, app_indent = timings[app_idx]
+    total_ms = total_us / 1000.0
+
+    # -X importtime prints children before their parent; walk back from the
+    # app line to collect its direct imports (one nesting level deeper).
+    children = []
+    for entry in reversed(timings[:app_idx]):
+        if entry[2] <= app_indent:
+            break
+        if entry[2] == app_indent + 2:
+            children.append(entry)
+
+    print(f"ℹ️  import app: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("   Slowest imports made by app.py:")
+    for us, name, _ in sorted(children, reverse=True)[:args.top]:
+        print(f"   {us / 1000.0:9.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"❌ Heavy modules imported at load time: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Cold start over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    if not failed:
+        print("✅ Startup within budget.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
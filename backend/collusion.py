@@ -0,0 +1,252 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+NUM_OPTIONS = 4
+NOT_ANSWERED = -1
+
+
+@dataclass(frozen=True)
+class SuspiciousPair:
+    session_a: int
+    session_b: int
+    shared_wrong: int      # questions both answered wrong with the same option
+    both_wrong: int        # questions both answered wrong
+    expected: float        # shared_wrong expected by chance, given how popular each distractor is
+    z_score: float
+
+
+class AnswerMatrix:
+    """Completed attempts of one exam as a sessions x questions int8 matrix.
+
+    Cells hold the canonical option picked (0-3) or NOT_ANSWERED, which also
+    covers questions a candidate was never shown.
+    """
+
+    def __init__(self, session_ids: np.ndarray, answers: np.ndarray, correct: np.ndarray) -> None:
+        self.session_ids = np.asarray(session_ids, dtype=np.int64)
+        self.answers = np.asarray(answers, dtype=np.int8)
+        self.correct = np.asarray(correct, dtype=np.int8)
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, np.ndarray]) -> 'AnswerMatrix':
+        """Build from ExamAnalytics.snapshot() columns."""
+        n_s, n_q = len(cols['session_ids']), len(cols['question_ids'])
+        answers = np.full((n_s, n_q), NOT_ANSWERED, dtype=np.int8)
+        sel = cols['r_selected']
+        answered = sel < NUM_OPTIONS
+        answers[cols['r_session'][answered], cols['r_question'][answered]] = sel[answered]
+        return cls(cols['session_ids'], answers, cols['correct_option'])
+
+    @property
+    def wrong(self) -> np.ndarray:
+        return (self.answers != NOT_ANSWERED) & (self.answers != self.correct)
+
+    def wrong_tokens(self) -> np.ndarray:
+        """One-hot (question, wrong option) matrix, sessions x (questions * 4)."""
+        n_s, n_q = self.answers.shape
+        onehot = np.zeros((n_s, n_q, NUM_OPTIONS), dtype=np.bool_)
+        rows, cols = np.nonzero(self.wrong)
+        onehot[rows, cols, self.answers[rows, cols]] = True
+        return onehot.reshape(n_s, n_q * NUM_OPTIONS)
+
+    def match_probability(self) -> np.ndarray:
+        """Per question: chance two candidates who both got it wrong picked the same option."""
+        wrong = self.wrong
+        counts = np.zeros((self.answers.shape[1], NUM_OPTIONS), dtype=np.float64)
+        rows, cols = np.nonzero(wrong)
+        np.add.at(counts, (cols, self.answers[rows, cols]), 1.0)
+        total = counts.sum(axis=1)
+        share = np.divide(counts, total[:, None], out=np.zeros_like(counts), where=total[:, None] > 0)
+        return np.clip((share ** 2).sum(axis=1), 1e-3, 1.0)
+
+
+class CollusionDetector:
+    """Flags session pairs sharing more identical wrong answers than chance allows.
+
+    For a pair, `shared_wrong` counts questions both answered wrong with the
+    same option. Under independence each such question matches with
+    probability s_q (from how the whole cohort spread over that question's
+    distractors), so shared_wrong has mean sum(s_q) and variance
+    sum(s_q(1 - s_q)) over the questions both got wrong. Pairs with at least
+    `min_shared` matches and a z-score of `min_z` or more are reported.
+
+    Small cohorts are compared exhaustively, in row blocks as matrix products.
+    Larger ones first bucket candidates with MinHash LSH over their sets of
+    (question, wrong option) tokens: `bands` bands of `rows_per_band` hashes,
+    so pairs with a Jaccard similarity above roughly
+    (1 / bands) ** (1 / rows_per_band) share a bucket with high probability,
+    and only those pairs are scored.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_shared: int = 5,
+        min_z: float = 4.0,
+        exact_max: int = 3000,
+        bands: int = 32,
+        rows_per_band: int = 5,
+        common_token_share: float = 0.2,
+        block_rows: int = 512,
+        seed: int = 0,
+    ) -> None:
+        self.min_shared = min_shared
+        self.min_z = min_z
+        self.exact_max = exact_max
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        self.common_token_share = common_token_share
+        self.block_rows = block_rows
+        self.seed = seed
+        self.last_stats: Dict[str, float] = {}
+
+    def scan(self, matrix: AnswerMatrix, method: Optional[str] = None) -> List[SuspiciousPair]:
+        """Score candidate pairs; `method` is 'exact', 'lsh' or None (by cohort size)."""
+        wrong = matrix.wrong
+        # Nobody with fewer than min_shared wrong answers can be flagged.
+        keep = np.flatnonzero(wrong.sum(axis=1) >= self.min_shared)
+        method = method or ('exact' if len(keep) <= self.exact_max else 'lsh')
+        self.last_stats = {'sessions': len(matrix.session_ids), 'eligible': int(len(keep)), 'method': method}
+        if len(keep) < 2:
+            self.last_stats['pairs_scored'] = 0
+            return []
+
+        tokens = matrix.wrong_tokens()[keep]
+        w = wrong[keep].astype(np.float32)
+        s = matrix.match_probability().astype(np.float32)
+        if method == 'exact':
+            found = self._scan_exact(tokens.astype(np.float32), w, s)
+        else:
+            found = self._scan_lsh(tokens, w, s)
+
+        ids = matrix.session_ids[keep]
+        pairs = [
+            SuspiciousPair(int(ids[i]), int(ids[j]), int(sh), int(bw), round(float(mu), 2), round(float(z), 2))
+            for i, j, sh, bw, mu, z in found
+        ]
+        pairs.sort(key=lambda p: p.z_score, reverse=True)
+        self.last_stats['flagged'] = len(pairs)
+        return pairs
+
+    # --- Scoring ---
+
+    def _flag(self, shared, both, mu, var):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = (shared - mu) / np.sqrt(var)
+        return (shared >= self.min_shared) & (var > 0) & (z >= self.min_z), z
+
+    def _scan_exact(self, tokens: np.ndarray, w: np.ndarray, s: np.ndarray):
+        n = len(w)
+        ws, wv = w * s, w * (s * (1.0 - s))
+        found = []
+        scored = 0
+        for start in range(0, n, self.block_rows):
+            stop = min(n, start + self.block_rows)
+            # Only pairs (i, j) with j > i: compare the block with itself and everything after it.
+            shared = tokens[start:stop] @ tokens[start:].T
+            both = w[start:stop] @ w[start:].T
+            mu = ws[start:stop] @ w[start:].T
+            var = wv[start:stop] @ w[start:].T
+            hit, z = self._flag(shared, both, mu, var)
+            hit &= np.arange(start, n)[None, :] > np.arange(start, stop)[:, None]
+            scored += (stop - start) * (n - start)
+            for bi, bj in zip(*np.nonzero(hit)):
+                found.append((start + bi, start + bj, shared[bi, bj], both[bi, bj], mu[bi, bj], z[bi, bj]))
+        self.last_stats['pairs_scored'] = scored
+        return found
+
+    def _scan_lsh(self, tokens: np.ndarray, w: np.ndarray, s: np.ndarray):
+        pairs = self._candidate_pairs(tokens)
+        self.last_stats['pairs_scored'] = int(len(pairs))
+        found = []
+        step = max(1, (1 << 24) // max(1, tokens.shape[1]))
+        for start in range(0, len(pairs), step):
+            i, j = pairs[start:start + step, 0], pairs[start:start + step, 1]
+            shared = (tokens[i] & tokens[j]).sum(axis=1)
+            both_mask = (w[i] * w[j])
+            both = both_mask.sum(axis=1)
+            mu = both_mask @ s
+            var = both_mask @ (s * (1.0 - s))
+            hit, z = self._flag(shared, both, mu, var)
+            for k in np.flatnonzero(hit):
+                found.append((i[k], j[k], shared[k], both[k], mu[k], z[k]))
+        return found
+
+    # --- LSH ---
+
+    def _signatures(self, tokens: np.ndarray) -> np.ndarray:
+        """MinHash signatures: per hash, the lowest random rank among a row's tokens.
+
+        Every row has tokens (scan() drops the others), so np.nonzero's
+        row-major output splits into one non-empty run per row.
+        """
+        n, t = tokens.shape
+        rows, cols = np.nonzero(tokens)
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        rng = np.random.default_rng(self.seed)
+        hashes = self.bands * self.rows_per_band
+        sig = np.empty((n, hashes), dtype=np.int64)
+        for h in range(hashes):
+            ranks = rng.permutation(t)
+            sig[:, h] = np.minimum.reduceat(ranks[cols], starts)
+        return sig
+
+    def _candidate_pairs(self, tokens: np.ndarray) -> np.ndarray:
+        n, t = tokens.shape
+        # Popular misconceptions are shared by chance and carry little
+        # evidence; hashing them would put most of the cohort in a few buckets.
+        rare = tokens.mean(axis=0) <= self.common_token_share
+        rare_tokens = tokens[:, rare]
+        has_rare = np.flatnonzero(rare_tokens.any(axis=1))
+        if not len(has_rare):
+            self.last_stats['largest_bucket'] = 0
+            return np.zeros((0, 2), dtype=np.int64)
+        sig = self._signatures(rare_tokens[has_rare])
+        n = len(has_rare)
+        r = self.rows_per_band
+        weights = (t + 1) ** np.arange(r, dtype=np.int64)
+        chunks: List[np.ndarray] = []
+        largest = 0
+        for b in range(self.bands):
+            # Rows with equal band signatures share a bucket; after sorting,
+            # bucket members are adjacent, so pairs are (k, k + d) with equal keys.
+            keys = sig[:, b * r:(b + 1) * r] @ weights
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            d = 1
+            while d < n:
+                same = np.flatnonzero(keys[d:] == keys[:-d])
+                if not len(same):
+                    break
+                a, c = order[same], order[same + d]
+                chunks.append(np.minimum(a, c) * n + np.maximum(a, c))
+                d += 1
+            largest = max(largest, d)
+        self.last_stats['largest_bucket'] = largest
+        if not chunks:
+            return np.zeros((0, 2), dtype=np.int64)
+        keys = np.unique(np.concatenate(chunks))
+        return np.stack([has_rare[keys // n], has_rare[keys % n]], axis=1)
+
+
+def group_pairs(pairs: List[SuspiciousPair]) -> List[Tuple[int, ...]]:
+    """Connected components of flagged pairs: candidates who likely share one source."""
+    parent: Dict[int, int] = {}
+
+    def find(x: int) -> int:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for p in pairs:
+        ra, rb = find(p.session_a), find(p.session_b)
+        if ra != rb:
+            parent[ra] = rb
+    groups: Dict[int, List[int]] = {}
+    for x in parent:
+        groups.setdefault(find(x), []).append(x)
+    return sorted((tuple(sorted(g)) for g in groups.values()), key=len, reverse=True)
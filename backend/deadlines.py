@@ -0,0 +1,135 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Heap entry kinds, in the order they fire for one session.
+WARN = 0      # remaining time reached one of `warn_before` -> countdown resync
+DEADLINE = 1  # time is up -> ask the client to submit now
+EXPIRE = 2    # deadline + grace passed -> finalize server-side
+
+Batch = List[Tuple[int, float]]  # (session_id, deadline)
+
+
+class DeadlineScheduler:
+    """One heap over every active exam session's deadline.
+
+    A single background task sleeps until the next entry is due (at most
+    `tick_sec`), pops everything due and hands it to the callbacks in batches,
+    so cost scales with events, not with the number of sessions, and no
+    per-session timer exists.
+
+    Rescheduling or removing a session does not touch the heap: entries carry
+    the deadline they were made for and are skipped when it no longer matches
+    the session's current deadline (lazy deletion). The heap is compacted when
+    stale entries outnumber live ones.
+
+    Callbacks (all receive a list of (session_id, deadline)):
+        on_warn      remaining time crossed a `warn_before` mark
+        on_deadline  deadline reached
+        on_expire    deadline + `grace_sec` reached; finalize these sessions
+    """
+
+    def __init__(
+        self,
+        *,
+        on_warn: Callable[[Batch], None],
+        on_deadline: Callable[[Batch], None],
+        on_expire: Callable[[Batch], None],
+        grace_sec: float = 30.0,
+        warn_before: Sequence[float] = (300.0, 60.0),
+        tick_sec: float = 1.0,
+        batch_size: int = 500,
+    ) -> None:
+        self.on_warn = on_warn
+        self.on_deadline = on_deadline
+        self.on_expire = on_expire
+        self.grace_sec = grace_sec
+        self.warn_before = tuple(warn_before)
+        self.tick_sec = tick_sec
+        self.batch_size = batch_size
+
+        self._heap: List[Tuple[float, int, int, float]] = []  # (due, kind, session_id, deadline)
+        self._deadlines: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+        self.stats = {'scheduled': 0, 'warned': 0, 'deadlines': 0, 'expired': 0, 'stale_skipped': 0}
+
+    # --- Registration ---
+
+    def add(self, session_id: int, deadline: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._deadlines[session_id] = deadline
+            for before in self.warn_before:
+                if deadline - before > now:
+                    heapq.heappush(self._heap, (deadline - before, WARN, session_id, deadline))
+            heapq.heappush(self._heap, (deadline, DEADLINE, session_id, deadline))
+            heapq.heappush(self._heap, (deadline + self.grace_sec, EXPIRE, session_id, deadline))
+            self.stats['scheduled'] += 1
+
+    def add_many(self, items: Iterable[Tuple[int, float]]) -> int:
+        n = 0
+        for session_id, deadline in items:
+            self.add(session_id, deadline)
+            n += 1
+        return n
+
+    def remove(self, session_id: int) -> None:
+        with self._lock:
+            self._deadlines.pop(session_id, None)
+            if len(self._heap) > 64 and len(self._heap) > 8 * (len(self._deadlines) + 1):
+                self._heap = [e for e in self._heap if self._deadlines.get(e[2]) == e[3]]
+                heapq.heapify(self._heap)
+
+    def deadline(self, session_id: int) -> Optional[float]:
+        return self._deadlines.get(session_id)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    # --- Loop ---
+
+    def start(self, spawn: Callable, sleep: Callable[[float], None]) -> None:
+        """Start the loop with the server's task primitives (e.g. socketio.start_background_task / socketio.sleep)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        spawn(self._run, sleep)
+
+    def _run(self, sleep: Callable[[float], None]) -> None:
+        while True:
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Deadline Scheduler Error: {e}")
+            with self._lock:
+                wait = self._heap[0][0] - time.time() if self._heap else self.tick_sec
+            sleep(min(max(wait, 0.05), self.tick_sec))
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Pop and dispatch every entry due at `now`; returns how many fired."""
+        now = time.time() if now is None else now
+        due: Tuple[Batch, Batch, Batch] = ([], [], [])
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, kind, session_id, deadline = heapq.heappop(self._heap)
+                if self._deadlines.get(session_id) != deadline:
+                    self.stats['stale_skipped'] += 1
+                    continue
+                if kind == EXPIRE:
+                    del self._deadlines[session_id]
+                due[kind].append((session_id, deadline))
+
+        for kind, callback, stat in (
+            (WARN, self.on_warn, 'warned'),
+            (DEADLINE, self.on_deadline, 'deadlines'),
+            (EXPIRE, self.on_expire, 'expired'),
+        ):
+            items = due[kind]
+            for i in range(0, len(items), self.batch_size):
+                callback(items[i:i + self.batch_size])
+            self.stats[stat] += len(items)
+        return sum(len(d) for d in due)
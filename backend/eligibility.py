@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+
+from models import db, ExamSession
+
+
+@dataclass(frozen=True)
+class ExamAccess:
+    allowed: bool
+    badge_text: str
+
+
+AVAILABLE_NOW = ExamAccess(True, 'Available now')
+
+
+def exam_access(exam_obj, last_submitted_at: Optional[datetime], today: Optional[date] = None) -> ExamAccess:
+    """Availability and reattempt rules for one exam, given the user's last completed attempt."""
+    today = today or datetime.utcnow().date()
+
+    available_from = getattr(exam_obj, 'available_from', None)
+    if available_from and today < available_from:
+        return ExamAccess(False, f"Available after {available_from.strftime('%b %d, %Y')}")
+
+    if last_submitted_at is None:
+        return AVAILABLE_NOW
+
+    if not bool(getattr(exam_obj, 'allow_reattempt', False)):
+        return ExamAccess(False, 'Single attempt completed')
+
+    days = getattr(exam_obj, 'reattempt_after_days', None)
+    try:
+        days = int(days) if days is not None else None
+    except Exception:
+        days = None
+    if not days or days <= 0:
+        return AVAILABLE_NOW
+
+    if today < last_submitted_at.date() + timedelta(days=days):
+        return ExamAccess(False, f"Reattempt locked ({days} days)")
+    return AVAILABLE_NOW
+
+
+class EligibilityService:
+    """Exam access for a user across all exams from one aggregated query.
+
+    Per user it memoizes {exam_id: last submitted_at} of completed attempts
+    (`MAX(submitted_at) GROUP BY exam_id`). Exam settings and today's date
+    are applied at read time, so only a new submission changes the memo;
+    call `invalidate(user_id)` when one happens. The TTL bounds staleness
+    across processes (prefork workers each keep their own memo), so the memo
+    only feeds dashboard badges; `access_for`, which gates starting an exam,
+    always reads the database.
+    """
+
+    def __init__(self, ttl_sec: float = 300.0, max_users: int = 20000) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_users = max_users
+        self._memo: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def last_submissions(self, user_id: int) -> Dict[int, datetime]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memo.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._memo.move_to_end(user_id)
+                self.stats['hits'] += 1
+                return entry[1]
+
+        rows = (
+            db.session.query(ExamSession.exam_id, func.max(ExamSession.submitted_at))
+            .filter(ExamSession.user_id == user_id)
+            .filter(ExamSession.status == 'Completed')
+            .filter(ExamSession.submitted_at.isnot(None))
+            .filter(ExamSession.exam_id.isnot(None))
+            .group_by(ExamSession.exam_id)
+            .all()
+        )
+        last = {exam_id: submitted_at for exam_id, submitted_at in rows}
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self._memo[user_id] = (now + self.ttl_sec, last)
+            self._memo.move_to_end(user_id)
+            while len(self._memo) > self.max_users:
+                self._memo.popitem(last=False)
+        return last
+
+    def access(self, user_id: int, exams: Iterable) -> Dict[int, ExamAccess]:
+        last = self.last_submissions(user_id)
+        today = datetime.utcnow().date()
+        return {e.id: exam_access(e, last.get(e.id), today) for e in exams}
+
+    def access_for(self, user_id: int, exam_obj) -> ExamAccess:
+        """Access to one exam from a fresh, indexed lookup of the user's last attempt (never the memo)."""
+        last = (
+            db.session.query(func.max(ExamSession.submitted_at))
+            .filter(ExamSession.user_id == user_id)
+            .filter(ExamSession.status == 'Completed')
+            .filter(ExamSession.submitted_at.isnot(None))
+            .filter(ExamSession.exam_id == exam_obj.id)
+            .scalar()
+        )
+        return exam_access(exam_obj, last)
+
+    def invalidate(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                if self._memo.pop(user_id, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
@@ -0,0 +1,272 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import Any, Dict, List, Optional
+
+_BLOB_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class EvidenceStore:
+    """Content-addressed store for violation snapshots.
+
+    Layout under `root`:
+        blobs/<aa>/<sha256>.jpg      one file per distinct (normalized) image
+        sessions/<session_id>.jsonl  append-only manifest, one line per capture
+
+    `capture()` only enqueues the raw data URL; decoding, downscaling,
+    recompression, hashing and the writes happen on a background thread so
+    the proctoring hot path is unaffected. Identical snapshots (same bytes
+    after normalization) are stored once and referenced from every manifest.
+
+    Retention: manifests older than `retention_days` are dropped, then the
+    oldest manifests are evicted until blobs fit in `max_total_bytes`; blobs
+    no manifest references are deleted once they are older than
+    `blob_grace_sec` (a blob is written, or touched when deduplicated, before
+    its manifest line, possibly by another process). Files another process
+    removed mid-sweep are skipped. The background thread sweeps every
+    `sweep_interval_sec` (0: never); with several processes sharing `root`,
+    enable it in one of them with `start_sweeping()`.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        max_width: int = 320,
+        jpeg_quality: int = 60,
+        retention_days: float = 30.0,
+        max_total_bytes: int = 2 * 1024 ** 3,
+        sweep_interval_sec: float = 600.0,
+        blob_grace_sec: float = 900.0,
+        max_queue: int = 1000,
+    ) -> None:
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.manifest_dir = os.path.join(root, 'sessions')
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self.sweep_interval_sec = sweep_interval_sec
+        self.blob_grace_sec = blob_grace_sec
+
+        self._queue: Queue = Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        self.stats = {'captured': 0, 'deduplicated': 0, 'dropped': 0, 'failed': 0, 'evicted_blobs': 0}
+
+    # --- Hot path ---
+
+    def capture(self, session_id: int, warning_id: Optional[int], violation: str, image_data_url: Optional[str]) -> bool:
+        """Queue a snapshot for background processing. Never blocks."""
+        if not image_data_url:
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((int(session_id), warning_id, violation, image_data_url, time.time()))
+            return True
+        except Full:
+            self.stats['dropped'] += 1
+            return False
+
+    # --- Reads (admin) ---
+
+    def blob_path(self, blob_id: str) -> Optional[str]:
+        if not _BLOB_ID_RE.match(blob_id or ''):
+            return None
+        path = os.path.join(self.blob_dir, blob_id[:2], f"{blob_id}.jpg")
+        return path if os.path.exists(path) else None
+
+    def manifest(self, session_id: int) -> List[Dict[str, Any]]:
+        path = self._manifest_path(session_id)
+        entries = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entries.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    # --- Background worker ---
+
+    def _start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            os.makedirs(self.blob_dir, exist_ok=True)
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='evidence-store', daemon=True)
+            self._thread.start()
+
+    def start_sweeping(self, interval_sec: Optional[float] = None) -> None:
+        """Sweep from this process (every `interval_sec`, if given), even before the first capture."""
+        if interval_sec is not None:
+            self.sweep_interval_sec = interval_sec
+        self._start()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except Empty:
+                item = None
+            if item is not None:
+                try:
+                    self._store(*item)
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    print(f"Evidence Error: {e}")
+                finally:
+                    self._queue.task_done()
+            if self.sweep_interval_sec > 0 and time.time() - self._last_sweep >= self.sweep_interval_sec:
+                self._last_sweep = time.time()
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Evidence Sweep Error: {e}")
+
+    def _normalize(self, raw: bytes) -> bytes:
+        """Downscale and recompress; returns raw bytes unchanged if OpenCV is unavailable."""
+        try:
+            import cv2  # type: ignore
+            import numpy as np  # type: ignore
+        except Exception:
+            return raw
+
+        img = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError('Undecodable snapshot')
+        h, w = img.shape[:2]
+        if w > self.max_width:
+            img = cv2.resize(img, (self.max_width, max(1, int(h * self.max_width / w))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise ValueError('Snapshot encode failed')
+        return buf.tobytes()
+
+    def _store(self, session_id: int, warning_id: Optional[int], violation: str, image_data_url: str, ts: float) -> None:
+        b64 = image_data_url.split(',', 1)[1] if ',' in image_data_url else image_data_url
+        data = self._normalize(base64.b64decode(b64))
+        blob_id = hashlib.sha256(data).hexdigest()
+
+        blob_dir = os.path.join(self.blob_dir, blob_id[:2])
+        blob_path = os.path.join(blob_dir, f"{blob_id}.jpg")
+        try:
+            os.utime(blob_path)  # restarts the sweep's grace period for a shared blob
+            self.stats['deduplicated'] += 1
+        except FileNotFoundError:
+            os.makedirs(blob_dir, exist_ok=True)
+            tmp = blob_path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, blob_path)
+
+        entry = {
+            'warning_id': warning_id,
+            'violation': violation,
+            'timestamp': ts,
+            'blob': blob_id,
+            'bytes': len(data),
+        }
+        with open(self._manifest_path(session_id), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        self.stats['captured'] += 1
+
+    def _manifest_path(self, session_id: int) -> str:
+        return os.path.join(self.manifest_dir, f"{int(session_id)}.jsonl")
+
+    # --- Retention ---
+
+    def sweep(self) -> Dict[str, int]:
+        """Apply the retention policy; returns counts of what was removed."""
+        removed = {'manifests': 0, 'blobs': 0, 'bytes': 0}
+        if not os.path.isdir(self.manifest_dir):
+            return removed
+
+        now = time.time()
+        cutoff = now - self.retention_days * 86400.0
+        manifests = []
+        for name in os.listdir(self.manifest_dir):
+            path = os.path.join(self.manifest_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if mtime < cutoff:
+                    os.remove(path)
+                    removed['manifests'] += 1
+                    continue
+            except FileNotFoundError:
+                continue
+            manifests.append((mtime, path))
+        manifests.sort()
+
+        blobs = {}
+        for sub in os.listdir(self.blob_dir) if os.path.isdir(self.blob_dir) else []:
+            for name in os.listdir(os.path.join(self.blob_dir, sub)):
+                if name.endswith('.jpg'):
+                    path = os.path.join(self.blob_dir, sub, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    blobs[name[:-4]] = (path, st.st_size, st.st_mtime)
+
+        # Reference counts across live manifests (a blob may be shared by many).
+        manifest_refs = []
+        refcount: Dict[str, int] = {}
+        for _, path in manifests:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    refs = {json.loads(line)['blob'] for line in f if line.strip()}
+            except FileNotFoundError:
+                continue
+            manifest_refs.append((path, refs))
+            for blob_id in refs:
+                refcount[blob_id] = refcount.get(blob_id, 0) + 1
+
+        total = sum(blobs[b][1] for b in refcount if b in blobs)
+        # Evict oldest sessions first until the referenced set fits the budget.
+        for path, refs in manifest_refs:
+            if total <= self.max_total_bytes:
+                break
+            try:
+                os.remove(path)
+                removed['manifests'] += 1
+            except FileNotFoundError:
+                pass
+            for blob_id in refs:
+                refcount[blob_id] -= 1
+                if refcount[blob_id] == 0:
+                    del refcount[blob_id]
+                    total -= blobs[blob_id][1] if blob_id in blobs else 0
+
+        fresh = now - self.blob_grace_sec
+        for blob_id, (path, size, mtime) in blobs.items():
+            if blob_id not in refcount and mtime < fresh:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed['blobs'] += 1
+                removed['bytes'] += size
+        self.stats['evicted_blobs'] += removed['blobs']
+        return removed
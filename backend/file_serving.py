@@ -0,0 +1,171 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import Response, make_response, send_from_directory
+
+ONE_YEAR = 31536000
+
+
+class StaticManifest:
+    """Content-hashed names for files under a static folder.
+
+    `hashed('js/exam.js')` -> 'js/exam.3f9a1c2b.js'. Hashes are cached per
+    (mtime, size), so an edited file gets a new name without a restart.
+    `resolve()` maps a requested name back to the real file and tells whether
+    the hash is current (safe to cache for a year).
+    """
+
+    def __init__(self, folder: str, hash_len: int = 8) -> None:
+        self.folder = folder
+        self.hash_len = hash_len
+        self._cache: Dict[str, Tuple[Tuple[float, int], str]] = {}
+
+    def _digest(self, rel: str) -> Optional[str]:
+        path = os.path.join(self.folder, rel)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_mtime, st.st_size)
+        cached = self._cache.get(rel)
+        if cached and cached[0] == key:
+            return cached[1]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                h.update(chunk)
+        digest = h.hexdigest()[:self.hash_len]
+        self._cache[rel] = (key, digest)
+        return digest
+
+    def hashed(self, rel: str) -> str:
+        digest = self._digest(rel)
+        if digest is None:
+            return rel
+        base, ext = os.path.splitext(rel)
+        return f"{base}.{digest}{ext}"
+
+    def resolve(self, requested: str) -> Tuple[str, bool]:
+        """Return (real relative path, hash_is_current)."""
+        base, ext = os.path.splitext(requested)
+        stem, dot, digest = base.rpartition('.')
+        if dot and len(digest) == self.hash_len:
+            rel = stem + ext
+            current = self._digest(rel)
+            if current is not None:
+                return rel, current == digest
+        return requested, False
+
+
+def _guess_mimetype(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+class FileSender:
+    """Conditional/Range-aware file responses with optional web-server offload.
+
+    mode:
+        ''           Flask streams the file (ETag, Last-Modified, Range, 304/206).
+        'x-sendfile' Apache/lighttpd: respond with an X-Sendfile header only.
+        'x-accel'    nginx: respond with X-Accel-Redirect to an internal location;
+                     `accel_prefixes` maps a served directory to its location
+                     (e.g. {'/srv/app/uploads': '/_protected/uploads/'}).
+    """
+
+    def __init__(self, mode: str = '', accel_prefixes: Optional[Dict[str, str]] = None) -> None:
+        mode = (mode or '').strip().lower()
+        if mode not in ('', 'x-sendfile', 'x-accel'):
+            raise ValueError(f'Unknown file offload mode: {mode}')
+        self.mode = mode
+        self.accel_prefixes = {os.path.abspath(k): v for k, v in (accel_prefixes or {}).items()}
+
+    @classmethod
+    def from_env(cls, env, accel_dirs: Dict[str, str]) -> 'FileSender':
+        """`accel_dirs` maps directory -> env var holding its internal location."""
+        prefixes = {}
+        for directory, var in accel_dirs.items():
+            if env.get(var):
+                prefixes[directory] = env[var]
+        return cls(env.get('FILE_OFFLOAD', ''), prefixes)
+
+    def send(
+        self,
+        directory: str,
+        filename: str,
+        *,
+        mimetype: Optional[str] = None,
+        max_age: int = 0,
+        immutable: bool = False,
+        private: bool = False,
+    ) -> Response:
+        directory = os.path.abspath(directory)
+        prefix = self.accel_prefixes.get(directory)
+        if self.mode == 'x-accel' and prefix:
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path):
+                return make_response('', 404)
+            resp = make_response('')
+            resp.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + filename
+            resp.headers['Content-Type'] = mimetype or _guess_mimetype(filename)
+        elif self.mode == 'x-sendfile':
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path):
+                return make_response('', 404)
+            resp = make_response('')
+            resp.headers['X-Sendfile'] = path
+            resp.headers['Content-Type'] = mimetype or _guess_mimetype(filename)
+        else:
+            resp = send_from_directory(directory, filename, mimetype=mimetype, conditional=True, etag=True, max_age=max_age)
+
+        parts = ['private' if private else 'public']
+        if max_age:
+            parts.append(f'max-age={max_age}')
+            if immutable:
+                parts.append('immutable')
+        else:
+            parts.append('no-cache')
+        resp.headers['Cache-Control'] = ', '.join(parts)
+        return resp
+
+
+_thumb_lock = threading.Lock()
+
+
+def ensure_thumbnail(src_path: str, thumb_dir: str, size: int = 96, quality: int = 80) -> Optional[str]:
+    """Create (once) a square, center-cropped JPEG thumbnail; returns its filename.
+
+    Returns None for non-images or when OpenCV is unavailable.
+    """
+    name = os.path.splitext(os.path.basename(src_path))[0] + f"_{size}.jpg"
+    out_path = os.path.join(thumb_dir, name)
+    if os.path.exists(out_path):
+        return name
+    if os.path.splitext(src_path)[1].lower() not in ('.jpg', '.jpeg', '.png') or not os.path.isfile(src_path):
+        return None
+    try:
+        import cv2  # type: ignore
+    except Exception:
+        return None
+
+    with _thumb_lock:
+        if os.path.exists(out_path):
+            return name
+        img = cv2.imread(src_path, cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        h, w = img.shape[:2]
+        side = min(h, w)
+        y, x = (h - side) // 2, (w - side) // 2
+        img = cv2.resize(img[y:y + side, x:x + side], (size, size), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if not ok:
+            return None
+        os.makedirs(thumb_dir, exist_ok=True)
+        tmp = out_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(buf.tobytes())
+        os.replace(tmp, out_path)
+    return name
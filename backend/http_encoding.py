@@ -0,0 +1,299 @@
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from flask import Response, current_app, has_request_context, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json', 'application/javascript', 'text/html', 'text/css', 'text/csv',
+    'text/plain', 'text/javascript', 'image/svg+xml',
+})
+
+
+def _endpoint() -> str:
+    return (request.endpoint or 'unknown') if has_request_context() else 'unknown'
+
+
+class ResponseMetrics:
+    """Per-endpoint JSON serialization time and bytes before/after compression."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+
+    def _entry(self, endpoint: str) -> Dict[str, float]:
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {
+                'serialized': 0, 'serialize_sec': 0.0, 'serialize_max_sec': 0.0, 'json_bytes': 0,
+                'responses': 0, 'compressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'compress_sec': 0.0,
+            }
+        return entry
+
+    def record_serialize(self, endpoint: str, seconds: float, nbytes: int) -> None:
+        with self._lock:
+            e = self._entry(endpoint)
+            e['serialized'] += 1
+            e['serialize_sec'] += seconds
+            e['serialize_max_sec'] = max(e['serialize_max_sec'], seconds)
+            e['json_bytes'] += nbytes
+
+    def record_encoding(self, endpoint: str, compressed: bool, raw: int, sent: int, seconds: float) -> None:
+        with self._lock:
+            e = self._entry(endpoint)
+            e['responses'] += 1
+            e['compressed'] += int(compressed)
+            e['bytes_in'] += raw
+            e['bytes_out'] += sent
+            e['compress_sec'] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            items = {k: dict(v) for k, v in self._endpoints.items()}
+        out: Dict[str, Any] = {}
+        for name, e in sorted(items.items()):
+            out[name] = {
+                'serialized': int(e['serialized']),
+                'serialize_ms_avg': round(e['serialize_sec'] * 1000.0 / e['serialized'], 3) if e['serialized'] else None,
+                'serialize_ms_max': round(e['serialize_max_sec'] * 1000.0, 3),
+                'json_bytes': int(e['json_bytes']),
+                'responses': int(e['responses']),
+                'compressed': int(e['compressed']),
+                'bytes_in': int(e['bytes_in']),
+                'bytes_out': int(e['bytes_out']),
+                'bytes_saved': int(e['bytes_in'] - e['bytes_out']),
+                'compress_ms_total': round(e['compress_sec'] * 1000.0, 2),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+response_metrics = ResponseMetrics()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with an orjson fast path for response bodies.
+
+    backend: 'auto' (orjson when installed), 'orjson' or 'stdlib'. Output
+    matches the default provider's (dates as HTTP dates, Decimal as str, keys
+    sorted when `sort_keys` is set); only `ensure_ascii` differs, since orjson
+    always writes UTF-8. Pretty-printed responses (debug mode) use the stdlib.
+    Serialization time and size go to `response_metrics` per endpoint.
+    """
+
+    def __init__(self, app, backend: str = 'auto') -> None:
+        super().__init__(app)
+        backend = (backend or 'auto').strip().lower()
+        if backend not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError(f'Unknown JSON backend: {backend}')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson but orjson is not installed')
+        self.backend = 'orjson' if backend != 'stdlib' and orjson is not None else 'stdlib'
+
+    def _pretty(self) -> bool:
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def encode(self, obj: Any) -> bytes:
+        """Compact JSON for `obj` as bytes (no trailing newline)."""
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=self.default, option=option)
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self._pretty():
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        t0 = time.perf_counter()
+        body = self.encode(obj) + b'\n'
+        response_metrics.record_serialize(_endpoint(), time.perf_counter() - t0, len(body))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def stream_json_array(items: Iterable[Any], chunk_bytes: int = 16384) -> Response:
+    """A JSON array response written as it is produced.
+
+    `items` is consumed lazily (e.g. a keyset-paged query), so memory stays
+    bounded by `chunk_bytes` rather than by the length of the list. The
+    request context stays available while the body is generated.
+    """
+    provider = current_app.json
+    encode = provider.encode if isinstance(provider, FastJSONProvider) else (
+        lambda o: provider.dumps(o, separators=(',', ':')).encode('utf-8')
+    )
+    endpoint = _endpoint()
+
+    def generate() -> Iterator[bytes]:
+        buf = bytearray(b'[')
+        spent, total, first = 0.0, 0, True
+        for item in items:
+            t0 = time.perf_counter()
+            if not first:
+                buf += b','
+            buf += encode(item)
+            spent += time.perf_counter() - t0
+            first = False
+            if len(buf) >= chunk_bytes:
+                total += len(buf)
+                yield bytes(buf)
+                buf.clear()
+        buf += b']\n'
+        total += len(buf)
+        yield bytes(buf)
+        response_metrics.record_serialize(endpoint, spent, total)
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
+class _GzipStream:
+    def __init__(self, level: int) -> None:
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._z.compress(chunk) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._c.process(chunk) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class ResponseCompressor:
+    """Negotiated Content-Encoding for dynamic responses (an after_request hook).
+
+    Picks br (when the brotli package is installed) or gzip from the client's
+    Accept-Encoding, honouring q-values and preferring br on a tie. Only
+    successful, compressible responses of at least `min_bytes` are touched;
+    file responses (direct passthrough, Range) are left to the file sender or
+    the front web server. Streamed bodies are compressed chunk by chunk with a
+    sync flush, so each chunk still reaches the client as soon as it is ready.
+    """
+
+    def __init__(self, min_bytes: int = 1024, gzip_level: int = 6, brotli_quality: int = 4, enabled: bool = True) -> None:
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls, env) -> 'ResponseCompressor':
+        return cls(
+            min_bytes=int(env.get('COMPRESS_MIN_BYTES', '1024')),
+            gzip_level=int(env.get('COMPRESS_GZIP_LEVEL', '6')),
+            brotli_quality=int(env.get('COMPRESS_BROTLI_QUALITY', '4')),
+            enabled=env.get('COMPRESS_RESPONSES', '1').strip().lower() not in ('0', 'false', 'no'),
+        )
+
+    def codings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encodings) -> Optional[str]:
+        best, best_q = None, 0.0
+        for coding in self.codings():
+            q = accept_encodings.quality(coding)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def _stream(self, coding: str) -> Any:
+        return _BrotliStream(self.brotli_quality) if coding == 'br' else _GzipStream(self.gzip_level)
+
+    def _eligible(self, resp: Response) -> bool:
+        return (
+            self.enabled
+            and 200 <= resp.status_code < 300 and resp.status_code not in (204, 206)
+            and not resp.direct_passthrough
+            and resp.mimetype in COMPRESSIBLE_TYPES
+            and 'Content-Encoding' not in resp.headers
+            and 'no-transform' not in (resp.headers.get('Cache-Control') or '')
+            and request.method != 'HEAD'
+        )
+
+    def __call__(self, resp: Response) -> Response:
+        if not self._eligible(resp):
+            return resp
+        resp.vary.add('Accept-Encoding')
+        coding = self.negotiate(request.accept_encodings)
+        endpoint = _endpoint()
+
+        if resp.is_streamed:
+            resp.response = self._compress_iter(resp.response, coding, endpoint)
+            if coding is not None:
+                resp.headers.pop('Content-Length', None)
+                self._mark(resp, coding)
+            return resp
+
+        body = resp.get_data()
+        if coding is None or len(body) < self.min_bytes:
+            response_metrics.record_encoding(endpoint, False, len(body), len(body), 0.0)
+            return resp
+        t0 = time.perf_counter()
+        stream = self._stream(coding)
+        packed = stream.process(body) + stream.finish()
+        response_metrics.record_encoding(endpoint, True, len(body), len(packed), time.perf_counter() - t0)
+        resp.set_data(packed)
+        self._mark(resp, coding)
+        return resp
+
+    @staticmethod
+    def _mark(resp: Response, coding: str) -> None:
+        resp.headers['Content-Encoding'] = coding
+        etag, weak = resp.get_etag()
+        if etag:
+            resp.set_etag(f'{etag}-{coding}', weak=weak)
+
+    def _compress_iter(self, body: Iterable[bytes], coding: Optional[str], endpoint: str) -> Iterator[bytes]:
+        """Compress (or, with no coding, just measure) a streamed body."""
+        stream = self._stream(coding) if coding is not None else None
+        raw = sent = 0
+        spent = 0.0
+        try:
+            for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                raw += len(chunk)
+                if stream is None:
+                    sent += len(chunk)
+                    yield chunk
+                    continue
+                t0 = time.perf_counter()
+                out = stream.process(chunk)
+                spent += time.perf_counter() - t0
+                sent += len(out)
+                if out:
+                    yield out
+            if stream is not None:
+                out = stream.finish()
+                sent += len(out)
+                yield out
+            response_metrics.record_encoding(endpoint, stream is not None, raw, sent, spent)
+        finally:
+            close: Optional[Callable[[], None]] = getattr(body, 'close', None)
+            if close is not None:
+                close()
@@ -0,0 +1,143 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from models import db
+
+GRANULARITIES = ('hour', 'day')
+
+_INSERT_SQL = text(
+    "INSERT INTO login_activity (user_id, email, role, login_time) VALUES (:user_id, :email, :role, :login_time)"
+)
+
+# Rollups are additive, so every worker can fold its own batches in.
+_ROLLUP_UPSERT_SQL = text(
+    "INSERT INTO login_rollup (granularity, bucket, role, logins) VALUES (:granularity, :bucket, :role, :logins) "
+    "ON CONFLICT(granularity, bucket, role) DO UPDATE SET logins = logins + excluded.logins"
+)
+
+# One-off: rollups for rows recorded before the rollup table existed.
+BACKFILL_ROLLUPS_SQL = (
+    "INSERT INTO login_rollup (granularity, bucket, role, logins) "
+    "SELECT '{granularity}', {bucket}, COALESCE(a.role, u.role, 'unknown'), COUNT(*) "
+    "FROM login_activity a LEFT JOIN user u ON u.id = a.user_id "
+    "GROUP BY 2, 3 "
+    "ON CONFLICT(granularity, bucket, role) DO UPDATE SET logins = logins + excluded.logins"
+)
+BACKFILL_BUCKETS = {
+    'hour': "strftime('%Y-%m-%d %H:00:00', a.login_time)",
+    'day': "strftime('%Y-%m-%d 00:00:00', a.login_time)",
+}
+
+_SERIES_SQL = text(
+    "SELECT bucket, role, logins FROM login_rollup "
+    "WHERE granularity = :granularity AND bucket >= :since ORDER BY bucket"
+)
+
+
+def _ts(at: datetime) -> str:
+    # Same text layout as the ORM's DateTime columns, so comparisons and the
+    # rollup primary key stay consistent however a row was written.
+    return at.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _bucket_key(at: datetime) -> str:
+    return at.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    if granularity == 'hour':
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class LoginAuditLog:
+    """Append-only login audit trail, buffered in memory and written in batches.
+
+    `record` only appends to a list, so login requests no longer pay for an
+    INSERT and a commit. `flush` (run by a background loop) writes the batch
+    with one executemany and folds it into hourly/daily rollups in the same
+    transaction. A crash loses at most one flush interval of entries; when the
+    buffer is full, new entries are dropped and counted rather than blocking
+    logins.
+    """
+
+    def __init__(self, max_buffer: int = 50000) -> None:
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._buffer: List[Tuple[int, str, Optional[str], datetime]] = []
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'flushes': 0, 'failed_flushes': 0}
+
+    def record(self, user_id: int, email: str, role: Optional[str], at: Optional[datetime] = None) -> None:
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.stats['dropped'] += 1
+                return
+            self._buffer.append((user_id, email, role, at or datetime.utcnow()))
+            self.stats['recorded'] += 1
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def forget(self, user_id: int) -> None:
+        """Drop buffered entries of a user that is being deleted."""
+        with self._lock:
+            self._buffer = [e for e in self._buffer if e[0] != user_id]
+
+    def flush(self) -> int:
+        """Write buffered entries and their rollups; needs an app context. Returns how many were written."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+
+        counts: Counter = Counter()
+        for _, _, role, at in batch:
+            for g in GRANULARITIES:
+                counts[(g, bucket_start(at, g), role or 'unknown')] += 1
+        try:
+            db.session.execute(_INSERT_SQL, [
+                {'user_id': u, 'email': e, 'role': r, 'login_time': _ts(at)} for u, e, r, at in batch
+            ])
+            db.session.execute(_ROLLUP_UPSERT_SQL, [
+                {'granularity': g, 'bucket': _bucket_key(b), 'role': r, 'logins': n} for (g, b, r), n in counts.items()
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.stats['failed_flushes'] += 1
+            with self._lock:
+                # Put the batch back in front for the next attempt, within the buffer limit.
+                keep = max(0, self.max_buffer - len(self._buffer))
+                self.stats['dropped'] += len(batch) - min(len(batch), keep)
+                self._buffer[:0] = batch[-keep:] if keep else []
+            raise
+        self.stats['written'] += len(batch)
+        self.stats['flushes'] += 1
+        return len(batch)
+
+
+def login_series(granularity: str, since: datetime) -> List[Dict[str, Any]]:
+    """Logins per bucket and role from `since` to now, with empty buckets filled in for charts."""
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    since = bucket_start(since, granularity)
+    by_bucket: Dict[datetime, Dict[str, int]] = {}
+    for bucket, role, logins in db.session.execute(_SERIES_SQL, {'granularity': granularity, 'since': _bucket_key(since)}).all():
+        if not isinstance(bucket, datetime):
+            bucket = datetime.fromisoformat(str(bucket))
+        by_bucket.setdefault(bucket, {})[role] = int(logins)
+
+    series = []
+    end = bucket_start(datetime.utcnow(), granularity)
+    b = since
+    while b <= end:
+        roles = by_bucket.get(b, {})
+        series.append({'bucket': b.isoformat(), 'total': sum(roles.values()), 'by_role': roles})
+        b += step
+    return series
+
+
+login_audit = LoginAuditLog()
@@ -0,0 +1,247 @@
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.mime.text import MIMEText
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Dict, List, Optional
+
+# SMTPException subclasses OSError; only these mean the connection itself is gone.
+_RECONNECTABLE = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+
+
+@dataclass
+class SMTPConfig:
+    host: str
+    port: int
+    user: Optional[str]
+    password: Optional[str]
+    from_email: str
+    starttls: bool = True
+    timeout_sec: float = 10.0
+
+    @classmethod
+    def from_env(cls, environ) -> Optional['SMTPConfig']:
+        """Build a config from SMTP_* env vars, or None when mail is not configured.
+
+        SMTP_USER/SMTP_PASS are optional so a local stand-in (e.g. aiosmtpd)
+        can be used; set SMTP_STARTTLS=0 for servers without TLS.
+        """
+        host = environ.get('SMTP_HOST')
+        port = environ.get('SMTP_PORT')
+        user = environ.get('SMTP_USER')
+        password = environ.get('SMTP_PASS')
+        from_email = environ.get('SMTP_FROM') or user
+        if not host or not port or not from_email:
+            return None
+        return cls(
+            host=host,
+            port=int(port),
+            user=user or None,
+            password=password or None,
+            from_email=from_email,
+            starttls=(environ.get('SMTP_STARTTLS', '1').strip().lower() not in ('0', 'false', 'no')),
+        )
+
+
+@dataclass
+class OutboundMail:
+    to_email: str
+    subject: str
+    body: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class MailQueue:
+    """Outbound mail queue drained by a single background sender.
+
+    Design goals:
+    - `enqueue` never touches the network, so request handlers return immediately.
+    - One persistent SMTP connection is reused across messages and reopened
+      transparently when the server drops it or it has been idle too long.
+    - Messages are sent in batches over the same connection.
+
+    Metrics (see `metrics()`) include delivery latency from enqueue to accepted
+    by the SMTP server.
+    """
+
+    def __init__(
+        self,
+        config: SMTPConfig,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 50,
+        batch_wait_sec: float = 0.25,
+        idle_timeout_sec: float = 60.0,
+        max_attempts: int = 3,
+        smtp_factory: Callable[..., Any] = smtplib.SMTP,
+    ) -> None:
+        self.config = config
+        self.batch_size = batch_size
+        self.batch_wait_sec = batch_wait_sec
+        self.idle_timeout_sec = idle_timeout_sec
+        self.max_attempts = max_attempts
+        self._smtp_factory = smtp_factory
+
+        self._queue: 'Queue[OutboundMail]' = Queue(maxsize=max_queue)
+        self._conn = None
+        self._last_used = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self._sent = 0
+        self._failed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._connects = 0
+        self._latencies = deque(maxlen=1000)
+
+    # --- Producer side ---
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close()
+
+    def enqueue(self, to_email: str, subject: str, body: str) -> bool:
+        """Queue a plain-text message. Returns False if the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait(OutboundMail(to_email, subject, body, time.time()))
+            return True
+        except Full:
+            self._dropped += 1
+            return False
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until the queue is drained (for scripts and tests)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    # --- Sender side ---
+
+    def _connect(self):
+        cfg = self.config
+        conn = self._smtp_factory(cfg.host, cfg.port, timeout=cfg.timeout_sec)
+        if cfg.starttls:
+            conn.starttls()
+        if cfg.user and cfg.password:
+            conn.login(cfg.user, cfg.password)
+        self._connects += 1
+        return conn
+
+    def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _connection(self):
+        if self._conn is not None and time.time() - self._last_used > self.idle_timeout_sec:
+            self._close()
+        if self._conn is None:
+            self._conn = self._connect()
+            self._last_used = time.time()
+        return self._conn
+
+    def _next_batch(self) -> List[OutboundMail]:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except Empty:
+            if self._conn is not None and time.time() - self._last_used > self.idle_timeout_sec:
+                self._close()
+            return []
+
+        batch = [first]
+        deadline = time.time() + self.batch_wait_sec
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _build(self, mail: OutboundMail) -> str:
+        msg = MIMEText(mail.body, 'plain', 'utf-8')
+        msg['Subject'] = mail.subject
+        msg['From'] = self.config.from_email
+        msg['To'] = mail.to_email
+        return msg.as_string()
+
+    def _send_one(self, mail: OutboundMail) -> None:
+        payload = self._build(mail)
+        while True:
+            mail.attempts += 1
+            try:
+                self._connection().sendmail(self.config.from_email, [mail.to_email], payload)
+                self._last_used = time.time()
+                self._sent += 1
+                self._latencies.append(self._last_used - mail.enqueued_at)
+                return
+            except OSError as e:
+                if isinstance(e, smtplib.SMTPException) and not isinstance(e, _RECONNECTABLE):
+                    # Rejected by the server (bad recipient etc.): retrying will not help.
+                    self._failed += 1
+                    print(f"Mail Error ({mail.to_email}): {e}")
+                    return
+                # Stale pooled connection: drop it and retry on a fresh one.
+                self._close()
+                if mail.attempts >= self.max_attempts:
+                    self._failed += 1
+                    print(f"Mail Error ({mail.to_email}): {e}")
+                    return
+                time.sleep(min(0.5 * mail.attempts, 2.0))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            self._batches += 1
+            for mail in batch:
+                try:
+                    self._send_one(mail)
+                finally:
+                    self._queue.task_done()
+        self._close()
+
+    def metrics(self) -> Dict[str, Any]:
+        lat = sorted(self._latencies)
+        p50 = lat[len(lat) // 2] if lat else None
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else None
+        return {
+            'queued': self._queue.qsize(),
+            'sent': self._sent,
+            'failed': self._failed,
+            'dropped': self._dropped,
+            'batches': self._batches,
+            'connections_opened': self._connects,
+            'latency_ms_p50': round(p50 * 1000.0, 2) if p50 is not None else None,
+            'latency_ms_p95': round(p95 * 1000.0, 2) if p95 is not None else None,
+            'latency_ms_max': round(lat[-1] * 1000.0, 2) if lat else None,
+        }
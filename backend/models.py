@@ -24,6 +24,9 @@ class User(db.Model):
 
     id_proof_path = db.Column(db.String(300), nullable=True)
     face_image_path = db.Column(db.String(300), nullable=True)
+    uploads_status = db.Column(db.String(20), nullable=True)  # pending / ready / invalid / failed (None: legacy)
+    uploads_attempts = db.Column(db.Integer, default=0)  # normalization runs started
+    face_embedding = db.Column(db.LargeBinary, nullable=True)  # see upload_pipeline.face_embedding
 
     proctoring_consent = db.Column(db.Boolean, default=False)
     terms_accepted = db.Column(db.Boolean, default=False)
@@ -42,13 +45,13 @@ class User(db.Model):
 # --- PASSWORD OTP MODEL ---
 class PasswordOTP(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     otp_hash = db.Column(db.String(200), nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
     used = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
-    user = db.relationship('User', backref='password_otps')
+    user = db.relationship('User', backref=db.backref('password_otps', cascade='all, delete-orphan', passive_deletes=True))
 
 # --- EXAM MODELS ---
 class Exam(db.Model):
@@ -57,16 +60,34 @@ class Exam(db.Model):
     description = db.Column(db.Text, nullable=True)
     duration_minutes = db.Column(db.Integer, nullable=True)
     total_marks = db.Column(db.Integer, default=0)
+    question_count = db.Column(db.Integer, default=0)
     pass_percentage = db.Column(db.Float, default=40.0)
     is_active = db.Column(db.Boolean, default=True)
     allow_reattempt = db.Column(db.Boolean, default=False)
     reattempt_after_days = db.Column(db.Integer, nullable=True)
     available_from = db.Column(db.Date, nullable=True)
+    proctor_policy = db.Column(db.Text, nullable=True)  # JSON, see proctor_policy.ProctorPolicy
+    recording_enabled = db.Column(db.Boolean, default=False)
+    recording_interval_sec = db.Column(db.Integer, default=10)
+    recording_budget_mb = db.Column(db.Integer, nullable=True)  # None: RECORDING_DEFAULT_BUDGET_MB
+    shuffle_questions = db.Column(db.Boolean, default=False)
+    shuffle_options = db.Column(db.Boolean, default=False)
+    pool_draw = db.Column(db.Text, nullable=True)  # JSON {pool: count}, see randomization.RandomizationPolicy
+    collusion_scanned_at = db.Column(db.DateTime, nullable=True)  # start of the last collusion scan
+    collusion_scan_requested = db.Column(db.String(10), nullable=True)  # queued admin scan: 'auto', 'exact' or 'lsh'
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+# Recomputes the denormalized Exam.question_count / total_marks from exam_question.
+# Used by the schema upgrader and by check_exam_consistency.py (plain sqlite3).
+EXAM_TOTALS_BACKFILL_SQL = (
+    "UPDATE exam SET "
+    "question_count = (SELECT COUNT(*) FROM exam_question q WHERE q.exam_id = exam.id), "
+    "total_marks = (SELECT COALESCE(SUM(q.marks), 0) FROM exam_question q WHERE q.exam_id = exam.id)"
+)
+
 class ExamQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     question_text = db.Column(db.Text, nullable=False)
     option_a = db.Column(db.Text, nullable=False)
     option_b = db.Column(db.Text, nullable=False)
@@ -75,14 +96,15 @@ class ExamQuestion(db.Model):
     correct_option = db.Column(db.Integer, nullable=False)  # 0=A,1=B,2=C,3=D
     marks = db.Column(db.Integer, default=1)
     order_index = db.Column(db.Integer, default=0)
+    pool = db.Column(db.String(50), nullable=True)
 
-    exam = db.relationship('Exam', backref='questions')
+    exam = db.relationship('Exam', backref=db.backref('questions', cascade='all, delete-orphan', passive_deletes=True))
 
 # --- EXAM SESSION MODEL ---
 class ExamSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='SET NULL'), nullable=True)  # history outlives the exam
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(20), default='Active') # Active, Completed, Terminated
@@ -97,34 +119,105 @@ class ExamSession(db.Model):
 
     results_published = db.Column(db.Boolean, default=True)
 
-    exam = db.relationship('Exam', backref='sessions')
-    user = db.relationship('User', backref='exam_sessions')
+    __table_args__ = (
+        db.Index('ix_exam_session_exam_status', 'exam_id', 'status', 'submitted_at'),
+        db.Index('ix_exam_session_user_status', 'user_id', 'status', 'submitted_at'),
+    )
+
+    exam = db.relationship('Exam', backref=db.backref('sessions', passive_deletes=True))
+    user = db.relationship('User', backref=db.backref('exam_sessions', cascade='all, delete-orphan', passive_deletes=True))
     
     # Relationship to warnings
-    warnings = db.relationship('Warning', backref='session', lazy=True)
+    warnings = db.relationship('Warning', backref='session', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
 # --- WARNING MODEL ---
 class Warning(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_session.id', ondelete='CASCADE'), nullable=False, index=True)
     violation_type = db.Column(db.String(100), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 # --- LOGIN ACTIVITY MODEL ---
 class LoginActivity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     email = db.Column(db.String(100), nullable=False)
-    login_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    user = db.relationship('User', backref='login_activities')
+    role = db.Column(db.String(20), nullable=True)
+    login_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    user = db.relationship('User', backref=db.backref('login_activities', cascade='all, delete-orphan', passive_deletes=True))
+
+# --- LOGIN ROLLUP MODEL ---
+class LoginRollup(db.Model):
+    """Logins per hour/day bucket and role; outlives the raw login_activity rows."""
+    granularity = db.Column(db.String(10), primary_key=True)  # 'hour' | 'day'
+    bucket = db.Column(db.DateTime, primary_key=True)
+    role = db.Column(db.String(20), primary_key=True)
+    logins = db.Column(db.Integer, nullable=False, default=0)
 
 class ExamResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('exam_question.id'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_session.id', ondelete='CASCADE'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('exam_question.id', ondelete='CASCADE'), nullable=False, index=True)
     selected_option = db.Column(db.Integer, nullable=True)
     is_correct = db.Column(db.Boolean, default=False)
     marks_awarded = db.Column(db.Integer, default=0)
 
-    session = db.relationship('ExamSession', backref='responses')
-    question = db.relationship('ExamQuestion')
\ No newline at end of file
+    session = db.relationship('ExamSession', backref=db.backref('responses', cascade='all, delete-orphan', passive_deletes=True))
+    question = db.relationship('ExamQuestion')
+
+# --- COLLUSION PAIR MODEL ---
+class CollusionPair(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False, index=True)
+    session_a = db.Column(db.Integer, db.ForeignKey('exam_session.id', ondelete='CASCADE'), nullable=False)
+    session_b = db.Column(db.Integer, db.ForeignKey('exam_session.id', ondelete='CASCADE'), nullable=False)
+    shared_wrong = db.Column(db.Integer, nullable=False)  # same wrong option on the same question
+    both_wrong = db.Column(db.Integer, nullable=False)
+    expected = db.Column(db.Float, nullable=False)        # shared_wrong expected by chance
+    z_score = db.Column(db.Float, nullable=False)
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- STUDENT DASHBOARD SUMMARY MODEL ---
+class DashboardSummary(db.Model):
+    """Per-student stats record behind the dashboard and profile; updated in place on each submission."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    exams_completed = db.Column(db.Integer, default=0)
+    score_sum = db.Column(db.Float, default=0.0)  # running sum of percentages
+    avg_score = db.Column(db.Float, default=0.0)
+    recent_results = db.Column(db.Text, nullable=True)  # JSON list
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- NOTIFICATION OUTBOX MODEL ---
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True, index=True)
+
+# --- PURGE JOB MODEL ---
+class PurgeJob(db.Model):
+    """Large user/exam deletion carried out in bounded batches by a background worker."""
+    id = db.Column(db.Integer, primary_key=True)
+    target_table = db.Column(db.String(50), nullable=False)  # 'user' | 'exam'
+    target_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, running, done, failed
+    rows_deleted = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# --- RETENTION CHECKPOINT MODEL ---
+class RetentionCheckpoint(db.Model):
+    """Cursor and running totals of one retention rule (see retention.py)."""
+    rule = db.Column(db.String(50), primary_key=True)
+    cursor = db.Column(db.String(300), nullable=True)
+    rows_deleted = db.Column(db.Integer, default=0)
+    files_deleted = db.Column(db.Integer, default=0)
+    bytes_reclaimed = db.Column(db.BigInteger, default=0)
+    passes = db.Column(db.Integer, default=0)
+    last_pass_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
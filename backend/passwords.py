@@ -0,0 +1,120 @@
+import hashlib
+import hmac
+import os
+from typing import Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Hashing policy. Any werkzeug method string is accepted, e.g.
+#   pbkdf2:sha256:1000000  (default; werkzeug 3.1's, pinned so upgrades do not force rehashes)
+#   pbkdf2:sha256:210000   (cheaper, for exam-start login storms)
+#   scrypt:32768:8:1
+# Stored hashes using a different method, or the same one at a lower cost,
+# are upgraded on the next login; stronger ones are left alone.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000000')
+
+# When running under the eventlet hub, hashing is pushed to its native thread
+# pool (hashlib releases the GIL) so a login storm does not stall green threads.
+OFFLOAD_HASHING = os.environ.get('PASSWORD_HASH_OFFLOAD', '1').strip().lower() not in ('0', 'false', 'no')
+
+OTP_DIGEST_PREFIX = 'hmac-sha256$'
+
+
+def _offload(fn, *args):
+    if OFFLOAD_HASHING and _in_green_thread():
+        try:
+            from eventlet import tpool  # type: ignore
+
+            return tpool.execute(fn, *args)
+        except ImportError:
+            pass
+    return fn(*args)
+
+
+def _in_green_thread() -> bool:
+    try:
+        import greenlet  # type: ignore
+    except ImportError:
+        return False
+    # Green threads spawned by the eventlet hub have the hub greenlet as parent.
+    return greenlet.getcurrent().parent is not None
+
+
+def _method_of(stored_hash: str) -> str:
+    return (stored_hash or '').split('$', 1)[0]
+
+
+def _normalized(method: str) -> str:
+    """Expand werkzeug shorthands so 'pbkdf2' and 'pbkdf2:sha256:<default>' compare equal."""
+    sample = generate_password_hash('', method=method)
+    return _method_of(sample)
+
+
+_policy_method_cache = {}
+
+
+def policy_method() -> str:
+    method = PASSWORD_HASH_METHOD
+    if method not in _policy_method_cache:
+        _policy_method_cache[method] = _normalized(method)
+    return _policy_method_cache[method]
+
+
+def hash_password(password: str) -> str:
+    return _offload(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+
+def _split_cost(method: str) -> Tuple[str, Tuple[int, ...]]:
+    """('pbkdf2:sha256', (iterations,)) or ('scrypt', (n, r, p)); unknown layouts have no cost."""
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2' and len(parts) == 3 and parts[2].isdigit():
+        return ':'.join(parts[:2]), (int(parts[2]),)
+    if parts[0] == 'scrypt' and len(parts) == 4 and all(p.isdigit() for p in parts[1:]):
+        return 'scrypt', tuple(int(p) for p in parts[1:])
+    return method, ()
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    stored, policy = _split_cost(_method_of(stored_hash)), _split_cost(policy_method())
+    if stored[0] != policy[0] or len(stored[1]) != len(policy[1]):
+        return True
+    return any(have < want for have, want in zip(stored[1], policy[1]))
+
+
+def verify_password(stored_hash: str, password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Check a password against its stored hash.
+
+    Returns (ok, upgraded_hash). `upgraded_hash` is set when the password matched
+    but was hashed under an older policy; callers should store it in the same
+    transaction as the login bookkeeping.
+    """
+    if not stored_hash or password is None:
+        return False, None
+    if not _offload(check_password_hash, stored_hash, password):
+        return False, None
+    if needs_rehash(stored_hash):
+        return True, hash_password(password)
+    return True, None
+
+
+def _otp_key(secret_key: str) -> bytes:
+    return hashlib.sha256(b'password-otp:' + (secret_key or '').encode('utf-8')).digest()
+
+
+def hash_otp(secret_key: str, user_id: int, otp_code: str) -> str:
+    """Keyed HMAC of a short-lived OTP.
+
+    OTPs expire within minutes and are bound to a user, so a slow KDF buys
+    nothing; HMAC with the app secret keeps them unusable if the table leaks.
+    """
+    msg = f"{int(user_id)}:{otp_code}".encode('utf-8')
+    return OTP_DIGEST_PREFIX + hmac.new(_otp_key(secret_key), msg, hashlib.sha256).hexdigest()
+
+
+def verify_otp(secret_key: str, user_id: int, otp_code: str, stored_hash: str) -> bool:
+    if not stored_hash or not otp_code:
+        return False
+    if stored_hash.startswith(OTP_DIGEST_PREFIX):
+        return hmac.compare_digest(hash_otp(secret_key, user_id, otp_code), stored_hash)
+    # OTPs issued before the switch were stored as werkzeug hashes.
+    return _offload(check_password_hash, stored_hash, otp_code)
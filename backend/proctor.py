@@ -1,13 +1,118 @@
 import base64
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from proctor_policy import DEFAULT_POLICY, ProctorPolicy
+from risk_scoring import RiskScorer
 
 
 @dataclass
 class ProctorResult:
     violation: bool
     message: Optional[str] = None
+    risk: float = 0.0
+
+
+@dataclass
+class FaceCheck:
+    """Second-tier (face mesh) verdict for one frame."""
+    face_count: int
+    looking_away: bool = False
+    mouth_open: bool = False
+
+
+# (face_count, off_center, mouth_open)
+FrameSignals = Tuple[int, bool, bool]
+
+TIERS = ('decode', 'motion', 'haar', 'mesh')
+ESCALATION_REASONS = ('no_face', 'multi_face', 'off_center', 'edge', 'sampled', 'recheck')
+
+# Consecutive near-identical frames that may reuse a result before the
+# cascade looks again anyway.
+MOTION_MAX_REUSE = 4
+
+# Analysed frames a face-mesh verdict may stand in for a suspicious Haar
+# result before the mesh is asked again.
+MESH_VERDICT_MAX_FRAMES = 3
+
+
+class CascadeMetrics:
+    """Per-tier cost and escalation counts for the detector cascade."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._runs = dict.fromkeys(TIERS, 0)
+            self._sec = dict.fromkeys(TIERS, 0.0)
+            self._max = dict.fromkeys(TIERS, 0.0)
+            self._reasons = dict.fromkeys(ESCALATION_REASONS, 0)
+            self._frames = 0
+            self._reused = 0
+            self._overridden = 0
+
+    def tier(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._runs[name] += 1
+            self._sec[name] += seconds
+            self._max[name] = max(self._max[name], seconds)
+
+    def frame(self, reused: bool = False) -> None:
+        with self._lock:
+            self._frames += 1
+            self._reused += int(reused)
+
+    def escalated(self, reason: str, overridden: bool) -> None:
+        with self._lock:
+            self._reasons[reason] += 1
+            self._overridden += int(overridden)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            frames = self._frames
+            tiers = {
+                name: {
+                    'runs': self._runs[name],
+                    'ms_avg': round(self._sec[name] * 1000.0 / self._runs[name], 3) if self._runs[name] else None,
+                    'ms_max': round(self._max[name] * 1000.0, 3),
+                    'ms_total': round(self._sec[name] * 1000.0, 1),
+                }
+                for name in TIERS
+            }
+            escalations = sum(self._reasons.values())
+            return {
+                'frames': frames,
+                'reused': self._reused,
+                'escalations': escalations,
+                'escalation_rate': round(escalations / frames, 4) if frames else None,
+                'escalation_reasons': dict(self._reasons),
+                'mesh_overrides': self._overridden,
+                'tiers': tiers,
+            }
+
+
+class _CascadeState:
+    """Per-session cascade memory (kept in session_state['cascade'])."""
+
+    __slots__ = ('thumb', 'last', 'reused', 'since_mesh', 'verified', 'verified_uses', 'recheck')
+
+    def __init__(self) -> None:
+        self.thumb = None  # thumbnail of the last analysed frame
+        self.last: Optional[FrameSignals] = None  # signals of the last analysed frame
+        self.reused = 0
+        self.since_mesh = 0
+        # (haar result, mesh result) of the last mesh check: while Haar keeps
+        # reporting the same suspicious thing, the mesh verdict stands, for
+        # at most MESH_VERDICT_MAX_FRAMES frames.
+        self.verified: Optional[Tuple[Tuple[int, bool], FrameSignals]] = None
+        self.verified_uses = 0
+        # A scheduled mesh check saw what Haar cannot (pose, mouth): look
+        # again on the next frame instead of waiting for the next sample.
+        self.recheck = False
 
 
 class ProctorEngine:
@@ -16,52 +121,101 @@ class ProctorEngine:
     Design goals:
     - Fast enough for low-end laptops: low FPS, small frames, simple models.
     - Optional CV dependencies: works even if OpenCV is not installed.
+    - Cheap to construct: OpenCV and the Haar cascade are loaded on the first
+      frame, or ahead of time via `prewarm()`.
     - Stateless per-call; stateful per-session via `session_state` dict.
+    - Detection is a cascade: every frame gets a cheap frame-difference
+      check and the Haar detector; the optional face-mesh verifier (head
+      pose, mouth) runs only when Haar is unsure or on a sampling schedule.
+      Per-tier cost and escalation rates are kept in `metrics`.
+    - Detection only extracts signals (face count, centering, voice, client
+      events); whether they add up to a violation is decided by the
+      ring-buffer `RiskScorer` under the session's `ProctorPolicy`, which
+      also carries the detection thresholds and which detectors run.
 
     Inputs:
     - `image_data_url`: data:image/jpeg;base64,... or None
-    - `audio_level`: float 0..1 (client-computed)
+    - `audio_level`: float 0..1 (client-computed; legacy fallback)
+    - `audio_features`: quantized band energies + flux (see audio_vad.py)
 
     Outputs:
-    - violation + message
+    - violation + message + rolling risk score
     """
 
     def __init__(
         self,
         *,
-        audio_threshold: float = 0.35,
-        min_violation_gap_sec: float = 2.5,
-        look_away_grace_count: int = 4,
+        default_policy: Optional[ProctorPolicy] = None,
+        verifier_loader: Optional[Callable[[], Any]] = None,
     ) -> None:
-        self.audio_threshold = audio_threshold
-        self.min_violation_gap_sec = min_violation_gap_sec
-        self.look_away_grace_count = look_away_grace_count
+        self.scorer = RiskScorer(default_policy or DEFAULT_POLICY)
+        self.metrics = CascadeMetrics()
+
+        # Face-mesh tier: an object with check_face(bgr_image, policy) ->
+        # Optional[FaceCheck] (ai_proctor.AIProctor), built on first use.
+        self._verifier_loader = verifier_loader
+        self._verifier = None
+        self._verifier_loading = False
 
         self._cv2 = None
         self._np = None
         self._face_cascade = None
-
+        self._cv_loaded = False
+        self._cv_lock = threading.Lock()
+        self._vad = None
+
+    def _ensure_cv(self) -> bool:
+        """Import OpenCV and load the cascade once; returns True if CV is usable."""
+        if self._cv_loaded:
+            return self._face_cascade is not None
+
+        with self._cv_lock:
+            if not self._cv_loaded:
+                try:
+                    import cv2  # type: ignore
+                    import numpy as np  # type: ignore
+
+                    self._cv2 = cv2
+                    self._np = np
+                    self._face_cascade = cv2.CascadeClassifier(
+                        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                    )
+                except Exception:
+                    self._cv2 = None
+                    self._np = None
+                    self._face_cascade = None
+                self._cv_loaded = True
+
+        return self._face_cascade is not None
+
+    @property
+    def models_loaded(self) -> bool:
+        """True once the CV load has been attempted (successfully or not)."""
+        return self._cv_loaded
+
+    @property
+    def cv_available(self) -> bool:
+        return self._cv_loaded and self._face_cascade is not None
+
+    def _load_verifier(self) -> None:
         try:
-            import cv2  # type: ignore
-            import numpy as np  # type: ignore
-
-            self._cv2 = cv2
-            self._np = np
-            self._face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
+            self._verifier = self._verifier_loader()
         except Exception:
-            self._cv2 = None
-            self._np = None
-            self._face_cascade = None
-
-    def _cooldown_ok(self, session_state: Dict[str, Any], key: str) -> bool:
-        now = time.time()
-        last = float(session_state.get(f'last_{key}_ts', 0.0))
-        if now - last < self.min_violation_gap_sec:
-            return False
-        session_state[f'last_{key}_ts'] = now
-        return True
+            self._verifier = None
+
+    def verifier(self):
+        """The face-mesh verifier, or None while it loads (in the background) or if unavailable."""
+        if self._verifier is None and self._verifier_loader is not None and not self._verifier_loading:
+            self._verifier_loading = True
+            threading.Thread(target=self._load_verifier, name='proctor-mesh-load', daemon=True).start()
+        return self._verifier
+
+    def prewarm(self, background: bool = True) -> None:
+        """Load CV models ahead of the first frame, by default on a daemon thread."""
+        if background:
+            threading.Thread(target=self._ensure_cv, name='proctor-prewarm', daemon=True).start()
+        else:
+            self._ensure_cv()
 
     def _decode_image(self, image_data_url: str):
         if not self._cv2 or not self._np:
@@ -77,66 +231,150 @@ class ProctorEngine:
         except Exception:
             return None
 
-    def analyze_tab_event(self, session_state: Dict[str, Any], event_name: str) -> ProctorResult:
-        if not self._cooldown_ok(session_state, 'tab'):
-            return ProctorResult(False)
-        return ProctorResult(True, event_name)
-
-    def analyze_audio(self, session_state: Dict[str, Any], audio_level: float) -> ProctorResult:
-        if audio_level is None:
-            return ProctorResult(False)
-
-        try:
-            lvl = float(audio_level)
-        except Exception:
-            return ProctorResult(False)
+    def _parse_audio_features(self, audio_features: Any):
+        """Validated feature array for the spectral VAD, or None to fall back to `audio_level`."""
+        if audio_features is None:
+            return None
+        if self._vad is None:
+            try:
+                from audio_vad import VoiceActivityDetector  # type: ignore
+            except Exception:
+                return None
+            self._vad = VoiceActivityDetector()
 
-        if lvl < self.audio_threshold:
-            session_state['noise_streak'] = 0
-            return ProctorResult(False)
+        from audio_vad import parse_features  # type: ignore
 
-        # Require 2 consecutive loud samples to reduce false positives.
-        streak = int(session_state.get('noise_streak', 0)) + 1
-        session_state['noise_streak'] = streak
-        if streak < 2:
-            return ProctorResult(False)
+        return parse_features(audio_features)
 
-        if not self._cooldown_ok(session_state, 'audio'):
-            return ProctorResult(False)
+    def voice_signal(self, session_state: Dict[str, Any], audio_level: Any, audio_features: Any = None) -> bool:
+        policy = self.scorer.policy_for(session_state)
+        if not policy.detect_voice:
+            return False
+        feats = self._parse_audio_features(audio_features)
+        if feats is not None:
+            is_voice, _ = self._vad.classify(session_state, feats)
+            return is_voice
 
-        session_state['noise_streak'] = 0
-        return ProctorResult(True, 'Background Noise / Talking detected')
+        if audio_level is None:
+            return False
+        try:
+            return float(audio_level) >= policy.audio_threshold
+        except Exception:
+            return False
 
-    def analyze_frame(self, session_state: Dict[str, Any], image_data_url: Optional[str]) -> ProctorResult:
-        # If client did not send a frame, do not flag by default.
-        if not image_data_url:
-            return ProctorResult(False)
+    def frame_signals(
+        self,
+        image_data_url: Optional[str],
+        policy: ProctorPolicy = DEFAULT_POLICY,
+        session_state: Optional[Dict[str, Any]] = None,
+    ) -> Optional[FrameSignals]:
+        """Return (face_count, off_center, mouth_open) for a frame, or None if it cannot be analysed.
+
+        With a `session_state`, near-identical consecutive frames reuse the
+        previous result and mesh verdicts carry over between escalations.
+        """
+        # If client did not send a frame (or face checks are off), do not flag.
+        if not image_data_url or not policy.detect_faces:
+            return None
 
         # Without CV deps, we cannot do face checks.
-        if not self._cv2 or not self._np or not self._face_cascade:
-            return ProctorResult(False)
+        if not self._ensure_cv():
+            return None
 
+        t0 = time.perf_counter()
         img = self._decode_image(image_data_url)
         if img is None:
-            return ProctorResult(False)
-
+            return None
         try:
             gray = self._cv2.cvtColor(img, self._cv2.COLOR_BGR2GRAY)
-            faces = self._face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
         except Exception:
-            return ProctorResult(False)
+            return None
+        t1 = time.perf_counter()
+        self.metrics.tier('decode', t1 - t0)
+
+        cascade = None
+        thumb = None
+        if session_state is not None:
+            cascade = session_state.get('cascade')
+            if cascade is None:
+                cascade = session_state['cascade'] = _CascadeState()
+            if policy.motion_threshold > 0:
+                thumb = self._cv2.resize(gray, (32, 24), interpolation=self._cv2.INTER_AREA)
+                still = (
+                    cascade.last is not None and cascade.thumb is not None
+                    and cascade.reused < MOTION_MAX_REUSE
+                    and float(self._cv2.absdiff(thumb, cascade.thumb).mean()) < policy.motion_threshold
+                )
+                self.metrics.tier('motion', time.perf_counter() - t1)
+                if still:
+                    cascade.reused += 1
+                    self.metrics.frame(reused=True)
+                    return cascade.last
+
+        self.metrics.frame()
+        haar = self._haar(gray, policy)
+        if haar is None:
+            return None
+        face_count, off_center, edge = haar
+        signals: FrameSignals = (face_count, off_center, False)
+
+        reason = None
+        verifier = self.verifier() if policy.detect_pose else None
+        if verifier is not None:
+            suspicious = face_count != 1 or off_center or edge
+            if cascade is not None and cascade.verified is not None:
+                if cascade.verified[0] != (face_count, off_center):
+                    cascade.verified = None
+                elif suspicious and cascade.verified_uses < MESH_VERDICT_MAX_FRAMES:
+                    cascade.verified_uses += 1
+                    signals = cascade.verified[1]
+                    suspicious = False
+            if suspicious:
+                reason = 'no_face' if face_count == 0 else 'multi_face' if face_count > 1 else 'off_center' if off_center else 'edge'
+            elif cascade is not None and cascade.recheck:
+                reason = 'recheck'
+            elif policy.mesh_every_n and (cascade is None or cascade.since_mesh + 1 >= policy.mesh_every_n):
+                reason = 'sampled'
+
+        if reason is not None:
+            t2 = time.perf_counter()
+            check = verifier.check_face(img, policy)
+            self.metrics.tier('mesh', time.perf_counter() - t2)
+            if check is not None:
+                signals = (check.face_count, check.looking_away, check.mouth_open)
+                self.metrics.escalated(reason, signals[:2] != (face_count, off_center))
+                if cascade is not None:
+                    if reason in ('sampled', 'recheck'):
+                        cascade.recheck = signals != (face_count, off_center, False)
+                    # The latest mesh check always replaces an older verdict.
+                    cascade.verified = ((face_count, off_center), signals)
+                    cascade.verified_uses = 0
+
+        if cascade is not None:
+            cascade.since_mesh = 0 if reason is not None else cascade.since_mesh + 1
+            cascade.thumb = thumb
+            cascade.last = signals
+            cascade.reused = 0
+        return signals
+
+    def _haar(self, gray, policy: ProctorPolicy) -> Optional[Tuple[int, bool, bool]]:
+        """(face_count, off_center, near_edge) from the Haar detector, or None on failure."""
+        t0 = time.perf_counter()
+        try:
+            faces = self._face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=policy.haar_scale_factor,
+                minNeighbors=policy.haar_min_neighbors,
+                minSize=policy.haar_min_size,
+            )
+        except Exception:
+            return None
+        finally:
+            self.metrics.tier('haar', time.perf_counter() - t0)
 
         face_count = 0 if faces is None else len(faces)
-
-        if face_count == 0:
-            if not self._cooldown_ok(session_state, 'noface'):
-                return ProctorResult(False)
-            return ProctorResult(True, 'No Face Detected')
-
-        if face_count >= 2:
-            if not self._cooldown_ok(session_state, 'multiface'):
-                return ProctorResult(False)
-            return ProctorResult(True, 'Multiple Faces Detected')
+        if face_count != 1:
+            return face_count, False, False
 
         # Single-face: estimate "looking away" using bounding box center drift.
         (x, y, w, h) = faces[0]
@@ -145,22 +383,28 @@ class ProctorEngine:
         cy = (y + (h / 2.0)) / float(ih)
 
         # Center window: tolerate movement.
-        centered = (0.25 <= cx <= 0.75) and (0.20 <= cy <= 0.80)
-        if centered:
-            session_state['look_away_count'] = 0
-            return ProctorResult(False)
+        return 1, not policy.centered(cx, cy), policy.near_edge(cx, cy)
 
-        look_away = int(session_state.get('look_away_count', 0)) + 1
-        session_state['look_away_count'] = look_away
+    def _decide(self, session_state: Dict[str, Any], **signals) -> ProctorResult:
+        d = self.scorer.update(session_state, **signals)
+        return ProctorResult(d.violation, d.message, d.risk)
 
-        if look_away < self.look_away_grace_count:
-            return ProctorResult(False)
+    def analyze_tab_event(self, session_state: Dict[str, Any], event_name: str) -> ProctorResult:
+        return self._decide(session_state, event=event_name)
 
-        if not self._cooldown_ok(session_state, 'lookaway'):
-            return ProctorResult(False)
+    def analyze_audio(
+        self,
+        session_state: Dict[str, Any],
+        audio_level: float,
+        audio_features: Any = None,
+    ) -> ProctorResult:
+        return self._decide(session_state, voice=self.voice_signal(session_state, audio_level, audio_features))
 
-        session_state['look_away_count'] = 0
-        return ProctorResult(True, 'Looking Away Frequently')
+    def analyze_frame(self, session_state: Dict[str, Any], image_data_url: Optional[str]) -> ProctorResult:
+        sig = self.frame_signals(image_data_url, self.scorer.policy_for(session_state), session_state)
+        if sig is None:
+            return self._decide(session_state)
+        return self._decide(session_state, face_count=sig[0], off_center=sig[1], voice=sig[2])
 
     def analyze(
         self,
@@ -169,14 +413,15 @@ class ProctorEngine:
         image_data_url: Optional[str],
         audio_level: float,
         client_violation_type: Optional[str] = None,
+        audio_features: Any = None,
     ) -> ProctorResult:
+        """Score one client sample (frame + audio window, or a client event) as a single observation."""
         if client_violation_type:
-            if not self._cooldown_ok(session_state, 'client'):
-                return ProctorResult(False)
-            return ProctorResult(True, str(client_violation_type))
-
-        video_res = self.analyze_frame(session_state, image_data_url)
-        if video_res.violation:
-            return video_res
-
-        return self.analyze_audio(session_state, audio_level)
+            return self.analyze_tab_event(session_state, str(client_violation_type))
+
+        sig = self.frame_signals(image_data_url, self.scorer.policy_for(session_state), session_state)
+        voice = self.voice_signal(session_state, audio_level, audio_features)
+        if sig is None:
+            return self._decide(session_state, voice=voice)
+        # An open mouth seen by the face mesh counts as talking.
+        return self._decide(session_state, face_count=sig[0], off_center=sig[1], voice=voice or sig[2])
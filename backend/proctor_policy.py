@@ -0,0 +1,126 @@
+import json
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Optional, Tuple
+
+from risk_scoring import ScoringPolicy
+
+
+@dataclass(frozen=True)
+class ProctorPolicy(ScoringPolicy):
+    """Per-exam proctoring policy: what is detected, how often, and how strictly.
+
+    Stored as flat JSON in `Exam.proctor_policy` (scoring keys from
+    ScoringPolicy plus the detection keys below; missing keys keep their
+    defaults). Instances are immutable and compiled once per exam, so the
+    frame path reads plain attributes and never touches the database.
+
+    Low-stakes exams can turn detectors off (`detect_faces`, `detect_voice`)
+    or sample less often (`frame_interval_ms`, applied by the client).
+    """
+
+    detect_faces: bool = True
+    detect_voice: bool = True
+    frame_interval_ms: int = 2000
+
+    # Legacy volume fallback when the client sends no spectral features.
+    audio_threshold: float = 0.35
+
+    # Haar face detector (ProctorEngine) and the tolerated face-centre window.
+    haar_scale_factor: float = 1.1
+    haar_min_neighbors: int = 5
+    haar_min_face_px: int = 40
+    center_x_min: float = 0.25
+    center_x_max: float = 0.75
+    center_y_min: float = 0.20
+    center_y_max: float = 0.80
+
+    # Detector cascade: Haar runs on every frame; the face mesh (AIProctor)
+    # only when Haar reports something new and suspicious, and on every
+    # `mesh_every_n`-th analysed frame (0: only when suspicious). A face
+    # centre within `center_margin` of the window edge counts as suspicious.
+    # Frames whose 32x24 thumbnail differs from the last analysed one by less
+    # than `motion_threshold` (mean grey levels) reuse its result.
+    detect_pose: bool = True
+    mesh_every_n: int = 10
+    center_margin: float = 0.05
+    motion_threshold: float = 2.0
+
+    # Face-mesh head pose and mouth thresholds (AIProctor).
+    max_yaw_deg: float = 25.0
+    max_pitch_down_deg: float = 20.0
+    max_pitch_up_deg: float = 25.0
+    mouth_open_ratio: float = 0.08
+
+    # Compiled from the fields above.
+    haar_min_size: Tuple[int, int] = field(init=False, repr=False, compare=False)
+    _hits: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+    _weights: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'haar_min_size', (self.haar_min_face_px, self.haar_min_face_px))
+        object.__setattr__(self, '_hits', (self.no_face_hits, self.multi_face_hits, self.look_away_hits, self.voice_hits, 1))
+        object.__setattr__(self, '_weights', super().weights())
+
+    def hits(self, signal: int) -> int:
+        return self._hits[signal]
+
+    def weights(self):
+        return self._weights
+
+    def centered(self, cx: float, cy: float) -> bool:
+        return self.center_x_min <= cx <= self.center_x_max and self.center_y_min <= cy <= self.center_y_max
+
+    def near_edge(self, cx: float, cy: float) -> bool:
+        """True when the face centre is within `center_margin` of the window's edge (either side)."""
+        m = self.center_margin
+        return (
+            min(abs(cx - self.center_x_min), abs(cx - self.center_x_max)) < m
+            or min(abs(cy - self.center_y_min), abs(cy - self.center_y_max)) < m
+        )
+
+    def client_settings(self) -> Dict[str, Any]:
+        """The part of the policy the exam page applies itself."""
+        return {
+            'frame_interval_ms': self.frame_interval_ms,
+            'max_warnings': self.max_warnings,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'ProctorPolicy':
+        """Like ScoringPolicy.from_dict, with range checks for the detection keys."""
+        policy = super().from_dict(data)
+        if not 250 <= policy.frame_interval_ms <= 60000:
+            raise ValueError('frame_interval_ms must be between 250 and 60000')
+        if policy.audio_threshold > 1:
+            raise ValueError('audio_threshold must be between 0 and 1')
+        if policy.haar_scale_factor <= 1:
+            raise ValueError('haar_scale_factor must be > 1')
+        if policy.haar_min_neighbors < 1 or policy.haar_min_face_px < 1:
+            raise ValueError('haar_min_neighbors and haar_min_face_px must be >= 1')
+        if not (policy.center_x_min < policy.center_x_max <= 1 and policy.center_y_min < policy.center_y_max <= 1):
+            raise ValueError('center window must satisfy 0 <= min < max <= 1')
+        if policy.center_margin > 0.5:
+            raise ValueError('center_margin must be between 0 and 0.5')
+        return policy
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> 'ProctorPolicy':
+        if not raw:
+            return cls()
+        return cls.from_dict(json.loads(raw))
+
+
+DEFAULT_POLICY = ProctorPolicy()
+
+
+def compile_policy(raw: Optional[str]) -> ProctorPolicy:
+    """The policy for a stored JSON value; unparsable or invalid values get the default."""
+    if not raw:
+        return DEFAULT_POLICY
+    try:
+        return ProctorPolicy.from_json(raw)
+    except (ValueError, TypeError):
+        return DEFAULT_POLICY
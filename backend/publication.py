@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Sequence
+
+from sqlalchemy import text
+
+from models import db, User
+from student_stats import rebuild_student_stats
+
+CHUNK = 500  # ids per IN (...) list
+
+# Flips every pending result of an exam in one statement and hands back what
+# the notifications need. The WHERE clause is the whole "which sessions" logic:
+# sessions submitted while this runs are either published and returned here,
+# or left pending for the next run.
+_PUBLISH_SQL = text(
+    "UPDATE exam_session SET results_published = 1 "
+    "WHERE exam_id = :exam_id AND status = 'Completed' AND submitted_at IS NOT NULL "
+    "AND (results_published = 0 OR results_published IS NULL) "
+    "RETURNING id, user_id, percentage, result_status"
+)
+
+_NOTIFICATION_INSERT_SQL = text(
+    "INSERT INTO notification (user_id, kind, title, body, created_at) "
+    "VALUES (:user_id, :kind, :title, :body, :created_at)"
+)
+
+
+def _chunks(ids: Sequence[int], size: int = CHUNK) -> Iterable[Sequence[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+@dataclass
+class PublicationResult:
+    published: int
+    students: int
+    notifications: int
+
+
+def publish_exam_results(exam_obj, notify_body: Callable[[Any, float, str], str]) -> PublicationResult:
+    """Publish every pending result of an exam, make sure the students' stats records exist and queue notifications.
+
+    One UPDATE ... RETURNING flips the flags; missing stats records and the
+    notifications are written in the same transaction, which is committed here.
+    Existing records are already current (submissions update them in place),
+    so the dashboard rush after publication reads prebuilt rows.
+    `notify_body(exam, percentage, result_status)` renders the message text.
+    """
+    rows = db.session.execute(_PUBLISH_SQL, {'exam_id': exam_obj.id}).all()
+    user_ids = {r[1] for r in rows}
+    rebuild_student_stats(user_ids, missing_only=True)
+
+    now = datetime.utcnow()
+    title = f"Results published: {exam_obj.name}"
+    notifications = [
+        {
+            'user_id': user_id,
+            'kind': 'results',
+            'title': title,
+            'body': notify_body(exam_obj, float(pct or 0.0), status or 'Completed'),
+            'created_at': now,
+        }
+        for _, user_id, pct, status in rows
+    ]
+    if notifications:
+        db.session.execute(_NOTIFICATION_INSERT_SQL, notifications)
+    db.session.commit()
+    return PublicationResult(len(rows), len(user_ids), len(notifications))
+
+
+# Claims a batch atomically, so several workers can drain the same table
+# without sending anything twice.
+_CLAIM_NOTIFICATIONS_SQL = text(
+    "UPDATE notification SET sent_at = :now WHERE id IN ("
+    " SELECT id FROM notification WHERE sent_at IS NULL ORDER BY id LIMIT :limit"
+    ") RETURNING id, user_id, title, body"
+)
+
+
+def drain_notifications(deliver: Callable[[str, str, str], bool], limit: int = 200) -> int:
+    """Claim up to `limit` queued notifications and hand them to `deliver(email, subject, body)`.
+
+    If `deliver` refuses one (e.g. a full mail queue), it and the rest of the
+    batch are released for the next drain. Delivery is at most once: a crash
+    between claim and hand-off drops that batch. Returns how many were delivered.
+    """
+    rows = db.session.execute(_CLAIM_NOTIFICATIONS_SQL, {'now': datetime.utcnow(), 'limit': limit}).all()
+    db.session.commit()
+    if not rows:
+        return 0
+
+    rows.sort(key=lambda r: r[0])
+    user_ids = sorted({r[1] for r in rows})
+    emails = {}
+    for chunk in _chunks(user_ids):
+        emails.update(db.session.query(User.id, User.email).filter(User.id.in_(chunk)).all())
+
+    delivered = 0
+    for nid, user_id, title, body in rows:
+        email = emails.get(user_id)
+        if email and not deliver(email, title, body):
+            break
+        delivered += 1
+    released = [r[0] for r in rows[delivered:]]
+    if released:
+        for chunk in _chunks(released):
+            db.session.execute(
+                text(f"UPDATE notification SET sent_at = NULL WHERE id IN ({','.join(str(i) for i in chunk)})")
+            )
+        db.session.commit()
+    return delivered
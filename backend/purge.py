@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from models import db
+
+PURGE_BATCH = 2000  # rows per statement (and per commit) in batched mode
+
+# Several workers may poll the same table; exactly one of them gets each job.
+# A job left 'running' by a worker that died is picked up again once stale;
+# plans are idempotent, so finishing it twice is harmless.
+_CLAIM_JOB_SQL = text(
+    "UPDATE purge_job SET status = 'running', started_at = :now WHERE id = ("
+    " SELECT id FROM purge_job WHERE status = 'pending' OR (status = 'running' AND started_at < :stale)"
+    " ORDER BY id LIMIT 1"
+    ") RETURNING id, target_table, target_id"
+)
+
+
+@dataclass
+class PurgeStep:
+    table: str
+    where: str  # predicate over `table`, bound to :id (the root row)
+    set_null: Optional[str] = None  # column to clear instead of deleting
+
+
+def cascade_plan(root: str) -> List[PurgeStep]:
+    """Statements that delete one `root` row and everything hanging off it.
+
+    Derived from the ondelete= rules declared on the models: CASCADE children
+    are deleted (their own children first), SET NULL children are detached.
+    Each step selects its rows with nested IN (subquery) predicates, so the
+    whole plan is a handful of set-based statements whatever the row counts.
+    Older SQLite files were created without these clauses and SQLite does not
+    enforce them by default either, so the plan is what actually applies them.
+    """
+    tables = db.metadata.tables
+
+    def children(parent, where: str) -> List[PurgeStep]:
+        steps: List[PurgeStep] = []
+        for child in db.metadata.sorted_tables:
+            for fk in sorted(child.foreign_keys, key=lambda f: f.parent.name):
+                if fk.column.table is not parent:
+                    continue
+                rule = (fk.ondelete or '').upper()
+                if where == 'id = :id' and fk.column.name == 'id':
+                    child_where = f'{fk.parent.name} = :id'
+                else:
+                    child_where = f'{fk.parent.name} IN (SELECT {fk.column.name} FROM "{parent.name}" WHERE {where})'
+                if rule == 'CASCADE':
+                    steps.extend(children(child, child_where))
+                    steps.append(PurgeStep(child.name, child_where))
+                elif rule == 'SET NULL':
+                    steps.append(PurgeStep(child.name, child_where, set_null=fk.parent.name))
+        return steps
+
+    plan = children(tables[root], 'id = :id')
+    plan.append(PurgeStep(root, 'id = :id'))
+    return plan
+
+
+def _statement(step: PurgeStep, limit: bool) -> str:
+    where = step.where
+    if limit:
+        where = f'rowid IN (SELECT rowid FROM "{step.table}" WHERE {step.where} LIMIT :batch)'
+    if step.set_null:
+        return f'UPDATE "{step.table}" SET {step.set_null} = NULL WHERE {where}'
+    return f'DELETE FROM "{step.table}" WHERE {where}'
+
+
+def count_rows(plan: List[PurgeStep], target_id: int) -> int:
+    """Rows the plan would touch; used to choose between an inline delete and a background job."""
+    total = 0
+    for step in plan:
+        total += db.session.execute(text(f'SELECT COUNT(*) FROM "{step.table}" WHERE {step.where}'), {'id': target_id}).scalar() or 0
+    return int(total)
+
+
+def run_plan(plan: List[PurgeStep], target_id: int) -> int:
+    """Apply the plan in the current transaction (no commit). Returns rows affected."""
+    total = 0
+    for step in plan:
+        total += db.session.execute(text(_statement(step, limit=False)), {'id': target_id}).rowcount or 0
+    return total
+
+
+def run_plan_batched(
+    plan: List[PurgeStep], target_id: int, batch: int = PURGE_BATCH, pause: Optional[Callable[[], None]] = None,
+) -> int:
+    """Apply the plan `batch` rows at a time, committing after each statement.
+
+    The SQLite write lock is only held for one small batch, so submissions and
+    autosaves of running exams get in between. Every step is idempotent;
+    the final pass (run_plan in one transaction) removes rows written while
+    the purge was in progress, together with the root row. Returns rows affected.
+    """
+    total = 0
+    for step in plan[:-1]:
+        stmt = text(_statement(step, limit=True))
+        while True:
+            n = db.session.execute(stmt, {'id': target_id, 'batch': batch}).rowcount or 0
+            db.session.commit()
+            total += n
+            if pause is not None:
+                pause()
+            if n < batch:
+                break
+    total += run_plan(plan, target_id)
+    db.session.commit()
+    return total
+
+
+def claim_purge_job(stale_after_sec: float = 3600.0) -> Optional[Dict[str, object]]:
+    """Mark the oldest pending (or stale running) job as running and return it, or None. Commits."""
+    now = datetime.utcnow()
+    row = db.session.execute(_CLAIM_JOB_SQL, {'now': now, 'stale': now - timedelta(seconds=stale_after_sec)}).first()
+    db.session.commit()
+    if row is None:
+        return None
+    return {'id': row[0], 'target_table': row[1], 'target_id': row[2]}
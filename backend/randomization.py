@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUM_OPTIONS = 4
+
+
+@dataclass(frozen=True)
+class RandomizationPolicy:
+    shuffle_questions: bool = False
+    shuffle_options: bool = False
+    # {pool_name: how many to draw}; questions in other pools (or none) are always included.
+    pool_draw: Tuple[Tuple[str, int], ...] = ()
+
+    @property
+    def active(self) -> bool:
+        return self.shuffle_questions or self.shuffle_options or bool(self.pool_draw)
+
+    @staticmethod
+    def parse_pool_draw(raw: Any) -> Tuple[Tuple[str, int], ...]:
+        """Validate a {pool: count} mapping (dict or JSON); raises ValueError."""
+        if not raw:
+            return ()
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        if not isinstance(raw, dict):
+            raise ValueError('pool_draw must be an object of {pool: count}')
+        out = []
+        for name, count in raw.items():
+            try:
+                count = int(count)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid draw count for pool {name}')
+            if count < 1:
+                raise ValueError(f'Draw count for pool {name} must be >= 1')
+            out.append((str(name), count))
+        return tuple(sorted(out))
+
+    @classmethod
+    def for_exam(cls, exam_obj) -> 'RandomizationPolicy':
+        try:
+            pool_draw = cls.parse_pool_draw(getattr(exam_obj, 'pool_draw', None))
+        except ValueError:
+            pool_draw = ()
+        return cls(
+            shuffle_questions=bool(getattr(exam_obj, 'shuffle_questions', False)),
+            shuffle_options=bool(getattr(exam_obj, 'shuffle_options', False)),
+            pool_draw=pool_draw,
+        )
+
+
+class ExamPayload:
+    """Question data of one exam in canonical order, shared by every candidate.
+
+    `questions` holds the public per-question dicts (no answers); grading data
+    sits in parallel NumPy arrays. Candidates differ only by an index plan.
+    """
+
+    __slots__ = ('exam_id', 'key', 'policy', 'questions', 'ids', 'correct', 'marks', 'fixed', 'pools')
+
+    def __init__(self, exam_id: int, rows: Sequence[Any], policy: RandomizationPolicy, key: Any = None) -> None:
+        self.exam_id = exam_id
+        self.key = key
+        self.policy = policy
+        self.questions = [
+            {
+                'id': q.id,
+                'question_text': q.question_text,
+                'options': (q.option_a, q.option_b, q.option_c, q.option_d),
+                'marks': q.marks,
+            }
+            for q in rows
+        ]
+        self.ids = np.fromiter((q.id for q in rows), dtype=np.int64, count=len(rows))
+        self.correct = np.fromiter((int(q.correct_option) for q in rows), dtype=np.int8, count=len(rows))
+        self.marks = np.fromiter((int(q.marks or 0) for q in rows), dtype=np.int32, count=len(rows))
+
+        drawn = dict(policy.pool_draw)
+        pools: Dict[str, List[int]] = {}
+        fixed = []
+        for i, q in enumerate(rows):
+            pool = getattr(q, 'pool', None)
+            if pool in drawn:
+                pools.setdefault(pool, []).append(i)
+            else:
+                fixed.append(i)
+        self.fixed = np.asarray(fixed, dtype=np.int32)
+        self.pools = [(np.asarray(pools.get(name, []), dtype=np.int32), count) for name, count in policy.pool_draw]
+
+    def drawn_totals(self) -> Tuple[int, int]:
+        """(questions, marks) of one attempt, which differ from the bank's when pools are drawn.
+
+        If a pool's questions carry different marks the total varies between
+        attempts; that case reports the expected total, rounded.
+        """
+        count = len(self.fixed)
+        marks = float(self.marks[self.fixed].sum())
+        for members, draw in self.pools:
+            k = min(draw, len(members))
+            if k:
+                count += k
+                marks += k * float(self.marks[members].mean())
+        return count, int(round(marks))
+
+
+@dataclass(frozen=True)
+class AttemptPlan:
+    """Which questions one candidate sees, in which order, with which option order.
+
+    order[k]          canonical position of the k-th displayed question
+    option_perm[k][j] canonical option index shown in display slot j
+    """
+
+    order: np.ndarray
+    option_perm: np.ndarray
+
+    def canonical_option(self, k: int, displayed: int) -> int:
+        return int(self.option_perm[k][displayed])
+
+
+class QuestionRandomizer:
+    """Deterministic per-(exam, session) question/option permutations.
+
+    Nothing is stored per candidate: the plan is re-derived from a keyed hash
+    of (exam_id, session_id), both when the exam is served and when it is
+    graded. The key keeps one candidate from computing another's order.
+    """
+
+    def __init__(self, secret: str) -> None:
+        self._secret = secret.encode('utf-8')
+        self._payloads: Dict[int, ExamPayload] = {}
+        self._lock = threading.Lock()
+
+    # --- Payload cache ---
+
+    def payload(self, exam_obj, load_rows) -> ExamPayload:
+        """Cached payload for `exam_obj`; `load_rows()` returns its ExamQuestion rows in canonical order."""
+        payload = self._payloads.get(exam_obj.id)
+        policy = RandomizationPolicy.for_exam(exam_obj)
+        # SQLite may reuse a deleted exam's id; the key tells the exams apart.
+        key = (getattr(exam_obj, 'created_at', None), getattr(exam_obj, 'question_count', None), policy)
+        if payload is None or payload.key != key:
+            payload = ExamPayload(exam_obj.id, load_rows(), policy, key)
+            with self._lock:
+                self._payloads[exam_obj.id] = payload
+        return payload
+
+    def invalidate(self, exam_id: int) -> None:
+        with self._lock:
+            self._payloads.pop(exam_id, None)
+
+    # --- Plans ---
+
+    def _rng(self, exam_id: int, session_id: int) -> np.random.Generator:
+        digest = hashlib.blake2b(f"{exam_id}:{session_id}".encode('ascii'), key=self._secret[:64], digest_size=16).digest()
+        return np.random.default_rng(int.from_bytes(digest, 'little'))
+
+    def plan(self, payload: ExamPayload, session_id: Optional[int]) -> AttemptPlan:
+        n = len(payload.questions)
+        policy = payload.policy
+        if session_id is None or not policy.active:
+            return AttemptPlan(np.arange(n, dtype=np.int32), np.tile(np.arange(NUM_OPTIONS, dtype=np.int8), (n, 1)))
+
+        rng = self._rng(payload.exam_id, session_id)
+        parts = [payload.fixed]
+        for members, count in payload.pools:
+            if len(members) > count:
+                members = np.sort(rng.choice(members, size=count, replace=False))
+            parts.append(members)
+        order = np.sort(np.concatenate(parts)) if len(parts) > 1 else payload.fixed
+        if policy.shuffle_questions:
+            order = rng.permutation(order)
+
+        k = len(order)
+        option_perm = np.tile(np.arange(NUM_OPTIONS, dtype=np.int8), (k, 1))
+        if policy.shuffle_options:
+            option_perm = rng.permuted(option_perm, axis=1)
+        return AttemptPlan(order.astype(np.int32, copy=False), option_perm)
+
+    @staticmethod
+    def totals(payload: ExamPayload, plan: AttemptPlan) -> Tuple[int, int]:
+        """(questions, marks) of exactly this attempt."""
+        return len(plan.order), int(payload.marks[plan.order].sum())
+
+    # --- Serving and grading ---
+
+    @staticmethod
+    def render(payload: ExamPayload, plan: AttemptPlan) -> List[Dict[str, Any]]:
+        out = []
+        questions = payload.questions
+        for k, (pos, perm) in enumerate(zip(plan.order.tolist(), plan.option_perm.tolist())):
+            q = questions[pos]
+            opts = q['options']
+            out.append({
+                'id': q['id'],
+                'question_text': q['question_text'],
+                'options': [opts[j] for j in perm],
+                'marks': q['marks'],
+                'order_index': k,
+            })
+        return out
+
+    @staticmethod
+    def grade(payload: ExamPayload, plan: AttemptPlan, answers: Dict[str, Any]):
+        """Map displayed answers back through the plan and score them.
+
+        Yields (question_id, canonical_selected_or_None, is_correct, marks_awarded, max_marks)
+        for every question in the plan.
+        """
+        order = plan.order
+        ids = payload.ids[order].tolist()
+        correct = payload.correct[order].tolist()
+        marks = payload.marks[order].tolist()
+        perms = plan.option_perm.tolist()
+        for k, qid in enumerate(ids):
+            raw = answers.get(str(qid))
+            selected = None
+            if raw is not None:
+                try:
+                    displayed = int(raw)
+                except (TypeError, ValueError):
+                    displayed = -1
+                if 0 <= displayed < NUM_OPTIONS:
+                    selected = perms[k][displayed]
+            is_correct = selected is not None and selected == correct[k]
+            yield qid, selected, is_correct, (marks[k] if is_correct else 0), marks[k]
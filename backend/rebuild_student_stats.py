@@ -0,0 +1,43 @@
+"""Rebuild per-student stats records from exam_session.
+
+Submissions keep the records current in place; run this after bulk data
+fixes or imports that change exam_session behind the app's back.
+
+Usage:
+    python rebuild_student_stats.py
+    python rebuild_student_stats.py --user-id 12 --user-id 40
+"""
+import argparse
+import sys
+import time
+
+from app import app, db, bootstrap_schema, User
+from student_stats import CHUNK, rebuild_student_stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Rebuild per-student stats records')
+    parser.add_argument('--user-id', type=int, action='append', help='student to rebuild (repeatable; default: all)')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        bootstrap_schema()
+        if args.user_id:
+            user_ids = sorted(set(args.user_id))
+        else:
+            user_ids = [u for (u,) in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+        if not user_ids:
+            print("ℹ️  No students.")
+            return 0
+
+        t0 = time.perf_counter()
+        written = 0
+        for i in range(0, len(user_ids), CHUNK):
+            written += rebuild_student_stats(user_ids[i:i + CHUNK])
+            db.session.commit()
+        print(f"✅ Rebuilt {written} stats records in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import text
+
+from admission import TokenBucket
+from models import db
+
+CHUNK = 500  # ids per IN (...) list
+
+# The cursor moves in the same transaction as the deletes it accounts for.
+_CHECKPOINT_UPSERT_SQL = text(
+    "INSERT INTO retention_checkpoint (rule, cursor, rows_deleted, files_deleted, bytes_reclaimed, passes, last_pass_at, updated_at) "
+    "VALUES (:rule, :cursor, :rows, :files, :bytes, :passes, :last_pass_at, :now) "
+    "ON CONFLICT(rule) DO UPDATE SET cursor = excluded.cursor, "
+    "rows_deleted = rows_deleted + excluded.rows_deleted, files_deleted = files_deleted + excluded.files_deleted, "
+    "bytes_reclaimed = bytes_reclaimed + excluded.bytes_reclaimed, passes = passes + excluded.passes, "
+    "last_pass_at = COALESCE(excluded.last_pass_at, last_pass_at), updated_at = excluded.updated_at"
+)
+
+
+def _ts(at: datetime) -> str:
+    # Same text layout as the ORM's DateTime columns.
+    return at.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _chunks(ids: Sequence, size: int = CHUNK) -> Iterable[Sequence]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+@dataclass
+class StepResult:
+    cursor: str
+    done: bool  # the pass is complete; the rule rests until its next pass
+    rows: int = 0
+    files: int = 0
+    bytes: int = 0
+
+
+class RowRule:
+    """Expire rows of `table`, walking it by rowid from a checkpoint cursor.
+
+    Each step looks at up to `limit` in-scope rows after the cursor and runs
+    `delete_sql` for the expired ones. Tables are append-only, so expiry
+    follows rowid order: the first live row is the frontier, the pass ends
+    there and the next pass starts from it, so a pass only reads what
+    expired since the previous one.
+    `delete_sql` receives the expired keys as {ids} (e.g. to delete the
+    responses of expired sessions rather than the sessions themselves).
+    """
+
+    kind = 'rows'
+
+    def __init__(self, name: str, table: str, expired: str, delete_sql: str, days: float,
+                 scope: str = '1', cost_per_key: int = 1) -> None:
+        self.name = name
+        self.table = table
+        self.expired = expired
+        self.delete_sql = delete_sql
+        self.days = days
+        self.scope = scope
+        self.cost_per_key = max(1, cost_per_key)  # rows deleted per key, for the rate limit
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def step(self, cursor: str, limit: int, now: datetime) -> StepResult:
+        start = int(cursor or 0)
+        rows = db.session.execute(
+            text(
+                f'SELECT rowid, CASE WHEN {self.expired} THEN 1 ELSE 0 END FROM "{self.table}" '
+                f'WHERE rowid > :start AND {self.scope} ORDER BY rowid LIMIT :limit'
+            ),
+            {'start': start, 'limit': max(1, limit // self.cost_per_key), 'cutoff': _ts(now - timedelta(days=self.days))},
+        ).all()
+        if not rows:
+            return StepResult(str(start), True)
+
+        expired = [r[0] for r in rows if r[1]]
+        frontier = next((r[0] for r in rows if not r[1]), None)
+        deleted = 0
+        for chunk in _chunks(expired):
+            deleted += db.session.execute(text(self.delete_sql.format(ids=','.join(str(i) for i in chunk)))).rowcount or 0
+        if frontier is not None:
+            return StepResult(str(frontier - 1), True, rows=deleted)
+        return StepResult(str(rows[-1][0]), len(rows) < max(1, limit // self.cost_per_key), rows=deleted)
+
+
+class UploadRule:
+    """Delete registration media (face_*/id proof files and their thumbnails) no user refers to any more.
+
+    Files of deleted accounts and of replaced captures are orphans; anything
+    younger than `grace_days` is left alone so registrations in flight are
+    never touched. Walks the directory in name order from the cursor.
+    """
+
+    kind = 'files'
+
+    def __init__(self, name: str, directory: str, prefixes: Sequence[str], referenced: Callable[[], Set[str]],
+                 grace_days: float, thumb_dir: Optional[str] = None, thumb_size: int = 96) -> None:
+        self.name = name
+        self.directory = directory
+        self.prefixes = tuple(prefixes)
+        self.referenced = referenced
+        self.grace_days = grace_days
+        self.thumb_dir = thumb_dir
+        self.thumb_size = thumb_size
+        self._refs: Optional[Set[str]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_days > 0
+
+    def step(self, cursor: str, limit: int, now: datetime) -> StepResult:
+        if not cursor or self._refs is None:
+            self._refs = self.referenced()
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.startswith(self.prefixes) and n > cursor)[:limit]
+        except FileNotFoundError:
+            names = []
+        if not names:
+            self._refs = None
+            return StepResult('', True)
+
+        cutoff = time.time() - self.grace_days * 86400.0
+        result = StepResult(names[-1], len(names) < limit)
+        for name in names:
+            if name in self._refs:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+                if st.st_mtime >= cutoff:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            result.files += 1
+            result.bytes += st.st_size
+            if self.thumb_dir:
+                thumb = os.path.join(self.thumb_dir, os.path.splitext(name)[0] + f"_{self.thumb_size}.jpg")
+                try:
+                    size = os.path.getsize(thumb)
+                    os.remove(thumb)
+                    result.files += 1
+                    result.bytes += size
+                except OSError:
+                    pass
+        if result.done:
+            self._refs = None
+            result.cursor = ''
+        return result
+
+
+class RecordingRule:
+    """Delete session recordings (<root>/<exam_id>/<session_id>/) older than `days` or whose session is gone.
+
+    `expired_sessions(ids, cutoff)` returns which of the given session ids may
+    go: missing from exam_session, or finished before the cutoff. Directories
+    written to within the last hour are skipped so an open recorder is never
+    pulled from under. Walks "<exam_id>/<session_id>" keys in order.
+    """
+
+    kind = 'files'
+
+    def __init__(self, name: str, root: str, days: float,
+                 expired_sessions: Callable[[List[int], datetime], Set[int]],
+                 on_removed: Optional[Callable[[int], None]] = None) -> None:
+        self.name = name
+        self.root = root
+        self.days = days
+        self.expired_sessions = expired_sessions
+        self.on_removed = on_removed
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def _keys(self, cursor: str, limit: int) -> List[str]:
+        keys = []
+        try:
+            exams = os.listdir(self.root)
+        except FileNotFoundError:
+            return keys
+        for exam in exams:
+            exam_dir = os.path.join(self.root, exam)
+            if not exam.isdigit() or not os.path.isdir(exam_dir):
+                continue
+            for sess in os.listdir(exam_dir):
+                if sess.isdigit():
+                    key = f"{int(exam):010d}/{int(sess):010d}"
+                    if key > cursor:
+                        keys.append(key)
+        keys.sort()
+        return keys[:limit]
+
+    def step(self, cursor: str, limit: int, now: datetime) -> StepResult:
+        keys = self._keys(cursor, limit)
+        if not keys:
+            return StepResult('', True)
+
+        result = StepResult(keys[-1], len(keys) < limit)
+        expired = self.expired_sessions([int(k.split('/')[1]) for k in keys], now - timedelta(days=self.days))
+        fresh = time.time() - 3600.0
+        for key in keys:
+            exam_id, session_id = (int(p) for p in key.split('/'))
+            if session_id not in expired:
+                continue
+            path = os.path.join(self.root, str(exam_id), str(session_id))
+            size, count, latest = 0, 0, 0.0
+            for dirpath, _, filenames in os.walk(path):
+                for n in filenames:
+                    try:
+                        st = os.stat(os.path.join(dirpath, n))
+                    except OSError:
+                        continue
+                    size += st.st_size
+                    count += 1
+                    latest = max(latest, st.st_mtime)
+            if latest >= fresh:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            result.files += count
+            result.bytes += size
+            if self.on_removed is not None:
+                self.on_removed(exam_id)
+        if result.done:
+            result.cursor = ''
+        return result
+
+
+class RetentionSweeper:
+    """Runs retention rules in small, rate-limited steps with a persistent cursor per rule.
+
+    Row deletes draw from a rows/s token bucket and file deletes from a
+    files/s bucket, so a backlog is worked off gradually instead of in one
+    long write transaction or I/O burst. `busy()` returning True (e.g. exams
+    in progress) skips the tick entirely. A rule that finishes a pass rests
+    for `pass_interval_sec`. Totals are kept in retention_checkpoint.
+    """
+
+    def __init__(self, rules: Sequence, *, rows_per_sec: float = 2000.0, files_per_sec: float = 50.0,
+                 batch: int = 500, pass_interval_sec: float = 3600.0,
+                 busy: Optional[Callable[[], bool]] = None) -> None:
+        self.rules = [r for r in rules if r.enabled]
+        self.batch = batch
+        self.pass_interval_sec = pass_interval_sec
+        self.busy = busy
+        self.buckets = {
+            'rows': TokenBucket(rows_per_sec, max(float(batch), rows_per_sec)),
+            'files': TokenBucket(files_per_sec, max(1.0, files_per_sec)),
+        }
+        self._resting_until: Dict[str, float] = {}
+        self.stats = {'ticks': 0, 'skipped_busy': 0, 'steps': 0}
+
+    def _cursor(self, rule) -> str:
+        row = db.session.execute(text("SELECT cursor FROM retention_checkpoint WHERE rule = :rule"), {'rule': rule.name}).first()
+        return (row[0] or '') if row else ''
+
+    def _save(self, rule, result: StepResult, now: datetime) -> None:
+        db.session.execute(_CHECKPOINT_UPSERT_SQL, {
+            'rule': rule.name, 'cursor': result.cursor, 'rows': result.rows, 'files': result.files,
+            'bytes': result.bytes, 'passes': 1 if result.done else 0,
+            'last_pass_at': now if result.done else None, 'now': now,
+        })
+        db.session.commit()
+
+    def step(self, rule, limit: int) -> StepResult:
+        """One bounded step of one rule, committed with its checkpoint. Needs an app context."""
+        now = datetime.utcnow()
+        try:
+            result = rule.step(self._cursor(rule), limit, now)
+        except Exception:
+            db.session.rollback()
+            raise
+        self._save(rule, result, now)
+        self.stats['steps'] += 1
+        return result
+
+    def tick(self) -> List[Tuple[object, StepResult]]:
+        """Give every due rule one step within the current token budgets; returns (rule, result) pairs."""
+        self.stats['ticks'] += 1
+        if self.busy is not None and self.busy():
+            self.stats['skipped_busy'] += 1
+            return []
+        results = []
+        mono = time.monotonic()
+        for rule in self.rules:
+            if self._resting_until.get(rule.name, 0.0) > mono:
+                continue
+            budget = self.buckets[rule.kind].take_up_to(self.batch)
+            if budget <= 0:
+                continue
+            result = self.step(rule, budget)
+            # Settle with what the step actually did: unused tokens go back,
+            # overshoot (e.g. many responses per session) becomes debt.
+            used = result.rows if rule.kind == 'rows' else result.files
+            bucket = self.buckets[rule.kind]
+            bucket.tokens = min(bucket.burst, bucket.tokens + budget - used)
+            if result.done:
+                self._resting_until[rule.name] = mono + self.pass_interval_sec
+            results.append((rule, result))
+        return results
+
+    def run_pass(self, rule) -> StepResult:
+        """Run one rule to the end of its current pass without rate limiting (CLI)."""
+        total = StepResult('', False)
+        while not total.done:
+            r = self.step(rule, self.batch)
+            total = StepResult(r.cursor, r.done, total.rows + r.rows, total.files + r.files, total.bytes + r.bytes)
+        return total
+
+
+def retention_report() -> List[Dict[str, object]]:
+    rows = db.session.execute(text(
+        "SELECT rule, cursor, rows_deleted, files_deleted, bytes_reclaimed, passes, last_pass_at, updated_at "
+        "FROM retention_checkpoint ORDER BY rule"
+    )).all()
+    return [
+        {
+            'rule': r[0], 'cursor': r[1], 'rows_deleted': int(r[2] or 0), 'files_deleted': int(r[3] or 0),
+            'bytes_reclaimed': int(r[4] or 0), 'passes': int(r[5] or 0),
+            'last_pass_at': str(r[6]) if r[6] else None, 'updated_at': str(r[7]) if r[7] else None,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,218 @@
+import json
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+# Signal bits recorded per observation in the ring buffer.
+NO_FACE = 0
+MULTI_FACE = 1
+LOOK_AWAY = 2
+VOICE = 3
+TAB = 4
+SIGNAL_NAMES = ('no_face', 'multi_face', 'look_away', 'voice', 'tab')
+NUM_SIGNALS = len(SIGNAL_NAMES)
+
+SIGNAL_MESSAGES = (
+    'No Face Detected',
+    'Multiple Faces Detected',
+    'Looking Away Frequently',
+    'Background Noise / Talking detected',
+    None,  # tab/client events carry their own message
+)
+
+
+@dataclass(frozen=True)
+class ScoringPolicy:
+    """Per-exam tuning for the temporal scorer.
+
+    A continuous signal (no_face, multi_face, look_away, voice) raises a
+    violation once it was seen in at least `<signal>_hits` of the last
+    `window` observations, and not more often than every
+    `signal_cooldown_sec`. Discrete client events (tab switch, restricted
+    key) raise immediately, rate-limited by `event_cooldown_sec`.
+
+    The rolling risk score is the weighted share of flagged observations in
+    the window, capped at 1.0 (a weight of 1.0 means "every observation
+    flagged with this signal alone is maximum risk").
+    """
+
+    window: int = 10
+    no_face_hits: int = 2
+    multi_face_hits: int = 2
+    look_away_hits: int = 4
+    voice_hits: int = 2
+    signal_cooldown_sec: float = 10.0
+    event_cooldown_sec: float = 2.5
+
+    no_face_weight: float = 1.0
+    multi_face_weight: float = 2.0
+    look_away_weight: float = 0.5
+    voice_weight: float = 1.0
+    tab_weight: float = 1.5
+
+    max_warnings: int = 6
+
+    def hits(self, signal: int) -> int:
+        return (self.no_face_hits, self.multi_face_hits, self.look_away_hits, self.voice_hits, 1)[signal]
+
+    def weights(self):
+        return (self.no_face_weight, self.multi_face_weight, self.look_away_weight, self.voice_weight, self.tab_weight)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'ScoringPolicy':
+        """Build a policy from (possibly partial) JSON; unknown keys are ignored.
+
+        Raises ValueError for values of the wrong type or out of range.
+        """
+        if not data:
+            return cls()
+        if not isinstance(data, dict):
+            raise ValueError('Policy must be an object')
+
+        kwargs = {}
+        for f in fields(cls):
+            if not f.init or f.name not in data or data[f.name] is None:
+                continue
+            if f.type is bool:
+                if not isinstance(data[f.name], bool):
+                    raise ValueError(f'{f.name} must be true or false')
+                kwargs[f.name] = data[f.name]
+                continue
+            try:
+                value = f.type(data[f.name]) if f.type in (int, float) else data[f.name]
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid value for {f.name}')
+            if isinstance(value, (int, float)) and value < 0:
+                raise ValueError(f'{f.name} must be >= 0')
+            kwargs[f.name] = value
+
+        policy = cls(**kwargs)
+        if policy.window < 1 or policy.window > 255:
+            raise ValueError('window must be between 1 and 255')
+        if policy.max_warnings < 1:
+            raise ValueError('max_warnings must be >= 1')
+        return policy
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> 'ScoringPolicy':
+        if not raw:
+            return cls()
+        return cls.from_dict(json.loads(raw))
+
+
+class RiskWindow:
+    """Fixed-size ring buffer of per-observation signal bitmasks.
+
+    Keeps running per-signal counts so every update is O(1) regardless of the
+    window size.
+    """
+
+    __slots__ = ('size', 'ring', 'pos', 'filled', 'counts', 'last_emit')
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.ring = bytearray(size)
+        self.pos = 0
+        self.filled = 0
+        self.counts = [0] * NUM_SIGNALS
+        self.last_emit = [float('-inf')] * NUM_SIGNALS
+
+    def push(self, mask: int) -> None:
+        evicted = self.ring[self.pos] if self.filled == self.size else 0
+        changed = evicted ^ mask
+        if changed:
+            for bit in range(NUM_SIGNALS):
+                if changed & (1 << bit):
+                    self.counts[bit] += 1 if mask & (1 << bit) else -1
+        self.ring[self.pos] = mask
+        self.pos = (self.pos + 1) % self.size
+        if self.filled < self.size:
+            self.filled += 1
+
+    def score(self, weights) -> float:
+        if not self.filled:
+            return 0.0
+        return min(1.0, sum(w * c for w, c in zip(weights, self.counts)) / self.filled)
+
+
+@dataclass
+class RiskDecision:
+    violation: bool
+    message: Optional[str] = None
+    risk: float = 0.0
+
+
+class RiskScorer:
+    """Streaming violation scorer over a per-session RiskWindow.
+
+    Per-session state (the window and the policy) lives in the caller's
+    `session_state` dict under the `risk_window` / `policy` keys.
+    """
+
+    def __init__(self, default_policy: Optional[ScoringPolicy] = None) -> None:
+        self.default_policy = default_policy or ScoringPolicy()
+
+    def policy_for(self, session_state: Dict[str, Any]) -> ScoringPolicy:
+        return session_state.get('policy') or self.default_policy
+
+    def _window(self, session_state: Dict[str, Any], policy: ScoringPolicy) -> RiskWindow:
+        win = session_state.get('risk_window')
+        if win is None or win.size != policy.window:
+            win = RiskWindow(policy.window)
+            session_state['risk_window'] = win
+        return win
+
+    def update(
+        self,
+        session_state: Dict[str, Any],
+        *,
+        face_count: Optional[int] = None,
+        off_center: bool = False,
+        voice: bool = False,
+        event: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> RiskDecision:
+        """Record one observation and decide whether it warrants a violation.
+
+        `face_count=None` means the frame could not be analysed; it records
+        no face signal either way.
+        """
+        policy = self.policy_for(session_state)
+        win = self._window(session_state, policy)
+        now = time.time() if now is None else now
+
+        mask = 0
+        if face_count is not None:
+            if face_count == 0:
+                mask |= 1 << NO_FACE
+            elif face_count >= 2:
+                mask |= 1 << MULTI_FACE
+            elif off_center:
+                mask |= 1 << LOOK_AWAY
+        if voice:
+            mask |= 1 << VOICE
+        if event:
+            mask |= 1 << TAB
+        win.push(mask)
+
+        risk = win.score(policy.weights())
+        session_state['risk_score'] = risk
+
+        if event:
+            if now - win.last_emit[TAB] < policy.event_cooldown_sec:
+                return RiskDecision(False, risk=risk)
+            win.last_emit[TAB] = now
+            return RiskDecision(True, str(event), risk)
+
+        # Highest-severity signal first.
+        for bit in (MULTI_FACE, NO_FACE, VOICE, LOOK_AWAY):
+            if not mask & (1 << bit):
+                continue
+            if win.counts[bit] < policy.hits(bit):
+                continue
+            if now - win.last_emit[bit] < policy.signal_cooldown_sec:
+                continue
+            win.last_emit[bit] = now
+            return RiskDecision(True, SIGNAL_MESSAGES[bit], risk)
+
+        return RiskDecision(False, risk=risk)
@@ -1,5 +1,5 @@
-from app import app, db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from app import app, db, User, bootstrap_schema, SCHEMA_VERSION
+from passwords import hash_password, verify_password
 import os
 
 def initialize_database():
@@ -34,7 +34,7 @@ def initialize_database():
         
         # Check if student exists (Double safety, though drop_all should have cleared it)
         if not User.query.filter_by(email='student@test.com').first():
-            hashed_pw_student = generate_password_hash('password123', method='pbkdf2:sha256')
+            hashed_pw_student = hash_password('password123')
             student = User(
                 name='Test Student',
                 email='student@test.com',
@@ -46,7 +46,7 @@ def initialize_database():
         
         # Check if admin exists
         if not User.query.filter_by(email='admin@test.com').first():
-            hashed_pw_admin = generate_password_hash('admin', method='pbkdf2:sha256')
+            hashed_pw_admin = hash_password('admin')
             admin = User(
                 name='Admin User',
                 email='admin@test.com',
@@ -63,6 +63,11 @@ def initialize_database():
             db.session.rollback()
             print(f"❌ Error saving users: {e}")
 
+        # Upgrade columns, seed the default exam and stamp the schema version
+        # so 'python app.py' does not redo this work on boot.
+        bootstrap_schema(force=True)
+        print(f"✅ Schema stamped as version {SCHEMA_VERSION}.")
+
         # 4. VERIFICATION
         print("\n--- 🔍 Verification Check ---")
         
@@ -75,7 +80,7 @@ def initialize_database():
         # Login Logic Check
         test_user = User.query.filter_by(email='student@test.com').first()
         if test_user:
-            if check_password_hash(test_user.password, 'password123'):
+            if verify_password(test_user.password, 'password123')[0]:
                 print("\n✅ LOGIN CHECK PASSED: Password 'password123' matches hash.")
             else:
                 print("\n❌ LOGIN CHECK FAILED: Hash mismatch.")
@@ -0,0 +1,47 @@
+"""Offline answer-similarity scan over completed exam attempts.
+
+Rescans every exam with completed attempts (or the given ones) and replaces
+their stored suspicious pairs, which the admin API then serves. The server
+does the same in the background for exams with new submissions.
+
+Usage:
+    python scan_collusion.py
+    python scan_collusion.py --exam-id 3 --exam-id 7 --method exact
+"""
+import argparse
+import sys
+
+from app import app, db, bootstrap_schema, Exam, ExamSession, run_collusion_scan
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Scan exams for candidates sharing wrong answers')
+    parser.add_argument('--exam-id', type=int, action='append', help='exam to scan (repeatable; default: all)')
+    parser.add_argument('--method', choices=['exact', 'lsh'], default=None, help='default: by cohort size')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        bootstrap_schema()
+        query = Exam.query
+        if args.exam_id:
+            query = query.filter(Exam.id.in_(args.exam_id))
+        else:
+            query = query.filter(
+                Exam.id.in_(db.session.query(ExamSession.exam_id).filter(ExamSession.status == 'Completed'))
+            )
+        exams = query.order_by(Exam.id.asc()).all()
+        if not exams:
+            print("ℹ️  No exams with completed attempts.")
+            return 0
+
+        for e in exams:
+            stats = run_collusion_scan(e, method=args.method)
+            print(
+                f"✅ {e.name} (#{e.id}): {stats['sessions']} sessions, {stats.get('pairs_scored', 0):,} pairs "
+                f"scored ({stats['method']}), {stats.get('flagged', 0)} flagged in {stats['seconds']:.2f}s"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Pre-fork server (POSIX only): warm the CV models once in the parent, then fork workers.
+
+The parent imports the app, loads and exercises the Haar cascade (and imports
+MediaPipe so its libraries and model files are mapped), freezes the GC so
+refcount bookkeeping does not dirty those pages, and then forks. Workers share
+the warmed pages copy-on-write instead of each loading their own copy on the
+first candidate's frame.
+
+The MediaPipe FaceMesh graph owns native threads, which do not survive fork(),
+so each worker builds and exercises its graph right after forking, before it
+accepts connections.
+
+Usage:
+    python serve_prefork.py --workers 4 --port 5000
+    python serve_prefork.py --workers 4 --no-mediapipe
+
+Socket.IO across several workers needs sticky sessions at the load balancer.
+ADMISSION_RATE / ADMISSION_BURST apply per worker.
+"""
+import argparse
+import base64
+import gc
+import os
+import signal
+import sys
+import time
+
+
+def _blank_frame_data_url():
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+
+    ok, buf = cv2.imencode('.jpg', np.zeros((240, 320, 3), dtype=np.uint8))
+    if not ok:
+        return None
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode('ascii')
+
+
+def _mem(app_module) -> str:
+    m = app_module._process_memory_kb()
+    rss = f"{m['rss_kb'] / 1024.0:.1f}" if m['rss_kb'] is not None else '?'
+    pss = f"{m['pss_kb'] / 1024.0:.1f}" if m['pss_kb'] is not None else '?'
+    return f"RSS {rss} MiB / PSS {pss} MiB"
+
+
+def warm_parent(app_module, with_mediapipe: bool) -> None:
+    print(f"ℹ️  [parent {os.getpid()}] before warmup: {_mem(app_module)}")
+    start = time.perf_counter()
+
+    with app_module.app.app_context():
+        if app_module.bootstrap_schema():
+            print(f"✅ Database schema bootstrapped (version {app_module.SCHEMA_VERSION})")
+        # Never share pooled DB connections across fork().
+        app_module.db.engine.dispose()
+
+    engine = app_module.proctor_engine
+    engine.prewarm(background=False)
+    if engine.cv_available:
+        frame = _blank_frame_data_url()
+        engine.analyze_frame({}, frame)
+
+    if with_mediapipe:
+        try:
+            import mediapipe  # type: ignore  # noqa: F401
+            import ai_proctor  # noqa: F401
+        except Exception as e:
+            print(f"⚠️  MediaPipe prewarm failed: {e}")
+
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+    gc.collect()
+    gc.freeze()
+    print(f"✅ [parent {os.getpid()}] warm in {time.perf_counter() - start:.2f}s: {_mem(app_module)}")
+
+
+def worker_main(listener, app_module, with_mediapipe: bool, slot: int = 0, first_boot: bool = True) -> None:
+    import eventlet.wsgi  # type: ignore
+
+    start = time.perf_counter()
+    if with_mediapipe:
+        p = app_module.get_proctor()
+        if p is not None and app_module.proctor_engine.cv_available:
+            p.process_frame(_blank_frame_data_url())
+    # Workers track their own sessions; slot 0 sweeps the database for the rest.
+    loaded = app_module.start_deadline_scheduler(load_active=False)
+    app_module.start_admission_gate()
+    app_module.start_notification_dispatcher()
+    app_module.start_policy_reloader()
+    app_module.start_login_audit_writer()
+    app_module.start_purge_worker()
+    if slot == 0:
+        # One process runs the sweepers and the collusion monitor: they work on
+        # rows and files every worker shares (the retention cursors, queued
+        # scans and scan times live in the database).
+        app_module.start_retention_sweeper()
+        app_module.start_expiry_sweeper()
+        app_module.start_evidence_sweeper()
+        app_module.start_collusion_monitor()
+        if first_boot:
+            # Only when the whole server starts: a restarted slot 0 would
+            # resubmit uploads the other workers are still processing.
+            with app_module.app.app_context():
+                if app_module._requeue_pending_uploads():
+                    print("ℹ️  Resumed pending upload normalization")
+    print(
+        f"✅ [worker {os.getpid()}] tracking {loaded} exam deadlines; ready in {time.perf_counter() - start:.2f}s: {_mem(app_module)}"
+    )
+    eventlet.wsgi.server(listener, app_module.app, log_output=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Pre-fork server with shared model warmup')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--no-mediapipe', action='store_true', help='skip MediaPipe warmup')
+    args = parser.parse_args(argv)
+
+    import eventlet  # type: ignore
+
+    import app as app_module
+
+    with_mediapipe = not args.no_mediapipe
+    warm_parent(app_module, with_mediapipe)
+
+    listener = eventlet.listen((args.host, args.port))
+    children = {}
+
+    def spawn(slot: int, first_boot: bool = True) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                worker_main(listener, app_module, with_mediapipe, slot, first_boot)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"🚀 Serving on {args.host}:{args.port} with {args.workers} workers")
+
+    stopping = [False]
+
+    def shutdown(signum, frame):
+        stopping[0] = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping[0]:
+            print(f"⚠️  Worker {pid} exited; restarting")
+            spawn(slot, first_boot=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
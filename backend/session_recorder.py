@@ -0,0 +1,315 @@
+import base64
+import mmap
+import os
+import struct
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import Dict, Optional, Tuple
+
+# One fixed-size index record per frame: timestamp, segment number, byte offset
+# within the segment, frame length. Fixed size lets readers mmap the index and
+# binary-search it without parsing.
+INDEX_RECORD = struct.Struct('<dIQI')
+INDEX_NAME = 'index.bin'
+
+
+def _segment_name(seg: int) -> str:
+    return f"seg_{seg:05d}.jpgs"
+
+
+class _SessionWriter:
+    __slots__ = ('dir', 'buffer_bytes', 'seg', 'seg_file', 'seg_size', 'index_file', 'last_write', 'unflushed')
+
+    def __init__(self, session_dir: str, buffer_bytes: int) -> None:
+        os.makedirs(session_dir, exist_ok=True)
+        self.dir = session_dir
+        self.buffer_bytes = buffer_bytes
+        index_path = os.path.join(session_dir, INDEX_NAME)
+        # Resume after a restart: continue in the last segment.
+        self.seg = 0
+        self.seg_size = 0
+        if os.path.exists(index_path):
+            size = os.path.getsize(index_path)
+            size -= size % INDEX_RECORD.size
+            if size:
+                with open(index_path, 'rb') as f:
+                    f.seek(size - INDEX_RECORD.size)
+                    _, self.seg, off, length = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+                self.seg_size = off + length
+            # Drop a torn trailing record, if any.
+            os.truncate(index_path, size)
+        self.index_file = open(index_path, 'ab', buffering=buffer_bytes // 16)
+        self.seg_file = open(os.path.join(session_dir, _segment_name(self.seg)), 'ab', buffering=buffer_bytes)
+        self.last_write = time.time()
+        self.unflushed = 0  # bytes written since the last flush (maybe not on disk yet)
+
+    def append(self, ts: float, frame: bytes, segment_bytes: int) -> int:
+        if self.seg_size and self.seg_size + len(frame) > segment_bytes:
+            self.seg_file.close()
+            self.seg += 1
+            self.seg_size = 0
+            self.seg_file = open(os.path.join(self.dir, _segment_name(self.seg)), 'ab', buffering=self.buffer_bytes)
+        offset = self.seg_size
+        self.seg_file.write(frame)
+        self.seg_size += len(frame)
+        self.index_file.write(INDEX_RECORD.pack(ts, self.seg, offset, len(frame)))
+        self.last_write = time.time()
+        self.unflushed += len(frame) + INDEX_RECORD.size
+        return len(frame) + INDEX_RECORD.size
+
+    def flush(self) -> None:
+        # Segment data first, so a flushed index record never points past EOF.
+        self.seg_file.flush()
+        self.index_file.flush()
+        self.unflushed = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.seg_file.close()
+        self.index_file.close()
+
+
+class SessionRecorder:
+    """Optional per-exam timelapse recording of proctoring frames.
+
+    Layout: <root>/<exam_id>/<session_id>/{index.bin, seg_00000.jpgs, ...}
+    Frames are the client's JPEGs appended back-to-back into segments of at
+    most `segment_bytes`; `index.bin` holds one INDEX_RECORD per frame.
+
+    `append()` only enqueues; decoding and buffered writes happen on a
+    background thread. Each exam has a disk budget; frames beyond it are
+    dropped (counted in `stats`). Several processes may record the same exam,
+    so an exam's usage is re-read from disk once it is `usage_ttl_sec` old
+    (this process's own writes are added in between); the budget can be
+    overshot by what the other processes write within one TTL.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        segment_bytes: int = 8 * 1024 * 1024,
+        buffer_bytes: int = 256 * 1024,
+        flush_interval_sec: float = 5.0,
+        idle_close_sec: float = 120.0,
+        usage_ttl_sec: float = 30.0,
+        max_queue: int = 2000,
+    ) -> None:
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval_sec = flush_interval_sec
+        self.idle_close_sec = idle_close_sec
+        self.usage_ttl_sec = usage_ttl_sec
+
+        self._queue: Queue = Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._writers: Dict[Tuple[int, int], _SessionWriter] = {}
+        self._usage: Dict[int, Tuple[float, int]] = {}  # exam_id -> (measured at, bytes)
+
+        self.stats = {'frames': 0, 'bytes': 0, 'over_budget': 0, 'dropped': 0, 'failed': 0}
+
+    # --- Hot path ---
+
+    def append(self, exam_id: int, session_id: int, image_data_url: str, budget_bytes: int) -> bool:
+        self._start()
+        try:
+            self._queue.put_nowait(('frame', int(exam_id or 0), int(session_id), time.time(), image_data_url, budget_bytes))
+            return True
+        except Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def close_session(self, exam_id: int, session_id: int) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(('close', int(exam_id or 0), int(session_id)))
+        except Full:
+            pass
+
+    # --- Reads ---
+
+    def session_dir(self, exam_id: int, session_id: int) -> str:
+        return os.path.join(self.root, str(int(exam_id or 0)), str(int(session_id)))
+
+    def open(self, exam_id: int, session_id: int) -> Optional['RecordingReader']:
+        path = self.session_dir(exam_id, session_id)
+        if not os.path.exists(os.path.join(path, INDEX_NAME)):
+            return None
+        return RecordingReader(path)
+
+    def usage_bytes(self, exam_id: int) -> int:
+        exam_id = int(exam_id or 0)
+        now = time.monotonic()
+        cached = self._usage.get(exam_id)
+        if cached is not None and now - cached[0] < self.usage_ttl_sec:
+            return cached[1]
+        total = 0
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, str(exam_id))):
+            for n in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, n))
+                except FileNotFoundError:
+                    pass
+        # Plus what this process has buffered but not flushed yet.
+        total += sum(w.unflushed for (e, _), w in list(self._writers.items()) if e == exam_id)
+        self._usage[exam_id] = (now, total)
+        return total
+
+    def forget_usage(self, exam_id: int) -> None:
+        """Drop the cached disk usage of an exam after files were removed behind the recorder's back."""
+        self._usage.pop(int(exam_id or 0), None)
+
+    # --- Background worker ---
+
+    def _start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='session-recorder', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until queued frames are written and flushed (for scripts and tests)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                break
+            time.sleep(0.01)
+        else:
+            return False
+        try:
+            self._queue.put_nowait(('flush',))
+        except Full:
+            return False
+        while time.time() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _run(self) -> None:
+        last_flush = time.time()
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except Empty:
+                item = None
+            if item is not None:
+                try:
+                    self._handle(item)
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    print(f"Recorder Error: {e}")
+                finally:
+                    self._queue.task_done()
+
+            now = time.time()
+            if now - last_flush >= self.flush_interval_sec:
+                last_flush = now
+                for key, w in list(self._writers.items()):
+                    if now - w.last_write >= self.idle_close_sec:
+                        w.close()
+                        del self._writers[key]
+                    else:
+                        w.flush()
+
+    def _handle(self, item) -> None:
+        kind = item[0]
+        if kind == 'flush':
+            for w in self._writers.values():
+                w.flush()
+            return
+        if kind == 'close':
+            w = self._writers.pop((item[1], item[2]), None)
+            if w:
+                w.close()
+            return
+
+        _, exam_id, session_id, ts, image_data_url, budget_bytes = item
+        b64 = image_data_url.split(',', 1)[1] if ',' in image_data_url else image_data_url
+        frame = base64.b64decode(b64)
+
+        if self.usage_bytes(exam_id) + len(frame) > budget_bytes:
+            self.stats['over_budget'] += 1
+            return
+
+        key = (exam_id, session_id)
+        w = self._writers.get(key)
+        if w is None:
+            w = _SessionWriter(self.session_dir(exam_id, session_id), self.buffer_bytes)
+            self._writers[key] = w
+        written = w.append(ts, frame, self.segment_bytes)
+        measured_at, used = self._usage.get(exam_id, (time.monotonic(), 0))
+        self._usage[exam_id] = (measured_at, used + written)
+        self.stats['frames'] += 1
+        self.stats['bytes'] += written
+
+
+class RecordingReader:
+    """Seekable, memory-mapped view over one session recording."""
+
+    def __init__(self, session_dir: str) -> None:
+        import numpy as np  # type: ignore
+
+        self.dir = session_dir
+        self._np = np
+        self._segments: Dict[int, Tuple[object, mmap.mmap]] = {}
+        dtype = np.dtype([('ts', '<f8'), ('seg', '<u4'), ('off', '<u8'), ('len', '<u4')])
+
+        self._index_file = open(os.path.join(session_dir, INDEX_NAME), 'rb')
+        count = os.fstat(self._index_file.fileno()).st_size // INDEX_RECORD.size
+        self._index_map = None
+        if count:
+            self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index = np.frombuffer(self._index_map, dtype=dtype, count=count)
+        else:
+            self.index = np.zeros(0, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def start(self) -> Optional[float]:
+        return float(self.index['ts'][0]) if len(self.index) else None
+
+    @property
+    def end(self) -> Optional[float]:
+        return float(self.index['ts'][-1]) if len(self.index) else None
+
+    def _segment(self, seg: int) -> Optional[mmap.mmap]:
+        if seg not in self._segments:
+            path = os.path.join(self.dir, _segment_name(seg))
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            f = open(path, 'rb')
+            self._segments[seg] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return self._segments[seg][1]
+
+    def frame_at(self, ts: float) -> Optional[Tuple[float, bytes]]:
+        """Latest frame at or before `ts` (or the first frame if `ts` precedes it)."""
+        if not len(self.index):
+            return None
+        i = int(self._np.searchsorted(self.index['ts'], ts, side='right')) - 1
+        rec = self.index[max(i, 0)]
+        mm = self._segment(int(rec['seg']))
+        off, length = int(rec['off']), int(rec['len'])
+        if mm is None or off + length > len(mm):
+            return None
+        return float(rec['ts']), mm[off:off + length]
+
+    def close(self) -> None:
+        for f, mm in self._segments.values():
+            mm.close()
+            f.close()
+        self._segments.clear()
+        # Release the array view before unmapping the index.
+        self.index = None
+        if self._index_map is not None:
+            self._index_map.close()
+        self._index_file.close()
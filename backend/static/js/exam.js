@@ -36,8 +36,11 @@ async function loadExam(examId) {
         renderPalette();
         loadQuestion(0);
 
-        const duration = parseInt(examMeta.duration_minutes || 30, 10);
-        startTimer(duration * 60);
+        // Provisional until the server's time_sync arrives; the server owns the deadline.
+        if (timerEndsAt === null) {
+            const duration = parseInt(examMeta.duration_minutes || 30, 10);
+            startTimer(duration * 60);
+        }
     } catch (err) {
         console.error(err);
         if (window.Swal) {
@@ -169,16 +172,60 @@ async function submitToServer() {
     }
 }
 
+// --- Timer (server-driven) ---
+// The server sends `time_sync` on connect and at a few remaining-time marks,
+// `force_submit` at the deadline and `exam_expired` once the grace period is
+// over. Between syncs the countdown runs locally from a fixed end time.
+
+let timerEndsAt = null;
+let timerInterval = null;
+let autoSubmitted = false;
+
+socket.on('time_sync', (data) => {
+    startTimer(Number(data.remaining_sec) || 0);
+});
+
+socket.on('force_submit', () => {
+    autoSubmit();
+});
+
+socket.on('exam_expired', (data) => {
+    if (window.Swal) {
+        Swal.fire({
+            icon: 'warning',
+            title: 'Time is up',
+            text: data.reason || 'Your exam was closed.',
+            allowOutsideClick: false
+        }).then(() => {
+            window.location.href = data.redirect || '/student_dashboard';
+        });
+    } else {
+        window.location.href = data.redirect || '/student_dashboard';
+    }
+});
+
+function autoSubmit() {
+    if (autoSubmitted) return;
+    autoSubmitted = true;
+    submitToServer();
+}
+
 function startTimer(duration) {
-    let timer = duration, minutes, seconds;
+    timerEndsAt = Date.now() + duration * 1000;
+    if (timerInterval) return;
+
     const display = document.getElementById('timer');
-    const interval = setInterval(() => {
-        minutes = parseInt(timer / 60, 10);
-        seconds = parseInt(timer % 60, 10);
+    const tick = () => {
+        const timer = Math.max(0, Math.round((timerEndsAt - Date.now()) / 1000));
+        const minutes = parseInt(timer / 60, 10);
+        const seconds = parseInt(timer % 60, 10);
         display.textContent = (minutes < 10 ? "0" + minutes : minutes) + ":" + (seconds < 10 ? "0" + seconds : seconds);
-        if (--timer < 0) {
-            clearInterval(interval);
-            submitExam();
+        if (timer <= 0) {
+            clearInterval(timerInterval);
+            timerInterval = null;
+            autoSubmit();
         }
-    }, 1000);
-}
\ No newline at end of file
+    };
+    tick();
+    timerInterval = setInterval(tick, 1000);
+}
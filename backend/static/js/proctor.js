@@ -1,14 +1,79 @@
 (() => {
-  const MAX_WARNINGS = 6;
-  const FRAME_INTERVAL_MS = 2000;
+  // Defaults until the server sends the exam's policy ('proctor_policy').
+  let maxWarnings = 6;
+  let frameIntervalMs = 2000;
+  let frameTimer = null;
+  const AUDIO_SAMPLE_MS = 100;
+
+  // Keep in sync with BAND_EDGES_HZ in audio_vad.py.
+  const AUDIO_BAND_EDGES_HZ = [100, 200, 300, 400, 510, 630, 770, 920, 1080, 1270, 1480, 1720, 2000, 2700, 3700, 5300, 8000];
+  const VOICE_LO_HZ = 300;
+  const VOICE_HI_HZ = 3700;
 
   let socket;
   let isActive = false;
+  let video;
+  let canvas;
 
   let audioContext;
   let analyser;
   let dataArray;
 
+  // Per-window accumulators for the spectral feature vector.
+  let bandBins = [];
+  let bandSums;
+  let audioSamples = 0;
+  let fluxSum = 0;
+  let lastVoiceLevel = null;
+
+  function setupBands() {
+    const binHz = audioContext.sampleRate / analyser.fftSize;
+    bandBins = [];
+    for (let b = 0; b < AUDIO_BAND_EDGES_HZ.length - 1; b++) {
+      const lo = Math.max(1, Math.floor(AUDIO_BAND_EDGES_HZ[b] / binHz));
+      const hi = Math.max(lo + 1, Math.min(dataArray.length, Math.floor(AUDIO_BAND_EDGES_HZ[b + 1] / binHz)));
+      const voice = AUDIO_BAND_EDGES_HZ[b] >= VOICE_LO_HZ && AUDIO_BAND_EDGES_HZ[b + 1] <= VOICE_HI_HZ;
+      bandBins.push({ lo, hi, voice });
+    }
+    bandSums = new Float32Array(bandBins.length);
+  }
+
+  function sampleAudioBands() {
+    if (!analyser || !dataArray || !bandBins.length) return;
+    analyser.getByteFrequencyData(dataArray);
+    let voiceSum = 0;
+    let voiceBands = 0;
+    for (let b = 0; b < bandBins.length; b++) {
+      const { lo, hi, voice } = bandBins[b];
+      let sum = 0;
+      for (let i = lo; i < hi; i++) sum += dataArray[i];
+      const level = sum / (hi - lo);
+      bandSums[b] += level;
+      if (voice) {
+        voiceSum += level;
+        voiceBands++;
+      }
+    }
+    const voiceLevel = voiceBands ? voiceSum / voiceBands : 0;
+    if (lastVoiceLevel !== null) fluxSum += Math.abs(voiceLevel - lastVoiceLevel);
+    lastVoiceLevel = voiceLevel;
+    audioSamples++;
+  }
+
+  // Mean band levels + voice-band flux over the window, each quantized to 0..255.
+  function takeAudioFeatures() {
+    if (!audioSamples) return null;
+    const out = [];
+    for (let b = 0; b < bandSums.length; b++) {
+      out.push(Math.min(255, Math.round(bandSums[b] / audioSamples)));
+      bandSums[b] = 0;
+    }
+    out.push(Math.min(255, Math.round(fluxSum / Math.max(1, audioSamples - 1))));
+    audioSamples = 0;
+    fluxSum = 0;
+    return out;
+  }
+
   function getAudioLevel() {
     if (!analyser || !dataArray) return 0;
     analyser.getByteFrequencyData(dataArray);
@@ -60,30 +125,46 @@
 
     const imageData = canvas.toDataURL('image/jpeg', 0.4);
     const audioLevel = getAudioLevel();
+    const audioFeatures = takeAudioFeatures();
 
     socket.emit('process_frame', {
       image: imageData,
       audio_level: audioLevel,
+      audio_features: audioFeatures,
       violation_type: null
     });
   }
 
+  function scheduleFrames() {
+    if (frameTimer) clearInterval(frameTimer);
+    frameTimer = setInterval(() => captureAndSendFrame(video, canvas), frameIntervalMs);
+  }
+
   async function start() {
-    const video = document.getElementById('webcam');
-    const canvas = document.getElementById('capture-canvas');
+    video = document.getElementById('webcam');
+    canvas = document.getElementById('capture-canvas');
 
     if (!video || !canvas) return;
 
     socket = window.io ? window.io() : null;
     if (!socket) return;
 
+    socket.on('proctor_policy', (policy) => {
+      if (policy.max_warnings) maxWarnings = policy.max_warnings;
+      if (policy.frame_interval_ms && policy.frame_interval_ms !== frameIntervalMs) {
+        frameIntervalMs = policy.frame_interval_ms;
+        if (frameTimer) scheduleFrames();
+      }
+    });
+
     socket.on('warning_alert', (data) => {
-      const remaining = MAX_WARNINGS - data.count;
+      if (data.max) maxWarnings = data.max;
+      const remaining = maxWarnings - data.count;
       if (window.Swal) {
         Swal.fire({
           icon: 'warning',
           title: '⚠️ Violation Detected',
-          html: `<b>${data.message}</b><br>Warnings: ${data.count}/${MAX_WARNINGS}<br>Exam will terminate in ${remaining} warnings!`,
+          html: `<b>${data.message}</b><br>Warnings: ${data.count}/${maxWarnings}<br>Exam will terminate in ${remaining} warnings!`,
           timer: 4000,
           toast: true,
           position: 'top-end',
@@ -122,11 +203,13 @@
       audioContext = new (window.AudioContext || window.webkitAudioContext)();
       const mic = audioContext.createMediaStreamSource(stream);
       analyser = audioContext.createAnalyser();
-      analyser.fftSize = 256;
+      analyser.fftSize = 512;
       mic.connect(analyser);
       dataArray = new Uint8Array(analyser.frequencyBinCount);
+      setupBands();
 
-      setInterval(() => captureAndSendFrame(video, canvas), FRAME_INTERVAL_MS);
+      setInterval(sampleAudioBands, AUDIO_SAMPLE_MS);
+      scheduleFrames();
     } catch (err) {
       isActive = false;
       if (window.Swal) {
@@ -42,11 +42,15 @@ document.addEventListener('DOMContentLoaded', async () => {
             const studentIdText = student.student_uid || (`STU-${student.id}`);
             const mobile = student.mobile_number || '';
 
+            const avatar = student.face_thumb_url
+                ? `<img src="${student.face_thumb_url}" alt="" class="avatar-circle me-3" loading="lazy" style="object-fit:cover;">`
+                : `<div class="avatar-circle ${color} text-white me-3">${initials}</div>`;
+
             const row = `
                 <tr>
                     <td class="ps-4">
                         <div class="d-flex align-items-center">
-                            <div class="avatar-circle ${color} text-white me-3">${initials}</div>
+                            ${avatar}
                             <div>
                                 <div class="fw-bold">${student.name || '--'}</div>
                                 <small class="text-muted">ID: ${studentIdText}</small>
@@ -116,7 +120,11 @@ document.addEventListener('DOMContentLoaded', async () => {
             if (face) {
                 if (data.user.face_url) {
                     face.href = data.user.face_url;
-                    face.innerText = 'View';
+                    if (data.user.face_thumb_url) {
+                        face.innerHTML = `<img src="${data.user.face_thumb_url}" alt="View" width="48" height="48" style="border-radius:50%; object-fit:cover;">`;
+                    } else {
+                        face.innerText = 'View';
+                    }
                 } else {
                     face.href = '#';
                     face.innerText = '--';
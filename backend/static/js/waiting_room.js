@@ -0,0 +1,52 @@
+// Waiting room: our ticket is the server time at which we may enter. The server
+// broadcasts its clock and admission rate to everyone waiting; our position is
+// how many admissions fit between that time and our ticket.
+
+document.addEventListener('DOMContentLoaded', () => {
+    const body = document.body;
+    const examId = body.getAttribute('data-exam-id');
+    const ticket = parseFloat(body.getAttribute('data-ticket'));
+
+    const posEl = document.getElementById('queuePosition');
+    const etaEl = document.getElementById('queueEta');
+    let entering = false;
+
+    function update(serverTime, rate) {
+        const position = Math.ceil((ticket - serverTime) * rate);
+        if (position <= 0) {
+            enter();
+            return;
+        }
+        posEl.innerText = `#${position}`;
+        const eta = rate > 0 ? Math.ceil(position / rate) : null;
+        etaEl.innerText = eta === null ? '--' : (eta < 60 ? `${eta} sec` : `${Math.ceil(eta / 60)} min`);
+    }
+
+    function enter() {
+        if (entering) return;
+        entering = true;
+        posEl.innerText = 'Starting...';
+        etaEl.innerText = 'now';
+        // Small jitter so a whole batch does not reload in the same millisecond.
+        setTimeout(() => {
+            window.location.href = `/exam?exam_id=${encodeURIComponent(examId)}`;
+        }, Math.random() * 1000);
+    }
+
+    // Count down on the server's clock between broadcasts: the worker holding
+    // our socket may not be the one that issued the ticket.
+    let clockOffset = parseFloat(body.getAttribute('data-server-time')) - Date.now() / 1000;
+    let rate = parseFloat(body.getAttribute('data-rate'));
+    const tick = () => update(Date.now() / 1000 + clockOffset, rate);
+    tick();
+    setInterval(tick, 1000);
+
+    const socket = window.io ? window.io() : null;
+    if (!socket) return;
+    socket.on('connect', () => socket.emit('waiting_room_join'));
+    socket.on('queue_progress', (data) => {
+        if (data.server_time) clockOffset = Number(data.server_time) - Date.now() / 1000;
+        if (data.rate) rate = Number(data.rate);
+        tick();
+    });
+});
@@ -0,0 +1,158 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from models import db, DashboardSummary
+
+RECENT_RESULTS = 10  # the profile shows 10, the dashboard the first 5
+CHUNK = 500  # ids per IN (...) list
+
+_TOTALS_SQL = (
+    "SELECT user_id, COUNT(*), SUM(COALESCE(percentage, 0)) FROM exam_session "
+    "WHERE status = 'Completed' AND submitted_at IS NOT NULL AND user_id IN ({ids}) "
+    "GROUP BY user_id"
+)
+
+_RECENT_SQL = (
+    "SELECT user_id, id, name, submitted_at, percentage, result_status FROM ("
+    " SELECT s.user_id, s.id, e.name, s.submitted_at, s.percentage, s.result_status,"
+    " ROW_NUMBER() OVER (PARTITION BY s.user_id ORDER BY s.submitted_at DESC) AS rn"
+    " FROM exam_session s LEFT JOIN exam e ON e.id = s.exam_id"
+    " WHERE s.status = 'Completed' AND s.submitted_at IS NOT NULL AND s.user_id IN ({ids})"
+    ") WHERE rn <= :n ORDER BY user_id, rn"
+)
+
+_UPSERT_SQL = text(
+    "INSERT INTO dashboard_summary (user_id, exams_completed, score_sum, avg_score, recent_results, updated_at) "
+    "VALUES (:user_id, :exams_completed, :score_sum, :avg_score, :recent_results, :updated_at) "
+    "ON CONFLICT(user_id) DO UPDATE SET exams_completed = excluded.exams_completed, "
+    "score_sum = excluded.score_sum, avg_score = excluded.avg_score, "
+    "recent_results = excluded.recent_results, updated_at = excluded.updated_at"
+)
+
+# The counters move in one statement; it also takes SQLite's write lock, so
+# the read-modify-write of recent_results that follows cannot interleave
+# with another submission of the same student.
+_BUMP_SQL = text(
+    "UPDATE dashboard_summary SET exams_completed = exams_completed + 1, "
+    "score_sum = COALESCE(score_sum, 0) + :pct, "
+    "avg_score = (COALESCE(score_sum, 0) + :pct) / (exams_completed + 1), updated_at = :now "
+    "WHERE user_id = :user_id RETURNING recent_results"
+)
+
+
+def _chunks(ids: Sequence[int], size: int = CHUNK) -> Iterable[Sequence[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _result_entry(session_id: int, exam_name: Optional[str], submitted_at, percentage, result_status) -> Dict[str, Any]:
+    submitted_at = _as_datetime(submitted_at)
+    return {
+        'session_id': session_id,
+        'exam_name': exam_name or 'Exam',
+        'date': submitted_at.isoformat() if submitted_at else None,
+        'percentage': float(percentage or 0.0),
+        'result_status': result_status or 'Completed',
+    }
+
+
+@dataclass
+class StudentStats:
+    exams_completed: int
+    avg_score: float
+    recent_results: List[Dict[str, Any]]  # newest first, 'date' as datetime
+
+
+def rebuild_student_stats(user_ids: Iterable[int], missing_only: bool = False) -> int:
+    """Recompute the stats record of these users from exam_session with set-based queries.
+
+    With `missing_only`, users who already have a record are skipped.
+    Does not commit. Returns how many records were written.
+    """
+    ids = sorted({int(u) for u in user_ids})
+    if missing_only and ids:
+        have = set()
+        for chunk in _chunks(ids):
+            have.update(u for (u,) in db.session.query(DashboardSummary.user_id).filter(DashboardSummary.user_id.in_(chunk)))
+        ids = [u for u in ids if u not in have]
+
+    now = datetime.utcnow()
+    written = 0
+    for chunk in _chunks(ids):
+        placeholders = ','.join(str(u) for u in chunk)
+        totals = {
+            uid: (int(n), float(total or 0.0))
+            for uid, n, total in db.session.execute(text(_TOTALS_SQL.format(ids=placeholders))).all()
+        }
+        recent: Dict[int, List[Dict[str, Any]]] = {}
+        for uid, sid, name, submitted_at, pct, status in db.session.execute(
+            text(_RECENT_SQL.format(ids=placeholders)), {'n': RECENT_RESULTS}
+        ).all():
+            recent.setdefault(uid, []).append(_result_entry(sid, name, submitted_at, pct, status))
+        rows = []
+        for uid in chunk:
+            n, total = totals.get(uid, (0, 0.0))
+            rows.append({
+                'user_id': uid,
+                'exams_completed': n,
+                'score_sum': total,
+                'avg_score': (total / n) if n else 0.0,
+                'recent_results': json.dumps(recent.get(uid, [])),
+                'updated_at': now,
+            })
+        db.session.execute(_UPSERT_SQL, rows)
+        written += len(rows)
+    return written
+
+
+def record_submission(user_id: int, session_id: int, exam_name: Optional[str], submitted_at, percentage, result_status) -> bool:
+    """Fold one newly completed attempt into the user's stats record. Does not commit.
+
+    Returns False when the user has no record yet; the next read builds it
+    from exam_session, which then already includes this attempt.
+    """
+    row = db.session.execute(
+        _BUMP_SQL, {'user_id': user_id, 'pct': float(percentage or 0.0), 'now': datetime.utcnow()}
+    ).first()
+    if row is None:
+        return False
+    recent = json.loads(row[0] or '[]')
+    recent.insert(0, _result_entry(session_id, exam_name, submitted_at, percentage, result_status))
+    db.session.execute(
+        text("UPDATE dashboard_summary SET recent_results = :recent WHERE user_id = :user_id"),
+        {'recent': json.dumps(recent[:RECENT_RESULTS]), 'user_id': user_id},
+    )
+    return True
+
+
+def student_stats(user_id: int) -> StudentStats:
+    """The user's stats record (one primary-key read), built and stored on a miss."""
+    row = DashboardSummary.query.get(user_id)
+    if row is None:
+        rebuild_student_stats([user_id])
+        db.session.commit()
+        row = DashboardSummary.query.get(user_id)
+    recent = json.loads(row.recent_results or '[]')
+    for r in recent:
+        r['date'] = _as_datetime(r.get('date'))
+    return StudentStats(int(row.exams_completed or 0), float(row.avg_score or 0.0), recent)
+
+
+def invalidate_student_stats(user_ids: Iterable[int]) -> None:
+    """Drop stats records that can no longer be updated in place (e.g. expiries, a deleted exam). Does not commit."""
+    ids = sorted({int(u) for u in user_ids})
+    for chunk in _chunks(ids):
+        DashboardSummary.query.filter(DashboardSummary.user_id.in_(chunk)).delete(synchronize_session=False)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Backend modules import each other by their top-level names.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that import app get a private in-memory database, never instance/database.db.
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
@@ -0,0 +1,35 @@
+from admission import AdmissionGate
+
+
+def test_queued_ticket_is_honoured_by_another_worker():
+    a = AdmissionGate(rate=10, burst=1)
+    b = AdmissionGate(rate=10, burst=1)
+    now = 1000.0
+    assert a.admit(now=now) == (True, None)
+
+    admitted, ticket = a.admit(now=now)
+    assert not admitted and ticket == now + 0.1
+    assert a.admit(ticket, now=now + 0.05) == (False, ticket)
+    # The next request lands on a worker that never saw the ticket.
+    assert b.admit(ticket, now=now + 0.1) == (True, None)
+    assert b.stats['admitted_from_queue'] == 1
+
+
+def test_tickets_are_slots_one_interval_apart():
+    gate = AdmissionGate(rate=4, burst=1)
+    gate.admit(now=0.0)
+    slots = [gate.admit(now=0.0)[1] for _ in range(3)]
+    assert slots == [0.25, 0.5, 0.75]
+    assert gate.position(slots[-1], now=0.0) == 3
+    assert gate.progress(now=0.0)['waiting'] == 3
+    # Arrivals cannot overtake the queue while it is being served.
+    assert gate.admit(now=0.3) == (False, 1.0)
+
+
+def test_expired_ticket_queues_again():
+    gate = AdmissionGate(rate=10, burst=1, ticket_ttl_sec=60)
+    gate.admit(now=0.0)
+    _, ticket = gate.admit(now=0.0)
+    admitted, again = gate.admit(ticket, now=ticket + 61)
+    assert gate.stats['expired_tickets'] == 1
+    assert admitted or again > ticket
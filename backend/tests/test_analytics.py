@@ -0,0 +1,65 @@
+import pytest
+from flask import Flask
+
+pytest.importorskip('numpy')
+
+from analytics import ExamAnalytics  # noqa: E402
+from models import db, Exam, ExamQuestion, ExamResponse, ExamSession, User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _exam():
+    user = User(name='S', email='s@test', password='-', role='student')
+    exam = Exam(name='E', is_active=True, pass_percentage=50)
+    db.session.add_all([user, exam])
+    db.session.flush()
+    q = ExamQuestion(exam_id=exam.id, question_text='Q', option_a='a', option_b='b', option_c='c', option_d='d',
+                     correct_option=1, marks=1, order_index=0)
+    db.session.add(q)
+    db.session.flush()
+    return user, exam, q
+
+
+def _attempt(user, exam, pct, answers):
+    s = ExamSession(user_id=user.id, exam_id=exam.id, status='Completed', percentage=pct)
+    db.session.add(s)
+    db.session.flush()
+    for question_id, selected, correct in answers:
+        db.session.add(ExamResponse(session_id=s.id, question_id=question_id, selected_option=selected, is_correct=correct))
+    return s
+
+
+def test_out_of_range_options_count_as_unanswered(app):
+    user, exam, q = _exam()
+    _attempt(user, exam, 100.0, [(q.id, 1, True)])
+    _attempt(user, exam, 0.0, [(q.id, -1, False)])
+    _attempt(user, exam, 0.0, [(q.id, 9, False)])
+    db.session.commit()
+
+    item = ExamAnalytics().get(exam)['items'][0]
+
+    assert item['question_id'] == q.id
+    assert item['attempts'] == 3
+    assert item['unanswered'] == 2
+    assert [o['count'] for o in item['options']] == [0, 1, 0, 0]
+
+
+def test_sessions_without_responses_are_left_out(app):
+    user, exam, q = _exam()
+    _attempt(user, exam, 80.0, [(q.id, 1, True)])
+    _attempt(user, exam, 0.0, [])  # closed at the deadline, nothing answered
+    db.session.commit()
+
+    result = ExamAnalytics().get(exam)
+
+    assert result['sessions'] == 1
+    assert result['scores']['mean'] == 80.0
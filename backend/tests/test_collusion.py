@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from collusion import AnswerMatrix, CollusionDetector, SuspiciousPair, group_pairs
+
+
+def _cohort(n=200, n_q=40, copied=(5, 17), seed=1):
+    rng = np.random.default_rng(seed)
+    correct = np.zeros(n_q, dtype=np.int8)
+    answers = np.where(rng.random((n, n_q)) < 0.3, rng.integers(1, 4, (n, n_q)), 0).astype(np.int8)
+    # One candidate copies a weak paper, wrong answers and all.
+    src, dst = copied
+    answers[src] = np.where(rng.random(n_q) < 0.5, rng.integers(1, 4, n_q), 0)
+    answers[dst] = answers[src]
+    return AnswerMatrix(np.arange(1000, 1000 + n), answers, correct)
+
+
+def _ids(pairs):
+    return {(p.session_a, p.session_b) for p in pairs} | {(p.session_b, p.session_a) for p in pairs}
+
+
+def test_exact_and_lsh_flag_the_copied_pair():
+    matrix = _cohort()
+    exact = CollusionDetector().scan(matrix, 'exact')
+    lsh = CollusionDetector().scan(matrix, 'lsh')
+
+    assert (1005, 1017) in _ids(exact)
+    assert (1005, 1017) in _ids(lsh)
+    # LSH only narrows the candidates; scores are computed the same way.
+    assert _ids(lsh) <= _ids(exact)
+    assert lsh[0] == exact[0]
+    assert {lsh[0].session_a, lsh[0].session_b} == {1005, 1017}
+
+
+def test_lsh_without_rare_tokens_finds_nothing():
+    # Everyone wrong the same way: every token is common, nothing to hash.
+    matrix = AnswerMatrix(np.arange(50), np.zeros((50, 20), np.int8), np.ones(20, np.int8))
+    detector = CollusionDetector()
+
+    assert detector.scan(matrix, 'lsh') == []
+    assert detector.last_stats['pairs_scored'] == 0
+
+
+@pytest.mark.parametrize('method', ['exact', 'lsh'])
+def test_cohort_too_small_to_flag(method):
+    matrix = AnswerMatrix(np.arange(3), np.zeros((3, 4), np.int8), np.ones(4, np.int8))
+    assert CollusionDetector().scan(matrix, method) == []
+
+
+def test_group_pairs_joins_connected_sessions():
+    def pair(a, b):
+        return SuspiciousPair(a, b, 6, 8, 2.0, 5.0)
+
+    groups = group_pairs([pair(1, 2), pair(3, 2), pair(7, 8)])
+
+    assert groups == [(1, 2, 3), (7, 8)]
+    assert group_pairs([]) == []
@@ -0,0 +1,70 @@
+import time
+
+from deadlines import DeadlineScheduler
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def scheduler(self, **kwargs):
+        return DeadlineScheduler(
+            on_warn=lambda batch: self.events.extend(('warn', sid) for sid, _ in batch),
+            on_deadline=lambda batch: self.events.extend(('deadline', sid) for sid, _ in batch),
+            on_expire=lambda batch: self.events.extend(('expire', sid) for sid, _ in batch),
+            **kwargs,
+        )
+
+
+def test_events_fire_in_deadline_order():
+    rec = Recorder()
+    sched = rec.scheduler(grace_sec=30, warn_before=(60,))
+    t0 = time.time()
+    sched.add(1, t0 + 200)
+    sched.add(2, t0 + 100)
+
+    for at in (50, 100, 135, 150, 200, 235):
+        sched.run_due(t0 + at)
+
+    assert rec.events == [
+        ('warn', 2), ('deadline', 2), ('expire', 2),
+        ('warn', 1), ('deadline', 1), ('expire', 1),
+    ]
+    assert len(sched) == 0
+
+
+def test_nothing_fires_early():
+    rec = Recorder()
+    sched = rec.scheduler(grace_sec=30, warn_before=(60,))
+    t0 = time.time()
+    sched.add(1, t0 + 100)
+    assert sched.run_due(t0 + 39) == 0
+    assert rec.events == []
+
+
+def test_rescheduled_and_removed_sessions_skip_stale_entries():
+    rec = Recorder()
+    sched = rec.scheduler(grace_sec=10, warn_before=())
+    t0 = time.time()
+    sched.add(1, t0 + 100)
+    sched.add(1, t0 + 300)   # extended
+    sched.add(2, t0 + 100)
+    sched.remove(2)          # submitted
+
+    sched.run_due(t0 + 200)
+    assert rec.events == []
+    sched.run_due(t0 + 310)
+    assert rec.events == [('deadline', 1), ('expire', 1)]
+    assert sched.stats['stale_skipped'] == 4
+
+
+def test_due_entries_are_batched():
+    batches = []
+    sched = DeadlineScheduler(on_warn=lambda b: None, on_deadline=lambda b: None,
+                              on_expire=lambda b: batches.append([sid for sid, _ in b]),
+                              grace_sec=0, warn_before=(), batch_size=2)
+    t0 = time.time()
+    for sid in range(5):
+        sched.add(sid, t0 + 10 + sid)
+    sched.run_due(t0 + 100)
+    assert batches == [[0, 1], [2, 3], [4]]
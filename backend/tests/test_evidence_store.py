@@ -0,0 +1,65 @@
+import json
+import os
+import time
+
+from evidence_store import EvidenceStore
+
+
+def _blob(store, blob_id, age_sec):
+    sub = os.path.join(store.blob_dir, blob_id[:2])
+    os.makedirs(sub, exist_ok=True)
+    path = os.path.join(sub, f"{blob_id}.jpg")
+    with open(path, 'wb') as f:
+        f.write(b'x' * 10)
+    t = time.time() - age_sec
+    os.utime(path, (t, t))
+    return path
+
+
+def _store(tmp_path):
+    store = EvidenceStore(str(tmp_path), sweep_interval_sec=0, blob_grace_sec=60)
+    os.makedirs(store.manifest_dir)
+    return store
+
+
+def test_sweep_keeps_unreferenced_blob_inside_grace_period(tmp_path):
+    store = _store(tmp_path)
+    fresh = _blob(store, 'a' * 64, age_sec=5)      # written, manifest line not yet appended
+    stale = _blob(store, 'b' * 64, age_sec=3600)   # orphaned long ago
+    kept = _blob(store, 'c' * 64, age_sec=3600)
+    with open(store._manifest_path(1), 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'blob': 'c' * 64}) + '\n')
+
+    removed = store.sweep()
+
+    assert removed['blobs'] == 1
+    assert os.path.exists(fresh) and os.path.exists(kept)
+    assert not os.path.exists(stale)
+
+
+def test_sweep_ignores_files_removed_by_another_process(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    path = _blob(store, 'd' * 64, age_sec=3600)
+    real_remove = os.remove
+
+    def remove_twice(p):
+        real_remove(p)
+        if p == path:
+            raise FileNotFoundError(p)  # another worker's sweep got there first
+
+    monkeypatch.setattr(os, 'remove', remove_twice)
+    assert store.sweep()['blobs'] == 0
+
+
+def test_dedup_refreshes_blob_mtime(tmp_path):
+    store = _store(tmp_path)
+    store._normalize = lambda raw: raw
+    store._store(1, None, 'x', 'data:image/jpeg;base64,eA==', time.time())
+    blob_id = store.manifest(1)[0]['blob']
+    path = store.blob_path(blob_id)
+    os.utime(path, (0, 0))
+
+    store._store(2, None, 'x', 'data:image/jpeg;base64,eA==', time.time())
+
+    assert os.path.getmtime(path) > time.time() - 60
+    assert store.stats['deduplicated'] == 1
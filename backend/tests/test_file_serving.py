@@ -0,0 +1,20 @@
+import pytest
+from flask import Flask
+
+from file_serving import FileSender
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / 'report.pdf').write_bytes(b'%PDF')
+    (tmp_path / 'blob.unknownext').write_bytes(b'x')
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('mode', ['x-sendfile', 'x-accel'])
+def test_offloaded_responses_carry_the_file_type(files, mode):
+    sender = FileSender(mode, {files: '/_protected/files/'})
+    with Flask(__name__).test_request_context():
+        assert sender.send(files, 'report.pdf').headers['Content-Type'] == 'application/pdf'
+        assert sender.send(files, 'blob.unknownext').headers['Content-Type'] == 'application/octet-stream'
+        assert sender.send(files, 'report.pdf', mimetype='image/jpeg').headers['Content-Type'] == 'image/jpeg'
@@ -0,0 +1,106 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+import http_encoding
+from http_encoding import FastJSONProvider, ResponseCompressor, stream_json_array
+
+ITEMS = [{'id': i, 'name': f'Student {i}', 'email': f's{i}@test'} for i in range(2000)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.after_request(ResponseCompressor(min_bytes=200))
+
+    @app.route('/big')
+    def big():
+        resp = jsonify(ITEMS[:50])
+        resp.set_etag('v1')
+        return resp
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return stream_json_array(iter(ITEMS), chunk_bytes=4096)
+
+    @app.route('/raw')
+    def raw():
+        resp = jsonify(ITEMS[:50])
+        resp.headers['Cache-Control'] = 'no-transform'
+        return resp
+
+    return app.test_client()
+
+
+def _accept(value):
+    return parse_accept_header(value, Accept)
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('*', 'br'),
+    ('br;q=0.5, gzip;q=0.8', 'gzip'),
+    ('br, gzip', 'br'),               # tie: br preferred
+    ('br;q=0.9, gzip;q=0.4', 'br'),
+    ('', None),
+])
+def test_negotiation_honours_q_values(monkeypatch, header, expected):
+    monkeypatch.setattr(http_encoding, 'brotli', object())   # only codings() looks at it here
+    assert ResponseCompressor().negotiate(_accept(header)) == expected
+
+
+def test_gzip_only_without_brotli(monkeypatch):
+    monkeypatch.setattr(http_encoding, 'brotli', None)
+    assert ResponseCompressor().negotiate(_accept('br, gzip;q=0.1')) == 'gzip'
+
+
+def test_large_json_is_gzipped_with_suffixed_etag(client):
+    resp = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert resp.headers['ETag'] == '"v1-gzip"'
+    assert json.loads(gzip.decompress(resp.data)) == ITEMS[:50]
+
+
+def test_identity_keeps_the_plain_etag(client):
+    resp = client.get('/big')
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.headers['ETag'] == '"v1"'
+    assert resp.get_json() == ITEMS[:50]
+
+
+def test_bodies_below_min_bytes_are_sent_as_is(client):
+    resp = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.get_json() == {'ok': True}
+
+
+def test_no_transform_is_respected(client):
+    resp = client.get('/raw', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+
+
+def test_streamed_body_round_trips_through_gzip(client):
+    resp = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in resp.headers
+    assert json.loads(gzip.decompress(resp.data)) == ITEMS
+
+
+def test_streamed_body_without_coding_is_untouched(client):
+    resp = client.get('/stream', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in resp.headers
+    assert json.loads(resp.data) == ITEMS
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from login_audit import LoginAuditLog, login_series
+from models import db, LoginActivity
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _rollups():
+    return {
+        (g, str(b), r): n
+        for g, b, r, n in db.session.execute(text('SELECT granularity, bucket, role, logins FROM login_rollup'))
+    }
+
+
+def test_flush_writes_entries_and_rolls_them_up(app):
+    log = LoginAuditLog()
+    day = datetime(2026, 5, 4)
+    log.record(1, 'a@test', 'student', at=day.replace(hour=9, minute=5))
+    log.record(2, 'b@test', 'student', at=day.replace(hour=9, minute=59, second=59))
+    log.record(3, 'c@test', None, at=day.replace(hour=10))
+    log.record(1, 'a@test', 'student', at=day + timedelta(days=1, hours=1))
+
+    assert log.flush() == 4
+    assert log.flush() == 0
+
+    assert LoginActivity.query.count() == 4
+    assert _rollups() == {
+        ('hour', '2026-05-04 09:00:00', 'student'): 2,
+        ('hour', '2026-05-04 10:00:00', 'unknown'): 1,
+        ('hour', '2026-05-05 01:00:00', 'student'): 1,
+        ('day', '2026-05-04 00:00:00', 'student'): 2,
+        ('day', '2026-05-04 00:00:00', 'unknown'): 1,
+        ('day', '2026-05-05 00:00:00', 'student'): 1,
+    }
+
+    # Later batches add to existing buckets.
+    log.record(4, 'd@test', 'student', at=day.replace(hour=9, minute=30))
+    log.flush()
+    assert _rollups()[('hour', '2026-05-04 09:00:00', 'student')] == 3
+    assert _rollups()[('day', '2026-05-04 00:00:00', 'student')] == 3
+
+
+def test_series_fills_empty_buckets(app):
+    log = LoginAuditLog()
+    now = datetime.utcnow()
+    log.record(1, 'a@test', 'student', at=now - timedelta(hours=2))
+    log.record(2, 'b@test', 'admin', at=now)
+    log.flush()
+
+    series = login_series('hour', now - timedelta(hours=2))
+
+    assert [s['total'] for s in series] == [1, 0, 1]
+    assert series[-1]['by_role'] == {'admin': 1}
+
+
+def test_failed_flush_puts_the_batch_back(app, monkeypatch):
+    log = LoginAuditLog(max_buffer=4)
+    for i in range(3):
+        log.record(i, f'{i}@test', 'student')
+    real_execute = db.session.execute
+
+    def failing_execute(*args, **kwargs):
+        # Two logins arrive while the write is in flight, then the database refuses it.
+        log.record(10, 'x@test', 'student')
+        log.record(11, 'y@test', 'student')
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'execute', failing_execute)
+    with pytest.raises(OperationalError):
+        log.flush()
+    monkeypatch.setattr(db.session, 'execute', real_execute)
+
+    # Only two of the three fit back in; the oldest is dropped, order is kept.
+    assert [e[0] for e in log._buffer] == [1, 2, 10, 11]
+    assert log.stats['failed_flushes'] == 1 and log.stats['dropped'] == 1
+
+    assert log.flush() == 4
+    assert sorted(a.user_id for a in LoginActivity.query) == [1, 2, 10, 11]
+    assert sum(_rollups().values()) == 8  # hour + day for each entry
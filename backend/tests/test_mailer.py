@@ -0,0 +1,129 @@
+import socket
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from mailer import MailQueue, SMTPConfig  # noqa: E402
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+        self.reject = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos[0], envelope.content.decode('utf-8', 'replace')))
+        return '250 Message accepted for delivery'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    inbox = Inbox()
+    port = _free_port()
+    servers = []
+
+    def start():
+        controller = Controller(inbox, hostname='127.0.0.1', port=port)
+        controller.start()
+        servers.append(controller)
+
+    def stop():
+        servers.pop().stop()
+
+    start()
+    yield inbox, port, start, stop
+    while servers:
+        stop()
+
+
+def _queue(port, **kwargs):
+    config = SMTPConfig(host='127.0.0.1', port=port, user=None, password=None,
+                        from_email='noreply@test', starttls=False, timeout_sec=2.0)
+    return MailQueue(config, batch_wait_sec=0.05, **kwargs)
+
+
+def test_batch_is_sent_over_one_connection(smtp):
+    inbox, port, _, _ = smtp
+    queue = _queue(port)
+    try:
+        for i in range(3):
+            assert queue.enqueue(f's{i}@test', 'Exam reminder', f'Hello {i}')
+        assert queue.flush()
+    finally:
+        queue.stop()
+
+    assert [to for to, _ in inbox.messages] == ['s0@test', 's1@test', 's2@test']
+    assert 'Subject: Exam reminder' in inbox.messages[0][1]
+    metrics = queue.metrics()
+    assert metrics['sent'] == 3 and metrics['failed'] == 0
+    assert metrics['connections_opened'] == 1
+
+
+def test_reconnects_after_server_restart(smtp):
+    inbox, port, start, stop = smtp
+    queue = _queue(port)
+    try:
+        queue.enqueue('a@test', 'One', 'first')
+        assert queue.flush()
+        # The pooled connection is now stale.
+        stop()
+        start()
+        queue.enqueue('b@test', 'Two', 'second')
+        assert queue.flush()
+    finally:
+        queue.stop()
+
+    assert [to for to, _ in inbox.messages] == ['a@test', 'b@test']
+    metrics = queue.metrics()
+    assert metrics['sent'] == 2 and metrics['failed'] == 0
+    assert metrics['connections_opened'] == 2
+
+
+def test_gives_up_after_max_attempts_while_server_is_down(smtp):
+    inbox, port, start, stop = smtp
+    stop()
+    queue = _queue(port, max_attempts=2)
+    try:
+        queue.enqueue('a@test', 'Lost', 'nobody listening')
+        assert queue.flush()
+        assert queue.metrics()['failed'] == 1
+        start()
+        queue.enqueue('b@test', 'Back', 'server is up again')
+        assert queue.flush()
+    finally:
+        queue.stop()
+
+    assert [to for to, _ in inbox.messages] == ['b@test']
+    assert queue.metrics()['sent'] == 1
+
+
+def test_rejected_recipient_is_not_retried(smtp):
+    inbox, port, _, _ = smtp
+    inbox.reject.add('gone@test')
+    queue = _queue(port)
+    try:
+        queue.enqueue('gone@test', 'Hi', 'bounced')
+        queue.enqueue('ok@test', 'Hi', 'delivered')
+        assert queue.flush()
+    finally:
+        queue.stop()
+
+    assert [to for to, _ in inbox.messages] == ['ok@test']
+    metrics = queue.metrics()
+    assert metrics['failed'] == 1 and metrics['sent'] == 1
+    assert metrics['connections_opened'] == 1
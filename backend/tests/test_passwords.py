@@ -0,0 +1,59 @@
+import importlib
+
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+import passwords
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    def set_policy(method):
+        monkeypatch.setattr(passwords, 'PASSWORD_HASH_METHOD', method)
+    return set_policy
+
+
+@pytest.mark.parametrize('stored, expected', [
+    ('pbkdf2:sha256:1000', False),     # same cost
+    ('pbkdf2:sha256:500', True),       # weaker: upgraded
+    ('pbkdf2:sha256:5000', False),     # stronger: never downgraded
+    ('pbkdf2:sha512:1000', True),      # other digest
+    ('scrypt:16384:8:1', True),        # other method
+])
+def test_rehash_only_upgrades(policy, stored, expected):
+    policy('pbkdf2:sha256:1000')
+    assert passwords.needs_rehash(generate_password_hash('pw', method=stored)) is expected
+
+
+def test_scrypt_costs_compare_per_parameter(policy):
+    policy('scrypt:1024:8:1')
+    assert not passwords.needs_rehash(generate_password_hash('pw', method='scrypt:2048:8:1'))
+    assert passwords.needs_rehash(generate_password_hash('pw', method='scrypt:1024:4:1'))
+
+
+def test_verify_returns_upgraded_hash_for_weaker_stored_hash(policy):
+    policy('pbkdf2:sha256:1000')
+    ok, upgraded = passwords.verify_password(generate_password_hash('pw', method='pbkdf2:sha256:500'), 'pw')
+    assert ok and upgraded.startswith('pbkdf2:sha256:1000$')
+    assert passwords.verify_password(upgraded, 'pw') == (True, None)
+    assert passwords.verify_password(upgraded, 'wrong') == (False, None)
+
+
+def test_default_policy_keeps_werkzeug_default_hashes(monkeypatch):
+    # Hashes made with werkzeug's own default must not be rewritten at a lower cost.
+    monkeypatch.delenv('PASSWORD_HASH_METHOD', raising=False)
+    importlib.reload(passwords)
+    assert not passwords.needs_rehash(f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}$salt$hash')
+
+
+def test_otp_digests_and_legacy_hashes(monkeypatch):
+    digest = passwords.hash_otp('secret', 7, '123456')
+    assert passwords.verify_otp('secret', 7, '123456', digest)
+    assert not passwords.verify_otp('secret', 8, '123456', digest)
+    assert not passwords.verify_otp('other', 7, '123456', digest)
+
+    offloaded = []
+    monkeypatch.setattr(passwords, '_offload', lambda fn, *args: offloaded.append(fn) or fn(*args))
+    legacy = generate_password_hash('123456', method='pbkdf2:sha256:1000')
+    assert passwords.verify_otp('secret', 7, '123456', legacy)
+    assert offloaded  # the legacy KDF check leaves the event loop like password checks do
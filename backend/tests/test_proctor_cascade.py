@@ -0,0 +1,72 @@
+import base64
+
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+
+from proctor import MESH_VERDICT_MAX_FRAMES, FaceCheck, ProctorEngine  # noqa: E402
+from proctor_policy import ProctorPolicy  # noqa: E402
+
+
+class StubVerifier:
+    """Face-mesh stand-in returning scripted verdicts (the last one repeats)."""
+
+    def __init__(self, *checks):
+        self.checks = list(checks)
+        self.calls = 0
+
+    def check_face(self, img, policy):
+        check = self.checks[min(self.calls, len(self.checks) - 1)]
+        self.calls += 1
+        return check
+
+
+def _blank_frame() -> str:
+    ok, buf = cv2.imencode('.jpg', np.zeros((240, 320, 3), dtype=np.uint8))
+    assert ok
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode('ascii')
+
+
+def _engine(verifier) -> ProctorEngine:
+    engine = ProctorEngine(verifier_loader=lambda: verifier)
+    engine.prewarm(background=False)
+    if not engine.cv_available:
+        pytest.skip('Haar cascade unavailable')
+    engine._load_verifier()
+    return engine
+
+
+def test_stale_mesh_verdict_does_not_hide_an_empty_seat():
+    # Haar sees no face on a blank frame; the mesh finds one face once, then none.
+    verifier = StubVerifier(FaceCheck(1), FaceCheck(0))
+    engine = _engine(verifier)
+    state = {'policy': ProctorPolicy(motion_threshold=0, mesh_every_n=0)}
+    frame = _blank_frame()
+
+    counts = [engine.frame_signals(frame, state['policy'], state)[0] for _ in range(30)]
+    assert counts[:1 + MESH_VERDICT_MAX_FRAMES] == [1] * (1 + MESH_VERDICT_MAX_FRAMES)
+    assert counts[1 + MESH_VERDICT_MAX_FRAMES:] == [0] * (29 - MESH_VERDICT_MAX_FRAMES)
+    # The mesh is asked again once per expired verdict, not on every frame.
+    assert verifier.calls < len(counts) // 2
+
+
+def test_empty_seat_raises_a_violation():
+    verifier = StubVerifier(FaceCheck(1), FaceCheck(0))
+    engine = _engine(verifier)
+    state = {'policy': ProctorPolicy(motion_threshold=0, mesh_every_n=0, signal_cooldown_sec=0)}
+    frame = _blank_frame()
+
+    results = [engine.analyze_frame(state, frame) for _ in range(30)]
+    assert any(r.violation and r.message == 'No Face Detected' for r in results)
+
+
+def test_confirmed_verdict_is_carried_between_checks():
+    verifier = StubVerifier(FaceCheck(1))
+    engine = _engine(verifier)
+    state = {'policy': ProctorPolicy(motion_threshold=0, mesh_every_n=0)}
+    frame = _blank_frame()
+
+    counts = [engine.frame_signals(frame, state['policy'], state)[0] for _ in range(12)]
+    assert counts == [1] * 12
+    assert verifier.calls == 3  # one check per MESH_VERDICT_MAX_FRAMES + 1 frames
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from proctor_policy import DEFAULT_POLICY, ProctorPolicy, compile_policy
+
+
+def test_stored_policy_overrides_defaults():
+    policy = compile_policy(json.dumps({'max_warnings': 3, 'detect_voice': False, 'frame_interval_ms': 5000}))
+    assert (policy.max_warnings, policy.detect_voice, policy.frame_interval_ms) == (3, False, 5000)
+    assert policy.window == DEFAULT_POLICY.window
+    assert policy.client_settings() == {'frame_interval_ms': 5000, 'max_warnings': 3}
+
+
+@pytest.mark.parametrize('raw', [
+    None,
+    '',
+    '{not json',
+    '[1, 2]',
+    '{"max_warnings": 0}',
+    '{"frame_interval_ms": 10}',
+    '{"detect_faces": "yes"}',
+    '{"center_x_min": 0.9, "center_x_max": 0.1}',
+    '{"haar_scale_factor": 1}',
+])
+def test_invalid_stored_policy_falls_back_to_default(raw):
+    assert compile_policy(raw) is DEFAULT_POLICY
+
+
+def test_round_trip_through_json():
+    policy = ProctorPolicy(max_warnings=4, mesh_every_n=0, center_margin=0.1)
+    assert compile_policy(json.dumps(policy.to_dict())) == policy
+
+
+def test_compiled_fields_follow_the_policy():
+    policy = ProctorPolicy(haar_min_face_px=60, multi_face_hits=5, tab_weight=0.75)
+    assert policy.haar_min_size == (60, 60)
+    assert policy.hits(1) == 5
+    assert policy.weights()[-1] == 0.75
@@ -0,0 +1,49 @@
+import pytest
+from flask import Flask
+
+from models import db, Notification, User
+from publication import drain_notifications
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _queue(n):
+    users = [User(name=f'S{i}', email=f's{i}@test', password='-', role='student') for i in range(n)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([Notification(user_id=u.id, kind='results', title=f'T{i}', body='b') for i, u in enumerate(users)])
+    db.session.commit()
+
+
+def test_refused_batch_is_released_for_the_next_drain(app):
+    _queue(5)
+    sent = []
+
+    def full_after_two(email, subject, body):
+        if len(sent) == 2:
+            return False
+        sent.append(subject)
+        return True
+
+    assert drain_notifications(full_after_two) == 2
+    assert sent == ['T0', 'T1']
+    assert Notification.query.filter(Notification.sent_at.is_(None)).count() == 3
+
+    sent.clear()
+    assert drain_notifications(lambda e, s, b: sent.append(s) or True) == 3
+    assert sent == ['T2', 'T3', 'T4']
+    assert drain_notifications(lambda e, s, b: pytest.fail('sent twice')) == 0
+
+
+def test_drain_respects_the_batch_limit(app):
+    _queue(3)
+    assert drain_notifications(lambda e, s, b: True, limit=2) == 2
+    assert drain_notifications(lambda e, s, b: True, limit=2) == 1
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from models import (db, CollusionPair, DashboardSummary, Exam, ExamQuestion, ExamResponse, ExamSession,
+                    LoginActivity, Notification, PasswordOTP, User, Warning)
+from purge import cascade_plan, count_rows, run_plan, run_plan_batched
+
+TABLES = ('user', 'password_otp', 'login_activity', 'dashboard_summary', 'notification', 'exam', 'exam_question',
+          'exam_session', 'exam_response', 'warning', 'collusion_pair')
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _user(name):
+    user = User(name=name, email=f'{name}@test', password='-', role='student')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all([
+        PasswordOTP(user_id=user.id, otp_hash='h', expires_at=datetime.utcnow() + timedelta(minutes=5)),
+        LoginActivity(user_id=user.id, email=user.email, role='student'),
+        DashboardSummary(user_id=user.id, exams_completed=2),
+        Notification(user_id=user.id, kind='result', title='Result'),
+    ])
+    return user
+
+
+def _exam(name):
+    exam = Exam(name=name, is_active=True)
+    db.session.add(exam)
+    db.session.flush()
+    questions = [ExamQuestion(exam_id=exam.id, question_text='Q', option_a='a', option_b='b', option_c='c',
+                              option_d='d', correct_option=0, marks=1, order_index=i) for i in range(3)]
+    db.session.add_all(questions)
+    db.session.flush()
+    return exam, questions
+
+
+def _attempt(user, exam, questions):
+    s = ExamSession(user_id=user.id, exam_id=exam.id, status='Completed')
+    db.session.add(s)
+    db.session.flush()
+    db.session.add_all([ExamResponse(session_id=s.id, question_id=q.id, selected_option=1, is_correct=False)
+                        for q in questions])
+    db.session.add(Warning(session_id=s.id, violation_type='tab_switch'))
+    return s
+
+
+def _snapshot():
+    return {t: {r[0] for r in db.session.execute(text(f'SELECT rowid FROM "{t}"'))} for t in TABLES}
+
+
+@pytest.fixture
+def data(app):
+    target, other = _user('target'), _user('other')
+    exam, questions = _exam('doomed')
+    keep_exam, keep_questions = _exam('kept')
+    sessions = {
+        (who, which): _attempt(user, e, qs)
+        for who, user in (('target', target), ('other', other))
+        for which, e, qs in (('doomed', exam, questions), ('kept', keep_exam, keep_questions))
+    }
+    for which, e in (('doomed', exam), ('kept', keep_exam)):
+        db.session.add(CollusionPair(exam_id=e.id, session_a=sessions['target', which].id,
+                                     session_b=sessions['other', which].id,
+                                     shared_wrong=3, both_wrong=3, expected=1.0, z_score=4.5))
+    db.session.commit()
+    return {'user': target, 'other': other, 'exam': exam, 'keep_exam': keep_exam, 'sessions': sessions}
+
+
+def _purge(table, target_id, batched):
+    plan = cascade_plan(table)
+    expected = count_rows(plan, target_id)
+    if batched:
+        touched = run_plan_batched(plan, target_id, batch=2)
+    else:
+        touched = run_plan(plan, target_id)
+        db.session.commit()
+    return expected, touched
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_user_purge_removes_exactly_the_users_rows(data, batched):
+    user_id = data['user'].id
+    target_sessions = {s.id for (who, _), s in data['sessions'].items() if who == 'target'}
+    before = _snapshot()
+    gone = {
+        'user': {user_id},
+        'password_otp': {o.id for o in PasswordOTP.query.filter_by(user_id=user_id)},
+        'login_activity': {a.id for a in LoginActivity.query.filter_by(user_id=user_id)},
+        'dashboard_summary': {user_id},
+        'notification': {n.id for n in Notification.query.filter_by(user_id=user_id)},
+        'exam_session': target_sessions,
+        'exam_response': {r.id for r in ExamResponse.query.filter(ExamResponse.session_id.in_(target_sessions))},
+        'warning': {w.id for w in Warning.query.filter(Warning.session_id.in_(target_sessions))},
+        'collusion_pair': {p.id for p in CollusionPair.query},  # every pair involves the target
+    }
+
+    expected, touched = _purge('user', user_id, batched)
+
+    after = _snapshot()
+    for table in TABLES:
+        assert after[table] == before[table] - gone.get(table, set()), table
+    assert touched == expected == sum(len(v) for v in gone.values())
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_exam_purge_keeps_session_history(data, batched):
+    exam_id = data['exam'].id
+    doomed_sessions = {s.id for (_, which), s in data['sessions'].items() if which == 'doomed'}
+    doomed_questions = {q.id for q in ExamQuestion.query.filter_by(exam_id=exam_id)}
+    before = _snapshot()
+    gone = {
+        'exam': {exam_id},
+        'exam_question': doomed_questions,
+        'exam_response': {r.id for r in ExamResponse.query.filter(ExamResponse.question_id.in_(doomed_questions))},
+        'collusion_pair': {p.id for p in CollusionPair.query.filter_by(exam_id=exam_id)},
+    }
+
+    _purge('exam', exam_id, batched)
+
+    after = _snapshot()
+    for table in TABLES:
+        assert after[table] == before[table] - gone.get(table, set()), table
+    db.session.expire_all()
+    for s in ExamSession.query:
+        assert s.exam_id == (None if s.id in doomed_sessions else data['keep_exam'].id)
+
+
+def test_plan_deletes_children_before_parents(app):
+    order = [step.table for step in cascade_plan('user')]
+    assert order[-1] == 'user'
+    for child, parent in (('exam_response', 'exam_session'), ('warning', 'exam_session'),
+                          ('collusion_pair', 'exam_session')):
+        assert order.index(child) < order.index(parent)
+    exam_plan = {step.table: step.set_null for step in cascade_plan('exam')}
+    assert exam_plan['exam_session'] == 'exam_id'
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+from randomization import NUM_OPTIONS, ExamPayload, QuestionRandomizer, RandomizationPolicy
+
+
+def _rows(n=10, pool=None, marks=1):
+    return [
+        SimpleNamespace(id=100 + i, question_text=f'Q{i}', option_a='a', option_b='b', option_c='c', option_d='d',
+                        correct_option=i % NUM_OPTIONS, marks=marks, pool=pool)
+        for i in range(n)
+    ]
+
+
+def _payload(rows, **policy):
+    return ExamPayload(7, rows, RandomizationPolicy(**policy))
+
+
+def test_plan_is_deterministic_per_session():
+    payload = _payload(_rows(20), shuffle_questions=True, shuffle_options=True)
+    a, b = QuestionRandomizer('secret'), QuestionRandomizer('secret')
+
+    first, again = a.plan(payload, 1), b.plan(payload, 1)
+    other = a.plan(payload, 2)
+
+    assert first.order.tolist() == again.order.tolist()
+    assert first.option_perm.tolist() == again.option_perm.tolist()
+    assert first.order.tolist() != other.order.tolist()
+    assert sorted(first.order.tolist()) == list(range(20))
+    assert QuestionRandomizer('other').plan(payload, 1).order.tolist() != first.order.tolist()
+
+
+def test_preview_and_inactive_policy_use_canonical_order():
+    randomizer = QuestionRandomizer('secret')
+    assert randomizer.plan(_payload(_rows(5), shuffle_questions=True), None).order.tolist() == [0, 1, 2, 3, 4]
+    assert randomizer.plan(_payload(_rows(5)), 3).option_perm.tolist() == [[0, 1, 2, 3]] * 5
+
+
+def test_displayed_answers_grade_against_the_stored_option():
+    rows = _rows(12)
+    payload = _payload(rows, shuffle_questions=True, shuffle_options=True)
+    randomizer = QuestionRandomizer('secret')
+    plan = randomizer.plan(payload, 42)
+    shown = randomizer.render(payload, plan)
+    by_id = {q.id: q for q in rows}
+
+    # A candidate picks, in every displayed question, the slot showing the correct text.
+    answers = {}
+    for q in shown:
+        row = by_id[q['id']]
+        correct_text = (row.option_a, row.option_b, row.option_c, row.option_d)[row.correct_option]
+        answers[str(q['id'])] = q['options'].index(correct_text)
+
+    graded = list(randomizer.grade(payload, plan, answers))
+
+    assert len(graded) == 12
+    assert all(is_correct and selected == by_id[qid].correct_option for qid, selected, is_correct, _, _ in graded)
+
+
+def test_wrong_and_invalid_answers_score_nothing():
+    payload = _payload(_rows(3), shuffle_options=True)
+    randomizer = QuestionRandomizer('secret')
+    plan = randomizer.plan(payload, 5)
+    wrong = list(plan.option_perm[0]).index((0 + 1) % NUM_OPTIONS)
+
+    graded = {qid: (selected, ok, awarded) for qid, selected, ok, awarded, _ in
+              randomizer.grade(payload, plan, {'100': wrong, '101': 'x', '102': 9})}
+
+    assert graded[100] == ((0 + 1) % NUM_OPTIONS, False, 0)
+    assert graded[101] == (None, False, 0)
+    assert graded[102] == (None, False, 0)
+
+
+def test_pool_draw_selects_count_from_each_pool():
+    rows = _rows(4) + _rows(10, pool='hard', marks=2)
+    for i, r in enumerate(rows):
+        r.id = 200 + i
+    payload = _payload(rows, pool_draw=(('hard', 3),))
+    randomizer = QuestionRandomizer('secret')
+
+    plans = [randomizer.plan(payload, sid) for sid in range(1, 30)]
+
+    for plan in plans:
+        order = plan.order.tolist()
+        assert order[:4] == [0, 1, 2, 3]           # questions outside pools are always included
+        assert len(order) == 7 and order == sorted(order)
+        assert randomizer.totals(payload, plan) == (7, 4 + 3 * 2)
+    assert len({tuple(p.order.tolist()) for p in plans}) > 1
+    assert payload.drawn_totals() == (7, 10)
+
+
+def test_pool_smaller_than_draw_is_taken_whole():
+    payload = _payload(_rows(2, pool='p'), pool_draw=(('p', 5),))
+    plan = QuestionRandomizer('secret').plan(payload, 1)
+    assert sorted(plan.order.tolist()) == [0, 1]
+    assert payload.drawn_totals() == (2, 2)
+
+
+def test_parse_pool_draw():
+    assert RandomizationPolicy.parse_pool_draw(None) == ()
+    assert RandomizationPolicy.parse_pool_draw('{"b": 2, "a": "1"}') == (('a', 1), ('b', 2))
+    assert RandomizationPolicy.parse_pool_draw({'x': 3}) == (('x', 3),)
+
+
+@pytest.mark.parametrize('raw', ['[1, 2]', {'p': 0}, {'p': -1}, {'p': 'many'}, {'p': None}, '{not json'])
+def test_parse_pool_draw_rejects_bad_input(raw):
+    with pytest.raises(ValueError):
+        RandomizationPolicy.parse_pool_draw(raw)
+
+
+def test_invalid_pool_draw_on_exam_is_ignored():
+    exam = SimpleNamespace(shuffle_questions=True, shuffle_options=False, pool_draw='{"p": 0}')
+    assert RandomizationPolicy.for_exam(exam) == RandomizationPolicy(shuffle_questions=True)
@@ -0,0 +1,135 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from models import db, Warning
+from retention import RecordingRule, RetentionSweeper, RowRule, UploadRule, retention_report
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _warnings(*ages_days):
+    db.session.add_all([Warning(session_id=1, violation_type='v', timestamp=NOW - timedelta(days=d)) for d in ages_days])
+    db.session.commit()
+
+
+def _warning_rule():
+    return RowRule('warnings', 'warning', 'timestamp < :cutoff', 'DELETE FROM warning WHERE id IN ({ids})', 30)
+
+
+def _ids():
+    return [w.id for w in Warning.query.order_by(Warning.id)]
+
+
+def test_row_rule_pass_stops_at_first_live_row_and_resumes_there(app):
+    _warnings(40, 40, 10, 35)   # ids 1-4; id 3 is the frontier
+    rule = _warning_rule()
+
+    first = rule.step('', 100, NOW)
+    db.session.commit()
+
+    assert first.done and first.cursor == '2'
+    assert first.rows == 3
+    assert _ids() == [3]
+
+    # Next pass, once row 3 has expired as well, starts at the frontier.
+    second = rule.step(first.cursor, 100, NOW + timedelta(days=25))
+    assert second.rows == 1 and second.done
+    assert _ids() == []
+
+
+def test_row_rule_pages_through_a_backlog(app):
+    _warnings(40, 40, 40, 40, 40)
+    rule = _warning_rule()
+
+    step = rule.step('', 2, NOW)
+    assert (step.cursor, step.done, step.rows) == ('2', False, 2)
+    step = rule.step(step.cursor, 2, NOW)
+    assert (step.cursor, step.done, step.rows) == ('4', False, 2)
+    step = rule.step(step.cursor, 2, NOW)
+    assert step.done and step.rows == 1
+
+
+def _file(path, age_sec, size=10):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    t = time.time() - age_sec
+    os.utime(path, (t, t))
+    return path
+
+
+def test_upload_rule_spares_referenced_and_recent_files(tmp_path):
+    uploads, thumbs = tmp_path / 'uploads', tmp_path / 'thumbs'
+    old = 3 * 86400
+    referenced = _file(str(uploads / 'face_kept.jpg'), old)
+    orphan = _file(str(uploads / 'face_orphan.jpg'), old)
+    orphan_thumb = _file(str(thumbs / 'face_orphan_96.jpg'), old)
+    recent = _file(str(uploads / 'idproof_new.png'), 60)
+    unrelated = _file(str(uploads / 'notes.txt'), old)
+    rule = UploadRule('upload_orphans', str(uploads), ('face_', 'idproof_'), lambda: {'face_kept.jpg'},
+                      grace_days=1, thumb_dir=str(thumbs), thumb_size=96)
+
+    result = rule.step('', 100, NOW)
+
+    assert result.done and result.cursor == ''
+    assert (result.files, result.bytes) == (2, 20)
+    assert not os.path.exists(orphan) and not os.path.exists(orphan_thumb)
+    assert all(os.path.exists(p) for p in (referenced, recent, unrelated))
+
+
+def test_recording_rule_skips_recently_written_sessions(tmp_path):
+    root = tmp_path / 'recordings'
+    _file(str(root / '3' / '10' / 'frames.bin'), 2 * 3600)
+    _file(str(root / '3' / '11' / 'frames.bin'), 60)        # recorder may still be open
+    _file(str(root / '3' / '12' / 'frames.bin'), 2 * 3600)  # session not expired
+    asked, removed = [], []
+
+    def expired(ids, cutoff):
+        asked.extend(ids)
+        return {10, 11}
+
+    rule = RecordingRule('recordings', str(root), 30, expired, on_removed=removed.append)
+    result = rule.step('', 100, NOW)
+
+    assert sorted(asked) == [10, 11, 12]
+    assert (result.files, result.bytes) == (1, 10)
+    assert sorted(os.listdir(root / '3')) == ['11', '12']
+    assert removed == [3]
+
+
+def test_sweeper_persists_the_cursor_between_steps(app):
+    _warnings(40, 40, 40, 40, 40)
+
+    first = RetentionSweeper([_warning_rule()], batch=2)
+    first.step(first.rules[0], 2)
+    # A fresh sweeper (another worker, or after a restart) carries on from the checkpoint.
+    second = RetentionSweeper([_warning_rule()], batch=2)
+    assert second._cursor(second.rules[0]) == '2'
+    second.step(second.rules[0], 2)
+
+    assert _ids() == [5]
+    report = {r['rule']: r for r in retention_report()}['warnings']
+    assert report['cursor'] == '4' and report['rows_deleted'] == 4 and report['passes'] == 0
+
+    total = second.run_pass(second.rules[0])
+    assert total.done and total.rows == 1
+    assert {r['rule']: r for r in retention_report()}['warnings']['passes'] == 1
+
+
+def test_disabled_rules_are_not_run():
+    rule = RowRule('off', 'warning', '1', 'DELETE FROM warning WHERE id IN ({ids})', 0)
+    assert RetentionSweeper([rule]).rules == []
@@ -0,0 +1,91 @@
+import pytest
+
+from risk_scoring import RiskScorer, ScoringPolicy
+
+POLICY = ScoringPolicy(window=5, no_face_hits=2, signal_cooldown_sec=10.0, event_cooldown_sec=2.5)
+
+
+def _feed(scorer, state, frames, start=0.0, step=1.0, **kw):
+    """Observe `frames` face counts one `step` apart; returns the decisions."""
+    return [scorer.update(state, face_count=n, now=start + i * step, **kw) for i, n in enumerate(frames)]
+
+
+def test_signal_needs_its_hit_count_within_the_window():
+    scorer, state = RiskScorer(POLICY), {}
+    first, second = _feed(scorer, state, [0, 0])
+    assert not first.violation
+    assert second.violation and second.message == 'No Face Detected'
+
+
+def test_window_decays_old_observations():
+    scorer, state = RiskScorer(POLICY), {}
+    _feed(scorer, state, [0, 1, 1, 1, 1, 1])   # the miss has left the 5-frame window
+    assert state['risk_score'] == 0.0
+    # A single miss is not enough once the earlier one has decayed.
+    assert not scorer.update(state, face_count=0, now=100.0).violation
+    assert state['risk_score'] == pytest.approx(1.0 / 5)
+
+
+def test_cooldown_limits_repeated_violations():
+    scorer, state = RiskScorer(POLICY), {}
+    decisions = _feed(scorer, state, [0] * 12)
+    assert [i for i, d in enumerate(decisions) if d.violation] == [1, 11]
+
+
+def test_most_severe_signal_wins():
+    scorer, state = RiskScorer(POLICY), {}
+    scorer.update(state, face_count=3, voice=True, now=0.0)
+    decision = scorer.update(state, face_count=3, voice=True, now=1.0)
+    assert decision.message == 'Multiple Faces Detected'
+    # Voice is still over its threshold and reported next, on its own cooldown.
+    assert scorer.update(state, face_count=3, voice=True, now=2.0).message == 'Background Noise / Talking detected'
+
+
+def test_unanalysed_frame_records_no_face_signal():
+    scorer, state = RiskScorer(POLICY), {}
+    _feed(scorer, state, [None, None, None])
+    assert state['risk_score'] == 0.0
+
+
+def test_client_events_fire_at_once_with_their_own_cooldown():
+    scorer, state = RiskScorer(POLICY), {}
+    assert scorer.update(state, event='Tab switched', now=0.0).message == 'Tab switched'
+    assert not scorer.update(state, event='Tab switched', now=1.0).violation
+    assert scorer.update(state, event='Restricted key', now=3.0).violation
+
+
+def test_risk_is_weighted_and_capped():
+    scorer, state = RiskScorer(ScoringPolicy(window=4, look_away_hits=99)), {}
+    _feed(scorer, state, [1, 1], off_center=True)
+    assert state['risk_score'] == pytest.approx(0.5)      # look_away weight 0.5 on every frame
+    _feed(scorer, state, [2, 2, 2, 2], start=10.0)
+    assert state['risk_score'] == 1.0
+
+
+def test_session_policy_overrides_default_and_resizes_window():
+    scorer = RiskScorer(POLICY)
+    state = {'policy': ScoringPolicy(window=3, no_face_hits=3)}
+    assert not any(d.violation for d in _feed(scorer, state, [0, 0]))
+    assert scorer.update(state, face_count=0, now=5.0).violation
+    assert state['risk_window'].size == 3
+
+
+def test_from_dict_accepts_partial_policies():
+    policy = ScoringPolicy.from_dict({'window': '20', 'voice_weight': 0.25, 'unknown': 1, 'max_warnings': None})
+    assert (policy.window, policy.voice_weight, policy.max_warnings) == (20, 0.25, ScoringPolicy().max_warnings)
+    assert ScoringPolicy.from_dict(None) == ScoringPolicy()
+    assert ScoringPolicy.from_json('{"max_warnings": 3}').max_warnings == 3
+
+
+@pytest.mark.parametrize('data', [
+    ['window', 5],
+    {'window': 0},
+    {'window': 256},
+    {'max_warnings': 0},
+    {'no_face_hits': -1},
+    {'signal_cooldown_sec': 'soon'},
+    {'tab_weight': [1]},
+])
+def test_from_dict_rejects_invalid_policies(data):
+    with pytest.raises(ValueError):
+        ScoringPolicy.from_dict(data)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask_socketio')
+
+import app as app_module  # noqa: E402
+from models import db, Exam, ExamSession, User  # noqa: E402
+
+
+@pytest.fixture
+def ctx(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(app_module.socketio, 'emit', lambda event, data=None, to=None, **kw: emitted.append((event, to)))
+    with app_module.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(name='S', email='s@test', password='-', role='student')
+        db.session.add(user)
+        db.session.commit()
+        yield user, emitted
+        db.session.remove()
+
+
+def _exam(duration, total=10, pass_pct=50):
+    exam = Exam(name=f'E{duration}', is_active=True, duration_minutes=duration, total_marks=total,
+                pass_percentage=pass_pct)
+    db.session.add(exam)
+    db.session.flush()
+    return exam
+
+
+def _session(user, exam, started_min_ago, **kw):
+    start = datetime.utcnow() - timedelta(minutes=started_min_ago) if started_min_ago is not None else None
+    s = ExamSession(user_id=user.id, exam_id=exam.id, status='Active', start_time=start, **kw)
+    db.session.add(s)
+    db.session.flush()
+    return s.id
+
+
+def _state(sid):
+    s = db.session.get(ExamSession, sid)
+    db.session.refresh(s)
+    return s.status, s.obtained_marks, s.total_marks, s.result_status
+
+
+def test_concurrently_submitted_session_is_not_overwritten(ctx):
+    user, emitted = ctx
+    exam = _exam(10)
+    expired, submitted = _session(user, exam, 20), _session(user, exam, 20)
+    db.session.commit()
+    # Submitted on another worker after the scheduler picked the batch.
+    ExamSession.query.filter_by(id=submitted).update({'status': 'Completed', 'obtained_marks': 7, 'total_marks': 10,
+                                                      'result_status': 'Passed', 'submitted_at': datetime.utcnow()})
+    db.session.commit()
+
+    closed = app_module._close_expired_sessions(f'id IN ({expired}, {submitted})', {})
+
+    assert closed == [expired]
+    assert _state(expired) == ('Completed', 0, 10, 'Failed')
+    assert _state(submitted) == ('Completed', 7, 10, 'Passed')
+    assert [to for event, to in emitted if event == 'exam_expired'] == [app_module._session_room(expired)]
+
+
+def test_second_close_is_a_no_op(ctx):
+    user, emitted = ctx
+    sid = _session(user, _exam(10), 20)
+    db.session.commit()
+
+    assert app_module._close_expired_sessions(f'id IN ({sid})', {}) == [sid]
+    assert app_module._close_expired_sessions(f'id IN ({sid})', {}) == []
+    assert len([e for e in emitted if e[0] == 'exam_expired']) == 1
+
+
+def test_overdue_backstop_falls_back_to_default_duration(ctx):
+    user, _ = ctx
+    timed = _session(user, _exam(10), 20)             # 10 min exam, 20 min in: overdue
+    zero = _session(user, _exam(0), 20)               # no duration: default 30 min applies
+    unset = _session(user, _exam(None), 20)
+    zero_late = _session(user, _exam(0), 40)          # past the default too
+    never_started = _session(user, _exam(10), None)
+    db.session.commit()
+
+    closed = app_module._close_expired_sessions(
+        app_module._OVERDUE_SESSIONS_WHERE, {'default_minutes': 30, 'overdue_sec': 60},
+    )
+
+    assert sorted(closed) == sorted([timed, zero_late])
+    for sid in (zero, unset, never_started):
+        assert _state(sid)[0] == 'Active'
+
+
+def test_overdue_backstop_waits_for_the_grace_margin(ctx):
+    user, _ = ctx
+    sid = _session(user, _exam(10), 10.5)             # deadline passed 30 s ago
+    db.session.commit()
+    where = app_module._OVERDUE_SESSIONS_WHERE
+
+    assert app_module._close_expired_sessions(where, {'default_minutes': 30, 'overdue_sec': 60}) == []
+    assert app_module._close_expired_sessions(where, {'default_minutes': 30, 'overdue_sec': 10}) == [sid]
@@ -0,0 +1,40 @@
+import base64
+
+from session_recorder import INDEX_RECORD, SessionRecorder
+
+FRAME = 'data:image/jpeg;base64,' + base64.b64encode(b'\xff' * 1000).decode('ascii')
+FRAME_BYTES = 1000 + INDEX_RECORD.size
+
+
+def _record(recorder, session_id, frames, budget):
+    for _ in range(frames):
+        recorder.append(7, session_id, FRAME, budget)
+    assert recorder.flush()
+
+
+def test_budget_counts_frames_written_by_other_processes(tmp_path):
+    # Two workers recording the same exam share the directory, not memory.
+    a = SessionRecorder(str(tmp_path), usage_ttl_sec=0)
+    b = SessionRecorder(str(tmp_path), usage_ttl_sec=0)
+    budget = 10 * FRAME_BYTES
+
+    _record(a, 1, 8, budget)
+    _record(b, 2, 8, budget)
+
+    assert a.stats['frames'] == 8
+    assert b.stats['frames'] == 2
+    assert b.stats['over_budget'] == 6
+    assert b.usage_bytes(7) == budget
+
+
+def test_usage_is_cached_within_the_ttl(tmp_path):
+    a = SessionRecorder(str(tmp_path), usage_ttl_sec=3600)
+    b = SessionRecorder(str(tmp_path), usage_ttl_sec=3600)
+    assert b.usage_bytes(7) == 0
+
+    _record(a, 1, 3, 100 * FRAME_BYTES)
+
+    assert a.usage_bytes(7) == 3 * FRAME_BYTES
+    assert b.usage_bytes(7) == 0
+    b.forget_usage(7)
+    assert b.usage_bytes(7) == 3 * FRAME_BYTES
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from check_startup import DEFAULT_BUDGET_MS, LAZY_MODULES, app_entry, profile_import
+
+
+@pytest.fixture(scope='module')
+def profile():
+    return profile_import()
+
+
+def test_heavy_modules_stay_lazy(profile):
+    _, loaded = profile
+    assert loaded == [], f"imported at load time: {loaded} (keep {LAZY_MODULES} lazy)"
+
+
+def test_import_time_within_budget(profile):
+    timings, _ = profile
+    idx = app_entry(timings)
+    assert idx is not None
+    budget_ms = float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+    assert timings[idx][0] / 1000.0 <= budget_ms
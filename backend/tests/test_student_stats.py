@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from models import db, DashboardSummary, Exam, ExamSession, User
+from student_stats import RECENT_RESULTS, invalidate_student_stats, rebuild_student_stats, record_submission, student_stats
+
+T0 = datetime(2026, 3, 1, 9, 0, 0, 250000)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def student(app):
+    user = User(name='S', email='s@test', password='-', role='student')
+    exams = [Exam(name=f'Exam {i}', is_active=True) for i in range(3)]
+    db.session.add_all([user] + exams)
+    db.session.commit()
+    return user, exams
+
+
+def _complete(user, exam, at, pct, record=True):
+    status = 'Passed' if pct >= 50 else 'Failed'
+    s = ExamSession(user_id=user.id, exam_id=exam.id, status='Completed', submitted_at=at, percentage=pct,
+                    result_status=status)
+    db.session.add(s)
+    db.session.flush()
+    if record:
+        record_submission(user.id, s.id, exam.name, at, pct, status)
+    db.session.commit()
+    return s
+
+
+def _stored(user_id):
+    db.session.expire_all()
+    stats = student_stats(user_id)
+    return stats.exams_completed, round(stats.avg_score, 6), stats.recent_results
+
+
+def test_incremental_record_matches_a_rebuild(student):
+    user, exams = student
+    assert student_stats(user.id).exams_completed == 0  # builds the (empty) record
+
+    scores = [55.0, 80.5, 12.0, 100.0, 47.25, 66.0, 90.0, 33.0, 71.0, 58.0, 49.5, 88.0]
+    for i, pct in enumerate(scores):
+        _complete(user, exams[i % len(exams)], T0 + timedelta(hours=i), pct)
+    incremental = _stored(user.id)
+
+    rebuild_student_stats([user.id])
+    db.session.commit()
+    rebuilt = _stored(user.id)
+
+    assert incremental == rebuilt
+    count, avg, recent = rebuilt
+    assert count == len(scores)
+    assert avg == round(sum(scores) / len(scores), 6)
+    assert len(recent) == RECENT_RESULTS
+    assert [r['percentage'] for r in recent] == scores[::-1][:RECENT_RESULTS]
+    assert recent[0]['date'] == T0 + timedelta(hours=len(scores) - 1)
+    assert recent[0]['exam_name'] == exams[(len(scores) - 1) % len(exams)].name
+
+
+def test_submission_without_a_record_is_left_to_the_lazy_build(student):
+    user, exams = student
+    _complete(user, exams[0], T0, 75.0)
+
+    assert db.session.get(DashboardSummary, user.id) is None
+    assert _stored(user.id)[:2] == (1, 75.0)
+
+
+def test_invalidated_record_is_rebuilt_on_next_read(student):
+    user, exams = student
+    student_stats(user.id)
+    _complete(user, exams[0], T0, 90.0)
+    # Closed at the deadline by the expiry SQL, which bypasses record_submission.
+    _complete(user, exams[1], T0 + timedelta(hours=1), 0.0, record=False)
+    assert _stored(user.id)[:2] == (1, 90.0)
+
+    invalidate_student_stats([user.id])
+    db.session.commit()
+
+    assert db.session.get(DashboardSummary, user.id) is None
+    count, avg, recent = _stored(user.id)
+    assert (count, avg) == (2, 45.0)
+    assert [r['percentage'] for r in recent] == [0.0, 90.0]
+    assert db.session.get(DashboardSummary, user.id) is not None
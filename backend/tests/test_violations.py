@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+pytest.importorskip('flask_socketio')
+
+import app as app_module  # noqa: E402
+from models import db, Exam, ExamSession, User, Warning  # noqa: E402
+
+
+@pytest.fixture
+def exam_session(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(app_module, 'emit', lambda event, data=None, **kw: emitted.append((event, data)))
+    with app_module.app.test_request_context():
+        db.drop_all()
+        db.create_all()
+        user = User(name='S', email='s@test', password='-', role='student')
+        exam = Exam(name='E', is_active=True, proctor_policy=json.dumps({'max_warnings': 3}))
+        db.session.add_all([user, exam])
+        db.session.flush()
+        s = ExamSession(user_id=user.id, exam_id=exam.id, status='Active', warnings_count=0)
+        db.session.add(s)
+        db.session.commit()
+        yield s.id, emitted
+        app_module._end_proctor_session(s.id)
+        db.session.remove()
+
+
+def test_session_is_terminated_at_the_policy_warning_limit(exam_session):
+    sid, emitted = exam_session
+
+    for _ in range(2):
+        app_module.handle_violation(sid, 'No Face Detected', risk=0.4)
+    s = db.session.get(ExamSession, sid)
+    assert s.status == 'Active' and s.warnings_count == 2
+    assert [e for e, _ in emitted] == ['warning_alert', 'warning_alert']
+    assert emitted[-1][1] == {'message': 'No Face Detected', 'count': 2, 'max': 3, 'risk': 0.4}
+
+    app_module.handle_violation(sid, 'Multiple Faces Detected')
+    db.session.refresh(s)
+    assert s.status == 'Terminated (Cheating)' and s.cheating_status and s.end_time is not None
+    assert emitted[-1][0] == 'exam_terminated'
+
+    # Nothing more is recorded for a terminated session.
+    app_module.handle_violation(sid, 'No Face Detected')
+    assert Warning.query.filter_by(session_id=sid).count() == 3
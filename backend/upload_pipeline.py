@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Dict, Optional
+
+# Face descriptor: the detected face, grayscale, resized to EMBED_SIZE², zero-mean
+# and L2-normalized, stored as float16. Cosine similarity between two of them is
+# a cheap same-person check against live proctoring frames.
+EMBED_SIZE = 32
+
+PDF_MAGIC = b'%PDF-'
+
+
+class UploadNormalizer:
+    """Background normalization of registration uploads.
+
+    The request only streams the raw files to disk and enqueues a job. The
+    worker then, per image: decodes it (rejecting anything that is not an
+    image), applies and drops EXIF (OpenCV honours the orientation tag on
+    decode and writes none on encode), bounds the longest side and
+    recompresses to JPEG. For the face capture it also builds the thumbnail and
+    the face descriptor. PDFs are only checked for a PDF header.
+
+    `on_done(user_id, result)` is called from the worker thread with
+    {'status': 'ready'|'invalid', 'id_proof_path', 'face_image_path',
+    'face_embedding'}; paths are only present when they changed. If processing
+    (or `on_done`) raises, `on_failed(user_id, error)` is called instead.
+    """
+
+    def __init__(
+        self,
+        on_done: Callable[[int, Dict[str, Any]], None],
+        *,
+        on_failed: Optional[Callable[[int, Exception], None]] = None,
+        thumb_dir: Optional[str] = None,
+        thumb_size: int = 96,
+        id_proof_max_side: int = 1600,
+        face_max_side: int = 640,
+        jpeg_quality: int = 85,
+        max_queue: int = 5000,
+    ) -> None:
+        self.on_done = on_done
+        self.on_failed = on_failed
+        self.thumb_dir = thumb_dir
+        self.thumb_size = thumb_size
+        self.id_proof_max_side = id_proof_max_side
+        self.face_max_side = face_max_side
+        self.jpeg_quality = jpeg_quality
+
+        self._queue: Queue = Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._cascade = None
+
+        self.stats = {'processed': 0, 'invalid': 0, 'dropped': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def submit(self, user_id: int, id_proof_path: Optional[str], face_image_path: Optional[str]) -> bool:
+        self._start()
+        try:
+            self._queue.put_nowait((int(user_id), id_proof_path, face_image_path))
+            return True
+        except Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def _start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='upload-normalizer', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            try:
+                user_id, id_proof_path, face_image_path = self._queue.get(timeout=1.0)
+            except Empty:
+                continue
+            try:
+                result = self.process(id_proof_path, face_image_path)
+                self.on_done(user_id, result)
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"Upload Normalize Error: {e}")
+                if self.on_failed is not None:
+                    try:
+                        self.on_failed(user_id, e)
+                    except Exception as ex:
+                        print(f"Upload Normalize Error: {ex}")
+            finally:
+                self._queue.task_done()
+
+    # --- Processing ---
+
+    def process(self, id_proof_path: Optional[str], face_image_path: Optional[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'status': 'ready'}
+
+        if id_proof_path:
+            if id_proof_path.lower().endswith('.pdf'):
+                with open(id_proof_path, 'rb') as f:
+                    if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                        result['status'] = 'invalid'
+            else:
+                out = self._normalize_image(id_proof_path, self.id_proof_max_side)
+                if out is None:
+                    result['status'] = 'invalid'
+                elif out[0] != id_proof_path:
+                    result['id_proof_path'] = out[0]
+
+        if face_image_path:
+            out = self._normalize_image(face_image_path, self.face_max_side)
+            if out is None:
+                result['status'] = 'invalid'
+            else:
+                path, img = out
+                if path != face_image_path:
+                    result['face_image_path'] = path
+                result['face_embedding'] = self.face_embedding(img)
+                if self.thumb_dir:
+                    from file_serving import ensure_thumbnail
+                    ensure_thumbnail(path, self.thumb_dir, self.thumb_size)
+
+        self.stats['processed'] += 1
+        if result['status'] == 'invalid':
+            self.stats['invalid'] += 1
+        return result
+
+    def _normalize_image(self, path: str, max_side: int):
+        """Rewrite `path` as a bounded, EXIF-free JPEG; returns (new_path, image) or None if undecodable."""
+        import cv2  # type: ignore
+        import numpy as np  # type: ignore
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        img = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+
+        h, w = img.shape[:2]
+        scale = max_side / float(max(h, w))
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            return None
+        data = buf.tobytes()
+
+        out_path = os.path.splitext(path)[0] + '.jpg'
+        tmp = out_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, out_path)
+        if out_path != path:
+            os.remove(path)
+
+        self.stats['bytes_in'] += len(raw)
+        self.stats['bytes_out'] += len(data)
+        return out_path, img
+
+    def face_embedding(self, img) -> Optional[bytes]:
+        """Descriptor of the largest detected face, or None if no face is found."""
+        import cv2  # type: ignore
+        import numpy as np  # type: ignore
+
+        if self._cascade is None:
+            self._cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        faces = self._cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+        if len(faces) == 0:
+            return None
+        x, y, w, h = max(faces, key=lambda r: r[2] * r[3])
+        crop = cv2.resize(cv2.equalizeHist(gray[y:y + h, x:x + w]), (EMBED_SIZE, EMBED_SIZE), interpolation=cv2.INTER_AREA)
+        vec = crop.astype(np.float32).ravel()
+        vec -= vec.mean()
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return None
+        return (vec / norm).astype(np.float16).tobytes()